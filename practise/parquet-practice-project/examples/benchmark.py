@@ -9,9 +9,19 @@ Parquet 性能基准测试
 import os
 import sys
 import time
+import json
+import shutil
+import argparse
+import itertools
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import matplotlib.pyplot as plt
-from typing import List, Dict, Any
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
 
 # 添加项目根目录到 Python 路径
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -20,23 +30,247 @@ sys.path.insert(0, os.path.join(project_root, 'src'))
 from parquet_practice import (
     DataGenerator, 
     ParquetCompressionExercise,
+    ParquetQueryOptimizationExercise,
     PerformanceAnalyzer
 )
+from parquet_practice.utils import CACHE_MODES, USER_SCHEMA
+from parquet_practice.row_group_index import RowGroupIndex
+from parquet_practice.bloom_filter import BloomFilterIndex, bloom_filter_write_options, DEFAULT_FPP
+from parquet_practice.page_index import PageIndex, page_index_write_options
+from parquet_practice.manifest import DatasetManifest
+from parquet_practice.metadata_cache import MetadataCache
+from parquet_practice.column_cache import ColumnChunkCache, CACHE_POLICIES
+from parquet_practice.result_cache import QueryResultCache, canonicalize_filters
+from parquet_practice.filter_compiler import compile_filters
+from parquet_practice.partitioning_exercise import hive_partitioning
+from parquet_practice.pandas_conversion import PANDAS_PROFILES, read_pandas
+from parquet_practice.read_modes import READ_MODES, read_table, ensure_hot_tier
+from parquet_practice import remote_io
+from parquet_practice.remote_io import compare_io_settings
+from parquet_practice.scanner import SCAN_SETTINGS, scan_table
+
+# 基准矩阵的维度及默认取值，矩阵为各维度取值的笛卡尔积（rows 最外层，read_path 最内层）
+# None 表示使用 pyarrow 的默认值
+DEFAULT_MATRIX_AXES = {
+    'rows': [100_000, 1_000_000],
+    'codec': ['snappy', 'zstd', 'none'],
+    'compression_level': [None],
+    'row_group_size': [None],
+    'data_page_size': [None],
+    'use_dictionary': [True],
+    'read_path': ['read_table', 'to_pandas', 'projection']
+}
+
+# 基准矩阵的运行设置
+DEFAULT_MATRIX_SETTINGS = {
+    'warmup': 1,
+    'repeat': 3,
+    'write_repeat': 1,
+    'cache_mode': 'warm'
+}
+
+# 决定写入文件的维度，相同写入配置的单元共享一个文件
+_MATRIX_WRITE_AXES = ['rows', 'codec', 'compression_level', 'row_group_size', 'data_page_size', 'use_dictionary']
+
+# pyarrow 默认的行组最大行数
+_DEFAULT_ROW_GROUP_ROWS = 1024 * 1024
+
+# 大量分区文件测试的分区列：City 和 Shard（UserID 的范围分桶）
+SHARDED_PARTITION_COLS = ['City', 'Shard']
+
+# 基准矩阵支持的读取路径
+MATRIX_READ_PATHS = {
+    'read_table': lambda path: pq.read_table(path),
+    'to_pandas': lambda path: pq.read_table(path).to_pandas(),
+    'projection': lambda path: pq.read_table(path, columns=['UserID', 'Age', 'Income']),
+    'filter': lambda path: pq.read_table(path, filters=[('Age', '>=', 60)]),
+    'iter_batches': lambda path: sum(batch.num_rows for batch in pq.ParquetFile(path).iter_batches())
+}
+
+
+def _supports_compression_level(codec: str) -> bool:
+    """判断 Parquet 编解码器是否支持压缩级别"""
+    return codec.lower() != 'none' and pa.Codec.supports_compression_level(codec)
+
+
+def expand_matrix(axes: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    展开基准矩阵
+    
+    不支持压缩级别的编解码器（snappy、none）只保留 compression_level 为 None 的单元。
+    
+    Args:
+        axes: 各维度的取值列表，缺少的维度使用 DEFAULT_MATRIX_AXES
+        
+    Returns:
+        单元参数字典列表，相同写入配置的单元相邻
+    """
+    unknown = set(axes) - set(DEFAULT_MATRIX_AXES)
+    if unknown:
+        raise ValueError(f"未知的矩阵维度: {sorted(unknown)}")
+    unknown_paths = set(axes.get('read_path', [])) - set(MATRIX_READ_PATHS)
+    if unknown_paths:
+        raise ValueError(f"未知的读取路径: {sorted(unknown_paths)}")
+    
+    axes = {**DEFAULT_MATRIX_AXES, **axes}
+    names = list(DEFAULT_MATRIX_AXES)
+    cells = []
+    seen = set()
+    for values in itertools.product(*(axes[name] for name in names)):
+        cell = dict(zip(names, values))
+        if not _supports_compression_level(cell['codec']):
+            cell['compression_level'] = None
+        cell_id = matrix_cell_id(cell)
+        if cell_id not in seen:
+            seen.add(cell_id)
+            cells.append(cell)
+    return cells
+
+
+def matrix_cell_id(cell: Dict[str, Any], axes: Optional[List[str]] = None,
+                   settings: Optional[Dict[str, Any]] = None) -> str:
+    """
+    生成单元的唯一标识，用于断点续跑
+    
+    传入 settings 时标识中包含运行设置（warmup、repeat 等），
+    在其他设置下测量的单元不会被当作已完成。
+    """
+    parts = [f"{name}={cell[name]}" for name in (axes or DEFAULT_MATRIX_AXES)]
+    if settings is not None:
+        parts += [f"{name}={settings[name]}" for name in DEFAULT_MATRIX_SETTINGS]
+    return '|'.join(parts)
+
+
+def _rewrite_parquet(source: str, target: str, cell: Dict[str, Any]) -> None:
+    """按单元的写入配置把源文件重新编码为目标文件"""
+    row_group_size = cell['row_group_size'] or _DEFAULT_ROW_GROUP_ROWS
+    source_file = pq.ParquetFile(source)
+    with pq.ParquetWriter(target, source_file.schema_arrow,
+                          compression=cell['codec'],
+                          compression_level=cell['compression_level'],
+                          data_page_size=cell['data_page_size'],
+                          use_dictionary=cell['use_dictionary']) as writer:
+        for batch in source_file.iter_batches(batch_size=row_group_size):
+            writer.write_batch(batch, row_group_size=row_group_size)
+
+
+def _load_matrix_records(results_file: str) -> List[Dict[str, Any]]:
+    """读取基准矩阵的 JSONL 结果，跳过中断写入造成的不完整行"""
+    if not os.path.exists(results_file):
+        return []
+    records = []
+    with open(results_file, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def _truncate_partial_line(results_file: str) -> None:
+    """截掉中断写入留下的不完整末行，避免后续追加的记录与其拼接"""
+    if not os.path.exists(results_file):
+        return
+    with open(results_file, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+def load_matrix_results(results_file: str, cell_ids: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    将基准矩阵的 JSONL 结果整理为整洁的表格（每个单元一行，每个变量一列）
+    
+    Args:
+        results_file: run_matrix 写入的 JSONL 文件
+        cell_ids: 只保留这些单元（matrix_cell_id(cell, settings=...)），默认保留文件中的所有记录
+        
+    Returns:
+        结果 DataFrame
+    """
+    rows = []
+    for record in _load_matrix_records(results_file):
+        if cell_ids is not None and record['cell_id'] not in cell_ids:
+            continue
+        row = {name: record[name] for name in DEFAULT_MATRIX_AXES}
+        row.update({name: record.get(name) for name in DEFAULT_MATRIX_SETTINGS})
+        row['file_size_mb'] = record['file_size_mb']
+        row['num_row_groups'] = record['num_row_groups']
+        for prefix in ('write', 'read', 'cold_read'):
+            stats = record.get(f'{prefix}_stats')
+            if stats is None:
+                continue
+            for field in ('median', 'min', 'p95', 'ci_low', 'ci_high'):
+                row[f'{prefix}_{field}_s'] = stats[field]
+            row[f'{prefix}_repeat'] = stats['repeat']
+        main_read = row.get('read_median_s', row.get('cold_read_median_s'))
+        row['read_mb_per_s'] = row['file_size_mb'] / main_read if main_read else None
+        row['read_rows_per_s'] = row['rows'] / main_read if main_read else None
+        row['timestamp'] = record['timestamp']
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _scatter_user_ids(batch: pa.RecordBatch, total_records: int, stride: int) -> pa.RecordBatch:
+    """
+    把 UserID（及对应的 Username）按 (id - 1) * stride mod N 打散到 [1, N]
+
+    stride 与 N 互质时这是一个置换，每个 ID 仍恰好出现一次，
+    但每个行组中的 ID 分布在整个取值范围内，min/max 统计信息无法排除行组。
+    """
+    user_ids = (batch.column(0).to_numpy() - 1) * stride % total_records + 1
+    usernames = pc.binary_join_element_wise(
+        'User_', pc.utf8_lpad(pc.cast(pa.array(user_ids), pa.string()), 6, '0'), ''
+    )
+    return pa.RecordBatch.from_arrays([pa.array(user_ids), usernames, *batch.columns[2:]],
+                                      schema=batch.schema)
+
+
+def legacy_generate_user_data(num_records: int, cities: List[str], seed: int = 42) -> pd.DataFrame:
+    """
+    逐行生成用户数据的参考实现（向量化之前的版本），仅用于对比生成速度
+    
+    Args:
+        num_records: 记录数量
+        cities: 城市列表
+        seed: 随机种子
+        
+    Returns:
+        包含用户数据的 DataFrame
+    """
+    np.random.seed(seed)
+    data = {
+        'UserID': range(1, num_records + 1),
+        'Username': [f'User_{i:06d}' for i in range(1, num_records + 1)],
+        'Age': np.random.randint(18, 80, num_records),
+        'City': np.random.choice(cities, num_records),
+        'RegisterTime': [
+            datetime.now() - timedelta(days=np.random.randint(0, 365))
+            for _ in range(num_records)
+        ],
+        'Income': np.random.normal(50000, 20000, num_records).round(2)
+    }
+    return pd.DataFrame(data)
 
 
 class ParquetBenchmark:
     """Parquet 性能基准测试"""
     
-    def __init__(self, output_dir: str = "benchmark_results"):
+    def __init__(self, output_dir: str = "benchmark_results", track_memory: bool = False,
+                 cache_mode: str = 'warm'):
         """
         初始化基准测试
         
         Args:
             output_dir: 输出目录
+            track_memory: 是否在计时统计中附带内存测量结果
+            cache_mode: 读取测试的缓存模式，'warm'、'cold'（每次读取前清除页缓存）或 'both'
         """
         self.output_dir = output_dir
+        self.cache_mode = cache_mode
         self.data_generator = DataGenerator()
-        self.performance_analyzer = PerformanceAnalyzer()
+        self.performance_analyzer = PerformanceAnalyzer(track_memory=track_memory)
         
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
@@ -66,7 +300,16 @@ class ParquetBenchmark:
             'csv_write_times': [],
             'csv_read_times': [],
             'parquet_sizes': [],
-            'csv_sizes': []
+            'csv_sizes': [],
+            'parquet_write_stats': [],
+            'parquet_read_stats': [],
+            'csv_write_stats': [],
+            'csv_read_stats': [],
+            # 冷缓存读取结果，cache_mode 为 cold/both 时填充
+            'parquet_cold_read_times': [],
+            'csv_cold_read_times': [],
+            'parquet_cold_read_stats': [],
+            'csv_cold_read_stats': []
         }
         
         for size in sizes:
@@ -81,28 +324,25 @@ class ParquetBenchmark:
             csv_file = os.path.join(self.output_dir, f"benchmark_{size}.csv")
             
             # 测试 Parquet 写入
-            start_time = time.time()
-            df.to_parquet(parquet_file, compression='snappy')
-            parquet_write_time = time.time() - start_time
-            results['parquet_write_times'].append(parquet_write_time)
+            _, stats = self.performance_analyzer.measure_stats(
+                df.to_parquet, parquet_file, compression='snappy'
+            )
+            results['parquet_write_times'].append(stats['median'])
+            results['parquet_write_stats'].append(stats)
             
             # 测试 CSV 写入
-            start_time = time.time()
-            df.to_csv(csv_file, index=False)
-            csv_write_time = time.time() - start_time
-            results['csv_write_times'].append(csv_write_time)
+            _, stats = self.performance_analyzer.measure_stats(df.to_csv, csv_file, index=False)
+            results['csv_write_times'].append(stats['median'])
+            results['csv_write_stats'].append(stats)
             
             # 测试 Parquet 读取
-            start_time = time.time()
-            pd.read_parquet(parquet_file)
-            parquet_read_time = time.time() - start_time
-            results['parquet_read_times'].append(parquet_read_time)
+            stats = self._measure_read(results, 'parquet', parquet_file, pd.read_parquet)
+            if 'memory' in stats:
+                print(f"  Parquet 读取内存峰值增量: RSS {stats['memory']['rss_peak_delta_mb']:.1f} MB, "
+                      f"Arrow {stats['memory']['arrow_peak_delta_mb']:.1f} MB")
             
             # 测试 CSV 读取
-            start_time = time.time()
-            pd.read_csv(csv_file)
-            csv_read_time = time.time() - start_time
-            results['csv_read_times'].append(csv_read_time)
+            self._measure_read(results, 'csv', csv_file, pd.read_csv)
             
             # 文件大小
             parquet_size = self.performance_analyzer.get_file_size(parquet_file)
@@ -116,6 +356,30 @@ class ParquetBenchmark:
         
         return results
     
+    def _measure_read(self, results: Dict[str, Any], prefix: str, filename: str, read_func) -> Dict[str, Any]:
+        """
+        按 cache_mode 测量一次读取并把结果追加到 results
+        
+        Args:
+            results: benchmark_data_sizes 的结果字典
+            prefix: 结果键前缀（parquet 或 csv）
+            filename: 被读取的文件
+            read_func: 读取函数
+            
+        Returns:
+            主要统计信息（测了热缓存时为热缓存统计，否则为冷缓存统计）
+        """
+        _, cache_stats = self.performance_analyzer.measure_cache_stats(
+            filename, read_func, filename, cache_mode=self.cache_mode
+        )
+        if 'cold' in cache_stats:
+            results[f'{prefix}_cold_read_times'].append(cache_stats['cold']['median'])
+            results[f'{prefix}_cold_read_stats'].append(cache_stats['cold'])
+        stats = cache_stats.get('warm', cache_stats.get('cold'))
+        results[f'{prefix}_read_times'].append(stats['median'])
+        results[f'{prefix}_read_stats'].append(stats)
+        return stats
+    
     def benchmark_compression_algorithms(self, num_records: int = 10000) -> Dict[str, Any]:
         """
         测试不同压缩算法的性能
@@ -129,10 +393,10 @@ class ParquetBenchmark:
         print(f"🗜️ 测试不同压缩算法的性能 ({num_records:,} 条记录)...")
         
         # 生成数据
-        data = self.data_generator.generate_user_data(num_records)
+        data = self.data_generator.generate_user_table(num_records)
         
         # 创建压缩练习实例
-        exercise = ParquetCompressionExercise(data, self.output_dir)
+        exercise = ParquetCompressionExercise(data, self.output_dir, cache_mode=self.cache_mode)
         
         # 运行压缩测试
         results = exercise.run_compression_exercise()
@@ -142,6 +406,1118 @@ class ParquetBenchmark:
         
         return results
     
+    def benchmark_data_generation(self, sizes: List[int] = None,
+                                  include_legacy: bool = True) -> Dict[str, Any]:
+        """
+        测试数据生成速度（向量化实现 vs 逐行参考实现）
+        
+        Args:
+            sizes: 数据量列表，默认 100 万和 1000 万行
+            include_legacy: 是否同时运行逐行参考实现（大数据量下耗时数分钟）
+            
+        Returns:
+            测试结果
+        """
+        if sizes is None:
+            sizes = [1_000_000, 10_000_000]
+        
+        print("⚙️ 测试数据生成速度...")
+        
+        results = {
+            'sizes': sizes,
+            'vectorized_times': [],
+            'legacy_times': [],
+            'speedups': []
+        }
+        
+        for size in sizes:
+            print(f"  生成 {size:,} 条记录...")
+            
+            generator = DataGenerator(seed=42)
+            start_time = time.perf_counter()
+            generator.generate_user_data(size)
+            vectorized_time = time.perf_counter() - start_time
+            results['vectorized_times'].append(vectorized_time)
+            
+            if include_legacy:
+                start_time = time.perf_counter()
+                legacy_generate_user_data(size, generator.cities, seed=42)
+                legacy_time = time.perf_counter() - start_time
+                speedup = legacy_time / vectorized_time if vectorized_time > 0 else 0
+                results['legacy_times'].append(legacy_time)
+                results['speedups'].append(speedup)
+                print(f"    向量化: {vectorized_time:.2f} 秒, 逐行: {legacy_time:.2f} 秒, 提升: {speedup:.1f}x")
+            else:
+                print(f"    向量化: {vectorized_time:.2f} 秒")
+        
+        return results
+    
+    def benchmark_streaming_write(self, total_records: int = 10_000_000,
+                                  batch_size: int = 1_000_000) -> Dict[str, Any]:
+        """
+        测试流式生成并写入大文件（内存占用只与批次大小有关）
+        
+        Args:
+            total_records: 总记录数
+            batch_size: 每个批次的记录数
+            
+        Returns:
+            测试结果
+        """
+        print(f"🌊 流式写入 {total_records:,} 条记录 (批次大小: {batch_size:,})...")
+        
+        parquet_file = os.path.join(self.output_dir, f"streaming_{total_records}.parquet")
+        
+        start_time = time.perf_counter()
+        batches = self.data_generator.write_user_parquet(parquet_file, total_records, batch_size)
+        write_time = time.perf_counter() - start_time
+        
+        file_size = self.performance_analyzer.get_file_size(parquet_file)
+        rows_per_second = total_records / write_time if write_time > 0 else 0
+        
+        print(f"  写入时间: {write_time:.2f} 秒, {batches} 个批次")
+        print(f"  文件大小: {file_size:.2f} MB, 吞吐: {rows_per_second:,.0f} 行/秒")
+        
+        os.remove(parquet_file)
+        
+        return {
+            'total_records': total_records,
+            'batch_size': batch_size,
+            'batches': batches,
+            'write_time': write_time,
+            'file_size': file_size,
+            'rows_per_second': rows_per_second
+        }
+    
+    def benchmark_parallel_generation(self, total_records: int = 10_000_000,
+                                      worker_counts: List[int] = None,
+                                      rows_per_shard: int = 1_000_000) -> Dict[str, Any]:
+        """
+        测试多进程并行生成分片文件的扩展性
+        
+        Args:
+            total_records: 总记录数
+            worker_counts: 工作进程数列表，默认 1 到 CPU 核数之间按倍数递增
+            rows_per_shard: 每个分片的行数
+            
+        Returns:
+            测试结果
+        """
+        if worker_counts is None:
+            cpu_count = os.cpu_count() or 1
+            worker_counts = sorted({1, *[2 ** i for i in range(1, cpu_count.bit_length())], cpu_count})
+        
+        print(f"🧵 测试并行数据生成 ({total_records:,} 条记录, 进程数: {worker_counts})...")
+        
+        results = {
+            'total_records': total_records,
+            'worker_counts': worker_counts,
+            'times': [],
+            'speedups': []
+        }
+        
+        for num_workers in worker_counts:
+            shard_dir = os.path.join(self.output_dir, f"parallel_{num_workers}")
+            
+            start_time = time.perf_counter()
+            files = self.data_generator.write_user_parquet_parallel(
+                shard_dir, total_records, num_workers=num_workers, rows_per_shard=rows_per_shard
+            )
+            elapsed = time.perf_counter() - start_time
+            
+            speedup = results['times'][0] / elapsed if results['times'] and elapsed > 0 else 1.0
+            results['times'].append(elapsed)
+            results['speedups'].append(speedup)
+            print(f"  {num_workers} 个进程: {elapsed:.2f} 秒, {len(files)} 个分片, 加速比 {speedup:.2f}x")
+            
+            for file in files:
+                os.remove(file)
+            os.rmdir(shard_dir)
+        
+        return results
+    
+    def benchmark_clustering(self, num_records: int = 1_000_000,
+                             cluster_by: List[str] = None) -> Dict[str, Any]:
+        """
+        测试数据聚集（排序、Z-order、Hilbert）对各过滤场景剪枝字节数和延迟的影响
+        
+        Args:
+            num_records: 记录数量
+            cluster_by: 聚集键，默认 Age 和 City
+            
+        Returns:
+            测试结果，{聚集方式: {场景: 结果}}
+        """
+        print(f"🧲 测试数据聚集对谓词下推的影响 ({num_records:,} 条记录)...")
+        
+        data = self.data_generator.generate_user_table(num_records)
+        exercise = ParquetQueryOptimizationExercise(data, self.output_dir)
+        results = exercise.test_clustering_effect(cluster_by)
+        exercise.cleanup()
+        
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'clustering_results.json')
+        )
+        return results
+    
+    def benchmark_point_lookup(self, num_records: int = 50_000_000, batch_size: int = 1_000_000,
+                               num_lookups: int = 10, fpp: float = DEFAULT_FPP) -> Dict[str, Any]:
+        """
+        测试 Bloom 过滤器对大文件点查询延迟的影响
+        
+        流式写入 UserID 和 Username 被打散的文件（每个批次一个行组，
+        两列都写入 Bloom 过滤器），然后对随机的命中和未命中值分别测量：
+        pyarrow 过滤、行组统计索引剪枝、统计索引 + Bloom 过滤器剪枝。
+        
+        Args:
+            num_records: 记录数量
+            batch_size: 每个批次（行组）的记录数
+            num_lookups: 命中和未命中查询各自的次数
+            fpp: Bloom 过滤器误判率
+        
+        Returns:
+            测试结果
+        """
+        print(f"🔎 测试 Bloom 过滤器点查询 ({num_records:,} 条记录, 行组 {batch_size:,} 行)...")
+        
+        parquet_file = os.path.join(self.output_dir, f"point_lookup_{num_records}.parquet")
+        stride = 2_654_435_761
+        while np.gcd(stride, num_records) != 1:
+            stride += 2
+        
+        start_time = time.perf_counter()
+        write_options = bloom_filter_write_options(['UserID', 'Username'], ndv=batch_size, fpp=fpp)
+        batches = self.data_generator.iter_user_batches(num_records, batch_size)
+        first_batch = _scatter_user_ids(next(batches), num_records, stride)
+        with pq.ParquetWriter(parquet_file, first_batch.schema, **write_options) as writer:
+            writer.write_batch(first_batch)
+            for batch in batches:
+                writer.write_batch(_scatter_user_ids(batch, num_records, stride))
+        write_time = time.perf_counter() - start_time
+        
+        stats_index = RowGroupIndex.build(parquet_file)
+        bloom_index = BloomFilterIndex.open(parquet_file)
+        filter_bytes = sum(num_bytes for locations in bloom_index.filters.values()
+                           for _, num_bytes in filter(None, locations))
+        file_size = self.performance_analyzer.get_file_size(parquet_file)
+        print(f"  写入时间: {write_time:.2f} 秒, 文件大小: {file_size:.2f} MB, "
+              f"其中 Bloom 过滤器 {filter_bytes / 1024 / 1024:.2f} MB")
+        
+        # 命中查询使用随机的已有用户名，未命中的用户名落在已有值之间
+        rng = np.random.default_rng(0)
+        lookup_ids = rng.integers(1, num_records + 1, num_lookups)
+        lookups = {
+            'hit': [[('Username', '==', f'User_{user_id:06d}')] for user_id in lookup_ids],
+            'miss': [[('Username', '==', f'User_{user_id:06d}#')] for user_id in lookup_ids]
+        }
+        read_paths = {
+            'pyarrow': lambda filters: pq.read_table(parquet_file, filters=filters),
+            'stats_index': lambda filters: stats_index.read(filters)[0],
+            'bloom': lambda filters: bloom_index.read(filters, stats_index=stats_index)[0]
+        }
+        
+        results = {
+            'num_records': num_records,
+            'row_groups': stats_index.num_row_groups,
+            'write_time': write_time,
+            'file_size': file_size,
+            'filter_bytes': filter_bytes,
+            'fpp': fpp
+        }
+        for kind, queries in lookups.items():
+            bloom_row_groups = [len(bloom_index.select_row_groups(filters, stats_index.select_row_groups(filters)))
+                                for filters in queries]
+            results[f'{kind}_bloom_row_groups'] = float(np.mean(bloom_row_groups))
+            for path, read in read_paths.items():
+                _, stats = self.performance_analyzer.measure_each(lambda filters: read(filters).num_rows, queries)
+                results[f'{kind}_{path}_latency'] = stats['median']
+                results[f'{kind}_{path}_latency_stats'] = stats
+                print(f"  {kind:<4} {path:<12} {self.performance_analyzer.format_stats(stats)}")
+            print(f"  {kind:<4} Bloom 剪枝后平均读取 {results[f'{kind}_bloom_row_groups']:.2f}/{stats_index.num_row_groups} 个行组")
+        
+        os.remove(parquet_file)
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'point_lookup_results.json')
+        )
+        return results
+    
+    def benchmark_page_index(self, num_records: int = 10_000_000, batch_size: int = 1_000_000,
+                             max_rows_per_page: int = 20_000, num_lookups: int = 10) -> Dict[str, Any]:
+        """
+        测试页索引对大行组上选择性查询读取字节数和延迟的影响
+        
+        按 UserID 顺序流式写入文件（每个批次一个行组，开启 write_page_index，
+        只有 City 使用字典编码），然后对 UserID 点查询、0.1% 的 UserID 范围查询和
+        Username 点查询分别测量行组统计索引剪枝和页索引剪枝读取的字节数和延迟。
+        
+        Args:
+            num_records: 记录数量
+            batch_size: 每个批次（行组）的记录数
+            max_rows_per_page: 每个数据页的最大行数
+            num_lookups: 每类查询的次数
+        
+        Returns:
+            测试结果
+        """
+        print(f"📑 测试页索引剪枝 ({num_records:,} 条记录, 行组 {batch_size:,} 行, 数据页 {max_rows_per_page:,} 行)...")
+        
+        parquet_file = os.path.join(self.output_dir, f"page_index_{num_records}.parquet")
+        start_time = time.perf_counter()
+        batches = self.data_generator.iter_user_batches(num_records, batch_size)
+        first_batch = next(batches)
+        with pq.ParquetWriter(parquet_file, first_batch.schema, use_dictionary=['City'],
+                              **page_index_write_options(max_rows_per_page)) as writer:
+            writer.write_batch(first_batch)
+            for batch in batches:
+                writer.write_batch(batch)
+        write_time = time.perf_counter() - start_time
+        
+        stats_index = RowGroupIndex.build(parquet_file)
+        page_index = PageIndex(parquet_file)
+        file_size = self.performance_analyzer.get_file_size(parquet_file)
+        print(f"  写入时间: {write_time:.2f} 秒, 文件大小: {file_size:.2f} MB, "
+              f"页索引 {page_index.index_bytes / 1024:.1f} KB ({page_index.num_pages} 个数据页)")
+        
+        rng = np.random.default_rng(0)
+        lookup_ids = rng.integers(1, num_records + 1, num_lookups)
+        range_width = max(num_records // 1000, 1)
+        queries = {
+            'point': [[('UserID', '==', int(user_id))] for user_id in lookup_ids],
+            'range_0.1%': [[('UserID', '>=', int(user_id)), ('UserID', '<', int(user_id) + range_width)]
+                           for user_id in lookup_ids],
+            'username': [[('Username', '==', f'User_{user_id:06d}')] for user_id in lookup_ids]
+        }
+        read_paths = {
+            'stats_index': lambda filters: stats_index.read(filters),
+            'page_index': lambda filters: page_index.read(filters, stats_index=stats_index)
+        }
+        
+        results = {
+            'num_records': num_records,
+            'row_groups': stats_index.num_row_groups,
+            'max_rows_per_page': max_rows_per_page,
+            'write_time': write_time,
+            'file_size': file_size,
+            'index_bytes': page_index.index_bytes
+        }
+        for kind, query_list in queries.items():
+            for path, read in read_paths.items():
+                plans, stats = self.performance_analyzer.measure_each(lambda filters: read(filters)[1], query_list)
+                read_bytes = [plan['read_bytes'] for plan in plans]
+                results[f'{kind}_{path}_latency'] = stats['median']
+                results[f'{kind}_{path}_latency_stats'] = stats
+                results[f'{kind}_{path}_read_bytes'] = float(np.mean(read_bytes))
+                print(f"  {kind:<10} {path:<12} 平均读取 {np.mean(read_bytes) / 1024:>10.1f} KB, "
+                      f"{self.performance_analyzer.format_stats(stats)}")
+        
+        os.remove(parquet_file)
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'page_index_results.json')
+        )
+        return results
+    
+    def _write_sharded_dataset(self, name: str, num_fragments: int,
+                               rows_per_fragment: int) -> Tuple[str, pd.DataFrame, float]:
+        """
+        按 City 和 Shard（UserID 的范围分桶）两级分区写入约 num_fragments 个文件
+        
+        Args:
+            name: 数据集目录名前缀，目录为 output_dir 下的 {name}_{num_fragments}，已存在时先删除
+            num_fragments: 目标分区文件数
+            rows_per_fragment: 每个文件的平均行数
+        
+        Returns:
+            (数据集目录, 带 Shard 列的原始数据, 写入时间)
+        """
+        dataset_dir = os.path.join(self.output_dir, f"{name}_{num_fragments}")
+        if os.path.exists(dataset_dir):
+            shutil.rmtree(dataset_dir)
+        
+        data = self.data_generator.generate_user_data(num_fragments * rows_per_fragment)
+        num_shards = max(num_fragments // data['City'].nunique(), 1)
+        shards = (data['UserID'] - 1) * num_shards // len(data)
+        data['Shard'] = shards.map(lambda shard: f"{shard:05d}")
+        table = pa.Table.from_pandas(data.sort_values(SHARDED_PARTITION_COLS), preserve_index=False)
+        
+        start_time = time.perf_counter()
+        ds.write_dataset(table, dataset_dir, format='parquet',
+                         partitioning=hive_partitioning(SHARDED_PARTITION_COLS),
+                         max_partitions=num_fragments + num_shards)
+        return dataset_dir, data, time.perf_counter() - start_time
+    
+    def benchmark_manifest(self, num_fragments: int = 10_000, rows_per_fragment: int = 100) -> Dict[str, Any]:
+        """
+        测试数据集清单对大量分区文件的数据集构建和查询延迟的影响
+        
+        按 City 和 Shard（UserID 的范围分桶）两级分区写入约 num_fragments 个文件，对比：
+        列举目录构建数据集（ds.dataset）和从清单构建数据集，以及两种方式下
+        分区列点查询和非分区列（UserID）点查询的端到端延迟。
+        
+        Args:
+            num_fragments: 目标分区文件数
+            rows_per_fragment: 每个文件的平均行数
+        
+        Returns:
+            测试结果
+        """
+        print(f"🗂️ 测试数据集清单 ({num_fragments:,} 个分区文件, 每个约 {rows_per_fragment} 行)...")
+        
+        dataset_dir, data, write_time = self._write_sharded_dataset('manifest', num_fragments, rows_per_fragment)
+        
+        start_time = time.perf_counter()
+        manifest = DatasetManifest.build(dataset_dir, SHARDED_PARTITION_COLS)
+        manifest_path = manifest.save()
+        build_time = time.perf_counter() - start_time
+        print(f"  写入时间: {write_time:.2f} 秒, 文件数: {manifest.num_files:,}, "
+              f"清单构建: {build_time:.2f} 秒, 清单大小: {os.path.getsize(manifest_path) / 1024:.1f} KB")
+        
+        middle = data.iloc[len(data) // 2]
+        user_id = int(middle['UserID'])
+        partition_filter = (ds.field('City') == middle['City']) & (ds.field('Shard') == middle['Shard'])
+        open_paths = {
+            'listing': lambda: ds.dataset(dataset_dir, format='parquet',
+                                          partitioning=hive_partitioning(SHARDED_PARTITION_COLS)),
+            'manifest': lambda: DatasetManifest.load(dataset_dir).to_dataset()
+        }
+        queries = {
+            'open': {
+                'listing': open_paths['listing'],
+                'manifest': open_paths['manifest']
+            },
+            'partition_query': {
+                'listing': lambda: open_paths['listing']().to_table(filter=partition_filter),
+                'manifest': lambda: open_paths['manifest']().to_table(filter=partition_filter)
+            },
+            # 非分区列：列举目录时每个文件都要打开尾部检查统计信息，清单可以先按文件级统计信息排除
+            'user_id_query': {
+                'listing': lambda: open_paths['listing']().to_table(filter=ds.field('UserID') == user_id),
+                'manifest': lambda: DatasetManifest.load(dataset_dir).to_dataset(
+                    [('UserID', '==', user_id)]
+                ).to_table(filter=ds.field('UserID') == user_id)
+            }
+        }
+        
+        results = {
+            'num_fragments': manifest.num_files,
+            'rows_per_fragment': rows_per_fragment,
+            'write_time': write_time,
+            'manifest_build_time': build_time,
+            'manifest_size': os.path.getsize(manifest_path)
+        }
+        for query, paths in queries.items():
+            for path, run in paths.items():
+                _, stats = self.performance_analyzer.measure_stats(run)
+                results[f'{query}_{path}_time'] = stats['median']
+                results[f'{query}_{path}_time_stats'] = stats
+                print(f"  {query:<16} {path:<9} {self.performance_analyzer.format_stats(stats)}")
+            results[f'{query}_speedup'] = self.performance_analyzer.speedup(
+                results[f'{query}_listing_time'], results[f'{query}_manifest_time']
+            )
+            print(f"  {query:<16} 清单提升: {results[f'{query}_speedup']:.2f}x")
+        
+        shutil.rmtree(dataset_dir)
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'manifest_results.json')
+        )
+        return results
+    
+    def benchmark_metadata_cache(self, num_columns: int = 500, num_records: int = 100_000,
+                                 row_group_size: int = 10_000, num_queries: int = 200) -> Dict[str, Any]:
+        """
+        测试元数据缓存对宽表上大量小查询的影响
+        
+        写出一个 num_columns 列的整数宽表，随机生成 num_queries 个只读两列、
+        带一个过滤条件的小查询，分别用 pq.read_table 和 MetadataCache.read_table 执行。
+        
+        Args:
+            num_columns: 列数
+            num_records: 记录数量
+            row_group_size: 行组行数
+            num_queries: 查询次数
+        
+        Returns:
+            测试结果
+        """
+        print(f"🧾 测试元数据缓存 ({num_columns} 列 × {num_records:,} 行, {num_queries} 个小查询)...")
+        
+        rng = np.random.default_rng(0)
+        parquet_file = os.path.join(self.output_dir, f"wide_{num_columns}.parquet")
+        table = pa.table({f"c{i:04d}": rng.integers(0, 1000, num_records) for i in range(num_columns)})
+        pq.write_table(table, parquet_file, row_group_size=row_group_size)
+        footer_bytes = pq.read_metadata(parquet_file).serialized_size
+        print(f"  文件大小: {self.performance_analyzer.get_file_size(parquet_file):.2f} MB, "
+              f"元数据 {footer_bytes / 1024:.1f} KB")
+        
+        queries = []
+        for _ in range(num_queries):
+            projected = rng.choice(num_columns, 2, replace=False)
+            filter_column = int(rng.integers(num_columns))
+            queries.append({
+                'columns': [f"c{i:04d}" for i in projected],
+                'filters': [(f"c{filter_column:04d}", '<', int(rng.integers(1, 1000)))]
+            })
+        
+        cache = MetadataCache()
+        read_paths = {
+            'read_table': lambda query: pq.read_table(parquet_file, **query),
+            'metadata_cache': lambda query: cache.read_table(parquet_file, **query)
+        }
+        
+        results = {
+            'num_columns': num_columns,
+            'num_records': num_records,
+            'num_queries': num_queries,
+            'footer_bytes': footer_bytes
+        }
+        for path, read in read_paths.items():
+            # 缓存从空开始计时，不预热
+            _, stats = self.performance_analyzer.measure_each(lambda query: read(query).num_rows, queries, warmup=0)
+            total_time = sum(stats['samples'])
+            results[f'{path}_latency'] = stats['median']
+            results[f'{path}_total_time'] = total_time
+            results[f'{path}_latency_stats'] = stats
+            print(f"  {path:<15} 总耗时 {total_time:.3f} 秒, 单次 {self.performance_analyzer.format_stats(stats)}")
+        
+        results['speedup'] = self.performance_analyzer.speedup(
+            results['read_table_total_time'], results['metadata_cache_total_time']
+        )
+        results['cache_stats'] = cache.stats()
+        print(f"  缓存命中率: {results['cache_stats']['hit_rate']:.1%}, 性能提升: {results['speedup']:.2f}x")
+        
+        os.remove(parquet_file)
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'metadata_cache_results.json')
+        )
+        return results
+    
+    def benchmark_column_cache(self, num_records: int = 1_000_000, row_group_size: int = 100_000,
+                               num_queries: int = 300, scan_every: int = 10,
+                               budget_ratio: float = 1.25) -> Dict[str, Any]:
+        """
+        测试列块缓存对看板类重复查询吞吐量的影响
+        
+        查询流以只涉及热点列 City、Age、Income 的看板查询为主，每 scan_every 个查询穿插一次
+        读取其余冷列的全表扫描。缓存预算为热点列解码后大小的 budget_ratio 倍：
+        扫描会把 LRU 中的热点列块挤出，ARC 则把多次访问的热点列块保留在频繁访问列表中。
+        
+        Args:
+            num_records: 记录数量
+            row_group_size: 行组行数
+            num_queries: 查询次数
+            scan_every: 每隔多少个查询插入一次冷列扫描，0 表示不插入
+            budget_ratio: 缓存预算与热点列解码后大小之比
+        
+        Returns:
+            测试结果
+        """
+        print(f"📊 测试列块缓存 ({num_records:,} 行, {num_queries} 个查询, 每 {scan_every} 个查询一次扫描)...")
+        
+        parquet_file = os.path.join(self.output_dir, f"column_cache_{num_records}.parquet")
+        self.data_generator.write_user_parquet(parquet_file, num_records, batch_size=row_group_size)
+        
+        hot_columns = ['City', 'Age', 'Income']
+        cold_columns = [name for name in pq.read_schema(parquet_file).names if name not in hot_columns]
+        hot_bytes = pq.read_table(parquet_file, columns=hot_columns).nbytes
+        max_bytes = int(hot_bytes * budget_ratio)
+        print(f"  热点列解码后 {hot_bytes / 1024 / 1024:.1f} MB, 缓存预算 {max_bytes / 1024 / 1024:.1f} MB")
+        
+        dashboard = [
+            {'columns': ['City', 'Income'], 'filters': [('City', 'in', ['Beijing', 'Shanghai', 'Shenzhen'])]},
+            {'columns': ['Age', 'Income'], 'filters': [('Age', '>=', 25), ('Age', '<=', 45)]},
+            {'columns': hot_columns, 'filters': [('Income', '>', 60000)]}
+        ]
+        rng = np.random.default_rng(0)
+        queries = []
+        for i in range(num_queries):
+            if scan_every and i % scan_every == scan_every - 1:
+                queries.append(('scan', {'columns': cold_columns, 'filters': None}))
+            else:
+                queries.append(('dashboard', dashboard[int(rng.integers(len(dashboard)))]))
+        
+        caches = {policy: ColumnChunkCache(max_bytes, policy=policy) for policy in CACHE_POLICIES}
+        read_paths = {'read_table': lambda query: pq.read_table(parquet_file, **query)}
+        for policy, cache in caches.items():
+            read_paths[policy] = lambda query, cache=cache: cache.read_table(parquet_file, **query)
+        
+        results = {
+            'num_records': num_records,
+            'num_queries': num_queries,
+            'scan_every': scan_every,
+            'hot_bytes': hot_bytes,
+            'max_bytes': max_bytes
+        }
+        for path, read in read_paths.items():
+            # 缓存从空开始计时，不预热
+            _, query_stats = self.performance_analyzer.measure_each(
+                lambda query: read(query[1]).num_rows, queries, warmup=0
+            )
+            latencies = {'dashboard': [], 'scan': []}
+            for (kind, _), latency in zip(queries, query_stats['samples']):
+                latencies[kind].append(latency)
+            total_time = sum(query_stats['samples'])
+            stats = self.performance_analyzer.compute_stats(latencies['dashboard'])
+            results[path] = {
+                'total_time': total_time,
+                'qps': num_queries / total_time,
+                'dashboard_latency': stats['median'],
+                'dashboard_latency_stats': stats,
+                'dashboard_qps': len(latencies['dashboard']) / sum(latencies['dashboard'])
+            }
+            message = (f"  {path:<10} {results[path]['qps']:8.1f} 查询/秒, "
+                       f"看板查询 {self.performance_analyzer.format_stats(stats)}")
+            if path in caches:
+                results[path]['cache_stats'] = caches[path].stats()
+                message += f", 命中率 {results[path]['cache_stats']['hit_rate']:.1%}"
+            print(message)
+        
+        for policy in caches:
+            results[policy]['speedup'] = self.performance_analyzer.speedup(
+                results['read_table']['total_time'], results[policy]['total_time']
+            )
+            print(f"  {policy} 吞吐量提升: {results[policy]['speedup']:.2f}x")
+        
+        os.remove(parquet_file)
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'column_cache_results.json')
+        )
+        return results
+    
+    def benchmark_result_cache(self, num_records: int = 1_000_000, row_group_size: int = 100_000,
+                               num_queries: int = 300) -> Dict[str, Any]:
+        """
+        测试查询结果缓存对重复查询的影响
+        
+        查询流从五个查询模板中随机抽取，每次随机打乱条件顺序和 IN 列表顺序，
+        模拟不同看板面板以不同写法发出的等价查询；分别用 pq.read_table 和 QueryResultCache 执行。
+        
+        Args:
+            num_records: 记录数量
+            row_group_size: 行组行数
+            num_queries: 查询次数
+        
+        Returns:
+            测试结果
+        """
+        print(f"🗃️ 测试查询结果缓存 ({num_records:,} 行, {num_queries} 个查询)...")
+        
+        parquet_file = os.path.join(self.output_dir, f"result_cache_{num_records}.parquet")
+        self.data_generator.write_user_parquet(parquet_file, num_records, batch_size=row_group_size)
+        
+        templates = [
+            (['UserID', 'Username', 'Age', 'City'], [('Age', '>', 30), ('City', 'in', ['Beijing', 'Shanghai', 'Guangzhou'])]),
+            (['UserID', 'Username', 'Age', 'Income'], [('Age', '>=', 25), ('Age', '<=', 45)]),
+            (['UserID', 'Username', 'Age', 'City', 'Income'], [('Age', '>', 30), ('Income', '>', 60000)]),
+            (['UserID', 'Username', 'City', 'Income'], [('City', 'in', ['Beijing', 'Shanghai', 'Shenzhen'])]),
+            (['City', 'Income'], [('Income', '>', 90000), ('City', '=', 'Hangzhou')])
+        ]
+        rng = np.random.default_rng(0)
+        queries = []
+        for _ in range(num_queries):
+            columns, filters = templates[int(rng.integers(len(templates)))]
+            filters = [(column, op, list(rng.permutation(value)) if op == 'in' else value)
+                       for column, op, value in filters]
+            queries.append({'columns': columns, 'filters': [filters[i] for i in rng.permutation(len(filters))]})
+        
+        cache = QueryResultCache()
+        read_paths = {
+            'read_table': lambda query: pq.read_table(parquet_file, **query),
+            'result_cache': lambda query: cache.read_table(parquet_file, **query)
+        }
+        
+        results = {
+            'num_records': num_records,
+            'num_queries': num_queries,
+            'distinct_written_queries': len({repr(query) for query in queries}),
+            'distinct_canonical_queries': len({canonicalize_filters(query['filters']) for query in queries})
+        }
+        print(f"  写法不同的查询 {results['distinct_written_queries']} 种, "
+              f"规范化后 {results['distinct_canonical_queries']} 种")
+        for path, read in read_paths.items():
+            # 缓存从空开始计时，不预热
+            _, stats = self.performance_analyzer.measure_each(lambda query: read(query).num_rows, queries, warmup=0)
+            total_time = sum(stats['samples'])
+            results[f'{path}_total_time'] = total_time
+            results[f'{path}_qps'] = num_queries / total_time
+            results[f'{path}_latency_stats'] = stats
+            print(f"  {path:<13} {results[f'{path}_qps']:8.1f} 查询/秒, 单次 {self.performance_analyzer.format_stats(stats)}")
+        
+        results['speedup'] = self.performance_analyzer.speedup(
+            results['read_table_total_time'], results['result_cache_total_time']
+        )
+        results['cache_stats'] = cache.stats()
+        print(f"  缓存命中率: {results['cache_stats']['hit_rate']:.1%}, "
+              f"节省 {results['cache_stats']['saved_seconds']:.3f} 秒, 性能提升: {results['speedup']:.2f}x")
+        
+        os.remove(parquet_file)
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'result_cache_results.json')
+        )
+        return results
+    
+    def benchmark_arrow_pipeline(self, num_records: int = 1_000_000,
+                                 codecs: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        测试 Arrow 原生流水线去掉的 pandas 转换开销
+        
+        pandas 流水线是练习类迁移前的做法：生成 Arrow 表后转换为 DataFrame，每种压缩算法写入前
+        再用 pa.Table.from_pandas 转回 Arrow，读回后再 to_pandas；Arrow 流水线从生成到写入、
+        读取始终使用同一个 Arrow 表。两者的 Parquet 编解码完全相同，差异就是转换的时间和内存。
+        
+        Args:
+            num_records: 记录数量
+            codecs: 写入使用的压缩算法列表，默认 snappy、zstd
+        
+        Returns:
+            测试结果
+        """
+        codecs = codecs or ['snappy', 'zstd']
+        print(f"🏹 测试 Arrow 原生流水线 ({num_records:,} 条记录, {len(codecs)} 种压缩算法)...")
+        
+        files = {codec: os.path.join(self.output_dir, f"arrow_pipeline_{codec}.parquet") for codec in codecs}
+        
+        def pandas_pipeline():
+            df = self.data_generator.generate_user_table(num_records).to_pandas()
+            for codec, filename in files.items():
+                pq.write_table(pa.Table.from_pandas(df, preserve_index=False), filename, compression=codec)
+            return [pq.read_table(filename).to_pandas() for filename in files.values()]
+        
+        def arrow_pipeline():
+            table = self.data_generator.generate_user_table(num_records)
+            for codec, filename in files.items():
+                pq.write_table(table, filename, compression=codec)
+            return [pq.read_table(filename) for filename in files.values()]
+        
+        results = {'num_records': num_records, 'codecs': codecs}
+        for name, pipeline in (('pandas', pandas_pipeline), ('arrow', arrow_pipeline)):
+            _, stats = self.performance_analyzer.measure_stats(pipeline)
+            _, memory = self.performance_analyzer.measure_memory(pipeline)
+            results[f'{name}_stats'] = stats
+            results[f'{name}_memory'] = memory
+            print(f"  {name:<7} {self.performance_analyzer.format_stats(stats)}, "
+                  f"峰值 RSS 增量 {memory['rss_peak_delta_mb']:.1f} MB, "
+                  f"Arrow 峰值增量 {memory['arrow_peak_delta_mb']:.1f} MB")
+        
+        # 单独测量被去掉的转换步骤
+        table = self.data_generator.generate_user_table(num_records)
+        df, to_pandas_stats = self.performance_analyzer.measure_stats(table.to_pandas)
+        _, from_pandas_stats = self.performance_analyzer.measure_stats(
+            lambda: pa.Table.from_pandas(df, preserve_index=False)
+        )
+        results['to_pandas_stats'] = to_pandas_stats
+        results['from_pandas_stats'] = from_pandas_stats
+        results['removed_conversion_time'] = (
+            (1 + len(codecs)) * to_pandas_stats['median'] + len(codecs) * from_pandas_stats['median']
+        )
+        results['dataframe_mb'] = df.memory_usage(deep=True).sum() / 1024 / 1024
+        results['table_mb'] = table.nbytes / 1024 / 1024
+        results['saved_time'] = results['pandas_stats']['median'] - results['arrow_stats']['median']
+        results['saved_peak_rss_mb'] = (results['pandas_memory']['rss_peak_delta_mb']
+                                        - results['arrow_memory']['rss_peak_delta_mb'])
+        results['speedup'] = self.performance_analyzer.speedup(
+            results['pandas_stats']['median'], results['arrow_stats']['median']
+        )
+        print(f"  to_pandas: {self.performance_analyzer.format_stats(to_pandas_stats)}, "
+              f"from_pandas: {self.performance_analyzer.format_stats(from_pandas_stats)}")
+        print(f"  去掉的转换耗时约 {results['removed_conversion_time']:.3f} 秒, "
+              f"流水线节省 {results['saved_time']:.3f} 秒 ({results['speedup']:.2f}x), "
+              f"峰值 RSS 减少 {results['saved_peak_rss_mb']:.1f} MB")
+        print(f"  DataFrame {results['dataframe_mb']:.1f} MB, Arrow 表 {results['table_mb']:.1f} MB")
+        
+        for filename in files.values():
+            os.remove(filename)
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'arrow_pipeline_results.json')
+        )
+        return results
+    
+    def benchmark_pandas_profiles(self, num_records: int = 10_000_000, batch_size: int = 1_000_000,
+                                  num_copies: int = 3, profiles: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        测试不同 to_pandas 转换配置读取宽表的耗时和峰值内存
+        
+        用户数据的每个批次再追加 num_copies 份除 UserID 外各列的副本（列名加 _1、_2 后缀），
+        流式写成宽表后，对每种转换配置分别测量读取并转换为 DataFrame 的耗时、峰值内存
+        和得到的 DataFrame 大小；只读取 Arrow 表的 read_table 作为不转换的基线。
+        
+        Args:
+            num_records: 记录数量
+            batch_size: 每个批次（行组）的记录数
+            num_copies: 追加的列副本份数
+            profiles: 要测试的转换配置，默认 PANDAS_PROFILES 中的全部配置
+        
+        Returns:
+            测试结果
+        """
+        profiles = profiles or list(PANDAS_PROFILES)
+        parquet_file = os.path.join(self.output_dir, f"pandas_profiles_{num_records}.parquet")
+        
+        copied = [field for field in USER_SCHEMA if field.name != 'UserID']
+        schema = pa.schema(list(USER_SCHEMA) + [
+            pa.field(f"{field.name}_{copy}", field.type) for copy in range(1, num_copies + 1) for field in copied
+        ])
+        with pq.ParquetWriter(parquet_file, schema) as writer:
+            for batch in self.data_generator.iter_user_batches(num_records, batch_size):
+                arrays = batch.columns + [batch.column(field.name) for _ in range(num_copies) for field in copied]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        file_size = self.performance_analyzer.get_file_size(parquet_file)
+        print(f"🐼 测试 to_pandas 转换配置 ({num_records:,} 行 x {len(schema)} 列, 文件 {file_size:.1f} MB)...")
+        
+        read_paths = {'read_table': lambda: pq.read_table(parquet_file)}
+        for profile in profiles:
+            read_paths[profile] = lambda profile=profile: read_pandas(parquet_file, profile=profile)
+        
+        results = {'num_records': num_records, 'num_columns': len(schema), 'file_size_mb': file_size}
+        for name, read in read_paths.items():
+            _, stats = self.performance_analyzer.measure_stats(read)
+            data, memory = self.performance_analyzer.measure_memory(read)
+            if isinstance(data, pa.Table):
+                result_mb = data.nbytes / 1024 / 1024
+            else:
+                result_mb = data.memory_usage(deep=True).sum() / 1024 / 1024
+            del data
+            results[name] = {
+                'read_stats': stats,
+                'memory': memory,
+                'result_mb': result_mb
+            }
+            print(f"  {name:<23} {self.performance_analyzer.format_stats(stats)}, "
+                  f"峰值 RSS 增量 {memory['rss_peak_delta_mb']:8.1f} MB, "
+                  f"Arrow 峰值增量 {memory['arrow_peak_delta_mb']:8.1f} MB, 结果 {result_mb:8.1f} MB")
+        
+        default = results.get('default')
+        if default:
+            for profile in profiles:
+                if profile == 'default':
+                    continue
+                results[profile]['speedup'] = self.performance_analyzer.speedup(
+                    default['read_stats']['median'], results[profile]['read_stats']['median']
+                )
+                results[profile]['saved_peak_rss_mb'] = (default['memory']['rss_peak_delta_mb']
+                                                         - results[profile]['memory']['rss_peak_delta_mb'])
+        
+        os.remove(parquet_file)
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'pandas_profiles_results.json')
+        )
+        return results
+    
+    def benchmark_read_modes(self, num_records: int = 5_000_000, batch_size: int = 1_000_000,
+                             num_reads: int = 20) -> Dict[str, Any]:
+        """
+        测试缓冲读取、内存映射读取和 Arrow IPC 热数据层重复读取的延迟和内存
+        
+        每种读取模式分别执行全表读取和带投影、过滤的查询：先重复 num_reads 次测量延迟，
+        再测量同时持有 num_reads 个读取结果时的内存（模拟多个消费者读取同一份热数据）。
+        缓冲读取每次都分配新的 Arrow 内存；热数据层的结果引用同一份映射页面，内存不随读取次数增长。
+        
+        Args:
+            num_records: 记录数量
+            batch_size: 每个批次（行组）的记录数
+            num_reads: 重复读取次数
+        
+        Returns:
+            测试结果，{读取模式: {场景: 结果}}
+        """
+        parquet_file = os.path.join(self.output_dir, f"read_modes_{num_records}.parquet")
+        self.data_generator.write_user_parquet(parquet_file, num_records, batch_size=batch_size)
+        hot_tier = ensure_hot_tier(parquet_file)
+        print(f"🗺️ 测试读取模式 ({num_records:,} 条记录, 重复 {num_reads} 次, "
+              f"Parquet {self.performance_analyzer.get_file_size(parquet_file):.1f} MB, "
+              f"IPC {self.performance_analyzer.get_file_size(hot_tier):.1f} MB)...")
+        
+        scenarios = {
+            'full': {},
+            'query': {'columns': ['UserID', 'Age', 'City', 'Income'],
+                      'filters': [('Age', '>', 30), ('City', 'in', ['Beijing', 'Shanghai', 'Guangzhou'])]}
+        }
+        results = {'num_records': num_records, 'num_reads': num_reads}
+        for mode in READ_MODES:
+            results[mode] = {}
+            for scenario, query in scenarios.items():
+                def read():
+                    return read_table(parquet_file, mode=mode, **query)
+                
+                _, stats = self.performance_analyzer.measure_each(lambda _: read().num_rows, range(num_reads))
+                tables, memory = self.performance_analyzer.measure_memory(
+                    lambda: [read() for _ in range(num_reads)]
+                )
+                num_rows = tables[0].num_rows
+                del tables
+                results[mode][scenario] = {
+                    'latency_stats': stats,
+                    'memory': memory,
+                    'num_rows': num_rows
+                }
+                print(f"  {mode:<8} {scenario:<5} {self.performance_analyzer.format_stats(stats)}, "
+                      f"持有 {num_reads} 个结果: RSS 峰值增量 {memory['rss_peak_delta_mb']:8.1f} MB, "
+                      f"Arrow 分配 {memory['arrow_allocated_mb']:8.1f} MB")
+        
+        for mode in READ_MODES:
+            if mode == 'buffered':
+                continue
+            for scenario in scenarios:
+                results[mode][scenario]['speedup'] = self.performance_analyzer.speedup(
+                    results['buffered'][scenario]['latency_stats']['median'],
+                    results[mode][scenario]['latency_stats']['median']
+                )
+        print("  相对 buffered 的性能提升: " + ", ".join(
+            f"{mode} {scenario} {results[mode][scenario]['speedup']:.2f}x"
+            for mode in READ_MODES if mode != 'buffered' for scenario in scenarios
+        ))
+        
+        os.remove(parquet_file)
+        os.remove(hot_tier)
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'read_modes_results.json')
+        )
+        return results
+    
+    def benchmark_remote_io(self, num_records: int = 1_000_000, row_group_size: int = 100_000,
+                            latencies: Optional[List[float]] = None) -> Dict[str, Any]:
+        """
+        测试模拟远程存储上不同读取设置的请求数和延迟
+        
+        同一份数据分别写成单个文件和按 City 分区的数据集，在不同的请求延迟下对两种布局执行相同的
+        投影加过滤查询，对比 remote_io.IO_SETTINGS 中的读取设置（pre_buffer、范围合并、缓冲流）。
+        查询分两类：age_income 只过滤非分区列，city_age 带 City 条件，分区数据集可以按目录剪枝。
+        
+        Args:
+            num_records: 记录数量
+            row_group_size: 行组行数
+            latencies: 模拟的请求延迟列表（秒），默认 1、5、20 毫秒
+        
+        Returns:
+            测试结果，{延迟: {查询: {数据布局: {读取设置: 结果}}}}
+        """
+        latencies = latencies or [0.001, 0.005, 0.02]
+        print(f"🌐 测试模拟远程存储上的读取设置 ({num_records:,} 条记录, 行组 {row_group_size:,} 行)...")
+        
+        parquet_file = os.path.abspath(os.path.join(self.output_dir, f"remote_io_{num_records}.parquet"))
+        dataset_dir = os.path.abspath(os.path.join(self.output_dir, f"remote_io_{num_records}"))
+        self.data_generator.write_user_parquet(parquet_file, num_records, batch_size=row_group_size)
+        ds.write_dataset(pq.read_table(parquet_file), dataset_dir, format='parquet',
+                         partitioning=hive_partitioning(['City']), existing_data_behavior='delete_matching',
+                         max_rows_per_group=row_group_size)
+        
+        columns = ['UserID', 'Username', 'Age', 'Income']
+        queries = {
+            'age_income': [('Age', '>', 30), ('Income', '>', 60000)],
+            'city_age': [('City', 'in', ['Beijing', 'Shanghai', 'Guangzhou']), ('Age', '>', 30)]
+        }
+        
+        def query_file(filesystem, io_options, filters):
+            return remote_io.read_table(parquet_file, columns=columns, filters=filters,
+                                        filesystem=filesystem, **io_options)
+        
+        def query_dataset(filesystem, io_options, filters):
+            dataset = ds.dataset(dataset_dir, format=remote_io.parquet_format(**io_options), filesystem=filesystem,
+                                 partitioning=hive_partitioning(['City']))
+            return dataset.to_table(columns=columns, filter=compile_filters(filters))
+        
+        results = {'num_records': num_records, 'row_group_size': row_group_size}
+        for latency in latencies:
+            results[f'{latency * 1000:g}ms'] = latency_results = {}
+            for query_name, filters in queries.items():
+                latency_results[query_name] = {}
+                for layout, query in (('file', query_file), ('partitioned', query_dataset)):
+                    print(f"\n  请求延迟 {latency * 1000:g} 毫秒, {query_name}, {layout}:")
+                    latency_results[query_name][layout] = compare_io_settings(
+                        lambda filesystem, io_options: query(filesystem, io_options, filters),
+                        self.performance_analyzer, latency=latency
+                    )
+        
+        os.remove(parquet_file)
+        shutil.rmtree(dataset_dir)
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'remote_io_results.json')
+        )
+        return results
+    
+    def benchmark_scan_scaling(self, num_fragments: int = 2000, rows_per_fragment: int = 500,
+                               cpu_counts: List[int] = None, io_thread_count: Optional[int] = None,
+                               settings: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        测试大量小分片的数据集全表扫描随 CPU 线程数的扩展性
+        
+        按 City 和 Shard 两级分区写入约 num_fragments 个文件（见 _write_sharded_dataset），
+        先用 pq.ParquetDataset(...).read() 作为基线，再对每种扫描设置（fragment_readahead、
+        batch_readahead 等）在每个 CPU 线程数下扫描全表。数据集只构建一次，计时不含列举目录。
+        
+        Args:
+            num_fragments: 目标分区文件数
+            rows_per_fragment: 每个文件的平均行数
+            cpu_counts: CPU 线程数列表，默认 1 到 CPU 核数之间按倍数递增
+            io_thread_count: 扫描期间的 I/O 线程数，默认不修改（pyarrow 默认 8）
+            settings: {名称: 扫描设置}，默认为 scanner.SCAN_SETTINGS
+        
+        Returns:
+            测试结果
+        """
+        if cpu_counts is None:
+            cpu_count = os.cpu_count() or 1
+            cpu_counts = sorted({1, *[2 ** i for i in range(1, cpu_count.bit_length())], cpu_count})
+        settings = settings or SCAN_SETTINGS
+        print(f"🧵 测试全表扫描的扩展性 ({num_fragments:,} 个分区文件, 每个约 {rows_per_fragment} 行, "
+              f"CPU 线程数: {cpu_counts})...")
+        
+        dataset_dir, _, _ = self._write_sharded_dataset('scan_scaling', num_fragments, rows_per_fragment)
+        dataset = ds.dataset(dataset_dir, format='parquet', partitioning=hive_partitioning(SHARDED_PARTITION_COLS))
+        num_files = len(dataset.files)
+        
+        results = {
+            'num_fragments': num_files,
+            'rows_per_fragment': rows_per_fragment,
+            'cpu_counts': cpu_counts,
+            'io_thread_count': io_thread_count or pa.io_thread_count(),
+            'settings': {}
+        }
+        
+        _, baseline_stats = self.performance_analyzer.measure_stats(
+            lambda: pq.ParquetDataset(dataset_dir).read()
+        )
+        results['parquet_dataset_time'] = baseline_stats['median']
+        results['parquet_dataset_time_stats'] = baseline_stats
+        print(f"  {'ParquetDataset':<16}     {self.performance_analyzer.format_stats(baseline_stats)}")
+        
+        for name, scan_options in settings.items():
+            setting_results = {'times': [], 'speedups': [], 'time_stats': []}
+            for cpu_count in cpu_counts:
+                _, stats = self.performance_analyzer.measure_stats(
+                    scan_table, dataset, **scan_options, cpu_count=cpu_count, io_thread_count=io_thread_count
+                )
+                speedup = (self.performance_analyzer.speedup(setting_results['times'][0], stats['median'])
+                           if setting_results['times'] else 1.0)
+                setting_results['times'].append(stats['median'])
+                setting_results['speedups'].append(speedup)
+                setting_results['time_stats'].append(stats)
+                print(f"  {name:<16} {cpu_count:>3} 线程 {self.performance_analyzer.format_stats(stats)}, "
+                      f"加速比 {speedup:.2f}x, 相对 ParquetDataset "
+                      f"{self.performance_analyzer.speedup(baseline_stats['median'], stats['median']):.2f}x")
+            results['settings'][name] = setting_results
+        
+        shutil.rmtree(dataset_dir)
+        self.performance_analyzer.save_results(
+            results, os.path.join(self.output_dir, 'scan_scaling_results.json')
+        )
+        return results
+    
+    def run_matrix(self, spec: Optional[Dict[str, Any]] = None, resume: bool = True,
+                   keep_files: bool = False) -> pd.DataFrame:
+        """
+        运行声明式基准矩阵
+        
+        每个行数先流式生成一个未压缩的源文件，再按各写入配置重新编码（写入耗时不含数据生成），
+        最后对每个读取路径用重复计时测量读取。每个单元完成后立即追加到
+        matrix_results.jsonl，中断后重新运行会跳过已完成的单元。
+        
+        Args:
+            spec: 矩阵定义，{'axes': {维度: 取值列表}, 以及 DEFAULT_MATRIX_SETTINGS 中的设置}
+            resume: 是否跳过结果文件中已完成的单元；为 False 时清空已有结果
+            keep_files: 是否保留生成的源文件和单元文件
+            
+        Returns:
+            整洁的结果表格（见 load_matrix_results），同时保存为 CSV 和 Parquet
+        """
+        spec = spec or {}
+        settings = {**DEFAULT_MATRIX_SETTINGS, 'cache_mode': self.cache_mode,
+                    **{key: value for key, value in spec.items() if key != 'axes'}}
+        cells = expand_matrix(spec.get('axes', {}))
+        
+        read_analyzer = PerformanceAnalyzer(warmup=settings['warmup'], repeat=settings['repeat'],
+                                            record_history=False)
+        write_analyzer = PerformanceAnalyzer(warmup=0, repeat=settings['write_repeat'],
+                                             record_history=False)
+        
+        matrix_dir = os.path.join(self.output_dir, 'matrix')
+        os.makedirs(matrix_dir, exist_ok=True)
+        results_file = os.path.join(self.output_dir, 'matrix_results.jsonl')
+        if not resume and os.path.exists(results_file):
+            os.remove(results_file)
+        
+        _truncate_partial_line(results_file)
+        # 单元标识包含运行设置，不同设置的矩阵可以共用一个结果文件
+        cell_ids = [matrix_cell_id(cell, settings=settings) for cell in cells]
+        done = {record['cell_id'] for record in _load_matrix_records(results_file)}
+        pending = [cell for cell, cell_id in zip(cells, cell_ids) if cell_id not in done]
+        
+        print(f"🧮 基准矩阵: 共 {len(cells)} 个单元，已完成 {len(cells) - len(pending)} 个，"
+              f"待运行 {len(pending)} 个 (repeat={settings['repeat']}, cache_mode={settings['cache_mode']})")
+        
+        for rows, rows_cells in itertools.groupby(pending, key=lambda cell: cell['rows']):
+            source = os.path.join(matrix_dir, f"source_{rows}.parquet")
+            if not os.path.exists(source):
+                print(f"  生成 {rows:,} 行源数据...")
+                self.data_generator.write_user_parquet(source + '.tmp', rows,
+                                                       batch_size=min(rows, _DEFAULT_ROW_GROUP_ROWS),
+                                                       compression='none')
+                os.replace(source + '.tmp', source)
+            
+            for _, write_cells in itertools.groupby(
+                    rows_cells, key=lambda cell: matrix_cell_id(cell, _MATRIX_WRITE_AXES)):
+                write_cells = list(write_cells)
+                config = write_cells[0]
+                target = os.path.join(matrix_dir, matrix_cell_id(config, _MATRIX_WRITE_AXES)
+                                      .replace('|', '_').replace('=', '-') + '.parquet')
+                
+                _, write_stats = write_analyzer.measure_stats(_rewrite_parquet, source, target, config)
+                file_size = self.performance_analyzer.get_file_size(target)
+                num_row_groups = pq.ParquetFile(target).metadata.num_row_groups
+                
+                for cell in write_cells:
+                    _, cache_stats = read_analyzer.measure_cache_stats(
+                        target, MATRIX_READ_PATHS[cell['read_path']], target,
+                        cache_mode=settings['cache_mode']
+                    )
+                    record = {
+                        'cell_id': matrix_cell_id(cell, settings=settings),
+                        **cell,
+                        **{name: settings[name] for name in DEFAULT_MATRIX_SETTINGS},
+                        'file_size_mb': file_size,
+                        'num_row_groups': num_row_groups,
+                        'write_stats': write_stats,
+                        'read_stats': cache_stats.get('warm'),
+                        'cold_read_stats': cache_stats.get('cold'),
+                        'timestamp': datetime.now().isoformat(timespec='seconds')
+                    }
+                    with open(results_file, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                        f.flush()
+                        os.fsync(f.fileno())
+                    
+                    read_stats = cache_stats.get('warm', cache_stats.get('cold'))
+                    print(f"  {record['cell_id']}: 写入 {write_stats['median']:.3f} 秒, "
+                          f"读取 {read_stats['median']:.3f} 秒, {file_size:.1f} MB")
+                
+                if not keep_files:
+                    os.remove(target)
+            
+            if not keep_files:
+                os.remove(source)
+        
+        if not keep_files:
+            # 同时清理被中断的运行遗留的文件
+            shutil.rmtree(matrix_dir, ignore_errors=True)
+        
+        # 结果表只包含本次矩阵定义的单元，结果文件中其他矩阵或其他设置的记录不混入
+        table = load_matrix_results(results_file, cell_ids)
+        table.to_csv(os.path.join(self.output_dir, 'matrix_results.csv'), index=False)
+        table.to_parquet(os.path.join(self.output_dir, 'matrix_results.parquet'), index=False)
+        
+        # 写入历史记录，便于与之前的矩阵运行比较；所有单元都已完成时没有新的测量，不追加记录
+        if pending:
+            current = set(cell_ids)
+            self.performance_analyzer.save_results(
+                {record['cell_id']: {key: record[key] for key in ('write_stats', 'read_stats', 'cold_read_stats')
+                                     if record.get(key)}
+                 for record in _load_matrix_records(results_file) if record['cell_id'] in current},
+                os.path.join(self.output_dir, 'matrix_results.json')
+            )
+        else:
+            print("所有单元均已完成，未追加历史记录")
+        
+        print(f"📋 矩阵结果表已保存: {os.path.join(self.output_dir, 'matrix_results.csv')}")
+        return table
+    
     def plot_size_benchmark(self, results: Dict[str, Any]) -> None:
         """绘制数据量基准测试图表"""
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
@@ -199,6 +1575,9 @@ class ParquetBenchmark:
         
         # 1. 数据量基准测试
         size_results = self.benchmark_data_sizes()
+        self.performance_analyzer.save_results(
+            size_results, os.path.join(self.output_dir, 'size_benchmark_results.json')
+        )
         
         # 2. 压缩算法基准测试
         compression_results = self.benchmark_compression_algorithms()
@@ -237,6 +1616,18 @@ class ParquetBenchmark:
                 
                 f.write(f"| {size:,} | {parquet_write:.3f} | {csv_write:.3f} | {parquet_read:.3f} | {csv_read:.3f} | {speedup:.1f}x | {parquet_size:.2f} | {csv_size:.2f} | {compression_ratio:.1f}% |\n")
             
+            # 冷缓存读取结果
+            if size_results.get('parquet_cold_read_times'):
+                f.write("\n### 冷缓存读取（每次读取前清除页缓存）\n\n")
+                f.write("| 记录数量 | Parquet冷读(s) | Parquet热读(s) | CSV冷读(s) | CSV热读(s) |\n")
+                f.write("|---------|---------------|---------------|-----------|-----------|\n")
+                warm_measured = self.cache_mode == 'both'
+                for i, size in enumerate(size_results['sizes']):
+                    parquet_warm = f"{size_results['parquet_read_times'][i]:.3f}" if warm_measured else '-'
+                    csv_warm = f"{size_results['csv_read_times'][i]:.3f}" if warm_measured else '-'
+                    f.write(f"| {size:,} | {size_results['parquet_cold_read_times'][i]:.3f} | {parquet_warm} | "
+                            f"{size_results['csv_cold_read_times'][i]:.3f} | {csv_warm} |\n")
+            
             # 压缩算法测试结果
             f.write("\n## 压缩算法性能测试\n\n")
             if 'compression_results' in compression_results:
@@ -270,11 +1661,100 @@ class ParquetBenchmark:
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='Parquet 性能基准测试')
+    parser.add_argument('--suite', choices=['full', 'generation', 'streaming', 'parallel', 'matrix', 'clustering', 'bloom',
+                                            'page_index', 'manifest', 'metadata_cache', 'column_cache', 'result_cache', 'arrow_pipeline',
+                                            'pandas_profiles', 'read_modes', 'remote_io', 'scan_scaling'],
+                        default='full',
+                        help='要运行的基准测试（默认：full）')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        help='数据量列表（manifest 和 scan_scaling 测试中为分区文件数，metadata_cache 测试中为列数），覆盖该测试的默认值')
+    parser.add_argument('--batch-size', type=int, default=1_000_000,
+                        help='流式写入、Bloom 过滤器、页索引、转换配置和读取模式测试的批次（行组）大小（默认：1000000）')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        help='并行生成测试的工作进程数列表，scan_scaling 测试中为 CPU 线程数列表')
+    parser.add_argument('--no-legacy', action='store_true',
+                        help='数据生成测试中跳过逐行参考实现')
+    parser.add_argument('--output', '-o', default='benchmark_results',
+                        help='输出目录路径（默认：benchmark_results）')
+    parser.add_argument('--track-memory', action='store_true',
+                        help='额外测量每项操作的峰值 RSS、Arrow 内存池和 Python 分配')
+    parser.add_argument('--cache-mode', choices=CACHE_MODES, default='warm',
+                        help='读取测试的缓存模式：warm 热缓存，cold 每次读取前清除页缓存，both 两者都测（默认：warm）')
+    parser.add_argument('--cluster-by', nargs='+',
+                        help='聚集测试的聚集键（默认：Age City）')
+    parser.add_argument('--lookups', type=int, default=10,
+                        help='Bloom 过滤器测试中命中和未命中查询各自的次数，页索引测试中每类查询的次数（默认：10）')
+    parser.add_argument('--matrix', metavar='SPEC_JSON',
+                        help='基准矩阵定义文件（JSON，见 benchmark_matrix_overnight.json）')
+    parser.add_argument('--repeat', type=int,
+                        help='基准矩阵中每个读取的计时次数，覆盖矩阵定义')
+    parser.add_argument('--fresh', action='store_true',
+                        help='基准矩阵从头运行，丢弃已完成单元的结果')
+    parser.add_argument('--keep-files', action='store_true',
+                        help='保留基准矩阵生成的 Parquet 文件')
+    args = parser.parse_args()
+    
     # 创建基准测试实例
-    benchmark = ParquetBenchmark()
+    benchmark = ParquetBenchmark(args.output, track_memory=args.track_memory, cache_mode=args.cache_mode)
     
-    # 运行完整基准测试
-    benchmark.run_full_benchmark()
+    if args.suite == 'generation':
+        benchmark.benchmark_data_generation(args.sizes, include_legacy=not args.no_legacy)
+    elif args.suite == 'streaming':
+        for total_records in args.sizes or [10_000_000]:
+            benchmark.benchmark_streaming_write(total_records, args.batch_size)
+    elif args.suite == 'parallel':
+        for total_records in args.sizes or [10_000_000]:
+            benchmark.benchmark_parallel_generation(total_records, args.workers)
+    elif args.suite == 'clustering':
+        for num_records in args.sizes or [1_000_000]:
+            benchmark.benchmark_clustering(num_records, args.cluster_by)
+    elif args.suite == 'bloom':
+        for num_records in args.sizes or [50_000_000]:
+            benchmark.benchmark_point_lookup(num_records, args.batch_size, args.lookups)
+    elif args.suite == 'page_index':
+        for num_records in args.sizes or [10_000_000]:
+            benchmark.benchmark_page_index(num_records, args.batch_size, num_lookups=args.lookups)
+    elif args.suite == 'manifest':
+        for num_fragments in args.sizes or [10_000]:
+            benchmark.benchmark_manifest(num_fragments)
+    elif args.suite == 'metadata_cache':
+        for num_columns in args.sizes or [500]:
+            benchmark.benchmark_metadata_cache(num_columns)
+    elif args.suite == 'column_cache':
+        for num_records in args.sizes or [1_000_000]:
+            benchmark.benchmark_column_cache(num_records)
+    elif args.suite == 'result_cache':
+        for num_records in args.sizes or [1_000_000]:
+            benchmark.benchmark_result_cache(num_records)
+    elif args.suite == 'arrow_pipeline':
+        for num_records in args.sizes or [1_000_000]:
+            benchmark.benchmark_arrow_pipeline(num_records)
+    elif args.suite == 'pandas_profiles':
+        for num_records in args.sizes or [10_000_000]:
+            benchmark.benchmark_pandas_profiles(num_records, args.batch_size)
+    elif args.suite == 'read_modes':
+        for num_records in args.sizes or [5_000_000]:
+            benchmark.benchmark_read_modes(num_records, args.batch_size)
+    elif args.suite == 'remote_io':
+        for num_records in args.sizes or [1_000_000]:
+            benchmark.benchmark_remote_io(num_records)
+    elif args.suite == 'scan_scaling':
+        for num_fragments in args.sizes or [2000]:
+            benchmark.benchmark_scan_scaling(num_fragments, cpu_counts=args.workers)
+    elif args.suite == 'matrix':
+        spec = {}
+        if args.matrix:
+            with open(args.matrix, encoding='utf-8') as f:
+                spec = json.load(f)
+        if args.sizes:
+            spec.setdefault('axes', {})['rows'] = args.sizes
+        if args.repeat:
+            spec['repeat'] = args.repeat
+        benchmark.run_matrix(spec, resume=not args.fresh, keep_files=args.keep_files)
+    else:
+        # 运行完整基准测试
+        benchmark.run_full_benchmark()
 
 
 if __name__ == '__main__':
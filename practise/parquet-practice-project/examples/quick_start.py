@@ -23,7 +23,7 @@ def quick_demo():
     # 1. 生成示例数据
     print("📊 生成示例数据...")
     data_generator = DataGenerator()
-    data = data_generator.generate_user_data(1000)  # 生成 1000 条记录
+    data = data_generator.generate_user_table(1000)  # 生成 1000 条记录（Arrow 表）
     print(f"✅ 生成了 {len(data)} 条用户数据")
     
     # 2. 创建输出目录
@@ -21,20 +21,25 @@ from parquet_practice import (
     ParquetPartitioningExercise,
     ParquetAdvancedExercise
 )
-from parquet_practice.utils import PerformanceAnalyzer
+from parquet_practice.utils import PerformanceAnalyzer, CACHE_MODES
+from parquet_practice.results_store import BenchmarkResultStore, HISTORY_FILENAME
 
 
 class ParquetPracticeRunner:
     """Parquet 实践练习运行器"""
     
-    def __init__(self, output_dir: str = "output"):
+    def __init__(self, output_dir: str = "output", cache_mode: str = 'warm', track_memory: bool = False):
         """
         Initialize runner
         
         Args:
             output_dir: Output directory
+            cache_mode: Page cache mode for read benchmarks ('warm', 'cold' or 'both')
+            track_memory: Measure memory usage in every exercise (the basic exercise always measures it)
         """
         self.output_dir = output_dir
+        self.cache_mode = cache_mode
+        self.track_memory = track_memory
         self.data_generator = DataGenerator()
         
         # Ensure output directory exists
@@ -57,11 +62,12 @@ class ParquetPracticeRunner:
         print("🚀 开始基础练习...")
         
         # 生成测试数据
-        data = self.data_generator.generate_user_data(num_records)
+        data = self.data_generator.generate_user_table(num_records)
         
         # 创建练习实例
-        exercise = ParquetBasicExercise(num_records=num_records, output_dir=self.output_dir)
-        exercise.df = data  # 设置已生成的数据
+        exercise = ParquetBasicExercise(num_records=num_records, output_dir=self.output_dir,
+                                        cache_mode=self.cache_mode)
+        exercise.set_data(data)  # 设置已生成的数据（Arrow 表）
         
         # 运行练习
         results = exercise.run_basic_exercise()
@@ -77,10 +83,11 @@ class ParquetPracticeRunner:
         print("🚀 开始压缩算法练习...")
         
         # 生成测试数据
-        data = self.data_generator.generate_user_data(num_records)
+        data = self.data_generator.generate_user_table(num_records)
         
         # 创建练习实例
-        exercise = ParquetCompressionExercise(data, self.output_dir)
+        exercise = ParquetCompressionExercise(data, self.output_dir, cache_mode=self.cache_mode,
+                                              track_memory=self.track_memory)
         
         # 运行练习
         results = exercise.run_compression_exercise()
@@ -96,10 +103,10 @@ class ParquetPracticeRunner:
         print("🔍 开始查询优化练习...")
         
         # Generate test data
-        data = self.data_generator.generate_user_data(num_records)
+        data = self.data_generator.generate_user_table(num_records)
         
         # Run query optimization exercises
-        exercise = ParquetQueryOptimizationExercise(data, self.output_dir)
+        exercise = ParquetQueryOptimizationExercise(data, self.output_dir, track_memory=self.track_memory)
         results = exercise.run_optimization_exercise()
         
         # Cleanup
@@ -114,10 +121,10 @@ class ParquetPracticeRunner:
         
         # Generate test data
         generator = DataGenerator()
-        df = generator.generate_user_data(num_records)
+        table = generator.generate_user_table(num_records)
         
         # Initialize exercise
-        exercise = ParquetPartitioningExercise(df, self.output_dir)
+        exercise = ParquetPartitioningExercise(table, self.output_dir, track_memory=self.track_memory)
         
         # Run exercises
         results = exercise.run_partitioning_exercise()
@@ -137,7 +144,7 @@ class ParquetPracticeRunner:
         print("🚀 开始高级特性练习...")
         
         # Run advanced exercises
-        exercise = ParquetAdvancedExercise(self.output_dir)
+        exercise = ParquetAdvancedExercise(self.output_dir, track_memory=self.track_memory)
         results = exercise.run_advanced_exercise()
         
         # Cleanup
@@ -237,6 +244,37 @@ class ParquetPracticeRunner:
         print("• 利用投影下推和谓词下推优化查询")
         print("• 在数据管道中使用流式处理技术")
     
+    def compare_runs(self, baseline: Optional[str] = None, candidate: Optional[str] = None,
+                     threshold: float = 0.05) -> int:
+        """
+        比较历史记录中各测试集的两次运行，报告显著的性能回退
+        
+        Args:
+            baseline: 基线运行（run_id 或 git SHA 前缀），默认为对比运行的前一次运行
+            candidate: 对比运行（run_id 或 git SHA 前缀），默认为最新运行
+            threshold: 判定回退所需的最小相对变化
+            
+        Returns:
+            发现的回退数量
+        """
+        store = BenchmarkResultStore(os.path.join(self.output_dir, HISTORY_FILENAME))
+        suites = store.suites()
+        if not suites:
+            print(f"❌ 没有历史记录：{store.path}")
+            return 0
+        
+        regressions = 0
+        for suite in suites:
+            report = store.compare(suite, baseline, candidate, threshold)
+            if report is None:
+                print(f"• {suite}: 没有可比较的两次运行，跳过")
+                continue
+            store.print_comparison(report)
+            regressions += len(report['regressions'])
+        
+        print(f"\n{'❌' if regressions else '✅'} 共发现 {regressions} 个显著回退")
+        return regressions
+    
     def run_interactive(self) -> None:
         """Run interactive mode"""
         print("\n" + "="*60)
@@ -333,6 +371,9 @@ def main():
   python main.py -e basic -r 5000         # 运行基础练习，生成 5000 条记录
   python main.py -e all -r 10000          # 运行所有练习，每个模块 10000 条记录
   python main.py -i                       # 强制进入交互式模式
+  python main.py -e basic --cache-mode both  # 同时测量冷缓存和热缓存读取
+  python main.py --compare                # 比较最近两次运行，报告显著回退
+  python main.py --compare --baseline 1a2b3c  # 以指定 git 版本或 run_id 为基线
         """)
     parser.add_argument('--exercise', '-e', 
                        choices=['basic', 'compression', 'query', 'partition', 'advanced', 'all'],
@@ -343,13 +384,28 @@ def main():
                        help='输出目录路径（默认：output）')
     parser.add_argument('--interactive', '-i', action='store_true',
                        help='启用交互式模式')
+    parser.add_argument('--cache-mode', choices=CACHE_MODES, default='warm',
+                       help='读取测试的缓存模式：warm 热缓存，cold 每次读取前清除页缓存，both 两者都测（默认：warm）')
+    parser.add_argument('--track-memory', action='store_true',
+                       help='在所有练习的计时统计中附带内存测量（基础练习始终测量）')
+    parser.add_argument('--compare', action='store_true',
+                       help='比较历史记录中的运行结果，发现显著回退时返回退出码 1')
+    parser.add_argument('--baseline',
+                       help='对比基线的 run_id 或 git SHA 前缀（默认：前一次运行）')
+    parser.add_argument('--candidate',
+                       help='对比运行的 run_id 或 git SHA 前缀（默认：最新运行）')
+    parser.add_argument('--threshold', type=float, default=0.05,
+                       help='判定回退的最小相对变化（默认：0.05）')
     
     args = parser.parse_args()
     
     # Create runner
-    runner = ParquetPracticeRunner(args.output)
+    runner = ParquetPracticeRunner(args.output, cache_mode=args.cache_mode, track_memory=args.track_memory)
     
-    if args.interactive or not args.exercise:
+    if args.compare:
+        regressions = runner.compare_runs(args.baseline, args.candidate, args.threshold)
+        sys.exit(1 if regressions else 0)
+    elif args.interactive or not args.exercise:
         # Interactive mode
         runner.run_interactive()
     else:
@@ -21,6 +21,14 @@ from .query_optimization_exercise import ParquetQueryOptimizationExercise
 from .partitioning_exercise import ParquetPartitioningExercise
 from .advanced_exercise import ParquetAdvancedExercise
 from .utils import DataGenerator, PerformanceAnalyzer
+from .results_store import BenchmarkResultStore
+from .row_group_index import RowGroupIndex
+from .bloom_filter import BloomFilterIndex
+from .page_index import PageIndex
+from .manifest import DatasetManifest
+from .metadata_cache import MetadataCache
+from .column_cache import ColumnChunkCache
+from .result_cache import QueryResultCache
 
 __all__ = [
     'ParquetBasicExercise',
@@ -29,5 +37,13 @@ __all__ = [
     'ParquetPartitioningExercise',
     'ParquetAdvancedExercise',
     'DataGenerator',
-    'PerformanceAnalyzer'
+    'PerformanceAnalyzer',
+    'BenchmarkResultStore',
+    'RowGroupIndex',
+    'BloomFilterIndex',
+    'PageIndex',
+    'DatasetManifest',
+    'MetadataCache',
+    'ColumnChunkCache',
+    'QueryResultCache'
 ]
\ No newline at end of file
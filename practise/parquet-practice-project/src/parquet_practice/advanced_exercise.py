@@ -12,26 +12,37 @@ import os
 import json
 from typing import Dict, Any, List, Optional, Iterator
 
-from .utils import DataGenerator, PerformanceAnalyzer
+from .utils import DataGenerator, PerformanceAnalyzer, USER_SCHEMA
+from .read_modes import READ_MODES, read_table
 
 
 class ParquetAdvancedExercise:
     """Parquet 高级特性练习类"""
     
-    def __init__(self, output_dir: str = "output"):
+    def __init__(self, output_dir: str = "output", read_mode: str = 'buffered', track_memory: bool = False):
         """
         初始化高级特性练习
         
         Args:
             output_dir: 输出目录
+            read_mode: 读取 Parquet 的方式，'buffered'、'mmap'（内存映射）或 'ipc'
+                       （内存映射未压缩的 Arrow IPC 热数据层，见 read_modes）
+            track_memory: 是否测量读写操作的内存使用（峰值 RSS、Arrow 内存池、Python 分配），结果放在计时统计信息的 memory 键下
         """
+        if read_mode not in READ_MODES:
+            raise ValueError(f"read_mode 必须是 {READ_MODES} 之一: {read_mode}")
         self.output_dir = output_dir
+        self.read_mode = read_mode
         self.data_generator = DataGenerator()
-        self.performance_analyzer = PerformanceAnalyzer()
+        self.performance_analyzer = PerformanceAnalyzer(track_memory=track_memory)
         
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
     
+    def _read_table(self, filename: str, columns: Optional[List[str]] = None) -> pa.Table:
+        """按 read_mode 读取 Parquet 文件"""
+        return read_table(filename, columns=columns, mode=self.read_mode)
+    
     def test_nested_data_structures(self, num_records: int = 1000) -> Dict[str, Any]:
         """
         测试嵌套数据结构
@@ -46,11 +57,8 @@ class ParquetAdvancedExercise:
         print("测试嵌套数据结构")
         print("=" * 60)
         
-        # 生成嵌套数据
-        nested_data = self.data_generator.generate_nested_data(num_records)
-        
-        # 转换为 PyArrow Table
-        table = pa.Table.from_pandas(nested_data)
+        # 生成嵌套数据（直接以列式 Arrow 表构建）
+        table = self.data_generator.generate_nested_table(num_records)
         
         print("嵌套数据结构:")
         print(table.schema)
@@ -61,20 +69,22 @@ class ParquetAdvancedExercise:
         def write_nested():
             pq.write_table(table, nested_file)
         
-        _, write_time = self.performance_analyzer.measure_time(write_nested)
+        _, write_stats = self.performance_analyzer.measure_stats(write_nested)
+        write_time = write_stats['median']
         
-        print(f"写入嵌套数据: {write_time:.4f} 秒")
+        print(f"写入嵌套数据: {self.performance_analyzer.format_stats(write_stats)}")
         
         # 读取嵌套数据
         def read_nested():
-            return pq.read_table(nested_file).to_pandas()
+            return self._read_table(nested_file).to_pandas()
         
-        df_read, read_time = self.performance_analyzer.measure_time(read_nested)
+        df_read, read_stats = self.performance_analyzer.measure_stats(read_nested)
+        read_time = read_stats['median']
         
-        print(f"读取嵌套数据: {read_time:.4f} 秒")
+        print(f"读取嵌套数据: {self.performance_analyzer.format_stats(read_stats)}")
         
         # 验证数据完整性
-        original_rows = len(nested_data)
+        original_rows = table.num_rows
         read_rows = len(df_read)
         data_integrity = original_rows == read_rows
         
@@ -102,7 +112,9 @@ class ParquetAdvancedExercise:
             'original_rows': original_rows,
             'read_rows': read_rows,
             'nested_columns': nested_columns,
-            'file_size_mb': file_size
+            'file_size_mb': file_size,
+            'write_time_stats': write_stats,
+            'read_time_stats': read_stats
         }
     
     def test_metadata_operations(self) -> Dict[str, Any]:
@@ -117,8 +129,7 @@ class ParquetAdvancedExercise:
         print("=" * 60)
         
         # 创建测试数据
-        df = self.data_generator.generate_user_data(1000)
-        table = pa.Table.from_pandas(df)
+        table = self.data_generator.generate_user_table(1000)
         
         # 添加自定义元数据
         metadata = {
@@ -216,36 +227,23 @@ class ParquetAdvancedExercise:
         print(f"流式写入 {total_records:,} 条记录 (批次大小: {batch_size:,})")
         
         def streaming_write():
-            writer = None
             batches_written = 0
             
-            try:
-                for i in range(0, total_records, batch_size):
-                    # 生成批次数据
-                    current_batch_size = min(batch_size, total_records - i)
-                    batch_df = self.data_generator.generate_user_data(current_batch_size)
-                    batch_table = pa.Table.from_pandas(batch_df)
-                    
-                    if writer is None:
-                        # 创建写入器
-                        writer = pq.ParquetWriter(streaming_file, batch_table.schema)
-                    
-                    # 写入批次
-                    writer.write_table(batch_table)
+            with pq.ParquetWriter(streaming_file, USER_SCHEMA) as writer:
+                # 批次直接以 RecordBatch 形式生成并写入，不经过 DataFrame
+                for batch in self.data_generator.iter_user_batches(total_records, batch_size):
+                    writer.write_batch(batch)
                     batches_written += 1
                     
                     if batches_written % 5 == 0:
                         print(f"已写入 {batches_written} 个批次...")
-                
-            finally:
-                if writer:
-                    writer.close()
             
             return batches_written
         
-        batches_written, write_time = self.performance_analyzer.measure_time(streaming_write)
+        batches_written, write_stats = self.performance_analyzer.measure_stats(streaming_write)
+        write_time = write_stats['median']
         
-        print(f"流式写入完成: {write_time:.4f} 秒, {batches_written} 个批次")
+        print(f"流式写入完成: {self.performance_analyzer.format_stats(write_stats)}, {batches_written} 个批次")
         
         # 流式读取
         print("\n流式读取数据:")
@@ -265,9 +263,10 @@ class ParquetAdvancedExercise:
             
             return total_rows, batches_read
         
-        (total_rows, batches_read), read_time = self.performance_analyzer.measure_time(streaming_read)
+        (total_rows, batches_read), read_stats = self.performance_analyzer.measure_stats(streaming_read)
+        read_time = read_stats['median']
         
-        print(f"流式读取完成: {read_time:.4f} 秒")
+        print(f"流式读取完成: {self.performance_analyzer.format_stats(read_stats)}")
         print(f"总行数: {total_rows:,}, 批次数: {batches_read}")
         
         # 验证数据完整性
@@ -287,7 +286,9 @@ class ParquetAdvancedExercise:
             'batches_read': batches_read,
             'total_rows_read': total_rows,
             'data_integrity': data_integrity,
-            'file_size_mb': file_size
+            'file_size_mb': file_size,
+            'write_time_stats': write_stats,
+            'read_time_stats': read_stats
         }
     
     def test_schema_evolution(self) -> Dict[str, Any]:
@@ -301,11 +302,13 @@ class ParquetAdvancedExercise:
         print("测试 Schema 演进")
         print("=" * 60)
         
+        rng = self.data_generator.spawn_rng()
+        
         # 创建初始 schema
         initial_data = pd.DataFrame({
             'id': range(100),
             'name': [f'User_{i}' for i in range(100)],
-            'age': np.random.randint(18, 80, 100)
+            'age': rng.integers(18, 80, 100)
         })
         
         initial_file = os.path.join(self.output_dir, 'schema_v1.parquet')
@@ -318,7 +321,7 @@ class ParquetAdvancedExercise:
         # 演进 schema - 添加新列
         evolved_data = initial_data.copy()
         evolved_data['email'] = [f'user_{i}@example.com' for i in range(100)]
-        evolved_data['city'] = np.random.choice(['北京', '上海', '广州'], 100)
+        evolved_data['city'] = rng.choice(['北京', '上海', '广州'], 100)
         
         evolved_file = os.path.join(self.output_dir, 'schema_v2.parquet')
         evolved_table = pa.Table.from_pandas(evolved_data)
@@ -331,16 +334,16 @@ class ParquetAdvancedExercise:
         print("\n测试 Schema 兼容性:")
         
         # 读取 v1 文件
-        v1_table = pq.read_table(initial_file)
+        v1_table = self._read_table(initial_file)
         print(f"v1 文件列数: {len(v1_table.schema)}")
         
         # 读取 v2 文件
-        v2_table = pq.read_table(evolved_file)
+        v2_table = self._read_table(evolved_file)
         print(f"v2 文件列数: {len(v2_table.schema)}")
         
         # 尝试用 v1 schema 读取 v2 文件的部分列
         try:
-            v2_partial = pq.read_table(evolved_file, columns=['id', 'name', 'age'])
+            v2_partial = self._read_table(evolved_file, columns=['id', 'name', 'age'])
             compatibility_test = len(v2_partial.schema) == len(v1_table.schema)
             print(f"向后兼容性: {'✓' if compatibility_test else '✗'}")
         except Exception as e:
@@ -391,19 +394,21 @@ class ParquetAdvancedExercise:
         print("测试数据类型和编码")
         print("=" * 60)
         
+        rng = self.data_generator.spawn_rng()
+        
         # 创建包含各种数据类型的数据
         data = {
-            'int8_col': np.random.randint(-128, 127, 1000, dtype=np.int8),
-            'int16_col': np.random.randint(-32768, 32767, 1000, dtype=np.int16),
-            'int32_col': np.random.randint(-2147483648, 2147483647, 1000, dtype=np.int32),
-            'int64_col': np.random.randint(-9223372036854775808, 9223372036854775807, 1000, dtype=np.int64),
-            'float32_col': np.random.random(1000).astype(np.float32),
-            'float64_col': np.random.random(1000).astype(np.float64),
-            'bool_col': np.random.choice([True, False], 1000),
+            'int8_col': rng.integers(-128, 127, 1000, dtype=np.int8),
+            'int16_col': rng.integers(-32768, 32767, 1000, dtype=np.int16),
+            'int32_col': rng.integers(-2147483648, 2147483647, 1000, dtype=np.int32),
+            'int64_col': rng.integers(-9223372036854775808, 9223372036854775807, 1000, dtype=np.int64),
+            'float32_col': rng.random(1000).astype(np.float32),
+            'float64_col': rng.random(1000).astype(np.float64),
+            'bool_col': rng.choice([True, False], 1000),
             'string_col': [f'String_{i}' for i in range(1000)],
-            'category_col': np.random.choice(['A', 'B', 'C', 'D'], 1000),
+            'category_col': rng.choice(['A', 'B', 'C', 'D'], 1000),
             'datetime_col': pd.date_range('2023-01-01', periods=1000, freq='H'),
-            'decimal_col': np.round(np.random.random(1000) * 1000, 2)
+            'decimal_col': np.round(rng.random(1000) * 1000, 2)
         }
         
         df = pd.DataFrame(data)
@@ -434,7 +439,7 @@ class ParquetAdvancedExercise:
         pq.write_table(table, types_file)
         
         # 读取并验证类型
-        read_table = pq.read_table(types_file)
+        read_table = self._read_table(types_file)
         
         print("\n读取后的数据类型:")
         for field in read_table.schema:
@@ -531,8 +536,7 @@ class ParquetAdvancedExercise:
         results = {}
         
         # 生成测试数据
-        test_data = self.data_generator.generate_user_data(5000)
-        table = pa.Table.from_pandas(test_data)
+        table = self.data_generator.generate_user_table(5000)
         
         for compression in compression_types:
             print(f"\n测试压缩算法: {compression}")
@@ -543,13 +547,16 @@ class ParquetAdvancedExercise:
             def save_with_compression():
                 pq.write_table(table, filename, compression=compression)
             
-            _, save_time = self.performance_analyzer.measure_time(save_with_compression)
+            _, save_stats = self.performance_analyzer.measure_stats(save_with_compression)
+            save_time = save_stats['median']
             
             # 读取
             def read_compressed():
-                return pq.read_table(filename)
+                # 对比的是压缩算法，热数据层未压缩，因此 ipc 模式下这里仍读取 Parquet 文件
+                return pq.read_table(filename, memory_map=self.read_mode == 'mmap')
             
-            _, read_time = self.performance_analyzer.measure_time(read_compressed)
+            _, read_stats = self.performance_analyzer.measure_stats(read_compressed)
+            read_time = read_stats['median']
             
             # 文件大小
             file_size = self.performance_analyzer.get_file_size(filename)
@@ -557,11 +564,13 @@ class ParquetAdvancedExercise:
             results[compression] = {
                 'save_time': save_time,
                 'read_time': read_time,
-                'file_size': file_size
+                'file_size': file_size,
+                'save_time_stats': save_stats,
+                'read_time_stats': read_stats
             }
             
-            print(f"保存时间: {save_time:.4f} 秒")
-            print(f"读取时间: {read_time:.4f} 秒")
+            print(f"保存时间: {self.performance_analyzer.format_stats(save_stats)}")
+            print(f"读取时间: {self.performance_analyzer.format_stats(read_stats)}")
             print(f"文件大小: {file_size:.2f} MB")
         
         # 找出最佳压缩算法
@@ -637,6 +646,7 @@ class ParquetAdvancedExercise:
             os.path.join(self.output_dir, 'schema_v2.parquet'),
             os.path.join(self.output_dir, 'schema_combined.parquet'),
             os.path.join(self.output_dir, 'data_types.parquet'),
-            os.path.join(self.output_dir, 'data_*.parquet')
+            os.path.join(self.output_dir, 'data_*.parquet'),
+            os.path.join(self.output_dir, '_*.parquet.arrow')
         ]
         cleanup_files(patterns)
\ No newline at end of file
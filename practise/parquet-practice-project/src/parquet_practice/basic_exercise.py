@@ -11,38 +11,60 @@ import time
 import os
 from typing import Dict, Any, Tuple
 
-from .utils import DataGenerator, PerformanceAnalyzer, verify_data_integrity
+from .utils import (DataGenerator, PerformanceAnalyzer, ArrowTableData, verify_data_integrity,
+                    DEFAULT_BATCH_SIZE, CACHE_MODES)
+from .pandas_conversion import read_pandas, resolve_profile
+from .read_modes import READ_MODES, ensure_hot_tier, hot_tier_path
 
 
-class ParquetBasicExercise:
+class ParquetBasicExercise(ArrowTableData):
     """Parquet 基础练习类"""
     
-    def __init__(self, num_records: int = 100000, output_dir: str = "output"):
+    def __init__(self, num_records: int = 100000, output_dir: str = "output",
+                 track_memory: bool = True, cache_mode: str = 'warm',
+                 pandas_profile: str = 'default', read_mode: str = 'buffered'):
         """
         初始化基础练习
         
         Args:
             num_records: 记录数量
             output_dir: 输出目录
+            track_memory: 是否测量读写操作的内存使用（峰值 RSS、Arrow 内存池、Python 分配）
+            cache_mode: 读取测试的缓存模式，'warm'、'cold'（每次读取前清除页缓存）或 'both'
+            pandas_profile: 读取 Parquet 为 DataFrame 时使用的转换配置
+                            （见 pandas_conversion.PANDAS_PROFILES）
+            read_mode: 读取 Parquet 的方式，'buffered'、'mmap'（内存映射）或 'ipc'
+                       （内存映射未压缩的 Arrow IPC 热数据层，见 read_modes）
         """
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"cache_mode 必须是 {CACHE_MODES} 之一: {cache_mode}")
+        if read_mode not in READ_MODES:
+            raise ValueError(f"read_mode 必须是 {READ_MODES} 之一: {read_mode}")
+        resolve_profile(pandas_profile)
         self.num_records = num_records
         self.output_dir = output_dir
+        self.cache_mode = cache_mode
+        self.pandas_profile = pandas_profile
+        self.read_mode = read_mode
         self.data_generator = DataGenerator()
-        self.performance_analyzer = PerformanceAnalyzer()
-        self.df = None
+        self.performance_analyzer = PerformanceAnalyzer(track_memory=track_memory)
+        # 练习数据以 Arrow 表保存，只有 CSV 对比需要 DataFrame（见 ArrowTableData）
+        self.set_data(None)
+        # 各操作的计时统计信息（min/median/p95 等）
+        self.timing_stats = {}
         
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
         
-    def generate_sample_data(self) -> pd.DataFrame:
+    def generate_sample_data(self) -> pa.Table:
         """
         生成示例数据
         
         Returns:
-            生成的 DataFrame
+            生成的 Arrow 表
         """
-        self.df = self.data_generator.generate_user_data(self.num_records)
-        return self.df
+        self.set_data(self.data_generator.generate_user_table(self.num_records))
+        return self.table
     
     def save_to_parquet(self, filename: str = None) -> Tuple[float, float]:
         """
@@ -59,19 +81,50 @@ class ParquetBasicExercise:
         
         print(f"正在保存数据到 {filename}...")
         
-        # Convert to PyArrow table
-        table = pa.Table.from_pandas(self.df)
-        
         # Measure save time
-        _, save_time = self.performance_analyzer.measure_time(
-            pq.write_table, table, filename
+        _, stats = self.performance_analyzer.measure_stats(
+            pq.write_table, self.table, filename
         )
+        self.timing_stats['parquet_save'] = stats
+        save_time = stats['median']
         
         # Get file size
         file_size = self.performance_analyzer.get_file_size(filename)
         
         print(f"Parquet 文件保存成功！")
-        print(f"保存时间：{save_time:.2f} 秒")
+        print(f"保存时间：{self.performance_analyzer.format_stats(stats)}")
+        print(f"文件大小：{file_size:.2f} MB")
+        
+        return save_time, file_size
+    
+    def save_streaming_parquet(self, filename: str = None,
+                               batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[float, float]:
+        """
+        按批次流式生成并写入 Parquet 文件
+        
+        数据直接以 RecordBatch 形式写入，不经过 DataFrame，
+        内存占用只与批次大小有关，可用于生成超出内存容量的大文件。
+        
+        Args:
+            filename: 文件名，默认为 sample_data_streaming.parquet
+            batch_size: 每个批次的记录数
+            
+        Returns:
+            (生成并写入的时间, 文件大小MB)
+        """
+        if filename is None:
+            filename = os.path.join(self.output_dir, 'sample_data_streaming.parquet')
+        
+        print(f"正在流式写入 {self.num_records:,} 条记录到 {filename} (批次大小: {batch_size:,})...")
+        
+        batches_written, save_time = self.performance_analyzer.measure_time(
+            self.data_generator.write_user_parquet, filename, self.num_records, batch_size
+        )
+        
+        file_size = self.performance_analyzer.get_file_size(filename)
+        
+        print(f"流式写入完成！共 {batches_written} 个批次")
+        print(f"写入时间：{save_time:.2f} 秒")
         print(f"文件大小：{file_size:.2f} MB")
         
         return save_time, file_size
@@ -91,26 +144,32 @@ class ParquetBasicExercise:
         
         print(f"正在保存数据到 {filename}...")
         
-        # 测量保存时间
-        _, save_time = self.performance_analyzer.measure_time(
-            self.df.to_csv, filename, index=False
+        # 测量保存时间（CSV 对比基线使用 pandas 写出，DataFrame 在第一次访问 df 时转换）
+        df = self.df
+        _, stats = self.performance_analyzer.measure_stats(
+            df.to_csv, filename, index=False
         )
+        self.timing_stats['csv_save'] = stats
+        save_time = stats['median']
         
         # 获取文件大小
         file_size = self.performance_analyzer.get_file_size(filename)
         
         print(f"CSV 文件保存完成！")
-        print(f"保存时间: {save_time:.2f} 秒")
+        print(f"保存时间: {self.performance_analyzer.format_stats(stats)}")
         print(f"文件大小: {file_size:.2f} MB")
         
         return save_time, file_size
     
-    def read_from_parquet(self, filename: str = None) -> Tuple[pd.DataFrame, float]:
+    def read_from_parquet(self, filename: str = None, profile: str = None,
+                          mode: str = None) -> Tuple[pd.DataFrame, float]:
         """
         从 Parquet 文件读取数据
         
         Args:
             filename: 文件名
+            profile: 转换配置，默认使用 self.pandas_profile
+            mode: 读取模式，默认使用 self.read_mode
             
         Returns:
             (读取的 DataFrame, 读取时间)
@@ -118,20 +177,34 @@ class ParquetBasicExercise:
         if filename is None:
             filename = os.path.join(self.output_dir, 'sample_data.parquet')
         
-        print(f"正在从 {filename} 读取数据...")
+        if profile is None:
+            profile = self.pandas_profile
+        if mode is None:
+            mode = self.read_mode
+        # 冷缓存测量清除实际被读取的文件的页缓存，ipc 模式下为热数据层文件
+        read_path = filename
+        if mode == 'ipc':
+            # 热数据层在计时前准备好
+            read_path = ensure_hot_tier(filename)
+        
+        print(f"正在从 {filename} 读取数据 (读取模式: {mode}, 转换配置: {profile})...")
         
         def read_parquet():
-            table = pq.read_table(filename)
-            return table.to_pandas()
+            return read_pandas(filename, profile=profile, mode=mode)
         
-        df_read, read_time = self.performance_analyzer.measure_time(read_parquet)
+        df_read, stats = self._measure_read('parquet_read', read_path, read_parquet)
+        read_time = stats['median']
         
         print(f"数据读取成功！")
-        print(f"读取时间：{read_time:.2f} 秒")
+        if 'memory' in stats:
+            memory = stats['memory']
+            print(f"内存峰值增量：RSS {memory['rss_peak_delta_mb']:.1f} MB，"
+                  f"Arrow {memory['arrow_peak_delta_mb']:.1f} MB，"
+                  f"Python {memory['python_peak_mb']:.1f} MB")
         print(f"数据形状：{df_read.shape}")
         
         # Verify data integrity
-        if verify_data_integrity(self.df, df_read):
+        if verify_data_integrity(self.table, df_read):
             print("✅ 数据完整性验证通过")
         else:
             print("❌ 数据完整性验证失败")
@@ -153,16 +226,40 @@ class ParquetBasicExercise:
         
         print(f"正在从 {filename} 读取数据...")
         
-        df_read, read_time = self.performance_analyzer.measure_time(
-            pd.read_csv, filename
-        )
+        df_read, stats = self._measure_read('csv_read', filename, pd.read_csv, filename)
+        read_time = stats['median']
         
         print(f"CSV 文件读取完成！")
-        print(f"读取时间: {read_time:.2f} 秒")
         print(f"读取行数: {len(df_read)}")
         
         return df_read, read_time
     
+    def _measure_read(self, key: str, filename: str, func, *args) -> Tuple[Any, Dict[str, Any]]:
+        """
+        按 cache_mode 测量读取操作并打印耗时
+        
+        热缓存统计保存在 timing_stats[key]，冷缓存统计保存在 timing_stats[key + '_cold']。
+        
+        Args:
+            key: 统计信息的键名
+            filename: 被读取的文件
+            func: 读取函数
+            *args: 读取函数参数
+            
+        Returns:
+            (读取结果, 主要统计信息；测了热缓存时为热缓存统计，否则为冷缓存统计)
+        """
+        result, cache_stats = self.performance_analyzer.measure_cache_stats(
+            filename, func, *args, cache_mode=self.cache_mode
+        )
+        if 'cold' in cache_stats:
+            self.timing_stats[key + '_cold'] = cache_stats['cold']
+            print(f"读取时间（冷缓存）：{self.performance_analyzer.format_stats(cache_stats['cold'])}")
+        if 'warm' in cache_stats:
+            self.timing_stats[key] = cache_stats['warm']
+            print(f"读取时间（热缓存）：{self.performance_analyzer.format_stats(cache_stats['warm'])}")
+        return result, cache_stats.get('warm', cache_stats.get('cold'))
+    
     def run_basic_exercise(self) -> Dict[str, Any]:
         """
         运行基础练习
@@ -175,7 +272,7 @@ class ParquetBasicExercise:
         print("=" * 60)
         
         # 1. Generate data
-        if self.df is None:
+        if self.table is None:
             self.generate_sample_data()
         
         # 2. Save as Parquet and CSV
@@ -183,29 +280,47 @@ class ParquetBasicExercise:
         csv_save_time, csv_size = self.save_to_csv()
         
         # 3. Read data
-        df_parquet, parquet_read_time = self.read_from_parquet()
-        df_csv, csv_read_time = self.read_from_csv()
+        df_parquet, _ = self.read_from_parquet()
+        df_csv, _ = self.read_from_csv()
         
         # 4. Verify data integrity
-        parquet_integrity = verify_data_integrity(self.df, df_parquet)
-        csv_integrity = verify_data_integrity(self.df, df_csv)
+        parquet_integrity = verify_data_integrity(self.table, df_parquet)
+        csv_integrity = verify_data_integrity(self.table, df_csv)
         
         # 5. Performance comparison
         results = {
             'Parquet': {
                 'save_time': parquet_save_time,
-                'read_time': parquet_read_time,
                 'file_size': parquet_size,
-                'integrity': parquet_integrity
+                'integrity': parquet_integrity,
+                'save_time_stats': self.timing_stats['parquet_save']
             },
             'CSV': {
                 'save_time': csv_save_time,
-                'read_time': csv_read_time,
                 'file_size': csv_size,
-                'integrity': csv_integrity
+                'integrity': csv_integrity,
+                'save_time_stats': self.timing_stats['csv_save']
             }
         }
         
+        # read_time 只记录热缓存读取，冷缓存读取（cache_mode 为 cold/both 时）记录为 cold_read_time，
+        # cache_mode 为 cold 时结果中没有 read_time，不会与热缓存运行的结果混在一起比较
+        for name, prefix in (('Parquet', 'parquet'), ('CSV', 'csv')):
+            if self.cache_mode != 'cold':
+                results[name]['read_time'] = self.timing_stats[f'{prefix}_read']['median']
+                results[name]['read_time_stats'] = self.timing_stats[f'{prefix}_read']
+            if self.cache_mode != 'warm':
+                cold_stats = self.timing_stats[f'{prefix}_read_cold']
+                results[name]['cold_read_time'] = cold_stats['median']
+                results[name]['cold_read_time_stats'] = cold_stats
+        
+        # 内存信息（开启 track_memory 时，仅热缓存读取测量）单独列出，便于 compare_performance 展示
+        if self.performance_analyzer.track_memory:
+            for name, metrics in results.items():
+                metrics['save_memory'] = metrics['save_time_stats']['memory']
+                if 'memory' in metrics.get('read_time_stats', {}):
+                    metrics['read_memory'] = metrics['read_time_stats']['memory']
+        
         # Display comparison results
         self.performance_analyzer.compare_performance(
             {k: {key: val for key, val in v.items() if key != 'integrity'} 
@@ -228,6 +343,7 @@ class ParquetBasicExercise:
         """清理临时文件"""
         from .utils import cleanup_files
         patterns = [
-            os.path.join(self.output_dir, 'sample_data.*')
+            os.path.join(self.output_dir, 'sample_data.*'),
+            hot_tier_path(os.path.join(self.output_dir, 'sample_data.parquet'))
         ]
         cleanup_files(patterns)
\ No newline at end of file
@@ -0,0 +1,553 @@
+"""
+Bloom 过滤器索引模块
+
+行组的 min/max 统计信息无法排除无序的高基数列（如打乱顺序后的 UserID、Username）上的等值查询。
+本模块为每个行组的指定列维护分块 Bloom 过滤器（Parquet 规范中的 Split Block Bloom Filter）：
+pyarrow 支持时直接写入 Parquet 文件，否则在写入后生成旁路文件。
+查询时在解码数据页之前检查过滤器，每个行组只需读取 32 字节的一个块。
+"""
+
+import inspect
+import math
+import os
+import struct
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from typing import Dict, Any, List, Optional, Tuple
+
+from .row_group_index import RowGroupIndex, Filters, normalize_filters, _SOURCE_SIZE_KEY, _SOURCE_MTIME_KEY
+from .filter_compiler import normalize_operator
+from .parquet_format import read_struct
+
+# 当前 pyarrow 是否支持把 Bloom 过滤器写入 Parquet 文件
+PARQUET_BLOOM_FILTERS = 'bloom_filter_options' in inspect.signature(pq.ParquetWriter.__init__).parameters
+
+# 过滤器的存放方式：auto 优先写入 Parquet 文件，不支持时使用旁路文件
+BLOOM_MODES = ('auto', 'parquet', 'sidecar')
+
+# 默认误判率
+DEFAULT_FPP = 0.01
+
+# pyarrow 默认的行组最大行数
+_DEFAULT_ROW_GROUP_ROWS = 1024 * 1024
+
+# 分块 Bloom 过滤器的块大小（8 个 32 位字）和大小上限
+_BLOCK_BYTES = 32
+_MAX_FILTER_BYTES = 128 * 1024 * 1024
+
+# 每个块内 8 个字各自使用的乘法盐值（Parquet 规范）
+_SALT = (0x47b6137b, 0x44974d91, 0x8824ad5b, 0xa2b7289d,
+         0x705495c7, 0x2df1424b, 0x9efc4947, 0x5c6bfb31)
+
+# XXH64 常量
+_MASK64 = (1 << 64) - 1
+_PRIME64_1 = 0x9E3779B185EBCA87
+_PRIME64_2 = 0xC2B2AE3D27D4EB4F
+_PRIME64_3 = 0x165667B19E3779F9
+_PRIME64_4 = 0x85EBCA77C2B2AE63
+_PRIME64_5 = 0x27D4EB2F165667C5
+
+# 旁路文件使用的哈希函数（写入和查询必须一致）
+_SIDECAR_HASH = b'pandas.hash_array'
+_HASH_KEY = b'hash'
+
+
+def _rotl64(x: int, r: int) -> int:
+    return ((x << r) | (x >> (64 - r))) & _MASK64
+
+
+def _xxh64_round(acc: int, lane: int) -> int:
+    return (_rotl64((acc + lane * _PRIME64_2) & _MASK64, 31) * _PRIME64_1) & _MASK64
+
+
+def _xxh64(data: bytes, seed: int = 0) -> int:
+    """
+    XXH64 哈希（Parquet Bloom 过滤器规定的哈希函数）
+
+    查询时每个值只需计算一次，因此使用纯 Python 实现，不依赖 xxhash 包。
+    """
+    length = len(data)
+    pos = 0
+    if length >= 32:
+        lanes = [(seed + _PRIME64_1 + _PRIME64_2) & _MASK64, (seed + _PRIME64_2) & _MASK64,
+                 seed, (seed - _PRIME64_1) & _MASK64]
+        while pos + 32 <= length:
+            lanes = [_xxh64_round(acc, lane)
+                     for acc, lane in zip(lanes, struct.unpack_from('<4Q', data, pos))]
+            pos += 32
+        h = (_rotl64(lanes[0], 1) + _rotl64(lanes[1], 7) +
+             _rotl64(lanes[2], 12) + _rotl64(lanes[3], 18)) & _MASK64
+        for acc in lanes:
+            h = ((h ^ _xxh64_round(0, acc)) * _PRIME64_1 + _PRIME64_4) & _MASK64
+    else:
+        h = (seed + _PRIME64_5) & _MASK64
+
+    h = (h + length) & _MASK64
+    while pos + 8 <= length:
+        h ^= _xxh64_round(0, struct.unpack_from('<Q', data, pos)[0])
+        h = (_rotl64(h, 27) * _PRIME64_1 + _PRIME64_4) & _MASK64
+        pos += 8
+    if pos + 4 <= length:
+        h ^= (struct.unpack_from('<I', data, pos)[0] * _PRIME64_1) & _MASK64
+        h = (_rotl64(h, 23) * _PRIME64_2 + _PRIME64_3) & _MASK64
+        pos += 4
+    while pos < length:
+        h ^= (data[pos] * _PRIME64_5) & _MASK64
+        h = (_rotl64(h, 11) * _PRIME64_1) & _MASK64
+        pos += 1
+
+    h ^= h >> 33
+    h = (h * _PRIME64_2) & _MASK64
+    h ^= h >> 29
+    h = (h * _PRIME64_3) & _MASK64
+    h ^= h >> 32
+    return h
+
+
+def _block_contains(block: bytes, hash_value: int) -> bool:
+    """检查哈希值对应的 8 个位是否都在块中被置位"""
+    key = hash_value & 0xFFFFFFFF
+    words = struct.unpack('<8I', block)
+    return all((words[i] >> (((key * salt) & 0xFFFFFFFF) >> 27)) & 1 for i, salt in enumerate(_SALT))
+
+
+def _block_index(hash_value: int, num_bytes: int) -> int:
+    """哈希值的高 32 位决定所在的块"""
+    return ((hash_value >> 32) * (num_bytes // _BLOCK_BYTES)) >> 32
+
+
+def optimal_num_bytes(ndv: int, fpp: float = DEFAULT_FPP) -> int:
+    """
+    计算给定不同值数量和误判率所需的过滤器大小
+
+    与 Parquet C++ 实现的算法相同，结果向上取整为 2 的幂。
+
+    Args:
+        ndv: 不同值的数量
+        fpp: 误判率
+
+    Returns:
+        过滤器字节数
+    """
+    if not 0 < fpp < 1:
+        raise ValueError(f"fpp 必须在 (0, 1) 之间: {fpp}")
+    num_bits = -8 * max(ndv, 1) / math.log(1 - fpp ** (1 / 8))
+    num_bytes = 1 << (max(math.ceil(num_bits / 8), 1) - 1).bit_length()
+    return min(max(num_bytes, _BLOCK_BYTES), _MAX_FILTER_BYTES)
+
+
+def _is_supported_type(arrow_type: pa.DataType) -> bool:
+    """
+    是否支持查询该类型列的过滤器
+
+    只支持整数和字符串/二进制列：浮点数的 0.0/-0.0 和时间戳的单位换算
+    可能让按字节计算的哈希与按值比较的结果不一致，导致漏掉匹配行。
+    """
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    return (pa.types.is_integer(arrow_type) or pa.types.is_string(arrow_type) or
+            pa.types.is_large_string(arrow_type) or pa.types.is_binary(arrow_type) or
+            pa.types.is_large_binary(arrow_type))
+
+
+def _plain_encode(value: Any, arrow_type: pa.DataType, physical_type: str) -> Optional[bytes]:
+    """
+    按 Parquet PLAIN 编码（不含长度前缀）序列化单个值，作为 XXH64 的输入
+
+    值无法转换为列类型时返回 None。
+    """
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    try:
+        scalar = pa.scalar(value, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError):
+        return None
+    if not scalar.is_valid:
+        return None
+
+    if physical_type == 'BYTE_ARRAY':
+        data = scalar.as_py()
+        return data.encode('utf-8') if isinstance(data, str) else data
+    if physical_type in ('INT32', 'INT64') and pa.types.is_integer(arrow_type):
+        num_bits = 32 if physical_type == 'INT32' else 64
+        return (scalar.as_py() & ((1 << num_bits) - 1)).to_bytes(num_bits // 8, 'little')
+    return None
+
+
+def _sidecar_values(values: pa.Array) -> np.ndarray:
+    """旁路过滤器哈希前统一的 numpy 表示（写入和查询使用同一转换）"""
+    if pa.types.is_dictionary(values.type):
+        values = values.dictionary_decode()
+    return values.to_numpy(zero_copy_only=False)
+
+
+def _sidecar_hashes(values: pa.Array) -> np.ndarray:
+    return pd.util.hash_array(_sidecar_values(values), categorize=False)
+
+
+def _build_bitset(hashes: np.ndarray, num_bytes: int) -> bytes:
+    """用一组 64 位哈希值向量化地构建分块 Bloom 过滤器"""
+    num_blocks = num_bytes // _BLOCK_BYTES
+    hashes = hashes.astype(np.uint64, copy=False)
+    blocks = (((hashes >> np.uint64(32)) * np.uint64(num_blocks)) >> np.uint64(32)).astype(np.intp)
+    keys = hashes & np.uint64(0xFFFFFFFF)
+
+    words = np.zeros((num_blocks, 8), dtype=np.uint32)
+    for i, salt in enumerate(_SALT):
+        bits = (((keys * np.uint64(salt)) & np.uint64(0xFFFFFFFF)) >> np.uint64(27)).astype(np.uint32)
+        np.bitwise_or.at(words[:, i], blocks, np.left_shift(np.uint32(1), bits))
+    return words.astype('<u4').tobytes()
+
+
+def bloom_filter_write_options(columns: List[str], ndv: int = _DEFAULT_ROW_GROUP_ROWS,
+                               fpp: float = DEFAULT_FPP) -> Dict[str, Any]:
+    """
+    生成把 Bloom 过滤器写入 Parquet 文件的写入参数
+
+    可直接传给 pq.write_table、pq.ParquetWriter 或 DataGenerator.write_user_parquet。
+
+    Args:
+        columns: 需要过滤器的列
+        ndv: 每个行组中预计的不同值数量，高基数列通常取行组行数
+        fpp: 误判率
+
+    Returns:
+        {'bloom_filter_options': {...}}
+    """
+    if not PARQUET_BLOOM_FILTERS:
+        raise ValueError(f"pyarrow {pa.__version__} 不支持写入 Bloom 过滤器，请使用旁路文件")
+    return {'bloom_filter_options': {column: {'ndv': max(int(ndv), 1), 'fpp': fpp} for column in columns}}
+
+
+class BloomFilterIndex:
+    """Parquet 文件各行组的 Bloom 过滤器"""
+
+    def __init__(self, filename: str, source: str,
+                 filters: Dict[str, List[Optional[Tuple[int, int]]]],
+                 bitsets: Optional[Dict[str, List[Optional[bytes]]]] = None):
+        """
+        初始化 Bloom 过滤器索引
+
+        Args:
+            filename: Parquet 文件
+            source: 'parquet'（过滤器在文件中）或 'sidecar'（旁路文件）
+            filters: {列: 每个行组的 (位集偏移量, 位集字节数)}，没有过滤器的行组为 None；
+                     旁路文件的偏移量为 0
+            bitsets: 旁路文件中的位集，{列: 每个行组的位集}
+        """
+        self.filename = filename
+        self.source = source
+        self.filters = filters
+        self.bitsets = bitsets or {}
+        self.columns = list(filters)
+
+        parquet_file = pq.ParquetFile(filename)
+        self.num_row_groups = parquet_file.metadata.num_row_groups
+        self._types = {name: parquet_file.schema_arrow.field(name).type for name in self.columns}
+        self._physical_types = {}
+        if self.num_row_groups > 0:
+            row_group = parquet_file.metadata.row_group(0)
+            for j in range(row_group.num_columns):
+                column = row_group.column(j)
+                if column.path_in_schema in filters:
+                    self._physical_types[column.path_in_schema] = column.physical_type
+
+    @staticmethod
+    def sidecar_path(filename: str) -> str:
+        """旁路过滤器文件路径（以下划线开头，pyarrow.dataset 会忽略）"""
+        directory, basename = os.path.split(filename)
+        return os.path.join(directory, f"_{basename}.bloom")
+
+    @classmethod
+    def from_parquet(cls, filename: str) -> 'BloomFilterIndex':
+        """
+        读取 Parquet 文件中写入的 Bloom 过滤器位置
+
+        只读取每个过滤器的头部，位集在查询时按块读取。
+        没有过滤器或类型不受支持的列不会出现在索引中。
+
+        Args:
+            filename: Parquet 文件
+
+        Returns:
+            Bloom 过滤器索引
+        """
+        parquet_file = pq.ParquetFile(filename)
+        metadata = parquet_file.metadata
+        schema = parquet_file.schema_arrow
+
+        filters = {}
+        with open(filename, 'rb') as f:
+            for i in range(metadata.num_row_groups):
+                row_group = metadata.row_group(i)
+                for j in range(row_group.num_columns):
+                    column = row_group.column(j)
+                    name = column.path_in_schema
+                    if name not in schema.names or not _is_supported_type(schema.field(name).type):
+                        continue
+                    location = None
+                    if column.bloom_filter_offset is not None:
+                        f.seek(column.bloom_filter_offset)
+                        header, header_length = read_struct(f.read(256))
+                        # 只支持 XXH64 哈希且未压缩的过滤器
+                        if header.get(3) == {1: {}} and header.get(4) == {1: {}}:
+                            location = (column.bloom_filter_offset + header_length, header[1])
+                    if location is not None or name in filters:
+                        filters.setdefault(name, [None] * i).append(location)
+        return cls(filename, 'parquet', filters)
+
+    @classmethod
+    def build(cls, filename: str, columns: List[str], fpp: float = DEFAULT_FPP) -> 'BloomFilterIndex':
+        """
+        读取数据为指定列构建旁路过滤器
+
+        每个行组逐列读取，过滤器大小按行组内实际的不同值数量确定。
+
+        Args:
+            filename: Parquet 文件
+            columns: 需要过滤器的列（整数或字符串列）
+            fpp: 误判率
+
+        Returns:
+            Bloom 过滤器索引
+        """
+        parquet_file = pq.ParquetFile(filename)
+        schema = parquet_file.schema_arrow
+        for column in columns:
+            if not _is_supported_type(schema.field(column).type):
+                raise ValueError(f"Bloom 过滤器只支持整数和字符串列: {column} ({schema.field(column).type})")
+
+        bitsets = {column: [] for column in columns}
+        for i in range(parquet_file.metadata.num_row_groups):
+            row_group = parquet_file.read_row_group(i, columns=columns)
+            for column in columns:
+                values = row_group[column].combine_chunks().drop_null()
+                if pa.types.is_dictionary(values.type):
+                    # count_distinct 不支持字典类型，按值计数和哈希
+                    values = values.dictionary_decode()
+                num_bytes = optimal_num_bytes(pc.count_distinct(values).as_py(), fpp)
+                bitsets[column].append(_build_bitset(_sidecar_hashes(values), num_bytes))
+
+        filters = {column: [(0, len(bitset)) for bitset in column_bitsets]
+                   for column, column_bitsets in bitsets.items()}
+        return cls(filename, 'sidecar', filters, bitsets)
+
+    def save(self, path: Optional[str] = None) -> str:
+        """
+        保存旁路过滤器文件（Parquet 格式，每个行组每列一行）
+
+        Args:
+            path: 保存路径，默认为 sidecar_path(filename)
+
+        Returns:
+            保存路径
+        """
+        if self.source != 'sidecar':
+            raise ValueError("过滤器已写入 Parquet 文件，无需保存旁路文件")
+        path = path or self.sidecar_path(self.filename)
+        names, row_groups, bitsets = [], [], []
+        for column, column_bitsets in self.bitsets.items():
+            for i, bitset in enumerate(column_bitsets):
+                names.append(column)
+                row_groups.append(i)
+                bitsets.append(bitset)
+
+        stat = os.stat(self.filename)
+        table = pa.table({
+            'column': pa.array(names, type=pa.string()),
+            'row_group': pa.array(row_groups, type=pa.int32()),
+            'bitset': pa.array(bitsets, type=pa.large_binary())
+        }).replace_schema_metadata({
+            _HASH_KEY: _SIDECAR_HASH,
+            _SOURCE_SIZE_KEY: str(stat.st_size).encode(),
+            _SOURCE_MTIME_KEY: str(stat.st_mtime_ns).encode()
+        })
+        # 位集近似随机，压缩没有收益
+        pq.write_table(table, path, compression='none', use_dictionary=['column'])
+        return path
+
+    @classmethod
+    def load(cls, filename: str, path: Optional[str] = None) -> Optional['BloomFilterIndex']:
+        """
+        加载旁路过滤器文件
+
+        Args:
+            filename: Parquet 文件
+            path: 旁路文件路径，默认为 sidecar_path(filename)
+
+        Returns:
+            Bloom 过滤器索引；文件不存在、源文件已变化或哈希函数不一致时返回 None
+        """
+        path = path or cls.sidecar_path(filename)
+        if not os.path.exists(path):
+            return None
+
+        table = pq.read_table(path)
+        metadata = table.schema.metadata or {}
+        stat = os.stat(filename)
+        if metadata.get(_HASH_KEY) != _SIDECAR_HASH or \
+                metadata.get(_SOURCE_SIZE_KEY) != str(stat.st_size).encode() or \
+                metadata.get(_SOURCE_MTIME_KEY) != str(stat.st_mtime_ns).encode():
+            return None
+
+        bitsets = {}
+        for column, row_group, bitset in zip(table['column'].to_pylist(), table['row_group'].to_pylist(),
+                                             table['bitset'].to_pylist()):
+            column_bitsets = bitsets.setdefault(column, [])
+            column_bitsets.extend([None] * (row_group + 1 - len(column_bitsets)))
+            column_bitsets[row_group] = bitset
+        filters = {column: [(0, len(bitset)) if bitset is not None else None for bitset in column_bitsets]
+                   for column, column_bitsets in bitsets.items()}
+        return cls(filename, 'sidecar', filters, bitsets)
+
+    @classmethod
+    def open(cls, filename: str) -> 'BloomFilterIndex':
+        """
+        打开文件的 Bloom 过滤器：优先使用有效的旁路文件，否则读取文件中的过滤器
+
+        Args:
+            filename: Parquet 文件
+
+        Returns:
+            Bloom 过滤器索引（文件没有任何过滤器时 columns 为空，不排除行组）
+        """
+        return cls.load(filename) or cls.from_parquet(filename)
+
+    def _hash(self, column: str, value: Any) -> Optional[int]:
+        """计算值在该列过滤器中的哈希，无法转换为列类型时返回 None"""
+        if self.source == 'parquet':
+            data = _plain_encode(value, self._types[column], self._physical_types.get(column))
+            return None if data is None else _xxh64(data)
+        try:
+            values = pa.array([value], type=self._types[column])
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError):
+            return None
+        if values.null_count:
+            return None
+        return int(_sidecar_hashes(values)[0])
+
+    def _row_groups_containing(self, column: str, values: List[Any], row_groups: List[int]) -> List[int]:
+        """在候选行组中保留过滤器可能包含任一值的行组"""
+        hashes = [self._hash(column, value) for value in values]
+        if any(h is None for h in hashes):
+            return row_groups
+
+        locations = self.filters[column]
+        selected = []
+        f = open(self.filename, 'rb') if self.source == 'parquet' else None
+        try:
+            for i in row_groups:
+                location = locations[i] if i < len(locations) else None
+                if location is None:
+                    selected.append(i)
+                    continue
+                offset, num_bytes = location
+                for h in hashes:
+                    block_offset = _block_index(h, num_bytes) * _BLOCK_BYTES
+                    if f is not None:
+                        f.seek(offset + block_offset)
+                        block = f.read(_BLOCK_BYTES)
+                    else:
+                        block = self.bitsets[column][i][block_offset:block_offset + _BLOCK_BYTES]
+                    if _block_contains(block, h):
+                        selected.append(i)
+                        break
+        finally:
+            if f is not None:
+                f.close()
+        return selected
+
+    def select_row_groups(self, filters: Optional[Filters],
+                          row_groups: Optional[List[int]] = None) -> List[int]:
+        """
+        根据过滤条件中的等值条件（== 和 in）排除过滤器判定不包含该值的行组
+
+        其他操作符以及没有过滤器的列不排除行组。
+
+        Args:
+            filters: pyarrow 风格的过滤条件
+            row_groups: 候选行组（例如行组统计索引的剪枝结果），默认为所有行组
+
+        Returns:
+            行组序号列表
+        """
+        candidates = list(range(self.num_row_groups)) if row_groups is None else list(row_groups)
+        groups = normalize_filters(filters)
+        if not groups:
+            return candidates
+
+        selected = set()
+        for group in groups:
+            remaining = candidates
+            for column, op, value in group:
+                if not remaining:
+                    break
+                op = normalize_operator(op)
+                if column not in self.filters or op not in ('==', 'in'):
+                    continue
+                values = list(value) if op == 'in' else [value]
+                remaining = self._row_groups_containing(column, values, remaining)
+            selected.update(remaining)
+        return sorted(selected)
+
+    def read(self, filters: Optional[Filters] = None, columns: Optional[List[str]] = None,
+             stats_index: Optional[RowGroupIndex] = None) -> Tuple[pa.Table, Dict[str, Any]]:
+        """
+        先用行组统计信息、再用 Bloom 过滤器排除行组，最后读取剩余行组并精确过滤
+
+        Args:
+            filters: 过滤条件
+            columns: 要返回的列，默认返回所有列
+            stats_index: 行组统计索引，默认从文件元数据构建
+
+        Returns:
+            (过滤后的表, 读取计划)；计划在 RowGroupIndex.plan 的基础上增加
+            stats_row_groups（统计信息剪枝后的行组数）和 bloom_skipped_row_groups
+        """
+        stats_index = stats_index or RowGroupIndex.build(self.filename)
+        candidates = stats_index.select_row_groups(filters)
+        row_groups = self.select_row_groups(filters, candidates)
+
+        table, plan = stats_index.read(filters, columns, row_groups=row_groups)
+        plan['stats_row_groups'] = len(candidates)
+        plan['bloom_skipped_row_groups'] = len(candidates) - len(row_groups)
+        return table, plan
+
+
+def write_with_bloom_filters(table: pa.Table, filename: str, columns: List[str],
+                             fpp: float = DEFAULT_FPP, mode: str = 'auto',
+                             **write_options) -> BloomFilterIndex:
+    """
+    写入 Parquet 文件并为指定列生成 Bloom 过滤器
+
+    Args:
+        table: 数据表
+        filename: 输出文件名
+        columns: 需要过滤器的列，适合等值查询的高基数列
+        fpp: 误判率
+        mode: 'parquet' 写入文件、'sidecar' 生成旁路文件，'auto' 按 pyarrow 是否支持自动选择
+        **write_options: 传递给 pq.write_table 的参数（如 row_group_size）
+
+    Returns:
+        Bloom 过滤器索引
+    """
+    if mode not in BLOOM_MODES:
+        raise ValueError(f"mode 必须是 {BLOOM_MODES} 之一: {mode}")
+    if mode == 'auto':
+        mode = 'parquet' if PARQUET_BLOOM_FILTERS else 'sidecar'
+
+    if mode == 'parquet':
+        ndv = min(table.num_rows, write_options.get('row_group_size') or _DEFAULT_ROW_GROUP_ROWS)
+        pq.write_table(table, filename, **bloom_filter_write_options(columns, ndv, fpp), **write_options)
+        return BloomFilterIndex.from_parquet(filename)
+
+    pq.write_table(table, filename, **write_options)
+    sidecar_path = BloomFilterIndex.sidecar_path(filename)
+    if os.path.exists(sidecar_path):
+        os.remove(sidecar_path)
+    index = BloomFilterIndex.build(filename, columns, fpp)
+    index.save()
+    return index
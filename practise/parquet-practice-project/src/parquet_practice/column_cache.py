@@ -0,0 +1,302 @@
+"""
+列块缓存模块
+
+看板类查询反复读取同几列（City、Age、Income），每次都要重新解压和解码。
+本模块在进程内缓存解码后的列块（一个行组中的一列，Arrow 数组），键为 (文件, 行组, 列)，
+按内存预算用 LRU 或 ARC 策略淘汰；文件大小或修改时间变化时丢弃该文件的所有缓存列块。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import pyarrow as pa
+from typing import Dict, Any, Hashable, List, Optional, Tuple
+
+from .metadata_cache import MetadataCache
+from .filter_compiler import Filters, normalize_filters, compile_filters
+
+# 支持的淘汰策略
+CACHE_POLICIES = ('lru', 'arc')
+
+# 默认的缓存内存预算
+DEFAULT_COLUMN_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class _LRUPolicy:
+    """按字节预算淘汰最久未使用项的 LRU 策略"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def keys(self) -> List[Hashable]:
+        return list(self._items)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> int:
+        """插入缓存项，返回被淘汰的项数"""
+        self.remove(key)
+        self._items[key] = (value, size)
+        self.bytes += size
+        evicted = 0
+        while self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self._items.popitem(last=False)
+            self.bytes -= evicted_size
+            evicted += 1
+        return evicted
+
+    def remove(self, key: Hashable) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.bytes -= item[1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class _ARCPolicy:
+    """
+    自适应替换缓存（ARC）策略，按字节计算容量
+
+    T1 保存只访问过一次的项，T2 保存访问过多次的项；B1、B2 记录最近从 T1、T2 淘汰的键（不保存值）。
+    命中 B1 说明 T1 太小，命中 B2 说明 T2 太小，据此调整 T1 的目标大小 p。
+    一次性的大扫描只会进入 T1，不会冲掉 T2 中反复访问的热点列。
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.p = 0
+        self._t1, self._t2 = OrderedDict(), OrderedDict()
+        self._b1, self._b2 = OrderedDict(), OrderedDict()
+        self._sizes = {'t1': 0, 't2': 0, 'b1': 0, 'b2': 0}
+
+    @property
+    def bytes(self) -> int:
+        return self._sizes['t1'] + self._sizes['t2']
+
+    def __len__(self) -> int:
+        return len(self._t1) + len(self._t2)
+
+    def keys(self) -> List[Hashable]:
+        return list(self._t1) + list(self._t2)
+
+    def _pop(self, name: str, key: Hashable = None) -> Tuple[Hashable, Any]:
+        """从指定列表移除键（默认为最久未使用的键），返回 (键, 值或大小)"""
+        items = getattr(self, f'_{name}')
+        if key is None:
+            key, item = items.popitem(last=False)
+        else:
+            item = items.pop(key)
+        self._sizes[name] -= item[1] if name in ('t1', 't2') else item
+        return key, item
+
+    def _push(self, name: str, key: Hashable, item: Any) -> None:
+        getattr(self, f'_{name}')[key] = item
+        self._sizes[name] += item[1] if name in ('t1', 't2') else item
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if key in self._t1:
+            _, item = self._pop('t1', key)
+            self._push('t2', key, item)
+            return item[0]
+        if key in self._t2:
+            self._t2.move_to_end(key)
+            return self._t2[key][0]
+        return None
+
+    def _replace(self, size: int, in_b2: bool) -> int:
+        """为 size 字节的新项腾出空间，被淘汰的项进入对应的幽灵列表"""
+        evicted = 0
+        while self.bytes + size > self.max_bytes and len(self):
+            t1_bytes = self._sizes['t1']
+            if self._t1 and (t1_bytes > self.p or (in_b2 and t1_bytes >= self.p) or not self._t2):
+                key, (_, item_size) = self._pop('t1')
+                self._push('b1', key, item_size)
+            else:
+                key, (_, item_size) = self._pop('t2')
+                self._push('b2', key, item_size)
+            evicted += 1
+        return evicted
+
+    def _trim_ghosts(self) -> None:
+        """幽灵列表只记录键和大小，总量限制在容量以内"""
+        while self._sizes['t1'] + self._sizes['b1'] > self.max_bytes and self._b1:
+            self._pop('b1')
+        while self.bytes + self._sizes['b1'] + self._sizes['b2'] > 2 * self.max_bytes and self._b2:
+            self._pop('b2')
+
+    def put(self, key: Hashable, value: Any, size: int) -> int:
+        """插入缓存项（通常在 get 未命中之后），返回被淘汰的项数"""
+        self.remove(key)
+        if key in self._b1:
+            ratio = self._sizes['b2'] / self._sizes['b1'] if self._sizes['b1'] else 1
+            self.p = min(self.max_bytes, self.p + max(ratio, 1) * size)
+            self._pop('b1', key)
+            evicted = self._replace(size, in_b2=False)
+            self._push('t2', key, (value, size))
+        elif key in self._b2:
+            ratio = self._sizes['b1'] / self._sizes['b2'] if self._sizes['b2'] else 1
+            self.p = max(0, self.p - max(ratio, 1) * size)
+            self._pop('b2', key)
+            evicted = self._replace(size, in_b2=True)
+            self._push('t2', key, (value, size))
+        else:
+            evicted = self._replace(size, in_b2=False)
+            self._push('t1', key, (value, size))
+        self._trim_ghosts()
+        return evicted
+
+    def remove(self, key: Hashable) -> None:
+        for name in ('t1', 't2', 'b1', 'b2'):
+            if key in getattr(self, f'_{name}'):
+                self._pop(name, key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'recent_bytes': self._sizes['t1'],
+            'frequent_bytes': self._sizes['t2'],
+            'target_recent_bytes': int(self.p)
+        }
+
+
+class ColumnChunkCache:
+    """解码后列块的内存缓存"""
+
+    def __init__(self, max_bytes: int = DEFAULT_COLUMN_CACHE_BYTES, policy: str = 'lru',
+                 metadata_cache: Optional[MetadataCache] = None):
+        """
+        初始化列块缓存
+
+        Args:
+            max_bytes: 内存预算（按 Arrow 数组的 nbytes 计算），超过预算的单个列块不缓存
+            policy: 淘汰策略，'lru' 或 'arc'
+            metadata_cache: 文件元数据缓存，默认新建
+        """
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"policy 必须是 {CACHE_POLICIES} 之一: {policy}")
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes 必须大于 0: {max_bytes}")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.metadata_cache = metadata_cache or MetadataCache()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._store = _LRUPolicy(max_bytes) if policy == 'lru' else _ARCPolicy(max_bytes)
+        # 路径 -> 缓存列块对应的文件版本 (mtime_ns, size)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def _check_version(self, path: str) -> None:
+        """文件变化时丢弃该文件的所有缓存列块（调用方持有锁）"""
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        if self._versions.get(path, version) != version:
+            for key in self._store.keys():
+                if key[0] == path:
+                    self._store.remove(key)
+                    self.invalidations += 1
+        self._versions[path] = version
+
+    def read_row_group(self, path: str, row_group: int, columns: List[str]) -> pa.Table:
+        """
+        读取一个行组中的指定列，已缓存的列块直接返回，其余列一次读取后放入缓存
+
+        Args:
+            path: Parquet 文件
+            row_group: 行组序号
+            columns: 列名
+
+        Returns:
+            Arrow 表（列顺序与 columns 一致）
+        """
+        path = os.path.abspath(path)
+        arrays = {}
+        with self._lock:
+            self._check_version(path)
+            for name in columns:
+                value = self._store.get((path, row_group, name))
+                if value is not None:
+                    arrays[name] = value
+            self.hits += len(arrays)
+            self.misses += len(columns) - len(arrays)
+
+        missing = [name for name in columns if name not in arrays]
+        if missing:
+            parquet_file = self.metadata_cache.parquet_file(path)
+            table = parquet_file.read_row_group(row_group, columns=missing)
+            with self._lock:
+                for name in missing:
+                    values = table[name].combine_chunks()
+                    arrays[name] = values
+                    if values.nbytes <= self.max_bytes:
+                        self.evictions += self._store.put((path, row_group, name), values, values.nbytes)
+        return pa.table({name: arrays[name] for name in columns})
+
+    def read_table(self, path: str, columns: Optional[List[str]] = None,
+                   filters: Optional[Filters] = None) -> pa.Table:
+        """
+        与 pq.read_table(path, columns=..., filters=...) 等价的读取，列块从缓存中取得
+
+        先用（缓存的）行组统计信息排除行组，再按列块读取剩余行组并精确过滤。
+
+        Args:
+            path: Parquet 文件
+            columns: 要读取的列，默认读取所有列
+            filters: pyarrow 风格的过滤条件
+
+        Returns:
+            Arrow 表
+        """
+        schema = self.metadata_cache.schema(path)
+        index = self.metadata_cache.row_group_index(path)
+        needed = list(columns) if columns is not None else list(schema.names)
+        for group in normalize_filters(filters):
+            for column, _, _ in group:
+                if column not in needed:
+                    needed.append(column)
+
+        needed_schema = pa.schema([schema.field(name) for name in needed], metadata=schema.metadata)
+        tables = [pa.Table.from_arrays(self.read_row_group(path, i, needed).columns, schema=needed_schema)
+                  for i in index.select_row_groups(filters)]
+        table = pa.concat_tables(tables) if tables else needed_schema.empty_table()
+        if filters:
+            table = table.filter(compile_filters(filters))
+        if columns is not None:
+            table = table.select(columns)
+        return table
+
+    def clear(self) -> None:
+        """清空缓存（计数器保留）"""
+        with self._lock:
+            self._store = type(self._store)(self.max_bytes)
+            self._versions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计：列块命中、未命中、淘汰和失效次数，命中率，当前缓存的列块数和字节数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'policy': self.policy,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._store),
+                'bytes': self._store.bytes,
+                'max_bytes': self.max_bytes,
+                **self._store.stats()
+            }
@@ -4,29 +4,33 @@ Parquet 压缩算法比较练习模块
 提供不同压缩算法的性能比较功能。
 """
 
-import pyarrow as pa
 import pyarrow.parquet as pq
-import pandas as pd
 import os
 from typing import Dict, Any, List, Optional
 
-from .utils import PerformanceAnalyzer
+from .utils import PerformanceAnalyzer, ArrowTableData, DataFrameOrTable, CACHE_MODES
 
 
-class ParquetCompressionExercise:
+class ParquetCompressionExercise(ArrowTableData):
     """Parquet 压缩算法比较练习类"""
     
-    def __init__(self, data_df: pd.DataFrame, output_dir: str = "output"):
+    def __init__(self, data: DataFrameOrTable, output_dir: str = "output", cache_mode: str = 'warm',
+                 track_memory: bool = False):
         """
         初始化压缩算法比较练习
         
         Args:
-            data_df: 要测试的数据
+            data: 要测试的数据（DataFrame 或 Arrow 表），内部统一保存为 Arrow 表
             output_dir: 输出目录
+            cache_mode: 读取测试的缓存模式，'warm'、'cold'（每次读取前清除页缓存）或 'both'
+            track_memory: 是否测量读写操作的内存使用（峰值 RSS、Arrow 内存池、Python 分配），结果放在计时统计信息的 memory 键下
         """
-        self.df = data_df
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"cache_mode 必须是 {CACHE_MODES} 之一: {cache_mode}")
+        self.set_data(data)
         self.output_dir = output_dir
-        self.performance_analyzer = PerformanceAnalyzer()
+        self.cache_mode = cache_mode
+        self.performance_analyzer = PerformanceAnalyzer(track_memory=track_memory)
         self.compression_algorithms = ['SNAPPY', 'GZIP', 'LZ4', 'BROTLI', None]
         
         # 确保输出目录存在
@@ -48,13 +52,11 @@ class ParquetCompressionExercise:
         
         filename = os.path.join(self.output_dir, f'data_{compression_name.lower()}.parquet')
         
-        # 转换为 PyArrow 表
-        table = pa.Table.from_pandas(self.df)
-        
-        # 测试写入性能
-        _, write_time = self.performance_analyzer.measure_time(
-            pq.write_table, table, filename, compression=compression
+        # 测试写入性能（所有压缩算法共用同一个 Arrow 表）
+        _, write_stats = self.performance_analyzer.measure_stats(
+            pq.write_table, self.table, filename, compression=compression
         )
+        write_time = write_stats['median']
         
         # 获取文件大小
         file_size = self.performance_analyzer.get_file_size(filename)
@@ -63,18 +65,31 @@ class ParquetCompressionExercise:
         def read_table():
             return pq.read_table(filename)
         
-        _, read_time = self.performance_analyzer.measure_time(read_table)
-        
-        print(f"写入时间：{write_time:.4f} 秒")
-        print(f"读取时间：{read_time:.4f} 秒")
+        _, cache_stats = self.performance_analyzer.measure_cache_stats(
+            filename, read_table, cache_mode=self.cache_mode
+        )
+        read_stats = cache_stats.get('warm', cache_stats.get('cold'))
+        read_time = read_stats['median']
+        
+        print(f"写入时间：{self.performance_analyzer.format_stats(write_stats)}")
+        if 'warm' in cache_stats:
+            print(f"读取时间（热缓存）：{self.performance_analyzer.format_stats(cache_stats['warm'])}")
+        if 'cold' in cache_stats:
+            print(f"读取时间（冷缓存）：{self.performance_analyzer.format_stats(cache_stats['cold'])}")
         print(f"文件大小：{file_size:.2f} MB")
         
-        return {
+        result = {
             'write_time': write_time,
             'read_time': read_time,
             'file_size': file_size,
-            'filename': filename
+            'filename': filename,
+            'write_time_stats': write_stats,
+            'read_time_stats': read_stats
         }
+        if 'cold' in cache_stats:
+            result['cold_read_time'] = cache_stats['cold']['median']
+            result['cold_read_time_stats'] = cache_stats['cold']
+        return result
     
     def run_compression_exercise(self) -> Dict[str, Dict[str, float]]:
         """
@@ -156,6 +171,8 @@ class ParquetCompressionExercise:
                 'file_size': metrics['file_size'],
                 'compression_ratio': compression_ratio
             }
+            if 'cold_read_time' in metrics:
+                display_results[algo]['cold_read_time'] = metrics['cold_read_time']
         
         # 使用性能分析器显示结果
         self.performance_analyzer.compare_performance(display_results, "压缩算法性能对比")
@@ -179,15 +196,17 @@ class ParquetCompressionExercise:
                              key=lambda x: results[x].get('compression_ratio', 0))
         fastest_write = min(results.keys(), 
                            key=lambda x: results[x].get('write_time', float('inf')))
+        # 测了冷缓存时按冷缓存读取时间评估，反映真实的存储吞吐
+        read_key = 'cold_read_time' if all('cold_read_time' in r for r in results.values()) else 'read_time'
         fastest_read = min(results.keys(), 
-                          key=lambda x: results[x].get('read_time', float('inf')))
+                          key=lambda x: results[x].get(read_key, float('inf')))
         
         print(f"🏆 最佳压缩比: {best_compression} "
               f"({results[best_compression]['compression_ratio']:.2f}x)")
         print(f"⚡ 最快写入: {fastest_write} "
               f"({results[fastest_write]['write_time']:.4f}s)")
-        print(f"⚡ 最快读取: {fastest_read} "
-              f"({results[fastest_read]['read_time']:.4f}s)")
+        print(f"⚡ 最快读取{'（冷缓存）' if read_key == 'cold_read_time' else ''}: {fastest_read} "
+              f"({results[fastest_read][read_key]:.4f}s)")
         
         # 推荐算法
         print(f"\n📋 算法推荐:")
@@ -207,8 +226,8 @@ class ParquetCompressionExercise:
             write_score = (1 / metrics.get('write_time', 1)) / max(
                 1 / r.get('write_time', 1) for r in results.values()
             )
-            read_score = (1 / metrics.get('read_time', 1)) / max(
-                1 / r.get('read_time', 1) for r in results.values()
+            read_score = (1 / metrics.get(read_key, 1)) / max(
+                1 / r.get(read_key, 1) for r in results.values()
             )
             
             balanced_scores[algo] = (
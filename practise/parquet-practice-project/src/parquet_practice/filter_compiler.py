@@ -0,0 +1,138 @@
+"""
+过滤条件编译模块
+
+把 pyarrow 风格的析取范式过滤条件（[(列, 操作符, 值), ...] 或其列表，列表之间为 OR）
+编译为 pyarrow.compute 表达式。同一个表达式既可以下推给 pq.read_table 和数据集扫描，
+也可以直接在内存中的 Arrow 表上向量化求值，基线路径和下推路径的过滤语义因此完全一致。
+
+在 pyarrow 支持的操作符之外，还支持 'between'（值为 (下界, 上界)，两端包含）、
+'is null' 和 'is not null'（值被忽略，可写 None）。
+"""
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Any, List, Optional, Tuple, Union
+
+Filters = Union[List[Tuple], List[List[Tuple]]]
+
+# 支持的过滤操作符（规范名称）
+OPERATORS = ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in', 'between', 'is null', 'is not null')
+
+# 操作符的同义写法
+_OPERATOR_ALIASES = {'=': '==', 'not_in': 'not in', 'is_null': 'is null', 'is_not_null': 'is not null'}
+
+
+def normalize_filters(filters: Optional[Filters]) -> List[List[Tuple]]:
+    """
+    将 pyarrow 风格的过滤条件统一为析取范式（OR 连接的 AND 条件组）
+
+    Args:
+        filters: [(列, 操作符, 值), ...] 或 [[(列, 操作符, 值), ...], ...]
+
+    Returns:
+        条件组列表；filters 为空时返回 []
+    """
+    if not filters:
+        return []
+    if isinstance(filters[0], tuple):
+        return [list(filters)]
+    return [list(group) for group in filters]
+
+
+def normalize_operator(op: str) -> str:
+    """
+    操作符的规范名称：忽略大小写和多余空白，'=' 视为 '=='
+
+    Raises:
+        ValueError: 不支持的操作符
+    """
+    name = ' '.join(op.lower().split())
+    name = _OPERATOR_ALIASES.get(name, name)
+    if name not in OPERATORS:
+        raise ValueError(f"不支持的过滤操作符: {op}")
+    return name
+
+
+def compile_condition(column: str, op: str, value: Any) -> pc.Expression:
+    """
+    编译单个条件
+
+    与 pyarrow 一致，比较运算遇到 null 不成立；'not in' 是 'in' 取反，因此保留 null 行。
+
+    Args:
+        column: 列名
+        op: 操作符
+        value: 比较值；'in'/'not in' 为值的集合，'between' 为 (下界, 上界)
+
+    Returns:
+        布尔表达式
+    """
+    op = normalize_operator(op)
+    field = pc.field(column)
+    if op == 'is null':
+        return field.is_null()
+    if op == 'is not null':
+        return field.is_valid()
+    if op in ('in', 'not in'):
+        if isinstance(value, (str, bytes)) or not hasattr(value, '__iter__'):
+            raise ValueError(f"'{op}' 的值必须是集合: {value!r}")
+        expression = field.isin(list(value))
+        return ~expression if op == 'not in' else expression
+    if op == 'between':
+        if isinstance(value, (str, bytes)) or len(value) != 2:
+            raise ValueError(f"'between' 的值必须是 (下界, 上界): {value!r}")
+        low, high = value
+        return (field >= low) & (field <= high)
+    if op == '==':
+        return field == value
+    if op == '!=':
+        return field != value
+    if op == '<':
+        return field < value
+    if op == '<=':
+        return field <= value
+    if op == '>':
+        return field > value
+    return field >= value
+
+
+def compile_filters(filters: Optional[Filters]) -> Optional[pc.Expression]:
+    """
+    把析取范式过滤条件编译为一个表达式
+
+    返回值可以直接传给 pq.read_table(filters=...)、Dataset.to_table(filter=...) 或 Table.filter。
+
+    Args:
+        filters: pyarrow 风格的过滤条件
+
+    Returns:
+        布尔表达式；filters 为空时返回 None
+    """
+    expression = None
+    for group in normalize_filters(filters):
+        group_expression = None
+        for column, op, value in group:
+            condition = compile_condition(column, op, value)
+            group_expression = condition if group_expression is None else group_expression & condition
+        if group_expression is None:
+            # 空条件组匹配所有行
+            group_expression = pc.scalar(True)
+        expression = group_expression if expression is None else expression | group_expression
+    return expression
+
+
+def filter_table(table: pa.Table, filters: Optional[Filters]) -> pa.Table:
+    """
+    在内存中的 Arrow 表上向量化地执行过滤条件
+
+    Args:
+        table: Arrow 表，需要包含过滤条件涉及的列
+        filters: pyarrow 风格的过滤条件
+
+    Returns:
+        过滤后的表；filters 为空时原样返回
+    """
+    expression = compile_filters(filters)
+    if expression is None:
+        return table
+    return table.filter(expression)
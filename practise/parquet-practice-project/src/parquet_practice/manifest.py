@@ -0,0 +1,294 @@
+"""
+数据集清单模块
+
+ds.dataset(目录) 每次都要遍历目录树并打开文件尾部推断 schema，分区很多时发现过程主导查询延迟。
+清单在写入数据集后一次性记录所有数据文件的路径、分区值、行数、各列统计信息和尾部元数据位置，
+保存为数据集目录下的一个 Parquet 文件；查询时只需读取这一个文件即可构建数据集，
+并可以在打开任何数据文件之前按分区值和列统计信息排除文件。
+"""
+
+import json
+import os
+import struct
+from urllib.parse import unquote
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from typing import Dict, Any, List, Optional
+
+from .row_group_index import RowGroupIndex, Filters, normalize_filters, statistics_mask
+
+# 清单文件名，以下划线开头，ds.dataset 发现文件时会忽略它
+MANIFEST_FILENAME = '_manifest.parquet'
+
+# 清单表中每个文件的基本信息列
+_FILE_COLUMNS = ['path', 'file_size', 'num_rows', 'num_row_groups', 'footer_offset', 'footer_length']
+
+# 清单文件的元数据键
+_PARTITION_COLS_KEY = b'partition_cols'
+_SCHEMA_KEY = b'dataset_schema'
+
+
+def _partition_values(relative_dir: str) -> Dict[str, str]:
+    """解析 hive 风格目录（City=Beijing/AgeGroup=Middle）中的分区值"""
+    values = {}
+    for part in relative_dir.split(os.sep):
+        key, sep, value = part.partition('=')
+        if sep:
+            values[unquote(key)] = unquote(value)
+    return values
+
+
+def _footer_length(filename: str) -> int:
+    """读取文件末尾记录的 FileMetaData 长度"""
+    with open(filename, 'rb') as f:
+        f.seek(-8, 2)
+        return struct.unpack('<I', f.read(4))[0]
+
+
+class DatasetManifest:
+    """hive 分区 Parquet 数据集的文件清单"""
+
+    def __init__(self, base_dir: str, table: pa.Table):
+        """
+        初始化数据集清单
+
+        Args:
+            base_dir: 数据集目录
+            table: 清单表，每个数据文件一行，包含 path（相对 base_dir）、file_size、num_rows、
+                   num_row_groups、footer_offset、footer_length、每个分区列的取值，
+                   以及每列的 "<列>.min"、"<列>.max"、"<列>.null_count"
+        """
+        self.base_dir = base_dir
+        self.table = table
+        metadata = table.schema.metadata or {}
+        self.partition_cols = json.loads(metadata.get(_PARTITION_COLS_KEY, b'[]'))
+        self.schema = pa.ipc.read_schema(pa.py_buffer(metadata[_SCHEMA_KEY])) \
+            if _SCHEMA_KEY in metadata else pa.schema([])
+        self.columns = [name[:-len('.min')] for name in table.column_names if name.endswith('.min')]
+
+    @staticmethod
+    def manifest_path(base_dir: str) -> str:
+        """清单文件路径"""
+        return os.path.join(base_dir, MANIFEST_FILENAME)
+
+    @classmethod
+    def build(cls, base_dir: str, partition_cols: List[str]) -> 'DatasetManifest':
+        """
+        遍历数据集目录并读取每个文件的尾部元数据，构建清单
+
+        Args:
+            base_dir: 数据集目录（hive 分区）
+            partition_cols: 分区列（按目录层级顺序）
+
+        Returns:
+            数据集清单；schema 取第一个文件的 schema 加上分区列
+        """
+        files = []
+        for root, dirs, filenames in os.walk(base_dir):
+            dirs[:] = sorted(d for d in dirs if not d.startswith(('.', '_')))
+            for filename in sorted(filenames):
+                if filename.endswith('.parquet') and not filename.startswith(('.', '_')):
+                    files.append(os.path.join(root, filename))
+
+        file_schema = None
+        data = {name: [] for name in _FILE_COLUMNS + list(partition_cols)}
+        stats = []
+        for filename in files:
+            metadata = pq.read_metadata(filename)
+            file_schema = file_schema or metadata.schema.to_arrow_schema()
+            file_size = os.path.getsize(filename)
+            footer_length = _footer_length(filename)
+            relative_path = os.path.relpath(filename, base_dir)
+
+            data['path'].append(relative_path)
+            data['file_size'].append(file_size)
+            data['num_rows'].append(metadata.num_rows)
+            data['num_row_groups'].append(metadata.num_row_groups)
+            data['footer_offset'].append(file_size - 8 - footer_length)
+            data['footer_length'].append(footer_length)
+            values = _partition_values(os.path.dirname(relative_path))
+            for col in partition_cols:
+                data[col].append(values.get(col))
+            stats.append(RowGroupIndex.build(filename, metadata))
+
+        file_schema = file_schema or pa.schema([])
+        schema = pa.schema([field for field in file_schema if field.name not in partition_cols] +
+                           [pa.field(col, pa.string()) for col in partition_cols],
+                           metadata=file_schema.metadata)
+
+        arrays = {key: pa.array(values, type=pa.string() if key in partition_cols or key == 'path' else pa.int64())
+                  for key, values in data.items()}
+        columns = [field.name for field in file_schema
+                   if field.name not in partition_cols and not pa.types.is_nested(field.type)]
+        for name in columns:
+            # 字典编码列的统计信息按值类型聚合和保存（min/max 没有字典类型的内核）
+            value_type = schema.field(name).type
+            if pa.types.is_dictionary(value_type):
+                value_type = value_type.value_type
+            mins, maxes, null_counts = [], [], []
+            for index in stats:
+                if name not in index.columns or index.num_row_groups == 0:
+                    mins.append(None)
+                    maxes.append(None)
+                    null_counts.append(None)
+                    continue
+                # 任一行组缺少统计信息时文件级统计信息也视为缺失
+                col_min = index.table[f"{name}.min"].cast(value_type)
+                col_max = index.table[f"{name}.max"].cast(value_type)
+                has_min_max = col_min.null_count == 0 and col_max.null_count == 0
+                mins.append(pc.min(col_min).as_py() if has_min_max else None)
+                maxes.append(pc.max(col_max).as_py() if has_min_max else None)
+                col_nulls = index.table[f"{name}.null_count"]
+                null_counts.append(pc.sum(col_nulls).as_py() if col_nulls.null_count == 0 else None)
+            arrays[f"{name}.min"] = pa.array(mins, type=value_type)
+            arrays[f"{name}.max"] = pa.array(maxes, type=value_type)
+            arrays[f"{name}.null_count"] = pa.array(null_counts, type=pa.int64())
+
+        table = pa.table(arrays).replace_schema_metadata({
+            _PARTITION_COLS_KEY: json.dumps(list(partition_cols)).encode(),
+            _SCHEMA_KEY: schema.serialize().to_pybytes()
+        })
+        return cls(base_dir, table)
+
+    def save(self, path: Optional[str] = None) -> str:
+        """
+        保存清单文件（Parquet 格式）
+
+        Args:
+            path: 保存路径，默认为 manifest_path(base_dir)
+
+        Returns:
+            保存路径
+        """
+        path = path or self.manifest_path(self.base_dir)
+        pq.write_table(self.table, path)
+        return path
+
+    @classmethod
+    def load(cls, base_dir: str, path: Optional[str] = None) -> Optional['DatasetManifest']:
+        """
+        加载清单文件（不列举目录，不打开数据文件）
+
+        清单是写入时的快照，加载时不检查目录是否变化（检查需要列举目录）；
+        写入或删除数据文件后应重新构建并保存清单。
+
+        Args:
+            base_dir: 数据集目录
+            path: 清单文件路径，默认为 manifest_path(base_dir)
+
+        Returns:
+            数据集清单；清单文件不存在时返回 None
+        """
+        path = path or cls.manifest_path(base_dir)
+        if not os.path.exists(path):
+            return None
+        return cls(base_dir, pq.read_table(path))
+
+    @classmethod
+    def load_or_build(cls, base_dir: str, partition_cols: List[str], save: bool = True) -> 'DatasetManifest':
+        """
+        加载清单，不存在或分区列不同时重新构建
+
+        Args:
+            base_dir: 数据集目录
+            partition_cols: 分区列
+            save: 重新构建后是否保存清单文件
+
+        Returns:
+            数据集清单
+        """
+        manifest = cls.load(base_dir)
+        if manifest is None or manifest.partition_cols != list(partition_cols):
+            manifest = cls.build(base_dir, partition_cols)
+            if save:
+                manifest.save()
+        return manifest
+
+    @property
+    def num_files(self) -> int:
+        """数据文件数量"""
+        return self.table.num_rows
+
+    def _predicate_mask(self, column: str, op: str, value: Any) -> pa.ChunkedArray:
+        """
+        计算单个条件下每个文件是否可能包含匹配行
+
+        分区列视为 min 和 max 都等于分区值；没有统计信息的列保守地返回 True。
+        """
+        if column in self.partition_cols:
+            values = self.table[column]
+            null_count = pa.chunked_array([pa.array([0] * self.num_files, type=pa.int64())])
+            return statistics_mask(values, values, null_count, self.table['num_rows'], op, value)
+        if column not in self.columns:
+            return pa.chunked_array([pa.array([True] * self.num_files)])
+        return statistics_mask(self.table[f"{column}.min"], self.table[f"{column}.max"],
+                               self.table[f"{column}.null_count"], self.table['num_rows'], op, value)
+
+    def select_files(self, filters: Optional[Filters] = None) -> List[int]:
+        """
+        根据过滤条件选出可能包含匹配行的文件
+
+        Args:
+            filters: pyarrow 风格的过滤条件（AND 列表或 OR 连接的 AND 条件组）
+
+        Returns:
+            文件在清单中的序号列表
+        """
+        groups = normalize_filters(filters)
+        if not groups:
+            return list(range(self.num_files))
+
+        selected = None
+        for group in groups:
+            group_mask = None
+            for column, op, value in group:
+                mask = self._predicate_mask(column, op, value)
+                group_mask = mask if group_mask is None else pc.and_(group_mask, mask)
+            selected = group_mask if selected is None else pc.or_(selected, group_mask)
+        return pc.indices_nonzero(selected).to_pylist()
+
+    def to_dataset(self, filters: Optional[Filters] = None, filesystem: Optional[pafs.FileSystem] = None,
+                   format: Optional[ds.ParquetFileFormat] = None) -> ds.FileSystemDataset:
+        """
+        根据清单构建数据集，不列举目录也不打开数据文件
+
+        每个文件的分区表达式由清单中的分区值构成，dataset.to_table(filter=...) 仍会按分区裁剪。
+
+        Args:
+            filters: 过滤条件，只把可能匹配的文件加入数据集（读取时仍需传入过滤条件做精确过滤）
+            filesystem: 读取数据文件使用的文件系统，默认为本地文件系统
+            format: Parquet 文件格式（可携带读取设置），默认为 ds.ParquetFileFormat()
+
+        Returns:
+            数据集
+        """
+        selected = self.select_files(filters)
+        paths = self.table['path'].take(selected).to_pylist()
+        partitions = None
+        if self.partition_cols:
+            # 由 pyarrow 解析目录名得到分区表达式，比在 Python 中逐个拼接表达式快得多
+            partitioning = ds.partitioning(
+                pa.schema([self.schema.field(col) for col in self.partition_cols]), flavor='hive'
+            )
+            partitions = [partitioning.parse(path.replace(os.sep, '/')) for path in paths]
+        return ds.FileSystemDataset.from_paths(
+            [os.path.join(os.path.abspath(self.base_dir), path) for path in paths],
+            schema=self.schema,
+            format=format or ds.ParquetFileFormat(),
+            filesystem=filesystem or pafs.LocalFileSystem(),
+            partitions=partitions
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """清单概要：文件数、行数、数据大小和尾部元数据总大小"""
+        return {
+            'num_files': self.num_files,
+            'num_rows': pc.sum(self.table['num_rows']).as_py() or 0,
+            'total_bytes': pc.sum(self.table['file_size']).as_py() or 0,
+            'footer_bytes': pc.sum(self.table['footer_length']).as_py() or 0,
+            'partition_cols': self.partition_cols
+        }
@@ -0,0 +1,178 @@
+"""
+Parquet 文件元数据缓存模块
+
+每次 pq.read_table 都要重新读取并解析文件尾部的 Thrift 元数据，宽表的元数据可达数百 KB，
+对同一文件的大量小查询中解析元数据的开销往往超过读取数据本身。
+本模块在进程内按 (路径, 修改时间, 大小) 缓存解析后的元数据，按字节预算做 LRU 淘汰。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Dict, Any, List, Optional, Tuple
+
+from .row_group_index import RowGroupIndex, Filters
+
+# 默认的缓存字节预算
+DEFAULT_METADATA_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class MetadataCache:
+    """Parquet 文件元数据的 LRU 缓存"""
+
+    def __init__(self, max_bytes: int = DEFAULT_METADATA_CACHE_BYTES):
+        """
+        初始化元数据缓存
+
+        Args:
+            max_bytes: 字节预算，按元数据序列化后的大小（即文件尾部长度）加上行组统计索引的大小计算；
+                       超过预算时淘汰最久未使用的文件，单个超过预算的文件不缓存
+        """
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes 必须大于 0: {max_bytes}")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(path: str) -> Tuple[int, int]:
+        """文件版本：(修改时间, 大小)，任一变化都视为新文件"""
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _remove(self, path: str) -> None:
+        entry = self._entries.pop(path)
+        self._bytes -= entry['nbytes']
+
+    def _evict(self) -> None:
+        """超出字节预算时从最久未使用的缓存项开始淘汰（调用方持有锁）"""
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _entry(self, path: str) -> Dict[str, Any]:
+        """
+        查找或加载缓存项
+
+        Returns:
+            {'version', 'path', 'metadata', 'index', 'nbytes'}，index 为按需构建的行组统计索引
+        """
+        path = os.path.abspath(path)
+        version = self._version(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                if entry['version'] == version:
+                    self.hits += 1
+                    self._entries.move_to_end(path)
+                    return entry
+                self.invalidations += 1
+                self._remove(path)
+            self.misses += 1
+
+        metadata = pq.read_metadata(path)
+        entry = {
+            'version': version,
+            'path': path,
+            'metadata': metadata,
+            'index': None,
+            'nbytes': metadata.serialized_size
+        }
+        if entry['nbytes'] > self.max_bytes:
+            return entry
+
+        with self._lock:
+            if path in self._entries:
+                self._remove(path)
+            self._entries[path] = entry
+            self._bytes += entry['nbytes']
+            self._evict()
+        return entry
+
+    def metadata(self, path: str) -> pq.FileMetaData:
+        """文件的 FileMetaData，可传给 pq.ParquetFile(metadata=...)"""
+        return self._entry(path)['metadata']
+
+    def schema(self, path: str) -> pa.Schema:
+        """文件的 Arrow schema"""
+        return self.metadata(path).schema.to_arrow_schema()
+
+    def row_group_index(self, path: str) -> RowGroupIndex:
+        """文件的行组统计索引（基于缓存的元数据构建并随元数据一起缓存）"""
+        return self._row_group_index(self._entry(path))
+
+    def _row_group_index(self, entry: Dict[str, Any]) -> RowGroupIndex:
+        """缓存项的行组统计索引，第一次带过滤条件读取时构建，其大小计入字节预算"""
+        if entry['index'] is None:
+            index = RowGroupIndex.build(entry['path'], entry['metadata'])
+            with self._lock:
+                if entry['index'] is None:
+                    entry['index'] = index
+                    entry['nbytes'] += index.table.nbytes
+                    if self._entries.get(entry['path']) is entry:
+                        self._bytes += index.table.nbytes
+                        self._evict()
+        return entry['index']
+
+    def parquet_file(self, path: str, **kwargs) -> pq.ParquetFile:
+        """使用缓存元数据打开 ParquetFile"""
+        return pq.ParquetFile(path, metadata=self.metadata(path), **kwargs)
+
+    def read_table(self, path: str, columns: Optional[List[str]] = None,
+                   filters: Optional[Filters] = None) -> pa.Table:
+        """
+        与 pq.read_table(path, columns=..., filters=...) 等价的读取，使用缓存的元数据
+
+        通过 ParquetFile(metadata=...) 读取；有过滤条件时先用缓存的行组统计索引跳过行组，
+        再精确过滤。
+
+        Args:
+            path: Parquet 文件
+            columns: 要读取的列，默认读取所有列
+            filters: pyarrow 风格的过滤条件
+
+        Returns:
+            Arrow 表
+        """
+        entry = self._entry(path)
+        if not filters:
+            return pq.ParquetFile(path, metadata=entry['metadata']).read(columns=columns)
+        table, _ = self._row_group_index(entry).read(filters, columns, metadata=entry['metadata'])
+        return table
+
+    def invalidate(self, path: str) -> None:
+        """移除指定文件的缓存项"""
+        with self._lock:
+            path = os.path.abspath(path)
+            if path in self._entries:
+                self._remove(path)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """清空缓存（计数器保留）"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计：命中、未命中、淘汰、失效次数，命中率，当前缓存项数和字节数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,448 @@
+"""
+页索引模块
+
+行组很大时，行组级剪枝之后仍要读取整个列块。写入时开启 write_page_index=True，
+Parquet 会为每个列块记录 ColumnIndex（每个数据页的 min/max/null_count）和
+OffsetIndex（每个数据页在文件中的位置和第一行的行号）。
+
+pyarrow 写入页索引但读取时不使用。本模块解析页索引，算出过滤条件可能匹配的行范围，
+每列只读取与这些行重叠的数据页（以及字典页），拼成只含这些页的单列 Parquet 文件交给 pyarrow 解码，
+再按行号对齐各列。
+"""
+
+import json
+import struct
+import inspect
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Dict, Any, List, Optional, Tuple
+
+from .parquet_format import (
+    ThriftList, ThriftStruct, read_file_metadata, read_struct, top_level_leaves, write_struct,
+    MAGIC, I32, I64, LIST, BINARY, STRUCT
+)
+from .row_group_index import RowGroupIndex, statistics_mask
+from .filter_compiler import Filters, normalize_filters, compile_filters
+
+# 当前 pyarrow 是否支持按行数限制数据页大小（max_rows_per_page）
+PAGE_ROW_LIMITS = 'max_rows_per_page' in inspect.signature(pq.ParquetWriter.__init__).parameters
+
+# 行范围列表：按起始行排序、互不重叠的 [start, stop)
+RowRanges = List[Tuple[int, int]]
+
+# 单列文件中需要去掉的 ColumnMetaData 字段，它们描述的是原始列块的全部数据页：
+# 8 key_value_metadata、10 index_page_offset、12 statistics、14/15 Bloom 过滤器位置、
+# 16 size_statistics、17 geospatial_statistics
+_DROPPED_COLUMN_META_FIELDS = (8, 10, 12, 14, 15, 16, 17)
+
+# 时间戳逻辑类型的单位
+_TIME_UNITS = {'milliseconds': 'ms', 'microseconds': 'us', 'nanoseconds': 'ns'}
+
+
+def page_index_write_options(max_rows_per_page: Optional[int] = None) -> Dict[str, Any]:
+    """
+    写入页索引的 ParquetWriter 参数
+
+    当前 pyarrow 不支持 max_rows_per_page 时忽略该参数，数据页只按 data_page_size（默认 1 MiB）切分，
+    页级剪枝的粒度更粗，但结果不受影响。
+
+    Args:
+        max_rows_per_page: 每个数据页的最大行数，None 表示使用 pyarrow 的默认值
+
+    Returns:
+        可传给 pq.write_table 或 pq.ParquetWriter 的参数
+    """
+    options = {'write_page_index': True}
+    if max_rows_per_page is not None and PAGE_ROW_LIMITS:
+        options['max_rows_per_page'] = max_rows_per_page
+    return options
+
+
+def _union_ranges(ranges: RowRanges) -> RowRanges:
+    """合并重叠或相邻的行范围"""
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def _intersect_ranges(left: RowRanges, right: RowRanges) -> RowRanges:
+    """两组有序行范围的交集"""
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        start = max(left[i][0], right[j][0])
+        stop = min(left[i][1], right[j][1])
+        if start < stop:
+            result.append((start, stop))
+        if left[i][1] < right[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def _statistics_type(column: pq.ColumnSchema) -> Optional[pa.DataType]:
+    """
+    页级 min/max 使用的 Arrow 类型（按文件中存储的单位，不转换为读取时的类型）
+
+    不支持的类型（布尔、INT96、定长二进制、小数等）返回 None，这些列不参与页级剪枝。
+    """
+    logical = json.loads(column.logical_type.to_json())
+    logical_type = logical.get('Type')
+    physical_type = column.physical_type
+    if physical_type == 'BYTE_ARRAY':
+        if logical_type in ('String', 'Enum', 'Json'):
+            return pa.string()
+        return pa.binary() if logical_type == 'None' else None
+    if physical_type == 'FLOAT':
+        return pa.float32()
+    if physical_type == 'DOUBLE':
+        return pa.float64()
+    if physical_type not in ('INT32', 'INT64'):
+        return None
+    if logical_type == 'None':
+        return pa.int32() if physical_type == 'INT32' else pa.int64()
+    if logical_type == 'Int':
+        prefix = 'int' if logical.get('isSigned', True) else 'uint'
+        return getattr(pa, f"{prefix}{logical['bitWidth']}")()
+    if logical_type == 'Date':
+        return pa.date32()
+    if logical_type == 'Timestamp' and logical.get('timeUnit') in _TIME_UNITS:
+        return pa.timestamp(_TIME_UNITS[logical['timeUnit']], tz='UTC' if logical.get('isAdjustedToUTC') else None)
+    return None
+
+
+def _decode_statistics(values: List[bytes], null_pages: List[bool],
+                       statistics_type: pa.DataType) -> Optional[pa.Array]:
+    """
+    将 ColumnIndex 中 PLAIN 编码的 min/max 值解码为 Arrow 数组，全 null 的页为 null
+
+    无法解码时返回 None（该列不参与页级剪枝）。
+    """
+    if pa.types.is_string(statistics_type) or pa.types.is_binary(statistics_type):
+        try:
+            decoded = [None if is_null else
+                       (value.decode('utf-8') if pa.types.is_string(statistics_type) else value)
+                       for value, is_null in zip(values, null_pages)]
+        except UnicodeDecodeError:
+            # 截断后的 min/max 可能不是合法的 UTF-8
+            return None
+        return pa.array(decoded, type=statistics_type)
+
+    if pa.types.is_floating(statistics_type):
+        dtype = '<f4' if statistics_type.bit_width == 32 else '<f8'
+    else:
+        # 64 位以下的整数、日期都按 INT32 存储
+        dtype = '<i8' if statistics_type.bit_width == 64 else '<i4'
+    width = np.dtype(dtype).itemsize
+    raw = b''.join(bytes(width) if is_null else value[:width] for value, is_null in zip(values, null_pages))
+    array = pa.array(np.frombuffer(raw, dtype=dtype), mask=np.array(null_pages, dtype=bool))
+    if array.type == statistics_type:
+        return array
+    if array.type.bit_width == statistics_type.bit_width:
+        return array.view(statistics_type)
+    return array.cast(statistics_type, safe=False)
+
+
+class PageIndex:
+    """Parquet 文件的页索引"""
+
+    def __init__(self, filename: str):
+        """
+        读取文件尾部元数据和所有顶层基本类型列的页索引
+
+        页索引集中存放在文件末尾，一次读取即可。没有页索引的列块读取时回退为读取整个列块。
+
+        Args:
+            filename: 写入时开启了 write_page_index 的 Parquet 文件
+        """
+        self.filename = filename
+        self.metadata = read_file_metadata(filename)
+        parquet_file = pq.ParquetFile(filename)
+        self.schema = parquet_file.schema_arrow
+        self.num_row_groups = len(self.metadata.get(4, []))
+        self.row_group_rows = [row_group[3] for row_group in self.metadata.get(4, [])]
+
+        # 列名 -> (SchemaElement 序号, 叶子列序号)，只保留 Arrow schema 中的顶层列
+        self._leaves = {name: position for name, position in top_level_leaves(self.metadata[2]).items()
+                        if name in self.schema.names}
+        statistics_types = {name: _statistics_type(parquet_file.schema.column(leaf))
+                            for name, (_, leaf) in self._leaves.items()}
+
+        # 页索引所在的文件区间
+        locations = []
+        for row_group in self.metadata.get(4, []):
+            for name, (_, leaf) in self._leaves.items():
+                chunk = row_group[1][leaf]
+                for offset_field, length_field in ((4, 5), (6, 7)):
+                    if offset_field in chunk:
+                        locations.append((chunk[offset_field], chunk[length_field]))
+        self.index_bytes = 0
+        index_data = b''
+        index_start = 0
+        if locations:
+            index_start = min(offset for offset, _ in locations)
+            index_stop = max(offset + length for offset, length in locations)
+            with open(filename, 'rb') as f:
+                f.seek(index_start)
+                index_data = f.read(index_stop - index_start)
+            self.index_bytes = len(index_data)
+
+        # (行组, 列名) -> 页信息
+        self.pages: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        for i, row_group in enumerate(self.metadata.get(4, [])):
+            for name, (_, leaf) in self._leaves.items():
+                chunk = row_group[1][leaf]
+                if 4 not in chunk:
+                    continue
+                offset_index, _ = read_struct(index_data, chunk[4] - index_start)
+                locations = offset_index[1]
+                first_rows = [location[3] for location in locations]
+                pages = {
+                    'offsets': [location[1] for location in locations],
+                    'sizes': [location[2] for location in locations],
+                    'first_rows': first_rows,
+                    'num_rows': [stop - start for start, stop in zip(first_rows, first_rows[1:] + [row_group[3]])],
+                    'min': None,
+                    'max': None,
+                    'null_counts': None
+                }
+                if 6 in chunk and statistics_types[name] is not None:
+                    column_index, _ = read_struct(index_data, chunk[6] - index_start)
+                    null_pages = list(column_index[1])
+                    pages['min'] = _decode_statistics(column_index[2], null_pages, statistics_types[name])
+                    pages['max'] = _decode_statistics(column_index[3], null_pages, statistics_types[name])
+                    if 5 in column_index:
+                        pages['null_counts'] = pa.array(column_index[5], type=pa.int64())
+                    else:
+                        pages['null_counts'] = pa.array([n if is_null else None for n, is_null in
+                                                         zip(pages['num_rows'], null_pages)], type=pa.int64())
+                self.pages[(i, name)] = pages
+
+    @property
+    def num_pages(self) -> int:
+        """所有列块的数据页总数"""
+        return sum(len(pages['offsets']) for pages in self.pages.values())
+
+    def _matching_ranges(self, row_group: int, column: str, op: str, value: Any) -> Optional[RowRanges]:
+        """单个条件在行组内可能匹配的行范围，无法判断时返回 None"""
+        pages = self.pages.get((row_group, column))
+        if pages is None or pages['min'] is None or pages['max'] is None:
+            return None
+        mask = statistics_mask(pages['min'], pages['max'], pages['null_counts'],
+                               pa.array(pages['num_rows'], type=pa.int64()), op, value)
+        return _union_ranges([(start, start + num_rows) for selected, start, num_rows in
+                              zip(mask.to_pylist(), pages['first_rows'], pages['num_rows']) if selected])
+
+    def select_rows(self, filters: Optional[Filters],
+                    row_groups: Optional[List[int]] = None) -> Dict[int, RowRanges]:
+        """
+        根据过滤条件和页级 min/max 选出可能匹配的行范围
+
+        Args:
+            filters: pyarrow 风格的过滤条件
+            row_groups: 候选行组（例如行组统计索引的剪枝结果），默认为所有行组
+
+        Returns:
+            {行组: 行组内的行范围}，不包含没有可能匹配行的行组
+        """
+        if row_groups is None:
+            row_groups = range(self.num_row_groups)
+        groups = normalize_filters(filters) or [[]]
+
+        selected = {}
+        for i in row_groups:
+            ranges = []
+            for group in groups:
+                group_ranges = [(0, self.row_group_rows[i])]
+                for column, op, value in group:
+                    matching = self._matching_ranges(i, column, op, value)
+                    if matching is not None:
+                        group_ranges = _intersect_ranges(group_ranges, matching)
+                    if not group_ranges:
+                        break
+                ranges.extend(group_ranges)
+            ranges = _union_ranges(ranges)
+            if ranges:
+                selected[i] = ranges
+        return selected
+
+    def _single_column_file(self, row_group: int, column: str, body: bytes,
+                            dictionary_length: int, num_rows: int) -> bytes:
+        """
+        把字典页和选中的数据页组装为只有一个行组、一列的 Parquet 文件
+
+        schema、编码和压缩信息沿用原文件，只改写页的位置、数量和大小。
+        """
+        position, leaf = self._leaves[column]
+        root = self.metadata[2][0].copy()
+        root[5] = 1
+
+        column_meta = self.metadata[4][row_group][1][leaf][3].copy()
+        for field_id in _DROPPED_COLUMN_META_FIELDS:
+            column_meta.pop(field_id, None)
+        column_meta.pop(11, None)
+        if dictionary_length:
+            column_meta.set(11, I64, len(MAGIC))
+        column_meta[9] = len(MAGIC) + dictionary_length
+        column_meta[5] = num_rows
+        column_meta[6] = column_meta[7] = len(body)
+
+        chunk = ThriftStruct()
+        chunk.set(2, I64, len(MAGIC))
+        chunk.set(3, STRUCT, column_meta)
+        new_row_group = ThriftStruct()
+        new_row_group.set(1, LIST, ThriftList(STRUCT, [chunk]))
+        new_row_group.set(2, I64, len(body))
+        new_row_group.set(3, I64, num_rows)
+
+        file_meta = ThriftStruct()
+        file_meta.set(1, I32, self.metadata[1])
+        file_meta.set(2, LIST, ThriftList(STRUCT, [root, self.metadata[2][position]]))
+        file_meta.set(3, I64, num_rows)
+        file_meta.set(4, LIST, ThriftList(STRUCT, [new_row_group]))
+        # created_by 决定了 pyarrow 对旧版写入器的兼容处理，需要保留
+        if 6 in self.metadata:
+            file_meta.set(6, BINARY, self.metadata[6])
+        if 7 in self.metadata:
+            file_meta.set(7, LIST, ThriftList(self.metadata[7].element_type, [self.metadata[7][leaf]]))
+
+        footer = write_struct(file_meta)
+        return MAGIC + body + bytes(footer) + struct.pack('<I', len(footer)) + MAGIC
+
+    def _read_column_chunk(self, parquet_file: pq.ParquetFile, row_group: int, column: str,
+                           ranges: RowRanges) -> Tuple[pa.Array, int]:
+        """
+        读取整个列块并取出指定行范围的值
+
+        Returns:
+            (值数组, 列块压缩后的字节数)
+        """
+        values = parquet_file.read_row_group(row_group, columns=[column]).column(0)
+        if ranges != [(0, len(values))]:
+            positions = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+            values = values.take(pa.array(positions))
+        _, leaf = self._leaves.get(column, (None, None))
+        chunk_size = parquet_file.metadata.row_group(row_group).column(leaf).total_compressed_size \
+            if leaf is not None else 0
+        return values.combine_chunks(), chunk_size
+
+    def _read_column(self, f, parquet_file: pq.ParquetFile, row_group: int, column: str,
+                     ranges: RowRanges) -> Tuple[pa.Array, int, int]:
+        """
+        读取一列在行组内指定行范围的值
+
+        Returns:
+            (值数组, 读取的字节数, 读取的数据页数)
+        """
+        field_type = self.schema.field(column).type
+        pages = self.pages.get((row_group, column))
+        if pages is None:
+            # 没有页索引：读取整个列块
+            return self._read_column_chunk(parquet_file, row_group, column, ranges) + (0,)
+
+        # 与行范围重叠的数据页
+        selected = []
+        range_index = 0
+        for p, (start, num_rows) in enumerate(zip(pages['first_rows'], pages['num_rows'])):
+            while range_index < len(ranges) and ranges[range_index][1] <= start:
+                range_index += 1
+            if range_index < len(ranges) and ranges[range_index][0] < start + num_rows:
+                selected.append(p)
+        if len(selected) == len(pages['offsets']):
+            # 所有数据页都要读取：直接读取整个列块，避免重新组装文件
+            return self._read_column_chunk(parquet_file, row_group, column, ranges) + (len(selected),)
+
+        column_meta = self.metadata[4][row_group][1][self._leaves[column][1]][3]
+        dictionary_offset = column_meta.get(11)
+        dictionary_length = pages['offsets'][0] - dictionary_offset if dictionary_offset else 0
+
+        # 读取字典页和选中的数据页，文件中相邻的页合并为一次读取
+        reads = [(dictionary_offset, dictionary_length)] if dictionary_length else []
+        for p in selected:
+            offset, size = pages['offsets'][p], pages['sizes'][p]
+            if reads and reads[-1][0] + reads[-1][1] == offset:
+                reads[-1] = (reads[-1][0], reads[-1][1] + size)
+            else:
+                reads.append((offset, size))
+        chunks = []
+        for offset, size in reads:
+            f.seek(offset)
+            chunks.append(f.read(size))
+        body = b''.join(chunks)
+
+        num_rows = sum(pages['num_rows'][p] for p in selected)
+        data = self._single_column_file(row_group, column, body, dictionary_length, num_rows)
+        values = pq.read_table(pa.BufferReader(data)).column(0).combine_chunks()
+
+        # 行号 -> 解码结果中的位置
+        decoded_start = np.cumsum([0] + [pages['num_rows'][p] for p in selected])
+        page_start = np.array([pages['first_rows'][p] for p in selected])
+        rows = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+        k = np.searchsorted(page_start, rows, side='right') - 1
+        values = values.take(pa.array(rows - page_start[k] + decoded_start[k]))
+        if values.type != field_type:
+            values = values.cast(field_type)
+        return values, len(body), len(selected)
+
+    def read(self, filters: Optional[Filters] = None, columns: Optional[List[str]] = None,
+             stats_index: Optional[RowGroupIndex] = None) -> Tuple[pa.Table, Dict[str, Any]]:
+        """
+        先用行组统计信息排除行组，再用页索引只读取可能匹配的数据页，最后精确过滤
+
+        Args:
+            filters: 过滤条件
+            columns: 要返回的列，默认返回所有列
+            stats_index: 行组统计索引，默认从文件元数据构建
+
+        Returns:
+            (过滤后的表, 读取计划)；计划包含读取的行组、数据页、行数和字节数，
+            row_group_bytes 为只做行组剪枝时需要读取的字节数
+        """
+        stats_index = stats_index or RowGroupIndex.build(self.filename)
+        candidates = stats_index.select_row_groups(filters)
+        row_group_plan = stats_index.plan(filters, columns, candidates)
+        needed_columns = row_group_plan['columns'] or self.schema.names
+
+        row_ranges = self.select_rows(filters, candidates)
+        parquet_file = pq.ParquetFile(self.filename)
+        tables = []
+        read_bytes = read_pages = 0
+        with open(self.filename, 'rb') as f:
+            for i, ranges in row_ranges.items():
+                arrays = []
+                for name in needed_columns:
+                    values, num_bytes, num_pages = self._read_column(f, parquet_file, i, name, ranges)
+                    arrays.append(values)
+                    read_bytes += num_bytes
+                    read_pages += num_pages
+                tables.append(pa.Table.from_arrays(arrays, names=needed_columns))
+
+        schema = pa.schema([self.schema.field(name) for name in needed_columns])
+        table = pa.concat_tables(tables) if tables else schema.empty_table()
+        if filters:
+            table = table.filter(compile_filters(filters))
+        if columns is not None:
+            table = table.select(columns)
+
+        total_pages = sum(len(pages['offsets']) for (i, name), pages in self.pages.items()
+                          if i in candidates and name in needed_columns)
+        return table, {
+            'row_groups': list(row_ranges),
+            'row_ranges': row_ranges,
+            'columns': needed_columns,
+            'total_row_groups': self.num_row_groups,
+            'read_row_groups': len(row_ranges),
+            'total_pages': total_pages,
+            'read_pages': read_pages,
+            'read_rows': sum(stop - start for ranges in row_ranges.values() for start, stop in ranges),
+            'read_bytes': read_bytes,
+            'row_group_bytes': row_group_plan['read_bytes'],
+            'skipped_bytes': row_group_plan['read_bytes'] - read_bytes,
+            'index_bytes': self.index_bytes
+        }
@@ -0,0 +1,149 @@
+"""
+pandas 转换模块
+
+默认的 table.to_pandas() 会把同类型的列合并成二维块，转换期间 Arrow 表和 DataFrame
+同时驻留内存，峰值约为数据量的两倍。本模块把常用的转换参数组合成命名的转换配置（profile），
+供读取接口在确实需要 DataFrame 时选择：
+
+- default: 与 table.to_pandas() 相同
+- split_blocks: 每列一个块，省去合并块的复制
+- self_destruct: split_blocks 基础上边转换边释放 Arrow 内存（转换后 Arrow 表不可再用）
+- arrow_dtype: 使用 pd.ArrowDtype，列直接引用 Arrow 内存，几乎不复制
+- dictionary: 低基数字符串列以字典编码读取，转换为 Categorical
+- strings_to_categorical: 字符串列在转换时编码为 Categorical
+- low_memory: dictionary + self_destruct
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from typing import Dict, Any, List, Optional, Union
+
+from .filter_compiler import Filters
+from .read_modes import read_table
+
+# 命名的转换配置；read_dictionary 作用于读取，其余参数传给 to_pandas
+PANDAS_PROFILES = {
+    'default': {},
+    'split_blocks': {'split_blocks': True},
+    'self_destruct': {'split_blocks': True, 'self_destruct': True},
+    'arrow_dtype': {'types_mapper': pd.ArrowDtype},
+    'dictionary': {'read_dictionary': True},
+    'strings_to_categorical': {'strings_to_categorical': True},
+    'low_memory': {'read_dictionary': True, 'split_blocks': True, 'self_destruct': True}
+}
+
+# 转换配置中允许的参数
+PROFILE_OPTIONS = ('read_dictionary', 'split_blocks', 'self_destruct', 'types_mapper',
+                   'strings_to_categorical', 'use_threads')
+
+# 选择以字典编码读取的列时的样本行数和不同值占比上限（见 dictionary_columns）
+DICTIONARY_SAMPLE_ROWS = 10000
+DICTIONARY_MAX_RATIO = 0.1
+
+Profile = Union[str, Dict[str, Any]]
+
+
+def resolve_profile(profile: Optional[Profile]) -> Dict[str, Any]:
+    """
+    把配置名称或参数字典解析为参数字典
+
+    Args:
+        profile: PANDAS_PROFILES 中的名称、参数字典或 None（等同于 'default'）
+
+    Returns:
+        参数字典（副本）
+
+    Raises:
+        ValueError: 未知的配置名称或参数
+    """
+    if profile is None:
+        return {}
+    if isinstance(profile, str):
+        if profile not in PANDAS_PROFILES:
+            raise ValueError(f"未知的转换配置: {profile}，可选 {list(PANDAS_PROFILES)}")
+        return dict(PANDAS_PROFILES[profile])
+    unknown = set(profile) - set(PROFILE_OPTIONS)
+    if unknown:
+        raise ValueError(f"不支持的转换参数: {sorted(unknown)}")
+    return dict(profile)
+
+
+def dictionary_columns(source: str, columns: Optional[List[str]] = None,
+                       sample_rows: int = DICTIONARY_SAMPLE_ROWS,
+                       max_ratio: float = DICTIONARY_MAX_RATIO) -> List[str]:
+    """
+    适合以字典编码读取的列：低基数的字符串列
+
+    文件元数据中没有可靠的基数信息，因此读取文件开头 sample_rows 行的字符串列，
+    不同值数量不超过样本行数的 max_ratio 时选中，以免把近乎唯一的列（如 Username）
+    转换为类别数与行数相当的 Categorical。
+
+    Args:
+        source: Parquet 文件路径
+        columns: 要读取的列，None 表示所有列
+        sample_rows: 样本行数
+        max_ratio: 不同值数量占样本行数的上限
+
+    Returns:
+        列名列表
+    """
+    parquet_file = pq.ParquetFile(source)
+    schema = parquet_file.schema_arrow
+    names = schema.names if columns is None else [name for name in columns if name in schema.names]
+    candidates = [name for name in names
+                  if pa.types.is_string(schema.field(name).type) or pa.types.is_large_string(schema.field(name).type)]
+    if not candidates or parquet_file.metadata.num_rows == 0:
+        return []
+    sample = next(parquet_file.iter_batches(batch_size=sample_rows, columns=candidates))
+    return [name for name in candidates
+            if pc.count_distinct(sample.column(name)).as_py() <= max_ratio * sample.num_rows]
+
+
+def table_to_pandas(table: pa.Table, profile: Optional[Profile] = 'default',
+                    owned: bool = False) -> pd.DataFrame:
+    """
+    按转换配置把 Arrow 表转换为 DataFrame
+
+    self_destruct 会释放表对列数据的引用，表在转换后不可再用。只有调用方独占这个表时
+    （owned=True，例如刚从文件读出的表）才启用；共享的表（缓存结果、练习数据）自动退回
+    split_blocks 转换。read_dictionary 只在读取时有效，这里忽略。
+
+    Args:
+        table: Arrow 表
+        profile: 转换配置名称或参数字典
+        owned: 调用方是否独占 table，转换后不再使用它
+
+    Returns:
+        DataFrame
+    """
+    options = resolve_profile(profile)
+    options.pop('read_dictionary', None)
+    if not owned:
+        options.pop('self_destruct', None)
+    return table.to_pandas(**options)
+
+
+def read_pandas(source: str, columns: Optional[List[str]] = None, filters: Optional[Filters] = None,
+                profile: Optional[Profile] = 'default', mode: str = 'buffered') -> pd.DataFrame:
+    """
+    按转换配置读取 Parquet 文件为 DataFrame
+
+    Args:
+        source: Parquet 文件路径
+        columns: 要读取的列，默认读取所有列
+        filters: pyarrow 风格的过滤条件
+        profile: 转换配置名称或参数字典
+        mode: 读取模式（见 read_modes.READ_MODES）；ipc 模式读取未压缩的热数据层，
+              不使用 read_dictionary
+
+    Returns:
+        DataFrame
+    """
+    options = resolve_profile(profile)
+    read_dictionary = None
+    if options.pop('read_dictionary', False) and mode != 'ipc':
+        read_dictionary = dictionary_columns(source, columns)
+    table = read_table(source, columns, filters, mode=mode, read_dictionary=read_dictionary)
+    return table_to_pandas(table, options, owned=True)
@@ -0,0 +1,253 @@
+"""
+Parquet 文件格式底层结构模块
+
+pyarrow 没有公开 Bloom 过滤器、页索引等结构的读取接口，
+本模块实现读写这些结构所需的 Thrift compact 协议编解码和文件尾部元数据解析。
+解析结果保留每个字段的类型，修改后可以重新编码。
+"""
+
+import struct
+from typing import Any, Dict, List, Tuple
+
+# Thrift compact 协议的类型编号
+BOOL_TRUE = 1
+BOOL_FALSE = 2
+BYTE = 3
+I16 = 4
+I32 = 5
+I64 = 6
+DOUBLE = 7
+BINARY = 8
+LIST = 9
+SET = 10
+STRUCT = 12
+
+# Parquet 文件首尾的魔数
+MAGIC = b'PAR1'
+
+
+class ThriftStruct(dict):
+    """Thrift 结构体：{字段 ID: 值}，types 记录每个字段的类型，用于重新编码"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.types: Dict[int, int] = {}
+
+    def set(self, field_id: int, field_type: int, value: Any) -> None:
+        """设置字段的值和类型"""
+        self[field_id] = value
+        self.types[field_id] = field_type
+
+    def copy(self) -> 'ThriftStruct':
+        """浅拷贝（保留字段类型）"""
+        result = ThriftStruct(self)
+        result.types = dict(self.types)
+        return result
+
+
+class ThriftList(list):
+    """Thrift 列表，element_type 记录元素类型"""
+
+    def __init__(self, element_type: int, values=()):
+        super().__init__(values)
+        self.element_type = element_type
+
+
+def _read_varint(buffer: bytes, pos: int) -> Tuple[int, int]:
+    """读取无符号变长整数"""
+    result = shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return result, pos
+
+
+def _read_zigzag(buffer: bytes, pos: int) -> Tuple[int, int]:
+    value, pos = _read_varint(buffer, pos)
+    return (value >> 1) ^ -(value & 1), pos
+
+
+def _read_value(buffer: bytes, pos: int, value_type: int) -> Tuple[Any, int]:
+    """读取指定类型的值（布尔字段的值已编码在字段头中，不经过这里）"""
+    if value_type in (BOOL_TRUE, BOOL_FALSE):
+        # 容器中的布尔值单独占一个字节
+        return buffer[pos] == BOOL_TRUE, pos + 1
+    if value_type == BYTE:
+        return struct.unpack_from('<b', buffer, pos)[0], pos + 1
+    if value_type in (I16, I32, I64):
+        return _read_zigzag(buffer, pos)
+    if value_type == DOUBLE:
+        return struct.unpack_from('<d', buffer, pos)[0], pos + 8
+    if value_type == BINARY:
+        length, pos = _read_varint(buffer, pos)
+        return bytes(buffer[pos:pos + length]), pos + length
+    if value_type in (LIST, SET):
+        header = buffer[pos]
+        pos += 1
+        size = header >> 4
+        if size == 15:
+            size, pos = _read_varint(buffer, pos)
+        values = ThriftList(header & 0x0f)
+        for _ in range(size):
+            value, pos = _read_value(buffer, pos, values.element_type)
+            values.append(value)
+        return values, pos
+    if value_type == STRUCT:
+        return read_struct(buffer, pos)
+    raise ValueError(f"不支持的 Thrift 类型: {value_type}")
+
+
+def read_struct(buffer: bytes, pos: int = 0) -> Tuple[ThriftStruct, int]:
+    """
+    读取 Thrift compact 协议编码的结构体
+
+    Args:
+        buffer: 字节数据
+        pos: 结构体的起始位置
+
+    Returns:
+        (结构体, 结构体结束后的位置)
+    """
+    fields = ThriftStruct()
+    field_id = 0
+    while True:
+        header = buffer[pos]
+        pos += 1
+        if header == 0:
+            return fields, pos
+        field_type = header & 0x0f
+        if header >> 4:
+            field_id += header >> 4
+        else:
+            field_id, pos = _read_zigzag(buffer, pos)
+
+        if field_type in (BOOL_TRUE, BOOL_FALSE):
+            fields.set(field_id, field_type, field_type == BOOL_TRUE)
+        else:
+            value, pos = _read_value(buffer, pos, field_type)
+            fields.set(field_id, field_type, value)
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_zigzag(out: bytearray, value: int) -> None:
+    _write_varint(out, (value << 1) ^ (value >> 63))
+
+
+def _write_value(out: bytearray, value: Any, value_type: int) -> None:
+    if value_type in (BOOL_TRUE, BOOL_FALSE):
+        out.append(BOOL_TRUE if value else BOOL_FALSE)
+    elif value_type == BYTE:
+        out += struct.pack('<b', value)
+    elif value_type in (I16, I32, I64):
+        _write_zigzag(out, value)
+    elif value_type == DOUBLE:
+        out += struct.pack('<d', value)
+    elif value_type == BINARY:
+        _write_varint(out, len(value))
+        out += value
+    elif value_type in (LIST, SET):
+        if len(value) < 15:
+            out.append((len(value) << 4) | value.element_type)
+        else:
+            out.append(0xf0 | value.element_type)
+            _write_varint(out, len(value))
+        for element in value:
+            _write_value(out, element, value.element_type)
+    elif value_type == STRUCT:
+        write_struct(value, out)
+    else:
+        raise ValueError(f"不支持的 Thrift 类型: {value_type}")
+
+
+def write_struct(fields: ThriftStruct, out: bytearray = None) -> bytearray:
+    """
+    按 Thrift compact 协议编码结构体（字段按 ID 升序写出）
+
+    Args:
+        fields: 结构体
+        out: 输出缓冲区，默认新建
+
+    Returns:
+        输出缓冲区
+    """
+    out = bytearray() if out is None else out
+    last_id = 0
+    for field_id in sorted(fields):
+        field_type = fields.types[field_id]
+        if field_type in (BOOL_TRUE, BOOL_FALSE):
+            field_type = BOOL_TRUE if fields[field_id] else BOOL_FALSE
+        delta = field_id - last_id
+        if 0 < delta <= 15:
+            out.append((delta << 4) | field_type)
+        else:
+            out.append(field_type)
+            _write_zigzag(out, field_id)
+        if field_type not in (BOOL_TRUE, BOOL_FALSE):
+            _write_value(out, fields[field_id], field_type)
+        last_id = field_id
+    out.append(0)
+    return out
+
+
+def read_file_metadata(filename: str) -> ThriftStruct:
+    """
+    读取并解析 Parquet 文件尾部的 FileMetaData
+
+    常用字段：2 schema（SchemaElement 列表）、3 num_rows、4 row_groups。
+    RowGroup 的 1 为 ColumnChunk 列表；ColumnChunk 的 3 为 ColumnMetaData，
+    4/5 为 OffsetIndex 的偏移量和长度，6/7 为 ColumnIndex 的偏移量和长度。
+
+    Args:
+        filename: Parquet 文件
+
+    Returns:
+        FileMetaData 结构体
+    """
+    with open(filename, 'rb') as f:
+        f.seek(-8, 2)
+        tail = f.read(8)
+        if tail[4:] != MAGIC:
+            raise ValueError(f"不是 Parquet 文件: {filename}")
+        footer_length = struct.unpack('<I', tail[:4])[0]
+        f.seek(-8 - footer_length, 2)
+        metadata, _ = read_struct(f.read(footer_length))
+    return metadata
+
+
+def top_level_leaves(schema: List[ThriftStruct]) -> Dict[str, Tuple[int, int]]:
+    """
+    找出 schema 中的顶层基本类型列
+
+    Args:
+        schema: FileMetaData 中的 SchemaElement 列表（深度优先顺序，第一个为根节点）
+
+    Returns:
+        {列名: (SchemaElement 序号, 叶子列序号)}，叶子列序号即 ColumnChunk 在行组中的位置
+    """
+    leaves = {}
+    leaf_index = 0
+    # 每层尚未遍历的子节点数
+    remaining = [schema[0].get(5, 0)]
+    for position, element in enumerate(schema[1:], start=1):
+        depth = len(remaining)
+        remaining[-1] -= 1
+        num_children = element.get(5)
+        if num_children:
+            remaining.append(num_children)
+        else:
+            # 3 为 repetition_type，2 表示 REPEATED
+            if depth == 1 and element.get(3) != 2:
+                leaves[element[4].decode('utf-8')] = (position, leaf_index)
+            leaf_index += 1
+        while remaining and remaining[-1] == 0 and len(remaining) > 1:
+            remaining.pop()
+    return leaves
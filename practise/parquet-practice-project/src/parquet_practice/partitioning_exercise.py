@@ -5,41 +5,94 @@ Parquet 分区练习模块
 """
 
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
 import pyarrow.parquet as pq
-import pandas as pd
 import os
 import shutil
 from typing import Dict, Any, List, Optional
 
-from .utils import PerformanceAnalyzer
+from .utils import PerformanceAnalyzer, ArrowTableData, DataFrameOrTable
+from .clustering import cluster_table, CLUSTER_METHODS
+from .manifest import DatasetManifest
+from .remote_io import (parquet_format, check_io_options, compare_io_settings,
+                        DEFAULT_REQUEST_LATENCY, DEFAULT_BANDWIDTH)
+from .scanner import scan_table, check_scan_options, SCAN_SETTINGS
 
 
-class ParquetPartitioningExercise:
+def hive_partitioning(partition_cols: List[str]) -> ds.Partitioning:
+    """
+    分区列均为字符串的 hive 分区方案（目录名形如 City=Beijing）
+    
+    Args:
+        partition_cols: 分区列（按目录层级顺序）
+        
+    Returns:
+        分区方案
+    """
+    return ds.partitioning(
+        pa.schema([pa.field(col, pa.string()) for col in partition_cols]),
+        flavor="hive"
+    )
+
+
+class ParquetPartitioningExercise(ArrowTableData):
     """Parquet 分区练习类"""
     
-    def __init__(self, data_df: pd.DataFrame, output_dir: str = "output"):
+    def __init__(self, data: DataFrameOrTable, output_dir: str = "output",
+                 cluster_by: Optional[List[str]] = None, cluster_method: str = 'sort',
+                 use_manifest: bool = False, filesystem: Optional[pafs.FileSystem] = None,
+                 io_options: Optional[Dict[str, Any]] = None, scan_options: Optional[Dict[str, Any]] = None,
+                 track_memory: bool = False):
         """
         初始化分区练习
         
         Args:
-            data_df: 要测试的数据
+            data: 要测试的数据（DataFrame 或 Arrow 表），内部统一保存为 Arrow 表
             output_dir: 输出目录
+            cluster_by: 写入前按这些列聚集数据（分区表中在每个分区内保持聚集顺序），默认保持原始顺序
+            cluster_method: 聚集方式，'sort'、'zorder' 或 'hilbert'
+            use_manifest: 查询分区表时从数据集清单构建数据集，而不是每次列举目录
+            filesystem: 查询读取文件使用的 pyarrow 文件系统（如 remote_io.latency_filesystem() 模拟的远程存储），
+                        默认为本地文件系统；写入始终在本地进行
+            io_options: 查询的读取设置，pre_buffer、buffer_size、hole_size_limit、range_size_limit 等
+                        （见 remote_io.parquet_format）
+            scan_options: 查询的扫描设置，fragment_readahead、batch_readahead、io_thread_count、cpu_count 等
+                          （见 scanner.scan_table）
+            track_memory: 是否测量读写操作的内存使用（峰值 RSS、Arrow 内存池、Python 分配），结果放在计时统计信息的 memory 键下
         """
-        self.df = data_df
+        if cluster_method not in CLUSTER_METHODS:
+            raise ValueError(f"cluster_method 必须是 {CLUSTER_METHODS} 之一: {cluster_method}")
+        self.set_data(data)
+        self.cluster_by = cluster_by
+        self.cluster_method = cluster_method
+        self.use_manifest = use_manifest
+        self.filesystem = filesystem
+        self.io_options = check_io_options(io_options)
+        self.scan_options = check_scan_options(scan_options)
         self.output_dir = output_dir
-        self.performance_analyzer = PerformanceAnalyzer()
+        self.performance_analyzer = PerformanceAnalyzer(track_memory=track_memory)
         
         # 分区和非分区表的路径
         self.non_partitioned_path = os.path.join(output_dir, 'non_partitioned.parquet')
         self.partitioned_path = os.path.join(output_dir, 'partitioned_table')
+        self.partition_cols = ['City']
         
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
     
+    def _source_table(self) -> pa.Table:
+        """写入用的 Arrow 表，设置了聚集键时先聚集"""
+        table = self.table
+        if self.cluster_by:
+            table = cluster_table(table, self.cluster_by, self.cluster_method)
+        return table
+    
     def create_non_partitioned_table(self) -> None:
         """创建非分区表"""
         print("创建非分区表...")
-        table = pa.Table.from_pandas(self.df)
+        table = self._source_table()
         pq.write_table(table, self.non_partitioned_path)
         
         file_size = self.performance_analyzer.get_file_size(self.non_partitioned_path)
@@ -62,26 +115,31 @@ class ParquetPartitioningExercise:
         if os.path.exists(self.partitioned_path):
             shutil.rmtree(self.partitioned_path)
         
-        table = pa.Table.from_pandas(self.df)
+        table = self._source_table()
+        self.partition_cols = list(partition_cols)
         
         # 写入分区表 - 使用 dataset API 保留分区列
-        import pyarrow.dataset as ds
-        partitioning = ds.partitioning(
-            pa.schema([pa.field(col, pa.string()) for col in partition_cols]),
-            flavor="hive"
-        )
+        partitioning = hive_partitioning(partition_cols)
+        # 聚集后的数据需要保持行顺序，多线程写入默认可能打乱顺序
+        write_options = {'preserve_order': True} if self.cluster_by else {}
         ds.write_dataset(
             table,
             base_dir=self.partitioned_path,
             format="parquet",
-            partitioning=partitioning
+            partitioning=partitioning,
+            **write_options
         )
         
+        # 写入数据集清单，查询时可以不列举目录
+        manifest = DatasetManifest.build(self.partitioned_path, partition_cols)
+        manifest.save()
+        
         # 统计分区信息
         partition_info = self._analyze_partitions()
         print(f"分区表已创建: {self.partitioned_path}")
         print(f"分区数量: {partition_info['partition_count']}")
         print(f"总大小: {partition_info['total_size']:.2f} MB")
+        print(f"数据集清单: {manifest.num_files} 个文件")
         
         return partition_info
     
@@ -93,7 +151,8 @@ class ParquetPartitioningExercise:
         
         for root, dirs, files in os.walk(self.partitioned_path):
             for file in files:
-                if file.endswith('.parquet'):
+                # 以下划线开头的是清单等辅助文件，不是分区数据
+                if file.endswith('.parquet') and not file.startswith('_'):
                     file_path = os.path.join(root, file)
                     size = self.performance_analyzer.get_file_size(file_path)
                     total_size += size
@@ -113,12 +172,70 @@ class ParquetPartitioningExercise:
             'partitions': partition_details
         }
     
-    def test_partition_pruning(self, filter_city: str = "Beijing") -> Dict[str, Any]:
+    def _open_dataset(self, path: str = None, partition_cols: List[str] = None,
+                      filesystem: Optional[pafs.FileSystem] = None,
+                      io_options: Optional[Dict[str, Any]] = None) -> ds.Dataset:
+        """
+        打开分区数据集并声明 hive 分区，分区列会作为字段出现在数据集中，
+        分区列上的过滤条件可以在打开文件之前排除分片
+        
+        设置了 use_manifest 且分区表的清单存在时，从清单构建数据集，不列举目录。
+        
+        Args:
+            path: 数据集目录，默认为分区表目录
+            partition_cols: 分区列，默认为创建分区表时使用的分区列
+            filesystem: 文件系统，默认为 self.filesystem
+            io_options: 读取设置，默认为 self.io_options
+            
+        Returns:
+            数据集
+        """
+        filesystem = filesystem or self.filesystem
+        file_format = parquet_format(**(self.io_options if io_options is None else io_options))
+        if self.use_manifest and path is None:
+            manifest = DatasetManifest.load(self.partitioned_path)
+            if manifest is not None:
+                return manifest.to_dataset(filesystem=filesystem, format=file_format)
+        return ds.dataset(
+            os.path.abspath(path or self.partitioned_path),
+            format=file_format,
+            filesystem=filesystem,
+            partitioning=hive_partitioning(partition_cols or self.partition_cols)
+        )
+    
+    def _query_partitioned(self, expression: Optional[ds.Expression], columns: Optional[List[str]] = None,
+                           path: str = None, partition_cols: List[str] = None,
+                           scan_options: Optional[Dict[str, Any]] = None) -> pa.Table:
+        """将过滤条件和列投影下推到数据集扫描，只读取匹配分区的文件；expression 为 None 时扫描全表"""
+        dataset = self._open_dataset(path, partition_cols)
+        return scan_table(dataset, columns, expression,
+                          **(self.scan_options if scan_options is None else scan_options))
+    
+    def _fragment_counts(self, expression: ds.Expression, path: str = None,
+                         partition_cols: List[str] = None) -> Dict[str, int]:
+        """
+        统计查询需要打开的分片（文件）数
+        
+        Returns:
+            {'fragments_opened': 分区裁剪后打开的分片数, 'total_fragments': 数据集的分片总数}
+        """
+        dataset = self._open_dataset(path, partition_cols)
+        return {
+            'fragments_opened': sum(1 for _ in dataset.get_fragments(filter=expression)),
+            'total_fragments': sum(1 for _ in dataset.get_fragments())
+        }
+    
+    def test_partition_pruning(self, filter_city: str = "Beijing",
+                               columns: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         测试分区裁剪
         
+        两种表都把过滤条件下推到扫描：非分区表只能依靠行组统计信息，
+        分区表可以直接跳过其他城市的文件。
+        
         Args:
             filter_city: 要过滤的城市
+            columns: 要读取的列，默认读取所有列
             
         Returns:
             分区裁剪测试结果
@@ -127,45 +244,46 @@ class ParquetPartitioningExercise:
         print("测试分区裁剪")
         print("=" * 60)
         
+        expression = ds.field('City') == filter_city
+        
         # 测试非分区表查询
         def query_non_partitioned():
-            table = pq.read_table(self.non_partitioned_path)
-            df = table.to_pandas()
-            return df[df['City'] == filter_city]
+            dataset = ds.dataset(os.path.abspath(self.non_partitioned_path), filesystem=self.filesystem,
+                                 format=parquet_format(**self.io_options))
+            return dataset.to_table(filter=expression, columns=columns)
         
-        df_non_part, time_non_part = self.performance_analyzer.measure_time(query_non_partitioned)
+        non_part_table, non_part_stats = self.performance_analyzer.measure_stats(query_non_partitioned)
+        time_non_part = non_part_stats['median']
         
-        print(f"非分区表查询 (城市={filter_city}): {time_non_part:.4f} 秒")
-        print(f"结果行数: {len(df_non_part)}")
+        print(f"非分区表查询 (城市={filter_city}): {self.performance_analyzer.format_stats(non_part_stats)}")
+        print(f"结果行数: {len(non_part_table)}")
         
         # 测试分区表查询
-        def query_partitioned():
-            import pyarrow.dataset as ds
-            # 读取所有数据，分区信息会自动添加到结果中
-            dataset = ds.dataset(self.partitioned_path, format="parquet")
-            table = dataset.to_table()
-            df = table.to_pandas()
-            # 手动过滤，因为分区列在这种情况下不在 schema 中
-            return df[df['City'] == filter_city] if 'City' in df.columns else df
-        
-        df_part, time_part = self.performance_analyzer.measure_time(query_partitioned)
+        part_table, part_stats = self.performance_analyzer.measure_stats(
+            self._query_partitioned, expression, columns
+        )
+        time_part = part_stats['median']
+        fragments = self._fragment_counts(expression)
         
-        print(f"分区表查询 (城市={filter_city}): {time_part:.4f} 秒")
-        print(f"结果行数: {len(df_part)}")
+        print(f"分区表查询 (城市={filter_city}): {self.performance_analyzer.format_stats(part_stats)}")
+        print(f"结果行数: {len(part_table)}, 打开分片: {fragments['fragments_opened']}/{fragments['total_fragments']}")
         
-        speedup = time_non_part / time_part if time_part > 0 else 0
+        speedup = self.performance_analyzer.speedup(time_non_part, time_part)
         print(f"性能提升: {speedup:.2f}x")
         
         # 验证结果一致性
-        data_consistent = len(df_non_part) == len(df_part)
+        data_consistent = len(non_part_table) == len(part_table)
         print(f"数据一致性: {'✓' if data_consistent else '✗'}")
         
         return {
             'non_partitioned_time': time_non_part,
             'partitioned_time': time_part,
             'speedup': speedup,
-            'result_rows': len(df_part),
-            'data_consistent': data_consistent
+            'result_rows': len(part_table),
+            'data_consistent': data_consistent,
+            **fragments,
+            'non_partitioned_time_stats': non_part_stats,
+            'partitioned_time_stats': part_stats
         }
     
     def test_multiple_partition_queries(self) -> Dict[str, Any]:
@@ -182,7 +300,7 @@ class ParquetPartitioningExercise:
         results = {}
         
         # 获取所有城市
-        cities = self.df['City'].unique()
+        cities = pc.unique(self.table['City']).to_pylist()
         
         # 场景1：单分区查询
         print("场景1: 单分区查询")
@@ -203,60 +321,185 @@ class ParquetPartitioningExercise:
         
         return results
     
-    def test_single_partition_query(self, city: str) -> Dict[str, Any]:
+    def test_single_partition_query(self, city: str, columns: Optional[List[str]] = None) -> Dict[str, Any]:
         """测试单分区查询"""
-        def query_single_partition():
-            import pyarrow.dataset as ds
-            dataset = ds.dataset(self.partitioned_path, format="parquet")
-            table = dataset.to_table()
-            df = table.to_pandas()
-            return df[df['City'] == city] if 'City' in df.columns else df
-        
-        df_result, query_time = self.performance_analyzer.measure_time(query_single_partition)
+        expression = ds.field('City') == city
+        result_table, query_stats = self.performance_analyzer.measure_stats(
+            self._query_partitioned, expression, columns
+        )
+        fragments = self._fragment_counts(expression)
         
-        print(f"查询城市 '{city}': {query_time:.4f} 秒, 结果: {len(df_result)} 行")
+        print(f"查询城市 '{city}': {self.performance_analyzer.format_stats(query_stats)}, 结果: {len(result_table)} 行, "
+              f"打开分片: {fragments['fragments_opened']}/{fragments['total_fragments']}")
         
         return {
             'city': city,
-            'time': query_time,
-            'rows': len(df_result)
+            'time': query_stats['median'],
+            'rows': len(result_table),
+            **fragments,
+            'time_stats': query_stats
         }
     
-    def test_multi_partition_query(self, cities: List[str]) -> Dict[str, Any]:
+    def test_multi_partition_query(self, cities: List[str], columns: Optional[List[str]] = None) -> Dict[str, Any]:
         """测试多分区查询"""
-        def query_multi_partitions():
-            import pyarrow.dataset as ds
-            dataset = ds.dataset(self.partitioned_path, format="parquet")
-            table = dataset.to_table()
-            df = table.to_pandas()
-            return df[df['City'].isin(cities)] if 'City' in df.columns else df
-        
-        df_result, query_time = self.performance_analyzer.measure_time(query_multi_partitions)
+        cities = [str(city) for city in cities]
+        expression = ds.field('City').isin(cities)
+        result_table, query_stats = self.performance_analyzer.measure_stats(
+            self._query_partitioned, expression, columns
+        )
+        fragments = self._fragment_counts(expression)
         
-        print(f"查询城市 {cities}: {query_time:.4f} 秒, 结果: {len(df_result)} 行")
+        print(f"查询城市 {cities}: {self.performance_analyzer.format_stats(query_stats)}, 结果: {len(result_table)} 行, "
+              f"打开分片: {fragments['fragments_opened']}/{fragments['total_fragments']}")
         
         return {
             'cities': cities,
-            'time': query_time,
-            'rows': len(df_result)
+            'time': query_stats['median'],
+            'rows': len(result_table),
+            **fragments,
+            'time_stats': query_stats
         }
     
     def test_full_scan(self) -> Dict[str, Any]:
         """测试全表扫描"""
-        def query_full_table():
-            dataset = pq.ParquetDataset(self.partitioned_path)
-            table = dataset.read()
-            return table.to_pandas()
+        result_table, query_stats = self.performance_analyzer.measure_stats(self._query_partitioned, None)
+        
+        print(f"全表扫描: {self.performance_analyzer.format_stats(query_stats)}, 结果: {len(result_table)} 行")
+        
+        return {
+            'time': query_stats['median'],
+            'rows': len(result_table),
+            'time_stats': query_stats
+        }
+    
+    def test_manifest_discovery(self, filter_city: str = "Beijing") -> Dict[str, Any]:
+        """
+        对比列举目录发现数据集和从清单构建数据集的延迟
+        
+        Args:
+            filter_city: 查询的城市
+            
+        Returns:
+            两种方式的数据集构建时间和查询时间
+        """
+        print("\n" + "=" * 60)
+        print("测试数据集清单")
+        print("=" * 60)
+        
+        manifest = DatasetManifest.load_or_build(self.partitioned_path, self.partition_cols)
+        expression = ds.field('City') == filter_city
+        
+        def open_listing():
+            return ds.dataset(self.partitioned_path, format="parquet",
+                              partitioning=hive_partitioning(self.partition_cols))
+        
+        def open_manifest():
+            return DatasetManifest.load(self.partitioned_path).to_dataset()
+        
+        results = {'num_files': manifest.num_files}
+        for name, open_dataset in (('listing', open_listing), ('manifest', open_manifest)):
+            _, open_stats = self.performance_analyzer.measure_stats(open_dataset)
+            table, query_stats = self.performance_analyzer.measure_stats(
+                lambda: open_dataset().to_table(filter=expression)
+            )
+            results[name] = {
+                'open_time': open_stats['median'],
+                'query_time': query_stats['median'],
+                'rows': table.num_rows,
+                'open_time_stats': open_stats,
+                'query_time_stats': query_stats
+            }
+            print(f"{name:<10} 构建数据集: {self.performance_analyzer.format_stats(open_stats)}")
+            print(f"{'':<10} 查询 (城市={filter_city}): {self.performance_analyzer.format_stats(query_stats)}, "
+                  f"结果: {table.num_rows} 行")
         
-        df_result, query_time = self.performance_analyzer.measure_time(query_full_table)
+        results['open_speedup'] = self.performance_analyzer.speedup(
+            results['listing']['open_time'], results['manifest']['open_time']
+        )
+        results['query_speedup'] = self.performance_analyzer.speedup(
+            results['listing']['query_time'], results['manifest']['query_time']
+        )
+        print(f"清单构建数据集提升: {results['open_speedup']:.2f}x, 查询提升: {results['query_speedup']:.2f}x")
+        return results
+    
+    def test_remote_io(self, settings: Optional[Dict[str, Dict[str, Any]]] = None,
+                       latency: float = DEFAULT_REQUEST_LATENCY, bandwidth: Optional[float] = DEFAULT_BANDWIDTH,
+                       cities: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        在模拟的远程存储上对比分区表查询的读取设置
         
-        print(f"全表扫描: {query_time:.4f} 秒, 结果: {len(df_result)} 行")
+        查询包括发现数据集（列举目录或读取清单）和读取匹配分区的每个分片，
+        每个分片至少需要打开文件、读取尾部元数据和读取列块几次请求。
+        
+        Args:
+            settings: {名称: 读取设置}，默认为 remote_io.IO_SETTINGS
+            latency: 每次请求的模拟延迟（秒）
+            bandwidth: 模拟带宽（字节/秒），None 表示不限速
+            cities: 查询的城市，默认为 Beijing、Shanghai、Guangzhou
+            
+        Returns:
+            远程读取测试结果
+        """
+        print("\n" + "=" * 60)
+        print(f"测试模拟远程存储上的分区查询 (请求延迟 {latency * 1000:.1f} 毫秒)")
+        print("=" * 60)
+        
+        expression = ds.field('City').isin(cities or ['Beijing', 'Shanghai', 'Guangzhou'])
+        
+        def query(filesystem, io_options):
+            dataset = self._open_dataset(filesystem=filesystem, io_options=io_options)
+            return dataset.to_table(filter=expression)
         
         return {
-            'time': query_time,
-            'rows': len(df_result)
+            'latency': latency,
+            'bandwidth': bandwidth,
+            'settings': compare_io_settings(query, self.performance_analyzer, settings, latency, bandwidth)
         }
     
+    def test_scan_scaling(self, cpu_counts: Optional[List[int]] = None,
+                          settings: Optional[Dict[str, Dict[str, Any]]] = None,
+                          columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        测试分区表全表扫描随 CPU 线程数的扩展性
+        
+        每种扫描设置在每个 CPU 线程数下扫描全表，加速比相对于同一设置下 1 个线程的耗时。
+        
+        Args:
+            cpu_counts: CPU 线程数列表，默认 1 到 CPU 核数之间按倍数递增
+            settings: {名称: 扫描设置}，默认为 scanner.SCAN_SETTINGS，与 self.scan_options 合并
+            columns: 要读取的列，默认读取所有列
+            
+        Returns:
+            {'cpu_counts', 'rows', 'settings': {名称: {'times', 'speedups', 'time_stats'}}}
+        """
+        if cpu_counts is None:
+            cpu_count = os.cpu_count() or 1
+            cpu_counts = sorted({1, *[2 ** i for i in range(1, cpu_count.bit_length())], cpu_count})
+        settings = settings or SCAN_SETTINGS
+        
+        print("\n" + "=" * 60)
+        print(f"测试全表扫描的扩展性 (CPU 线程数: {cpu_counts})")
+        print("=" * 60)
+        
+        results = {'cpu_counts': cpu_counts, 'settings': {}}
+        for name, scan_options in settings.items():
+            scan_options = check_scan_options({**self.scan_options, **scan_options})
+            setting_results = {'times': [], 'speedups': [], 'time_stats': []}
+            for cpu_count in cpu_counts:
+                table, stats = self.performance_analyzer.measure_stats(
+                    self._query_partitioned, None, columns, scan_options={**scan_options, 'cpu_count': cpu_count}
+                )
+                speedup = (self.performance_analyzer.speedup(setting_results['times'][0], stats['median'])
+                           if setting_results['times'] else 1.0)
+                setting_results['times'].append(stats['median'])
+                setting_results['speedups'].append(speedup)
+                setting_results['time_stats'].append(stats)
+                results['rows'] = table.num_rows
+                print(f"{name:<16} {cpu_count:>3} 线程: {self.performance_analyzer.format_stats(stats)}, "
+                      f"加速比 {speedup:.2f}x")
+            results['settings'][name] = setting_results
+        return results
+    
     def analyze_partition_distribution(self) -> Dict[str, Any]:
         """
         分析分区数据分布
@@ -269,11 +512,14 @@ class ParquetPartitioningExercise:
         print("=" * 60)
         
         # 统计每个城市的数据量
-        city_counts = self.df['City'].value_counts()
+        value_counts = pc.value_counts(self.table['City'])
+        city_counts = dict(sorted(zip(value_counts.field('values').to_pylist(),
+                                      value_counts.field('counts').to_pylist()),
+                                  key=lambda item: item[1], reverse=True))
         
         print("各城市数据分布:")
         for city, count in city_counts.items():
-            percentage = (count / len(self.df)) * 100
+            percentage = (count / self.table.num_rows) * 100
             print(f"• {city}: {count:,} 行 ({percentage:.1f}%)")
         
         # 分析分区大小
@@ -298,7 +544,7 @@ class ParquetPartitioningExercise:
             print(f"• 均衡比例: {balance_ratio:.2f}")
         
         return {
-            'city_distribution': city_counts.to_dict(),
+            'city_distribution': city_counts,
             'partition_info': partition_info,
             'balance_metrics': {
                 'avg_size': avg_size if sizes else 0,
@@ -308,12 +554,15 @@ class ParquetPartitioningExercise:
             }
         }
     
-    def test_nested_partitioning(self, partition_cols: List[str] = None) -> Dict[str, Any]:
+    def test_nested_partitioning(self, partition_cols: List[str] = None, city: str = 'Beijing',
+                                 age_group: str = 'Middle') -> Dict[str, Any]:
         """
         测试嵌套分区
         
         Args:
             partition_cols: 多级分区列
+            city: 查询的城市
+            age_group: 查询的年龄段（Young、Middle 或 Senior）
             
         Returns:
             嵌套分区测试结果
@@ -325,20 +574,17 @@ class ParquetPartitioningExercise:
         print(f"测试嵌套分区 ({' -> '.join(partition_cols)})")
         print("=" * 60)
         
-        # 添加年龄段列用于嵌套分区
-        df_with_age_group = self.df.copy()
-        df_with_age_group['AgeGroup'] = pd.cut(
-            df_with_age_group['Age'], 
-            bins=[0, 30, 50, 100], 
-            labels=['Young', 'Middle', 'Senior']
-        ).astype(str)
+        # 添加年龄段列用于嵌套分区：(0, 30] Young，(30, 50] Middle，其余 Senior
+        age = self.table['Age']
+        age_groups = pc.if_else(pc.less_equal(age, 30), 'Young',
+                                pc.if_else(pc.less_equal(age, 50), 'Middle', 'Senior'))
         
         # 创建嵌套分区表
         nested_path = os.path.join(self.output_dir, 'nested_partitioned_table')
         if os.path.exists(nested_path):
             shutil.rmtree(nested_path)
         
-        table = pa.Table.from_pandas(df_with_age_group)
+        table = self.table.append_column('AgeGroup', age_groups)
         pq.write_to_dataset(
             table,
             root_path=nested_path,
@@ -353,25 +599,25 @@ class ParquetPartitioningExercise:
         print(f"叶子分区数: {nested_info['leaf_partitions']}")
         print(f"总大小: {nested_info['total_size']:.2f} MB")
         
-        # 测试嵌套分区查询
-        def query_nested():
-            import pyarrow.dataset as ds
-            dataset = ds.dataset(nested_path, format="parquet")
-            table = dataset.to_table()
-            df = table.to_pandas()
-            # 添加年龄段列用于测试
-            df['AgeGroup'] = df['Age'].apply(lambda x: 'Young' if x < 30 else ('Middle' if x < 50 else 'Senior'))
-            return df[(df['City'] == 'Beijing') & (df['AgeGroup'] == 'Middle')] if 'City' in df.columns else df
-        
-        df_nested, nested_time = self.performance_analyzer.measure_time(query_nested)
+        # 测试嵌套分区查询：两级分区列上的条件都用于裁剪
+        expression = (ds.field('City') == city) & (ds.field('AgeGroup') == age_group)
+        nested_table, nested_stats = self.performance_analyzer.measure_stats(
+            self._query_partitioned, expression, None, nested_path, partition_cols
+        )
+        nested_time = nested_stats['median']
+        fragments = self._fragment_counts(expression, nested_path, partition_cols)
         
-        print(f"嵌套分区查询: {nested_time:.4f} 秒, 结果: {len(df_nested)} 行")
+        print(f"嵌套分区查询 (城市={city}, 年龄段={age_group}): "
+              f"{self.performance_analyzer.format_stats(nested_stats)}, 结果: {len(nested_table)} 行, "
+              f"打开分片: {fragments['fragments_opened']}/{fragments['total_fragments']}")
         
         return {
             'partition_cols': partition_cols,
             'nested_info': nested_info,
             'query_time': nested_time,
-            'result_rows': len(df_nested)
+            'result_rows': len(nested_table),
+            **fragments,
+            'query_time_stats': nested_stats
         }
     
     def _analyze_nested_partitions(self, path: str) -> Dict[str, Any]:
@@ -422,6 +668,15 @@ class ParquetPartitioningExercise:
         # 5. 测试嵌套分区
         results['nested_partitioning'] = self.test_nested_partitioning()
         
+        # 6. 测试数据集清单
+        results['manifest'] = self.test_manifest_discovery()
+        
+        # 7. 测试模拟远程存储上的读取设置
+        results['remote_io'] = self.test_remote_io()
+        
+        # 8. 测试全表扫描的扩展性
+        results['scan_scaling'] = self.test_scan_scaling()
+        
         # 显示总结
         self.display_partitioning_summary(results)
         
@@ -445,19 +700,39 @@ class ParquetPartitioningExercise:
         print("🎯 分区效果:")
         
         if 'partition_pruning' in results:
-            speedup = results['partition_pruning'].get('speedup', 0)
-            print(f"• 分区裁剪性能提升: {speedup:.2f}x")
+            pruning = results['partition_pruning']
+            print(f"• 分区裁剪性能提升: {pruning.get('speedup', 0):.2f}x "
+                  f"(打开 {pruning.get('fragments_opened', 0)}/{pruning.get('total_fragments', 0)} 个分片)")
         
         if 'partition_info' in results:
             partition_count = results['partition_info'].get('partition_count', 0)
             print(f"• 分区数量: {partition_count}")
         
+        if 'manifest' in results:
+            print(f"• 数据集清单构建数据集提升: {results['manifest']['open_speedup']:.2f}x")
+        
+        if 'remote_io' in results:
+            remote = results['remote_io']['settings']
+            best = min(remote, key=lambda name: remote[name]['time'])
+            print(f"• 模拟远程存储: 最快的读取设置为 {best} "
+                  f"({remote[best]['requests']} 次请求, {remote[best]['time']:.4f} 秒)")
+        
+        if 'scan_scaling' in results:
+            scaling = results['scan_scaling']
+            best = min(scaling['settings'], key=lambda name: min(scaling['settings'][name]['times']))
+            times = scaling['settings'][best]['times']
+            print(f"• 全表扫描: 最快的扫描设置为 {best} "
+                  f"({scaling['cpu_counts'][times.index(min(times))]} 线程, {min(times):.4f} 秒)")
+        
         print("\n💡 分区最佳实践:")
         print("• 选择查询频繁的列作为分区键")
         print("• 避免创建过多小分区")
         print("• 考虑数据分布的均衡性")
         print("• 合理使用嵌套分区")
         print("• 定期监控分区性能")
+        print("• 分区很多时写入数据集清单，避免每次查询都列举目录")
+        print("• 数据在远程存储上时开启 pre_buffer 合并读取请求，每个分片的请求数决定了延迟")
+        print("• 分片多而小时增大 fragment_readahead，让多个分片的打开和读取重叠")
     
     def cleanup(self):
         """清理临时文件"""
@@ -4,30 +4,96 @@ Parquet 查询优化练习模块
 提供投影下推和谓词下推等查询优化技术的演示。
 """
 
+import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
-import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.fs as pafs
 import os
 from typing import Dict, Any, List, Tuple, Optional
 
-from .utils import PerformanceAnalyzer
+from .utils import PerformanceAnalyzer, ArrowTableData, DataFrameOrTable
+from .row_group_index import RowGroupIndex
+from .clustering import cluster_table, CLUSTER_METHODS
+from .bloom_filter import BloomFilterIndex, write_with_bloom_filters, DEFAULT_FPP
+from .page_index import PageIndex, page_index_write_options
+from .metadata_cache import MetadataCache
+from .column_cache import ColumnChunkCache, DEFAULT_COLUMN_CACHE_BYTES
+from .result_cache import QueryResultCache
+from .filter_compiler import compile_filters, filter_table
+from .pandas_conversion import read_pandas, table_to_pandas, resolve_profile
+from .read_modes import READ_MODES, read_table, hot_tier_path
+from . import remote_io
+from .remote_io import compare_io_settings, check_io_options, DEFAULT_REQUEST_LATENCY, DEFAULT_BANDWIDTH
+
+# 练习中使用的过滤场景
+FILTER_SCENARIOS = {
+    'predicate': [('Age', '>', 50)],
+    'combined': [('Age', '>', 30), ('City', 'in', ['Beijing', 'Shanghai', 'Guangzhou'])],
+    'range': [('Age', '>=', 25), ('Age', '<=', 45)],
+    'multi_condition': [('Age', '>', 30), ('Income', '>', 60000)],
+    'in': [('City', 'in', ['Beijing', 'Shanghai', 'Shenzhen'])]
+}
 
 
-class ParquetQueryOptimizationExercise:
+class ParquetQueryOptimizationExercise(ArrowTableData):
     """Parquet 查询优化练习类"""
     
-    def __init__(self, data_df: pd.DataFrame, output_dir: str = "output"):
+    def __init__(self, data: DataFrameOrTable, output_dir: str = "output",
+                 row_group_size: Optional[int] = None,
+                 cluster_by: Optional[List[str]] = None, cluster_method: str = 'sort',
+                 metadata_cache: Optional[MetadataCache] = None,
+                 column_cache: Optional[ColumnChunkCache] = None,
+                 result_cache: Optional[QueryResultCache] = None,
+                 pandas_profile: str = 'default', read_mode: str = 'buffered',
+                 filesystem: Optional[pafs.FileSystem] = None,
+                 io_options: Optional[Dict[str, Any]] = None, track_memory: bool = False):
         """
         初始化查询优化练习
         
         Args:
-            data_df: 要测试的数据
+            data: 要测试的数据（DataFrame 或 Arrow 表），内部统一保存为 Arrow 表，查询结果也保持为 Arrow 表
             output_dir: 输出目录
+            row_group_size: 测试文件的行组行数，默认把数据分成约 20 个行组（至少 1000 行），
+                            以便观察基于行组统计信息的剪枝效果
+            cluster_by: 写入前按这些列聚集数据，默认保持原始顺序
+            cluster_method: 聚集方式，'sort'、'zorder' 或 'hilbert'
+            metadata_cache: 文件元数据缓存，复杂查询场景重复打开同一文件时复用解析后的元数据；
+                            默认不缓存，每次查询都重新解析文件尾部
+            column_cache: 解码后列块的缓存，复杂查询场景重复读取同一列块时跳过解压和解码；
+                          设置后优先于 metadata_cache 使用
+            result_cache: 查询结果缓存，组合优化和复杂查询场景中相同的列和过滤条件直接返回缓存的结果；
+                          未命中时再经过 column_cache 或 metadata_cache 读取
+            pandas_profile: query_pandas 和 df 属性转换为 DataFrame 时使用的转换配置
+                            （见 pandas_conversion.PANDAS_PROFILES）
+            read_mode: 未设置列块缓存和元数据缓存时查询读取文件的方式，'buffered'、'mmap'（内存映射）
+                       或 'ipc'（内存映射未压缩的 Arrow IPC 热数据层，见 read_modes）
+            filesystem: 查询读取文件使用的 pyarrow 文件系统（如 remote_io.latency_filesystem() 模拟的远程存储）；
+                        设置 filesystem 或 io_options 后，未设置缓存的查询改为按读取设置扫描，read_mode 不再生效
+            io_options: 读取设置，pre_buffer、buffer_size、hole_size_limit、range_size_limit 等
+                        （见 remote_io.parquet_format）
+            track_memory: 是否测量读写操作的内存使用（峰值 RSS、Arrow 内存池、Python 分配），结果放在计时统计信息的 memory 键下
         """
-        self.df = data_df
+        if cluster_method not in CLUSTER_METHODS:
+            raise ValueError(f"cluster_method 必须是 {CLUSTER_METHODS} 之一: {cluster_method}")
+        if read_mode not in READ_MODES:
+            raise ValueError(f"read_mode 必须是 {READ_MODES} 之一: {read_mode}")
+        resolve_profile(pandas_profile)
+        self.set_data(data)
         self.output_dir = output_dir
-        self.performance_analyzer = PerformanceAnalyzer()
+        self.performance_analyzer = PerformanceAnalyzer(track_memory=track_memory)
         self.filename = os.path.join(output_dir, 'optimization_test.parquet')
+        self.row_group_size = row_group_size or max(self.table.num_rows // 20, 1000)
+        self.cluster_by = cluster_by
+        self.cluster_method = cluster_method
+        self.row_group_index = None
+        self.metadata_cache = metadata_cache
+        self.column_cache = column_cache
+        self.result_cache = result_cache
+        self.pandas_profile = pandas_profile
+        self.read_mode = read_mode
+        self.filesystem = filesystem
+        self.io_options = check_io_options(io_options)
         
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
@@ -38,9 +104,94 @@ class ParquetQueryOptimizationExercise:
     def _prepare_test_data(self) -> None:
         """准备测试数据"""
         print("准备查询优化测试数据...")
-        table = pa.Table.from_pandas(self.df)
-        pq.write_table(table, self.filename)
+        table = self.table
+        if self.cluster_by:
+            table = cluster_table(table, self.cluster_by, self.cluster_method)
+            print(f"数据已按 {', '.join(self.cluster_by)} 聚集（{self.cluster_method}）")
+        pq.write_table(table, self.filename, row_group_size=self.row_group_size)
         print(f"测试数据已保存到: {self.filename}")
+        
+        # 构建行组统计索引并保存为旁路文件
+        self.row_group_index = RowGroupIndex.build(self.filename)
+        index_path = self.row_group_index.save()
+        print(f"行组索引已保存到: {index_path} ({self.row_group_index.num_row_groups} 个行组)")
+    
+    def _read_table(self, columns: Optional[List[str]] = None, filters: Optional[List[Tuple]] = None) -> pa.Table:
+        """读取测试文件，设置了结果缓存时相同的查询直接返回缓存的结果"""
+        if self.result_cache is not None:
+            return self.result_cache.read_table(self.filename, columns=columns, filters=filters,
+                                                reader=self._read_source)
+        return self._read_source(self.filename, columns=columns, filters=filters)
+    
+    def _read_source(self, path: str, columns: Optional[List[str]] = None,
+                     filters: Optional[List[Tuple]] = None) -> pa.Table:
+        """执行查询，设置了列块缓存或元数据缓存时复用缓存的列块或文件元数据，否则按 read_mode 读取"""
+        if self.column_cache is not None:
+            return self.column_cache.read_table(path, columns=columns, filters=filters)
+        if self.metadata_cache is not None:
+            return self.metadata_cache.read_table(path, columns=columns, filters=filters)
+        if self.filesystem is not None or self.io_options:
+            return remote_io.read_table(path, columns=columns, filters=filters, filesystem=self.filesystem,
+                                        **self.io_options)
+        return read_table(path, columns=columns, filters=filters, mode=self.read_mode)
+    
+    def query_pandas(self, columns: Optional[List[str]] = None, filters: Optional[List[Tuple]] = None,
+                     profile: Optional[str] = None) -> pd.DataFrame:
+        """
+        执行查询并按转换配置返回 DataFrame
+        
+        未设置任何缓存时直接按配置读取文件（支持 read_dictionary 和 self_destruct）；
+        设置了结果缓存时查询结果是共享的缓存项，不会被 self_destruct 释放。
+        
+        Args:
+            columns: 要读取的列，默认读取所有列
+            filters: pyarrow 风格的过滤条件
+            profile: 转换配置，默认使用 self.pandas_profile
+            
+        Returns:
+            查询结果 DataFrame
+        """
+        if profile is None:
+            profile = self.pandas_profile
+        if (self.result_cache is None and self.column_cache is None and self.metadata_cache is None
+                and self.filesystem is None and not self.io_options):
+            return read_pandas(self.filename, columns=columns, filters=filters, profile=profile,
+                               mode=self.read_mode)
+        table = self._read_table(columns=columns, filters=filters)
+        return table_to_pandas(table, profile, owned=self.result_cache is None)
+    
+    def _cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """打印并返回已设置的各级缓存的统计"""
+        caches = {
+            'result_cache': ('结果缓存', self.result_cache),
+            'column_cache': ('列块缓存', self.column_cache),
+            'metadata_cache': ('元数据缓存', self.metadata_cache)
+        }
+        results = {}
+        for name, (label, cache) in caches.items():
+            if cache is None:
+                continue
+            stats = cache.stats()
+            results[name] = stats
+            message = f"{label}: 命中 {stats['hits']} 次, 未命中 {stats['misses']} 次, 命中率 {stats['hit_rate']:.1%}"
+            if 'saved_seconds' in stats:
+                message += f", 节省 {stats['saved_seconds']:.4f} 秒"
+            print(message)
+        return results
+    
+    def _print_prune_plan(self, plan: Dict[str, Any]) -> None:
+        """打印行组索引的剪枝结果"""
+        total_bytes = plan['read_bytes'] + plan['skipped_bytes']
+        skipped_percent = plan['skipped_bytes'] / total_bytes * 100 if total_bytes > 0 else 0
+        print(f"行组索引: 读取 {plan['read_row_groups']}/{plan['total_row_groups']} 个行组, "
+              f"跳过 {plan['skipped_row_groups']} 个行组 / {plan['skipped_rows']:,} 行 / "
+              f"{plan['skipped_bytes'] / 1024:.1f} KB ({skipped_percent:.1f}%)")
+    
+    @staticmethod
+    def _plan_summary(plan: Dict[str, Any]) -> Dict[str, int]:
+        """读取计划中用于保存的统计字段"""
+        return {key: plan[key] for key in ('total_row_groups', 'read_row_groups', 'skipped_row_groups',
+                                           'read_rows', 'skipped_rows', 'read_bytes', 'skipped_bytes')}
     
     def test_projection_pushdown(self, selected_columns: List[str] = None) -> Dict[str, Any]:
         """
@@ -61,36 +212,38 @@ class ParquetQueryOptimizationExercise:
         
         # 测试读取所有列
         def read_all_columns():
-            table = pq.read_table(self.filename)
-            return table.to_pandas()
+            return pq.read_table(self.filename)
         
-        df_all, time_all_columns = self.performance_analyzer.measure_time(read_all_columns)
+        table_all, all_columns_stats = self.performance_analyzer.measure_stats(read_all_columns)
+        time_all_columns = all_columns_stats['median']
         
-        print(f"读取所有列 ({len(df_all.columns)} 列): {time_all_columns:.4f} 秒")
+        print(f"读取所有列 ({table_all.num_columns} 列): {self.performance_analyzer.format_stats(all_columns_stats)}")
         
         # 测试只读取部分列
         def read_selected_columns():
-            table = pq.read_table(self.filename, columns=selected_columns)
-            return table.to_pandas()
+            return pq.read_table(self.filename, columns=selected_columns)
         
-        df_selected, time_selected_columns = self.performance_analyzer.measure_time(read_selected_columns)
+        table_selected, selected_columns_stats = self.performance_analyzer.measure_stats(read_selected_columns)
+        time_selected_columns = selected_columns_stats['median']
         
-        print(f"读取选定列 ({len(selected_columns)} 列): {time_selected_columns:.4f} 秒")
+        print(f"读取选定列 ({len(selected_columns)} 列): {self.performance_analyzer.format_stats(selected_columns_stats)}")
         
-        speedup = time_all_columns / time_selected_columns if time_selected_columns > 0 else 0
+        speedup = self.performance_analyzer.speedup(time_all_columns, time_selected_columns)
         print(f"性能提升: {speedup:.2f}x")
         
         # 计算数据量减少
-        memory_reduction = (1 - len(selected_columns) / len(df_all.columns)) * 100
+        memory_reduction = (1 - len(selected_columns) / table_all.num_columns) * 100
         print(f"内存使用减少: {memory_reduction:.1f}%")
         
         return {
             'all_columns_time': time_all_columns,
             'selected_columns_time': time_selected_columns,
             'speedup': speedup,
-            'all_columns_count': len(df_all.columns),
+            'all_columns_count': table_all.num_columns,
             'selected_columns_count': len(selected_columns),
-            'memory_reduction_percent': memory_reduction
+            'memory_reduction_percent': memory_reduction,
+            'all_columns_time_stats': all_columns_stats,
+            'selected_columns_time_stats': selected_columns_stats
         }
     
     def test_predicate_pushdown(self, filters: List[Tuple] = None) -> Dict[str, Any]:
@@ -108,57 +261,119 @@ class ParquetQueryOptimizationExercise:
         print("=" * 60)
         
         if filters is None:
-            filters = [('Age', '>', 50)]
+            filters = FILTER_SCENARIOS['predicate']
         
-        # 测试不使用过滤器（内存过滤）
+        # 测试不使用过滤器（读取全表后在内存中用同一表达式过滤）
         def memory_filter():
             table = pq.read_table(self.filename)
-            df = table.to_pandas()
-            # 应用过滤条件
-            for column, op, value in filters:
-                if op == '>':
-                    df = df[df[column] > value]
-                elif op == '<':
-                    df = df[df[column] < value]
-                elif op == '>=':
-                    df = df[df[column] >= value]
-                elif op == '<=':
-                    df = df[df[column] <= value]
-                elif op == '==':
-                    df = df[df[column] == value]
-                elif op == '!=':
-                    df = df[df[column] != value]
-                elif op == 'in':
-                    df = df[df[column].isin(value)]
-            return df
-        
-        df_filtered_memory, time_memory_filter = self.performance_analyzer.measure_time(memory_filter)
-        
-        print(f"内存过滤: {time_memory_filter:.4f} 秒, 结果行数: {len(df_filtered_memory)}")
+            return filter_table(table, filters)
+        
+        table_filtered_memory, memory_filter_stats = self.performance_analyzer.measure_stats(memory_filter)
+        time_memory_filter = memory_filter_stats['median']
+        
+        print(f"内存过滤: {self.performance_analyzer.format_stats(memory_filter_stats)}, 结果行数: {len(table_filtered_memory)}")
         
         # 测试使用 Parquet 过滤器
         def parquet_filter():
-            table = pq.read_table(self.filename, filters=filters)
-            return table.to_pandas()
+            return pq.read_table(self.filename, filters=compile_filters(filters))
+        
+        table_filtered_parquet, parquet_filter_stats = self.performance_analyzer.measure_stats(parquet_filter)
+        time_parquet_filter = parquet_filter_stats['median']
         
-        df_filtered_parquet, time_parquet_filter = self.performance_analyzer.measure_time(parquet_filter)
+        print(f"Parquet 过滤: {self.performance_analyzer.format_stats(parquet_filter_stats)}, 结果行数: {len(table_filtered_parquet)}")
         
-        print(f"Parquet 过滤: {time_parquet_filter:.4f} 秒, 结果行数: {len(df_filtered_parquet)}")
+        # 测试先用行组索引排除行组，再读取剩余行组
+        def index_filter():
+            table, _ = self.row_group_index.read(filters)
+            return table
         
-        speedup = time_memory_filter / time_parquet_filter if time_parquet_filter > 0 else 0
+        table_filtered_index, index_filter_stats = self.performance_analyzer.measure_stats(index_filter)
+        plan = self.row_group_index.plan(filters)
+        
+        print(f"索引剪枝 + 过滤: {self.performance_analyzer.format_stats(index_filter_stats)}, 结果行数: {len(table_filtered_index)}")
+        self._print_prune_plan(plan)
+        
+        speedup = self.performance_analyzer.speedup(time_memory_filter, time_parquet_filter)
         print(f"性能提升: {speedup:.2f}x")
         
         # 计算数据量减少
-        data_reduction = (1 - len(df_filtered_parquet) / len(self.df)) * 100
+        data_reduction = (1 - len(table_filtered_parquet) / self.table.num_rows) * 100
         print(f"数据量减少: {data_reduction:.1f}%")
         
         return {
             'memory_filter_time': time_memory_filter,
             'parquet_filter_time': time_parquet_filter,
+            'index_filter_time': index_filter_stats['median'],
             'speedup': speedup,
-            'filtered_rows': len(df_filtered_parquet),
-            'original_rows': len(self.df),
-            'data_reduction_percent': data_reduction
+            'filtered_rows': len(table_filtered_parquet),
+            'original_rows': self.table.num_rows,
+            'data_reduction_percent': data_reduction,
+            'row_group_pruning': self._plan_summary(plan),
+            'memory_filter_time_stats': memory_filter_stats,
+            'parquet_filter_time_stats': parquet_filter_stats,
+            'index_filter_time_stats': index_filter_stats
+        }
+    
+    def test_row_group_pruning(self, filters: List[Tuple] = None,
+                               columns: List[str] = None) -> Dict[str, Any]:
+        """
+        测试基于行组统计索引的剪枝
+        
+        行组的 min/max 只有在数据按过滤列聚集时才能排除行组，
+        默认使用按写入顺序递增的 UserID 做范围过滤。
+        
+        Args:
+            filters: 过滤条件，默认选择前 10% 的 UserID
+            columns: 要读取的列，默认读取所有列
+            
+        Returns:
+            行组剪枝测试结果
+        """
+        print("\n" + "=" * 60)
+        print("测试行组统计索引剪枝")
+        print("=" * 60)
+        
+        if filters is None:
+            filters = [('UserID', '<=', pc.min(self.table['UserID']).as_py() + self.table.num_rows // 10)]
+        
+        # 从旁路文件加载索引（模拟新进程复用已有索引）
+        index, load_stats = self.performance_analyzer.measure_stats(RowGroupIndex.load_or_build, self.filename)
+        print(f"加载行组索引: {self.performance_analyzer.format_stats(load_stats)}")
+        
+        # pyarrow 内部过滤
+        def pyarrow_filter():
+            return pq.read_table(self.filename, columns=columns, filters=compile_filters(filters))
+        
+        table_pyarrow, pyarrow_stats = self.performance_analyzer.measure_stats(pyarrow_filter)
+        print(f"pyarrow 过滤: {self.performance_analyzer.format_stats(pyarrow_stats)}, 结果行数: {table_pyarrow.num_rows}")
+        
+        # 索引剪枝后 read_row_groups
+        def index_read():
+            table, _ = index.read(filters, columns)
+            return table
+        
+        table_index, index_stats = self.performance_analyzer.measure_stats(index_read)
+        plan = index.plan(filters, columns)
+        print(f"索引剪枝读取: {self.performance_analyzer.format_stats(index_stats)}, 结果行数: {table_index.num_rows}")
+        self._print_prune_plan(plan)
+        
+        if table_index.num_rows != table_pyarrow.num_rows:
+            print("❌ 索引剪枝结果与 pyarrow 过滤结果不一致")
+        
+        speedup = self.performance_analyzer.speedup(pyarrow_stats['median'], index_stats['median'])
+        print(f"性能提升: {speedup:.2f}x")
+        
+        return {
+            'filters': [list(condition) for condition in filters],
+            'pyarrow_filter_time': pyarrow_stats['median'],
+            'index_read_time': index_stats['median'],
+            'index_load_time': load_stats['median'],
+            'speedup': speedup,
+            'result_rows': table_index.num_rows,
+            'row_group_pruning': self._plan_summary(plan),
+            'pyarrow_filter_time_stats': pyarrow_stats,
+            'index_read_time_stats': index_stats,
+            'index_load_time_stats': load_stats
         }
     
     def test_combined_optimization(self, 
@@ -182,52 +397,41 @@ class ParquetQueryOptimizationExercise:
             selected_columns = ['UserID', 'Username', 'Age', 'City']
         
         if filters is None:
-            filters = [('Age', '>', 30), ('City', 'in', ['Beijing', 'Shanghai', 'Guangzhou'])]
+            filters = FILTER_SCENARIOS['combined']
         
         # 组合优化：只读取需要的列 + 过滤
         def optimized_query():
-            table = pq.read_table(
-                self.filename,
-                columns=selected_columns,
-                filters=filters
-            )
-            return table.to_pandas()
+            return self._read_table(columns=selected_columns, filters=filters)
         
-        df_optimized, time_optimized = self.performance_analyzer.measure_time(optimized_query)
+        table_optimized, optimized_stats = self.performance_analyzer.measure_stats(optimized_query)
+        time_optimized = optimized_stats['median']
         
-        print(f"组合优化查询: {time_optimized:.4f} 秒")
-        print(f"结果行数: {len(df_optimized)}")
-        print(f"结果列数: {len(df_optimized.columns)}")
+        print(f"组合优化查询: {self.performance_analyzer.format_stats(optimized_stats)}")
+        print(f"结果行数: {len(table_optimized)}")
+        print(f"结果列数: {table_optimized.num_columns}")
         
-        # 与全表扫描对比
+        # 与全表扫描对比（读取全表后在内存中用同一表达式过滤）
         def full_scan():
             table = pq.read_table(self.filename)
-            df = table.to_pandas()
-            # 应用过滤条件
-            for column, op, value in filters:
-                if op == '>':
-                    df = df[df[column] > value]
-                elif op == '<':
-                    df = df[df[column] < value]
-                elif op == 'in':
-                    df = df[df[column].isin(value)]
-                # 可以添加更多操作符
-            # 选择列
-            return df[selected_columns]
-        
-        df_full_scan, time_full_scan = self.performance_analyzer.measure_time(full_scan)
-        
-        print(f"全表扫描 + 内存过滤: {time_full_scan:.4f} 秒")
-        
-        speedup = time_full_scan / time_optimized if time_optimized > 0 else 0
+            return filter_table(table, filters).select(selected_columns)
+        
+        table_full_scan, full_scan_stats = self.performance_analyzer.measure_stats(full_scan)
+        time_full_scan = full_scan_stats['median']
+        
+        print(f"全表扫描 + 内存过滤: {self.performance_analyzer.format_stats(full_scan_stats)}")
+        
+        speedup = self.performance_analyzer.speedup(time_full_scan, time_optimized)
         print(f"性能提升: {speedup:.2f}x")
         
         return {
             'optimized_time': time_optimized,
             'full_scan_time': time_full_scan,
             'speedup': speedup,
-            'result_rows': len(df_optimized),
-            'result_columns': len(df_optimized.columns)
+            'result_rows': len(table_optimized),
+            'result_columns': table_optimized.num_columns,
+            'optimized_time_stats': optimized_stats,
+            'full_scan_time_stats': full_scan_stats,
+            **self._cache_stats()
         }
     
     def test_complex_queries(self) -> Dict[str, Any]:
@@ -245,54 +449,386 @@ class ParquetQueryOptimizationExercise:
         
         # 场景1：范围查询
         print("场景1: 年龄范围查询 (25-45岁)")
-        range_filters = [('Age', '>=', 25), ('Age', '<=', 45)]
+        range_filters = FILTER_SCENARIOS['range']
         range_columns = ['UserID', 'Username', 'Age', 'Income']
         
         def range_query():
-            return pq.read_table(
-                self.filename, 
-                columns=range_columns, 
-                filters=range_filters
-            ).to_pandas()
+            return self._read_table(columns=range_columns, filters=range_filters)
         
-        _, range_time = self.performance_analyzer.measure_time(range_query)
-        results['range_query'] = {'time': range_time}
-        print(f"范围查询时间: {range_time:.4f} 秒")
+        _, range_stats = self.performance_analyzer.measure_stats(range_query)
+        results['range_query'] = {'time': range_stats['median'], 'time_stats': range_stats}
+        print(f"范围查询时间: {self.performance_analyzer.format_stats(range_stats)}")
         
         # 场景2：多条件查询
         print("\n场景2: 多条件查询 (高收入用户)")
-        multi_filters = [('Age', '>', 30), ('Income', '>', 60000)]
+        multi_filters = FILTER_SCENARIOS['multi_condition']
         multi_columns = ['UserID', 'Username', 'Age', 'City', 'Income']
         
         def multi_condition_query():
-            return pq.read_table(
-                self.filename,
-                columns=multi_columns,
-                filters=multi_filters
-            ).to_pandas()
+            return self._read_table(columns=multi_columns, filters=multi_filters)
         
-        _, multi_time = self.performance_analyzer.measure_time(multi_condition_query)
-        results['multi_condition_query'] = {'time': multi_time}
-        print(f"多条件查询时间: {multi_time:.4f} 秒")
+        _, multi_stats = self.performance_analyzer.measure_stats(multi_condition_query)
+        results['multi_condition_query'] = {'time': multi_stats['median'], 'time_stats': multi_stats}
+        print(f"多条件查询时间: {self.performance_analyzer.format_stats(multi_stats)}")
         
         # 场景3：IN 查询
         print("\n场景3: IN 查询 (特定城市)")
-        in_filters = [('City', 'in', ['Beijing', 'Shanghai', 'Shenzhen'])]
+        in_filters = FILTER_SCENARIOS['in']
         in_columns = ['UserID', 'Username', 'City', 'Income']
         
         def in_query():
-            return pq.read_table(
-                self.filename,
-                columns=in_columns,
-                filters=in_filters
-            ).to_pandas()
+            return self._read_table(columns=in_columns, filters=in_filters)
+        
+        _, in_stats = self.performance_analyzer.measure_stats(in_query)
+        results['in_query'] = {'time': in_stats['median'], 'time_stats': in_stats}
+        print(f"IN 查询时间: {self.performance_analyzer.format_stats(in_stats)}")
         
-        _, in_time = self.performance_analyzer.measure_time(in_query)
-        results['in_query'] = {'time': in_time}
-        print(f"IN 查询时间: {in_time:.4f} 秒")
+        if any(cache is not None for cache in (self.result_cache, self.column_cache, self.metadata_cache)):
+            print()
+            results.update(self._cache_stats())
         
         return results
     
+    def test_clustering_effect(self, cluster_by: List[str] = None,
+                               methods: List[str] = None) -> Dict[str, Any]:
+        """
+        对比不同数据聚集方式下各过滤场景的剪枝效果和查询延迟
+        
+        每种聚集方式写出一个行组大小相同的文件，对 FILTER_SCENARIOS 中的每个场景
+        测量 pq.read_table(filters=...) 的耗时，并用行组索引统计可跳过的字节数
+        （pyarrow 依据同样的行组统计信息跳过行组）。
+        
+        Args:
+            cluster_by: 聚集键，默认为过滤场景中最常用的 Age 和 City
+            methods: 要对比的聚集方式，默认对比全部方式；'none' 表示原始顺序
+            
+        Returns:
+            {聚集方式: {场景: 结果}}
+        """
+        print("\n" + "=" * 60)
+        print("测试数据聚集对谓词下推的影响")
+        print("=" * 60)
+        
+        if cluster_by is None:
+            cluster_by = ['Age', 'City']
+        if methods is None:
+            methods = ['none', *CLUSTER_METHODS]
+        
+        table = self.table
+        results = {}
+        for method in methods:
+            filename = os.path.join(self.output_dir, f'clustering_{method}.parquet')
+            layout = table if method == 'none' else cluster_table(table, cluster_by, method)
+            pq.write_table(layout, filename, row_group_size=self.row_group_size)
+            index = RowGroupIndex.build(filename)
+            
+            results[method] = {}
+            for scenario, filters in FILTER_SCENARIOS.items():
+                result_table, stats = self.performance_analyzer.measure_stats(
+                    pq.read_table, filename, filters=compile_filters(filters)
+                )
+                plan = index.plan(filters)
+                total_bytes = plan['read_bytes'] + plan['skipped_bytes']
+                results[method][scenario] = {
+                    'time': stats['median'],
+                    'result_rows': result_table.num_rows,
+                    'skipped_bytes_percent': plan['skipped_bytes'] / total_bytes * 100 if total_bytes else 0.0,
+                    'row_group_pruning': self._plan_summary(plan),
+                    'time_stats': stats
+                }
+            os.remove(filename)
+        
+        # 打印对比表：每个场景一行，每种聚集方式显示延迟和跳过的字节比例
+        print(f"聚集键: {', '.join(cluster_by)}，行组大小: {self.row_group_size:,} 行")
+        header = f"{'场景':<16}" + ''.join(f" {method + ' 秒/跳过%':<22}" for method in methods)
+        print(header)
+        print("-" * len(header))
+        for scenario in FILTER_SCENARIOS:
+            row = f"{scenario:<16}"
+            for method in methods:
+                result = results[method][scenario]
+                row += f" {result['time']:<8.4f} {result['skipped_bytes_percent']:>5.1f}%{'':<7}"
+            print(row)
+        
+        return results
+    
+    def test_point_lookup(self, columns: List[str] = None, cluster_by: List[str] = None,
+                          fpp: float = DEFAULT_FPP, mode: str = 'auto') -> Dict[str, Any]:
+        """
+        测试 Bloom 过滤器对高基数列等值查询的剪枝效果
+        
+        数据先按 cluster_by 聚集，使 UserID 和 Username 在各行组中无序分布，
+        此时行组的 min/max 无法排除任何行组。对每个查询对比 pyarrow 过滤、
+        行组统计索引剪枝和统计索引 + Bloom 过滤器剪枝的延迟和读取的行组数。
+        
+        Args:
+            columns: 写入 Bloom 过滤器的列，默认 UserID 和 Username
+            cluster_by: 写入前的聚集键，默认 Age
+            fpp: Bloom 过滤器误判率
+            mode: 过滤器存放方式，'auto'、'parquet' 或 'sidecar'
+        
+        Returns:
+            {查询: 结果}，以及文件中过滤器的存放方式和额外占用的空间
+        """
+        print("\n" + "=" * 60)
+        print("测试 Bloom 过滤器点查询")
+        print("=" * 60)
+        
+        if columns is None:
+            columns = ['UserID', 'Username']
+        if cluster_by is None:
+            cluster_by = ['Age']
+        
+        table = cluster_table(self.table, cluster_by, 'sort')
+        filename = os.path.join(self.output_dir, 'point_lookup.parquet')
+        bloom_index = write_with_bloom_filters(table, filename, columns, fpp=fpp, mode=mode,
+                                               row_group_size=self.row_group_size)
+        stats_index = RowGroupIndex.build(filename)
+        print(f"Bloom 过滤器: {', '.join(bloom_index.columns)}（{bloom_index.source}，误判率 {fpp}）")
+        
+        # 命中查询取中间一行的值；未命中的用户名落在已有值的范围内，min/max 无法排除
+        middle = self.table.slice(self.table.num_rows // 2, 1).to_pylist()[0]
+        lookups = {
+            'UserID 命中': [('UserID', '==', int(middle['UserID']))],
+            'Username 命中': [('Username', '==', middle['Username'])],
+            'Username 未命中': [('Username', '==', middle['Username'] + '#')]
+        }
+        
+        results = {}
+        for name, filters in lookups.items():
+            pyarrow_table, pyarrow_stats = self.performance_analyzer.measure_stats(
+                pq.read_table, filename, filters=compile_filters(filters)
+            )
+            (_, stats_plan), stats_stats = self.performance_analyzer.measure_stats(stats_index.read, filters)
+            (bloom_table, bloom_plan), bloom_stats = self.performance_analyzer.measure_stats(
+                bloom_index.read, filters, stats_index=stats_index
+            )
+            
+            if bloom_table.num_rows != pyarrow_table.num_rows:
+                print(f"❌ {name}: Bloom 过滤器剪枝结果与 pyarrow 过滤结果不一致")
+            
+            results[name] = {
+                'filters': [list(condition) for condition in filters],
+                'pyarrow_filter_time': pyarrow_stats['median'],
+                'stats_index_time': stats_stats['median'],
+                'bloom_time': bloom_stats['median'],
+                'speedup': self.performance_analyzer.speedup(pyarrow_stats['median'], bloom_stats['median']),
+                'result_rows': bloom_table.num_rows,
+                'stats_row_groups': stats_plan['read_row_groups'],
+                'bloom_row_groups': bloom_plan['read_row_groups'],
+                'total_row_groups': bloom_plan['total_row_groups'],
+                'pyarrow_filter_time_stats': pyarrow_stats,
+                'stats_index_time_stats': stats_stats,
+                'bloom_time_stats': bloom_stats
+            }
+        
+        print(f"{'查询':<16} {'pyarrow(秒)':<12} {'统计索引(秒)':<12} {'Bloom(秒)':<12} {'读取行组(统计/Bloom)':<20}")
+        print("-" * 76)
+        for name, result in results.items():
+            print(f"{name:<16} {result['pyarrow_filter_time']:<12.4f} {result['stats_index_time']:<12.4f} "
+                  f"{result['bloom_time']:<12.4f} {result['stats_row_groups']}/{result['bloom_row_groups']} "
+                  f"（共 {result['total_row_groups']}）")
+        
+        sidecar = BloomFilterIndex.sidecar_path(filename)
+        results['filter_source'] = bloom_index.source
+        results['filter_bytes'] = sum(num_bytes for locations in bloom_index.filters.values()
+                                      for _, num_bytes in filter(None, locations))
+        print(f"过滤器大小: {results['filter_bytes'] / 1024:.1f} KB")
+        
+        os.remove(filename)
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+        return results
+    
+    def test_page_index_pruning(self, scenarios: Dict[str, List[Tuple]] = None, columns: List[str] = None,
+                                max_rows_per_page: int = 2000) -> Dict[str, Any]:
+        """
+        对比行组级剪枝和页级剪枝读取的字节数与延迟
+        
+        整个数据集写成一个行组（模拟 128MB 以上的大行组），开启 write_page_index，
+        此时行组级剪枝只能整块读取，页索引可以只读取匹配的数据页。
+        只有低基数的 City 使用字典编码：字典页总要完整读取，高基数列的字典页会抵消页级剪枝的收益。
+        
+        Args:
+            scenarios: {场景: 过滤条件}，默认为 UserID/Username 上的选择性查询和一个不选择性的 Age 过滤
+            columns: 要读取的列，默认读取所有列
+            max_rows_per_page: 每个数据页的最大行数
+            
+        Returns:
+            {场景: 结果}
+        """
+        print("\n" + "=" * 60)
+        print("测试页索引剪枝")
+        print("=" * 60)
+        
+        middle = self.table.slice(self.table.num_rows // 2, 1).to_pylist()[0]
+        if scenarios is None:
+            first_id = pc.min(self.table['UserID']).as_py()
+            scenarios = {
+                'range_1%': [('UserID', '<', first_id + self.table.num_rows // 100)],
+                'point': [('UserID', '==', int(middle['UserID']))],
+                'username': [('Username', '==', middle['Username'])],
+                'predicate': FILTER_SCENARIOS['predicate']
+            }
+        
+        filename = os.path.join(self.output_dir, 'page_index.parquet')
+        pq.write_table(self.table, filename, row_group_size=self.table.num_rows, use_dictionary=['City'],
+                       **page_index_write_options(max_rows_per_page))
+        stats_index = RowGroupIndex.build(filename)
+        page_index, open_stats = self.performance_analyzer.measure_stats(PageIndex, filename)
+        print(f"页索引: {page_index.num_pages} 个数据页, {page_index.index_bytes / 1024:.1f} KB, "
+              f"加载 {self.performance_analyzer.format_stats(open_stats)}")
+        
+        results = {}
+        for scenario, filters in scenarios.items():
+            (row_group_table, row_group_plan), row_group_stats = self.performance_analyzer.measure_stats(
+                stats_index.read, filters, columns
+            )
+            (page_table, page_plan), page_stats = self.performance_analyzer.measure_stats(
+                page_index.read, filters, columns, stats_index=stats_index
+            )
+            if not page_table.equals(row_group_table):
+                print(f"❌ {scenario}: 页索引剪枝结果与行组剪枝结果不一致")
+            
+            row_group_bytes = page_plan['row_group_bytes']
+            results[scenario] = {
+                'filters': [list(condition) for condition in filters],
+                'result_rows': page_table.num_rows,
+                'row_group_bytes': row_group_bytes,
+                'page_bytes': page_plan['read_bytes'],
+                'bytes_reduction_percent': (1 - page_plan['read_bytes'] / row_group_bytes) * 100
+                if row_group_bytes else 0.0,
+                'read_pages': page_plan['read_pages'],
+                'total_pages': page_plan['total_pages'],
+                'row_group_time': row_group_stats['median'],
+                'page_time': page_stats['median'],
+                'speedup': self.performance_analyzer.speedup(row_group_stats['median'], page_stats['median']),
+                'row_group_time_stats': row_group_stats,
+                'page_time_stats': page_stats
+            }
+        
+        header = f"{'场景':<12} {'行组剪枝(KB)':<14} {'页剪枝(KB)':<12} {'减少':<8} {'数据页':<12} {'行组(秒)':<10} {'页(秒)':<10}"
+        print(header)
+        print("-" * len(header))
+        for scenario, result in results.items():
+            print(f"{scenario:<12} {result['row_group_bytes'] / 1024:<14.1f} {result['page_bytes'] / 1024:<12.1f} "
+                  f"{result['bytes_reduction_percent']:<7.1f}% {result['read_pages']}/{result['total_pages']:<8} "
+                  f"{result['row_group_time']:<10.4f} {result['page_time']:<10.4f}")
+        
+        os.remove(filename)
+        return results
+    
+    def test_column_cache(self, queries: Dict[str, Tuple[List[str], List[Tuple]]] = None,
+                          policy: str = 'lru', max_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        对比看板类重复查询在有无列块缓存时的吞吐量
+        
+        看板反复查询同几列热点列（City、Age、Income），没有缓存时每次都要重新解压和解码列块。
+        使用练习的 column_cache（未设置时按 policy 和 max_bytes 新建），
+        先清空缓存测量冷查询，再测量缓存预热后的重复查询。
+        
+        Args:
+            queries: {查询名: (列, 过滤条件)}，默认为三个只涉及 City、Age、Income 的看板查询
+            policy: 新建缓存时的淘汰策略，'lru' 或 'arc'
+            max_bytes: 新建缓存时的内存预算，默认为 DEFAULT_COLUMN_CACHE_BYTES
+            
+        Returns:
+            列块缓存测试结果
+        """
+        print("\n" + "=" * 60)
+        print("测试列块缓存（看板重复查询）")
+        print("=" * 60)
+        
+        if queries is None:
+            queries = {
+                'city_income': (['City', 'Income'], FILTER_SCENARIOS['in']),
+                'age_income': (['Age', 'Income'], FILTER_SCENARIOS['range']),
+                'high_income': (['City', 'Age', 'Income'], [('Income', '>', 60000)])
+            }
+        cache = self.column_cache
+        if cache is None:
+            cache = ColumnChunkCache(max_bytes or DEFAULT_COLUMN_CACHE_BYTES, policy=policy,
+                                     metadata_cache=self.metadata_cache)
+        
+        def uncached_dashboard():
+            return [pq.read_table(self.filename, columns=columns, filters=compile_filters(filters))
+                    for columns, filters in queries.values()]
+        
+        def cached_dashboard():
+            return [cache.read_table(self.filename, columns=columns, filters=filters)
+                    for columns, filters in queries.values()]
+        
+        expected, uncached_stats = self.performance_analyzer.measure_stats(uncached_dashboard)
+        cache.clear()
+        _, cold_time = self.performance_analyzer.measure_time(cached_dashboard)
+        tables, cached_stats = self.performance_analyzer.measure_stats(cached_dashboard)
+        if not all(table.equals(reference) for table, reference in zip(tables, expected)):
+            print("❌ 列块缓存查询结果与 pq.read_table 不一致")
+        
+        cache_stats = cache.stats()
+        results = {
+            'queries': {name: {'columns': columns, 'filters': [list(condition) for condition in filters]}
+                        for name, (columns, filters) in queries.items()},
+            'uncached_time': uncached_stats['median'],
+            'cold_time': cold_time,
+            'cached_time': cached_stats['median'],
+            'uncached_qps': len(queries) / uncached_stats['median'],
+            'cached_qps': len(queries) / cached_stats['median'],
+            'speedup': self.performance_analyzer.speedup(uncached_stats['median'], cached_stats['median']),
+            'uncached_time_stats': uncached_stats,
+            'cached_time_stats': cached_stats,
+            'cache': cache_stats
+        }
+        
+        print(f"无缓存:   {self.performance_analyzer.format_stats(uncached_stats)}, "
+              f"{results['uncached_qps']:.1f} 查询/秒")
+        print(f"冷缓存:   {cold_time:.4f} 秒")
+        print(f"热缓存:   {self.performance_analyzer.format_stats(cached_stats)}, "
+              f"{results['cached_qps']:.1f} 查询/秒")
+        print(f"列块缓存 ({cache_stats['policy']}): 命中率 {cache_stats['hit_rate']:.1%}, "
+              f"{cache_stats['entries']} 个列块, {cache_stats['bytes'] / 1024 / 1024:.1f} MB, "
+              f"{results['speedup']:.2f}x 性能提升")
+        
+        return results
+    
+    def test_remote_io(self, settings: Optional[Dict[str, Dict[str, Any]]] = None,
+                       latency: float = DEFAULT_REQUEST_LATENCY, bandwidth: Optional[float] = DEFAULT_BANDWIDTH,
+                       columns: Optional[List[str]] = None, filters: Optional[List[Tuple]] = None) -> Dict[str, Any]:
+        """
+        在模拟的远程存储上对比读取设置
+        
+        本地磁盘上每次读取请求几乎没有代价；远程存储上每次请求都有固定延迟，
+        请求次数（由 pre_buffer、范围合并和缓冲流大小决定）成为查询延迟的主要部分。
+        
+        Args:
+            settings: {名称: 读取设置}，默认为 remote_io.IO_SETTINGS
+            latency: 每次请求的模拟延迟（秒）
+            bandwidth: 模拟带宽（字节/秒），None 表示不限速
+            columns: 要读取的列，默认为组合查询的列
+            filters: 过滤条件，默认为组合查询的过滤条件
+            
+        Returns:
+            远程读取测试结果
+        """
+        print("\n" + "=" * 60)
+        print(f"测试模拟远程存储上的读取设置 (请求延迟 {latency * 1000:.1f} 毫秒)")
+        print("=" * 60)
+        
+        if columns is None:
+            columns = ['UserID', 'Username', 'Age', 'City', 'Income']
+        if filters is None:
+            filters = FILTER_SCENARIOS['combined']
+        
+        def query(filesystem, io_options):
+            return remote_io.read_table(self.filename, columns=columns, filters=filters,
+                                        filesystem=filesystem, **io_options)
+        
+        return {
+            'latency': latency,
+            'bandwidth': bandwidth,
+            'settings': compare_io_settings(query, self.performance_analyzer, settings, latency, bandwidth)
+        }
+    
     def run_optimization_exercise(self) -> Dict[str, Any]:
         """
         运行完整的查询优化练习
@@ -312,12 +848,30 @@ class ParquetQueryOptimizationExercise:
         # 2. Predicate pushdown test
         results['predicate'] = self.test_predicate_pushdown()
         
-        # 3. Combined optimization test
+        # 3. Row group index pruning test
+        results['row_group_pruning'] = self.test_row_group_pruning()
+        
+        # 4. Combined optimization test
         results['combined'] = self.test_combined_optimization()
         
-        # 4. Complex query test
+        # 5. Complex query test
         results['complex'] = self.test_complex_queries()
         
+        # 6. Clustering effect test
+        results['clustering'] = self.test_clustering_effect()
+        
+        # 7. Bloom filter point lookup test
+        results['point_lookup'] = self.test_point_lookup()
+        
+        # 8. Page index pruning test
+        results['page_index'] = self.test_page_index_pruning()
+        
+        # 9. Column chunk cache test
+        results['column_cache'] = self.test_column_cache()
+        
+        # 10. Remote storage I/O settings test
+        results['remote_io'] = self.test_remote_io()
+        
         # Display summary
         self.display_optimization_summary(results)
         
@@ -348,6 +902,32 @@ class ParquetQueryOptimizationExercise:
             pred_speedup = results['predicate'].get('speedup', 0)
             print(f"• 谓词下推: {pred_speedup:.2f}x 性能提升")
         
+        if 'row_group_pruning' in results:
+            pruning = results['row_group_pruning']['row_group_pruning']
+            print(f"• 行组索引剪枝: 跳过 {pruning['skipped_row_groups']}/{pruning['total_row_groups']} 个行组, "
+                  f"{results['row_group_pruning'].get('speedup', 0):.2f}x 性能提升")
+        
+        if 'point_lookup' in results:
+            hit = results['point_lookup']['Username 命中']
+            print(f"• Bloom 过滤器点查询: 读取 {hit['bloom_row_groups']}/{hit['total_row_groups']} 个行组, "
+                  f"{hit['speedup']:.2f}x 性能提升")
+        
+        if 'page_index' in results:
+            point = results['page_index']['point']
+            print(f"• 页索引剪枝: 点查询读取 {point['page_bytes'] / 1024:.1f} KB "
+                  f"(行组剪枝 {point['row_group_bytes'] / 1024:.1f} KB), {point['speedup']:.2f}x 性能提升")
+        
+        if 'column_cache' in results:
+            chunk = results['column_cache']
+            print(f"• 列块缓存: 看板重复查询 {chunk['cached_qps']:.1f} 查询/秒 "
+                  f"(无缓存 {chunk['uncached_qps']:.1f}), {chunk['speedup']:.2f}x 性能提升")
+        
+        if 'remote_io' in results:
+            remote = results['remote_io']['settings']
+            best = min(remote, key=lambda name: remote[name]['time'])
+            print(f"• 模拟远程存储: 最快的读取设置为 {best} "
+                  f"({remote[best]['requests']} 次请求, {remote[best]['time']:.4f} 秒)")
+        
         if 'combined' in results:
             comb_speedup = results['combined'].get('speedup', 0)
             print(f"• 组合优化: {comb_speedup:.2f}x 性能提升")
@@ -355,6 +935,11 @@ class ParquetQueryOptimizationExercise:
         print("\n💡 优化建议:")
         print("• 只读取需要的列（投影下推）")
         print("• 在存储层面进行数据过滤（谓词下推）")
+        print("• 让过滤列在行组间有序，行组统计信息才能排除数据")
+        print("• 对无序的高基数列做等值查询时，为其写入 Bloom 过滤器")
+        print("• 行组很大时写入页索引，选择性查询只需读取匹配的数据页")
+        print("• 看板类重复查询缓存解码后的热点列块，避免重复解压和解码")
+        print("• 在高延迟的远程存储上开启 pre_buffer 并放宽范围合并，减少请求次数")
         print("• 结合使用多种优化技术")
         print("• 根据查询模式设计合适的分区策略")
     
@@ -362,6 +947,8 @@ class ParquetQueryOptimizationExercise:
         """清理临时文件"""
         from .utils import cleanup_files
         patterns = [
-            self.filename
+            self.filename,
+            RowGroupIndex.sidecar_path(self.filename),
+            hot_tier_path(self.filename)
         ]
         cleanup_files(patterns)
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+读取模式模块
+
+练习中的读取默认是带缓冲的文件读取：数据从页缓存复制到用户态缓冲区，再解压、解码成 Arrow 表。
+本模块提供三种读取模式：
+
+- buffered: pq.read_table 的默认行为
+- mmap: pq.read_table(memory_map=True)，通过内存映射访问文件，省去一次读入缓冲区的复制，
+  但仍需解压和解码
+- ipc: 热数据层。把 Parquet 文件转写为未压缩的 Arrow IPC（Feather v2）旁路文件，
+  读取时内存映射该文件，列数据直接引用映射的页面（零复制），重复读取几乎没有开销，
+  内存由操作系统页缓存承担，可以被回收，不计入进程的匿名内存
+"""
+
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import List, Optional
+
+from .filter_compiler import Filters, compile_filters, filter_table, normalize_filters
+
+# 支持的读取模式
+READ_MODES = ('buffered', 'mmap', 'ipc')
+
+
+def hot_tier_path(filename: str) -> str:
+    """
+    热数据层文件路径
+
+    与行组索引一样以下划线开头，pyarrow.dataset 发现文件时会忽略它。
+    """
+    directory, basename = os.path.split(filename)
+    return os.path.join(directory, f"_{basename}.arrow")
+
+
+def write_hot_tier(filename: str, path: Optional[str] = None) -> str:
+    """
+    把 Parquet 文件按行组流式转写为未压缩的 Arrow IPC 文件
+
+    先写临时文件再改名，读取方不会看到写了一半的文件。
+
+    Args:
+        filename: Parquet 文件路径
+        path: IPC 文件路径，默认为 hot_tier_path(filename)
+
+    Returns:
+        IPC 文件路径
+    """
+    path = path or hot_tier_path(filename)
+    parquet_file = pq.ParquetFile(filename)
+    temp_path = f"{path}.tmp"
+    with pa.OSFile(temp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, parquet_file.schema_arrow) as writer:
+            for rg in range(parquet_file.num_row_groups):
+                writer.write_table(parquet_file.read_row_group(rg))
+    os.replace(temp_path, path)
+    return path
+
+
+def ensure_hot_tier(filename: str) -> str:
+    """
+    确保热数据层文件存在且不旧于 Parquet 文件，否则重新转写
+
+    Args:
+        filename: Parquet 文件路径
+
+    Returns:
+        IPC 文件路径
+    """
+    path = hot_tier_path(filename)
+    if not os.path.exists(path) or os.stat(path).st_mtime_ns < os.stat(filename).st_mtime_ns:
+        write_hot_tier(filename, path)
+    return path
+
+
+def read_hot_tier(path: str, columns: Optional[List[str]] = None,
+                  filters: Optional[Filters] = None) -> pa.Table:
+    """
+    内存映射读取 Arrow IPC 文件
+
+    没有过滤条件时返回的表直接引用映射的页面，不复制数据；有过滤条件时只有过滤结果被复制。
+
+    Args:
+        path: IPC 文件路径
+        columns: 要读取的列，默认读取所有列
+        filters: pyarrow 风格的过滤条件
+
+    Returns:
+        Arrow 表
+    """
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    if not filters:
+        return table if columns is None else table.select(columns)
+    if columns is not None:
+        # 先只保留结果列和过滤列，过滤时不复制其他列
+        filter_columns = {column for group in normalize_filters(filters) for column, _, _ in group}
+        table = table.select(list(columns) + sorted(filter_columns - set(columns)))
+        return filter_table(table, filters).select(columns)
+    return filter_table(table, filters)
+
+
+def read_table(filename: str, columns: Optional[List[str]] = None, filters: Optional[Filters] = None,
+               mode: str = 'buffered', **read_options) -> pa.Table:
+    """
+    按读取模式读取 Parquet 文件
+
+    Args:
+        filename: Parquet 文件路径
+        columns: 要读取的列，默认读取所有列
+        filters: pyarrow 风格的过滤条件
+        mode: 读取模式，'buffered'、'mmap' 或 'ipc'（热数据层不存在或已过期时先转写）
+        **read_options: buffered 和 mmap 模式下传给 pq.read_table 的其他参数（如 read_dictionary），
+                        ipc 模式下忽略
+
+    Returns:
+        Arrow 表
+    """
+    if mode not in READ_MODES:
+        raise ValueError(f"mode 必须是 {READ_MODES} 之一: {mode}")
+    if mode == 'ipc':
+        return read_hot_tier(ensure_hot_tier(filename), columns, filters)
+    return pq.read_table(filename, columns=columns, filters=compile_filters(filters),
+                         memory_map=mode == 'mmap', **read_options)
@@ -0,0 +1,304 @@
+"""
+远程存储模拟与读取 I/O 设置模块
+
+生产环境中的文件放在网络存储上，每次请求都有毫秒级的固定延迟，而练习和基准测试都读本地磁盘，
+请求次数的影响完全看不出来。本模块提供：
+
+- LatencyFileSystemHandler：包装本地文件系统的 pyarrow.fs 文件系统，每次读取请求注入固定延迟
+  和按带宽计算的传输时间，元数据请求（获取文件信息、列举目录、打开文件）也注入延迟，并统计请求数
+- parquet_format / read_table：暴露 pre_buffer、范围合并（CacheOptions 的 hole_size_limit、
+  range_size_limit、lazy）和缓冲流大小（buffer_size）等读取设置
+
+说明：pyarrow 通过 PythonFile 调用 Python 实现的文件对象时，同一文件上的读取请求是串行执行的，
+因此模拟中 pre_buffer 的收益主要来自合并后请求数的减少，而不是请求的并发。
+"""
+
+import os
+import time
+import threading
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+from typing import Dict, Any, Callable, List, Optional
+
+from .filter_compiler import Filters, compile_filters
+
+# 默认的模拟请求延迟（秒）和带宽（字节/秒），大致相当于同区域的对象存储
+DEFAULT_REQUEST_LATENCY = 0.005
+DEFAULT_BANDWIDTH = 200 * 1024 * 1024
+
+# 读取设置允许的参数（见 parquet_format）
+IO_OPTIONS = ('pre_buffer', 'buffer_size', 'hole_size_limit', 'range_size_limit', 'lazy', 'prefetch_limit')
+
+# 对比用的读取设置
+IO_SETTINGS = {
+    'pre_buffer': {'pre_buffer': True},
+    'no_pre_buffer': {'pre_buffer': False},
+    'buffered_stream': {'pre_buffer': False, 'buffer_size': 64 * 1024},
+    'wide_coalescing': {'pre_buffer': True, 'hole_size_limit': 1024 * 1024, 'range_size_limit': 64 * 1024 * 1024}
+}
+
+
+class _LatencyFile:
+    """带延迟的只读文件对象，交给 pa.PythonFile 包装"""
+
+    def __init__(self, path: str, handler: 'LatencyFileSystemHandler'):
+        self._file = open(path, 'rb')
+        self._handler = handler
+
+    def read(self, nbytes: int = -1) -> bytes:
+        data = self._file.read(nbytes)
+        self._handler._request('read', len(data))
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return False
+
+
+class LatencyFileSystemHandler(pafs.FileSystemHandler):
+    """
+    本地文件系统的包装，模拟远程存储的请求延迟和带宽
+
+    用 pafs.PyFileSystem(handler) 得到可以传给 pq.read_table、ds.dataset 的文件系统。
+    写操作直接交给本地文件系统，不注入延迟。
+    """
+
+    def __init__(self, latency: float = DEFAULT_REQUEST_LATENCY, bandwidth: Optional[float] = DEFAULT_BANDWIDTH):
+        """
+        初始化
+
+        Args:
+            latency: 每次请求的固定延迟（秒）
+            bandwidth: 带宽（字节/秒），None 表示不限速
+        """
+        if latency < 0:
+            raise ValueError(f"latency 不能为负数: {latency}")
+        if bandwidth is not None and bandwidth <= 0:
+            raise ValueError(f"bandwidth 必须大于 0: {bandwidth}")
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._local = pafs.LocalFileSystem()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def _request(self, kind: str, nbytes: int = 0) -> None:
+        """记录一次请求并等待模拟的延迟和传输时间"""
+        delay = self.latency + (nbytes / self.bandwidth if self.bandwidth else 0.0)
+        with self._lock:
+            self._counts[kind] += 1
+            self._bytes_read += nbytes
+            self._simulated_seconds += delay
+        if delay > 0:
+            time.sleep(delay)
+
+    def reset_stats(self) -> None:
+        """清零请求统计"""
+        with self._lock:
+            self._counts = {'read': 0, 'open': 0, 'info': 0, 'list': 0}
+            self._bytes_read = 0
+            self._simulated_seconds = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """请求统计：各类请求数、请求总数、读取字节数和注入的等待时间"""
+        with self._lock:
+            return {
+                'read_requests': self._counts['read'],
+                'open_requests': self._counts['open'],
+                'info_requests': self._counts['info'],
+                'list_requests': self._counts['list'],
+                'requests': sum(self._counts.values()),
+                'bytes_read': self._bytes_read,
+                'simulated_seconds': self._simulated_seconds
+            }
+
+    def get_type_name(self) -> str:
+        return 'latency'
+
+    def normalize_path(self, path: str) -> str:
+        return self._local.normalize_path(path)
+
+    def get_file_info(self, paths: List[str]) -> List[pafs.FileInfo]:
+        for _ in paths:
+            self._request('info')
+        return self._local.get_file_info(paths)
+
+    def get_file_info_selector(self, selector: pafs.FileSelector) -> List[pafs.FileInfo]:
+        infos = self._local.get_file_info(selector)
+        # 对象存储按前缀分页列举，每页约 1000 个对象
+        for _ in range(max(1, (len(infos) + 999) // 1000)):
+            self._request('list')
+        return infos
+
+    def open_input_file(self, path: str) -> pa.PythonFile:
+        self._request('open')
+        return pa.PythonFile(_LatencyFile(path, self), mode='r')
+
+    def open_input_stream(self, path: str) -> pa.PythonFile:
+        return self.open_input_file(path)
+
+    def create_dir(self, path: str, recursive: bool) -> None:
+        self._local.create_dir(path, recursive=recursive)
+
+    def delete_dir(self, path: str) -> None:
+        self._local.delete_dir(path)
+
+    def delete_dir_contents(self, path: str, missing_dir_ok: bool = False) -> None:
+        self._local.delete_dir_contents(path, missing_dir_ok=missing_dir_ok)
+
+    def delete_root_dir_contents(self) -> None:
+        raise NotImplementedError("不支持清空根目录")
+
+    def delete_file(self, path: str) -> None:
+        self._local.delete_file(path)
+
+    def move(self, src: str, dest: str) -> None:
+        self._local.move(src, dest)
+
+    def copy_file(self, src: str, dest: str) -> None:
+        self._local.copy_file(src, dest)
+
+    def open_output_stream(self, path: str, metadata: Optional[Dict[str, str]] = None) -> pa.NativeFile:
+        return self._local.open_output_stream(path, metadata=metadata)
+
+    def open_append_stream(self, path: str, metadata: Optional[Dict[str, str]] = None) -> pa.NativeFile:
+        return self._local.open_append_stream(path, metadata=metadata)
+
+
+def latency_filesystem(latency: float = DEFAULT_REQUEST_LATENCY,
+                       bandwidth: Optional[float] = DEFAULT_BANDWIDTH) -> pafs.PyFileSystem:
+    """
+    创建模拟远程存储的文件系统，请求统计通过 fs.handler.stats() 获取
+
+    Args:
+        latency: 每次请求的固定延迟（秒）
+        bandwidth: 带宽（字节/秒），None 表示不限速
+
+    Returns:
+        文件系统
+    """
+    return pafs.PyFileSystem(LatencyFileSystemHandler(latency, bandwidth))
+
+
+def parquet_format(pre_buffer: bool = True, buffer_size: Optional[int] = None,
+                   hole_size_limit: Optional[int] = None, range_size_limit: Optional[int] = None,
+                   lazy: Optional[bool] = None, prefetch_limit: Optional[int] = None) -> ds.ParquetFileFormat:
+    """
+    按读取设置构建 Parquet 文件格式
+
+    Args:
+        pre_buffer: 是否预先缓冲列块数据：把一个行组内需要的列块按范围合并后一起请求，
+                    而不是每个列块单独请求
+        buffer_size: 缓冲流大小（字节）；None 表示整块读取列块，设置后按该大小分多次读取，
+                     内存占用小但请求数多
+        hole_size_limit: pre_buffer 合并范围时允许跨过的最大空洞（字节），pyarrow 默认 8 KiB
+        range_size_limit: 合并后单个范围的最大字节数，pyarrow 默认 32 MiB
+        lazy: 是否在读取器需要时才请求合并后的范围，pyarrow 默认 True
+        prefetch_limit: lazy 为 True 时提前请求的范围数
+
+    Returns:
+        Parquet 文件格式，可传给 ds.dataset(format=...)
+    """
+    cache_settings = {'hole_size_limit': hole_size_limit, 'range_size_limit': range_size_limit,
+                      'lazy': lazy, 'prefetch_limit': prefetch_limit}
+    cache_settings = {key: value for key, value in cache_settings.items() if value is not None}
+    scan_options = ds.ParquetFragmentScanOptions(
+        use_buffered_stream=buffer_size is not None,
+        buffer_size=buffer_size or 8192,
+        pre_buffer=pre_buffer,
+        cache_options=pa.CacheOptions(**cache_settings) if cache_settings else None
+    )
+    return ds.ParquetFileFormat(default_fragment_scan_options=scan_options)
+
+
+def check_io_options(io_options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    检查读取设置的参数名
+
+    Raises:
+        ValueError: 不支持的参数
+    """
+    io_options = dict(io_options or {})
+    unknown = set(io_options) - set(IO_OPTIONS)
+    if unknown:
+        raise ValueError(f"不支持的读取设置: {sorted(unknown)}，可选 {list(IO_OPTIONS)}")
+    return io_options
+
+
+def read_table(path: str, columns: Optional[List[str]] = None, filters: Optional[Filters] = None,
+               filesystem: Optional[pafs.FileSystem] = None, **io_options) -> pa.Table:
+    """
+    按读取设置读取单个 Parquet 文件
+
+    Args:
+        path: 文件路径
+        columns: 要读取的列，默认读取所有列
+        filters: pyarrow 风格的过滤条件
+        filesystem: 文件系统，默认为本地文件系统
+        **io_options: 读取设置，见 parquet_format
+
+    Returns:
+        Arrow 表
+    """
+    dataset = ds.dataset(os.path.abspath(path), format=parquet_format(**check_io_options(io_options)),
+                         filesystem=filesystem)
+    return dataset.to_table(columns=columns, filter=compile_filters(filters))
+
+
+def compare_io_settings(query: Callable[..., pa.Table], performance_analyzer,
+                        settings: Optional[Dict[str, Dict[str, Any]]] = None,
+                        latency: float = DEFAULT_REQUEST_LATENCY,
+                        bandwidth: Optional[float] = DEFAULT_BANDWIDTH) -> Dict[str, Dict[str, Any]]:
+    """
+    在模拟的远程存储上对比不同读取设置的请求数和延迟
+
+    每种设置先执行一次查询统计请求数，再用 performance_analyzer.measure_stats 重复计时。
+
+    Args:
+        query: 查询函数，调用方式为 query(filesystem, io_options)
+        performance_analyzer: 性能分析器
+        settings: {名称: 读取设置}，默认为 IO_SETTINGS
+        latency: 每次请求的固定延迟（秒）
+        bandwidth: 带宽（字节/秒），None 表示不限速
+
+    Returns:
+        {名称: {'time', 'time_stats', 'rows', 请求统计...}}
+    """
+    settings = settings or IO_SETTINGS
+    filesystem = latency_filesystem(latency, bandwidth)
+    results = {}
+    for name, io_options in settings.items():
+        io_options = check_io_options(io_options)
+        filesystem.handler.reset_stats()
+        table = query(filesystem, io_options)
+        requests = filesystem.handler.stats()
+        _, stats = performance_analyzer.measure_stats(query, filesystem, io_options)
+        results[name] = {
+            'time': stats['median'],
+            'time_stats': stats,
+            'rows': table.num_rows,
+            **requests
+        }
+        print(f"{name:<16} {performance_analyzer.format_stats(stats)}, 请求 {requests['requests']} 次 "
+              f"(读取 {requests['read_requests']}, 打开 {requests['open_requests']}), "
+              f"读取 {requests['bytes_read'] / 1024 / 1024:.1f} MB")
+    return results
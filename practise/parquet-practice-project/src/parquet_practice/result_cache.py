@@ -0,0 +1,249 @@
+"""
+查询结果缓存模块
+
+看板和练习中的查询经常以完全相同的列和过滤条件重复执行，每次都从头读取和过滤。
+本模块把 (列, 规范化后的过滤条件, 文件版本) 作为键缓存查询返回的 Arrow 表：
+等价的过滤条件（条件顺序不同、IN 列表顺序不同、'=' 与 '=='）命中同一缓存项，
+文件被改写后版本变化，旧结果自然不再命中。缓存项有存活时间（TTL），并按内存预算做 LRU 淘汰。
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Dict, Any, Callable, Hashable, List, Optional, Tuple, Union
+
+from .filter_compiler import Filters, normalize_filters, normalize_operator, compile_filters
+
+# 默认的缓存内存预算
+DEFAULT_RESULT_CACHE_BYTES = 128 * 1024 * 1024
+
+# 默认的缓存项存活时间（秒）
+DEFAULT_RESULT_TTL = 300.0
+
+
+def _sort_key(value: Any) -> Tuple[str, str]:
+    """不同类型的值也能排序的排序键"""
+    return type(value).__name__, repr(value)
+
+
+def _canonical_value(value: Any, is_set: bool = False) -> Hashable:
+    """把过滤值转换为可哈希的规范形式，is_set 为 True 时（IN 列表）去重并排序"""
+    if isinstance(value, (pa.Array, pa.ChunkedArray)):
+        value = value.to_pylist()
+    # 字符串以外的可迭代对象（列表、NumPy 数组、pandas Series 等）视为值的序列；0 维数组按标量处理
+    if not isinstance(value, (str, bytes)) and hasattr(value, '__iter__') and getattr(value, 'ndim', 1) != 0:
+        items = [_canonical_value(item) for item in value]
+        return tuple(sorted(set(items), key=_sort_key)) if is_set else tuple(items)
+    if hasattr(value, 'item') and callable(value.item):
+        # NumPy 标量
+        return value.item()
+    return value
+
+
+def canonicalize_filters(filters: Optional[Filters]) -> Tuple:
+    """
+    将过滤条件转换为规范形式，语义相同的过滤条件得到相同的结果
+
+    统一为析取范式后，操作符使用规范名称（见 normalize_operator），IN 列表去重排序，
+    每个条件组内的条件以及条件组之间去重并排序。
+
+    Args:
+        filters: pyarrow 风格的过滤条件
+
+    Returns:
+        可哈希的元组；filters 为空时返回 ()
+    """
+    groups = set()
+    for group in normalize_filters(filters):
+        conditions = set()
+        for column, op, value in group:
+            op = normalize_operator(op)
+            if op in ('is null', 'is not null'):
+                value = None
+            conditions.add((column, op, _canonical_value(value, is_set=op in ('in', 'not in'))))
+        groups.add(tuple(sorted(conditions, key=repr)))
+    return tuple(sorted(groups, key=repr))
+
+
+def file_versions(paths: Union[str, List[str]]) -> Tuple[Tuple[str, int, int], ...]:
+    """
+    文件版本：每个文件的 (绝对路径, 修改时间, 大小)
+
+    Args:
+        paths: 文件路径或路径列表
+
+    Returns:
+        按传入顺序排列的版本元组
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    versions = []
+    for path in paths:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        versions.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(versions)
+
+
+class QueryResultCache:
+    """查询结果（Arrow 表）的 LRU 缓存，带存活时间"""
+
+    def __init__(self, max_bytes: int = DEFAULT_RESULT_CACHE_BYTES,
+                 ttl: Optional[float] = DEFAULT_RESULT_TTL):
+        """
+        初始化查询结果缓存
+
+        Args:
+            max_bytes: 内存预算（按结果表的 nbytes 计算），超过预算时淘汰最久未使用的结果，
+                       单个超过预算的结果不缓存
+            ttl: 缓存项的存活时间（秒），None 表示不过期
+        """
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes 必须大于 0: {max_bytes}")
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"ttl 必须大于 0: {ttl}")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(paths: Union[str, List[str]], columns: Optional[List[str]] = None,
+                 filters: Optional[Filters] = None) -> Tuple:
+        """
+        查询的缓存键：(列, 规范化的过滤条件, 文件版本)
+
+        列的顺序决定结果表的列顺序，因此保持原样。
+
+        Args:
+            paths: 查询的文件路径或路径列表
+            columns: 要读取的列，None 表示所有列
+            filters: pyarrow 风格的过滤条件
+
+        Returns:
+            可哈希的缓存键
+        """
+        return (
+            tuple(columns) if columns is not None else None,
+            canonicalize_filters(filters),
+            file_versions(paths)
+        )
+
+    def _remove(self, key: Tuple) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry['nbytes']
+
+    def _purge_stale(self, versions: Tuple[Tuple[str, int, int], ...]) -> None:
+        """移除涉及这些文件旧版本的缓存结果，它们不会再被命中（调用方持有锁）"""
+        current = {version[0]: version for version in versions}
+        stale = [key for key in self._entries
+                 if any(version[0] in current and version != current[version[0]] for version in key[2])]
+        for key in stale:
+            self._remove(key)
+            self.invalidations += 1
+
+    def _lookup(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """查找未过期的缓存项（调用方持有锁）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry['expires'] is not None and time.monotonic() >= entry['expires']:
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def read_table(self, paths: Union[str, List[str]], columns: Optional[List[str]] = None,
+                   filters: Optional[Filters] = None,
+                   reader: Optional[Callable[..., pa.Table]] = None) -> pa.Table:
+        """
+        执行查询，相同的查询直接返回缓存的结果
+
+        Args:
+            paths: 查询的文件路径或路径列表
+            columns: 要读取的列，默认读取所有列
+            filters: pyarrow 风格的过滤条件
+            reader: 未命中时执行查询的函数，调用方式为 reader(paths, columns=..., filters=...)，
+                    默认用 pq.read_table 读取（过滤条件经 compile_filters 编译）
+
+        Returns:
+            Arrow 表（缓存项之间共享，Arrow 表不可变）
+        """
+        start_time = time.perf_counter()
+        key = self.make_key(paths, columns, filters)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                self.saved_seconds += max(entry['compute_time'] - (time.perf_counter() - start_time), 0.0)
+                return entry['table']
+            self.misses += 1
+
+        if reader is None:
+            table = pq.read_table(paths, columns=columns, filters=compile_filters(filters))
+        else:
+            table = reader(paths, columns=columns, filters=filters)
+        compute_time = time.perf_counter() - start_time
+        nbytes = table.nbytes
+        if nbytes > self.max_bytes:
+            return table
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._purge_stale(key[2])
+            self._entries[key] = {
+                'table': table,
+                'nbytes': nbytes,
+                'compute_time': compute_time,
+                'expires': time.monotonic() + self.ttl if self.ttl is not None else None
+            }
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return table
+
+    def invalidate(self, path: str) -> None:
+        """移除涉及指定文件的所有缓存结果"""
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in [key for key in self._entries if any(version[0] == path for version in key[2])]:
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """清空缓存（计数器保留）"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计：命中、未命中、过期、淘汰、失效次数，命中率，节省的查询时间，当前缓存项数和字节数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'saved_seconds': self.saved_seconds,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl
+            }
@@ -0,0 +1,322 @@
+"""
+基准结果存储模块
+
+以追加写入的 JSONL 文件保存每次运行的计时统计，并记录 git 版本、主机指纹和库版本，
+用于比较不同运行之间的性能并发现统计显著的回退。
+"""
+
+import os
+import json
+import uuid
+import hashlib
+import platform
+import subprocess
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import psutil
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from .utils import t_critical_95
+
+# 默认的历史记录文件名，保存在结果 JSON 所在目录
+HISTORY_FILENAME = 'benchmark_history.jsonl'
+
+# 写入历史记录的统计字段（samples 用于显著性检验）
+_STORED_STAT_FIELDS = ('median', 'mean', 'min', 'stddev', 'repeat', 'samples')
+
+
+def extract_metrics(results: Any, prefix: str = '') -> Dict[str, Dict[str, Any]]:
+    """
+    从结果字典中提取所有计时统计信息（measure_stats 的返回值）
+
+    嵌套字典的键以 "." 连接，列表元素以 "[i]" 标记，例如
+    "Parquet.read_time_stats"、"parquet_read_stats[2]"。
+
+    Args:
+        results: 练习或基准测试的结果
+        prefix: 键名前缀
+
+    Returns:
+        指标名到统计信息的映射
+    """
+    metrics = {}
+    if isinstance(results, dict):
+        if 'samples' in results and 'median' in results:
+            metrics[prefix] = {field: results[field] for field in _STORED_STAT_FIELDS if field in results}
+            return metrics
+        for key, value in results.items():
+            metrics.update(extract_metrics(value, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(results, list):
+        for i, value in enumerate(results):
+            metrics.update(extract_metrics(value, f"{prefix}[{i}]"))
+    return metrics
+
+
+def collect_environment() -> Dict[str, Any]:
+    """
+    收集当前运行环境：git 版本、主机指纹和库版本
+
+    Returns:
+        包含 git、host、versions 的字典；不在 git 仓库中时 git.sha 为 None
+    """
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    git = {'sha': None, 'dirty': None}
+    try:
+        git['sha'] = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=repo_dir, capture_output=True, text=True,
+            check=True, timeout=10
+        ).stdout.strip()
+        status = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo_dir,
+            capture_output=True, text=True, check=True, timeout=30
+        ).stdout
+        git['dirty'] = bool(status.strip())
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+    host = {
+        'hostname': platform.node(),
+        'system': platform.system(),
+        'release': platform.release(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'memory_gb': round(psutil.virtual_memory().total / 1024 ** 3, 1)
+    }
+    # 指纹只包含影响性能的硬件与系统信息
+    fingerprint_source = json.dumps({key: host[key] for key in
+                                     ('system', 'release', 'machine', 'processor', 'cpu_count', 'memory_gb')},
+                                    sort_keys=True)
+    host['fingerprint'] = hashlib.sha1(fingerprint_source.encode('utf-8')).hexdigest()[:12]
+
+    versions = {
+        'python': platform.python_version(),
+        'pyarrow': pa.__version__,
+        'pandas': pd.__version__,
+        'numpy': np.__version__
+    }
+    return {'git': git, 'host': host, 'versions': versions}
+
+
+def welch_test(baseline: List[float], candidate: List[float]) -> Dict[str, Any]:
+    """
+    Welch t 检验（不假设方差相等），判断两组样本均值差异是否在 95% 水平上显著
+
+    Args:
+        baseline: 基线样本
+        candidate: 对比样本
+
+    Returns:
+        包含 t 统计量、自由度和是否显著的字典；任一组少于 2 个样本时 significant 为 None
+    """
+    a = np.asarray(baseline, dtype=np.float64)
+    b = np.asarray(candidate, dtype=np.float64)
+    if len(a) < 2 or len(b) < 2:
+        return {'t': None, 'df': None, 'significant': None}
+
+    var_a = a.var(ddof=1) / len(a)
+    var_b = b.var(ddof=1) / len(b)
+    diff = b.mean() - a.mean()
+    if var_a + var_b == 0:
+        return {'t': None, 'df': None, 'significant': bool(diff != 0)}
+
+    t = diff / np.sqrt(var_a + var_b)
+    df = (var_a + var_b) ** 2 / (var_a ** 2 / (len(a) - 1) + var_b ** 2 / (len(b) - 1))
+    return {
+        't': float(t),
+        'df': float(df),
+        'significant': bool(abs(t) > t_critical_95(max(int(df), 1)))
+    }
+
+
+class BenchmarkResultStore:
+    """基准结果存储（追加写入的 JSONL 文件，每行一次运行）"""
+
+    def __init__(self, path: str):
+        """
+        初始化结果存储
+
+        Args:
+            path: JSONL 文件路径
+        """
+        self.path = path
+
+    def append(self, results: Dict[str, Any], suite: str,
+               environment: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        追加一次运行记录
+
+        Args:
+            results: 练习或基准测试的结果
+            suite: 测试集名称，只有同名测试集的运行之间才会比较
+            environment: 运行环境，默认调用 collect_environment
+
+        Returns:
+            写入的记录；结果中没有计时统计时不写入并返回 None
+        """
+        metrics = extract_metrics(results)
+        if not metrics:
+            return None
+
+        now = datetime.now()
+        record = {
+            'run_id': f"{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}",
+            'timestamp': now.isoformat(timespec='seconds'),
+            'suite': suite,
+            **(environment or collect_environment()),
+            'metrics': metrics
+        }
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=float) + '\n')
+        return record
+
+    def load(self, suite: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        读取运行记录（按写入顺序）
+
+        中断写入造成的不完整行会被跳过。
+
+        Args:
+            suite: 只返回该测试集的记录，默认返回全部
+
+        Returns:
+            运行记录列表
+        """
+        if not os.path.exists(self.path):
+            return []
+
+        records = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if suite is None or record.get('suite') == suite:
+                    records.append(record)
+        return records
+
+    def suites(self) -> List[str]:
+        """返回历史记录中出现过的测试集名称"""
+        return list(dict.fromkeys(record['suite'] for record in self.load()))
+
+    def find_run(self, ref: Optional[str] = None, suite: Optional[str] = None,
+                 before: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        查找运行记录
+
+        Args:
+            ref: run_id 或 git SHA 前缀，多条匹配时取最新一条；为 None 时取最新一条
+            suite: 测试集名称
+            before: 只在该 run_id 之前的记录中查找
+
+        Returns:
+            运行记录，找不到时返回 None
+        """
+        records = self.load(suite)
+        if before is not None:
+            ids = [record['run_id'] for record in records]
+            records = records[:ids.index(before)] if before in ids else records
+        for record in reversed(records):
+            if ref is None or record['run_id'].startswith(ref) or \
+                    (record['git']['sha'] or '').startswith(ref):
+                return record
+        return None
+
+    def compare(self, suite: str, baseline: Optional[str] = None, candidate: Optional[str] = None,
+                threshold: float = 0.05) -> Optional[Dict[str, Any]]:
+        """
+        比较同一测试集的两次运行
+
+        指标的耗时变化超过 threshold 且 Welch t 检验显著时判定为回退（变慢）或提升（变快）。
+
+        Args:
+            suite: 测试集名称
+            baseline: 基线运行（run_id 或 git SHA 前缀），默认为对比运行的前一次运行
+            candidate: 对比运行（run_id 或 git SHA 前缀），默认为最新运行
+            threshold: 判定回退所需的最小相对变化（中位数）
+
+        Returns:
+            对比报告，找不到两次运行时返回 None
+        """
+        candidate_run = self.find_run(candidate, suite)
+        if candidate_run is None:
+            return None
+        baseline_run = self.find_run(baseline, suite,
+                                     before=candidate_run['run_id'] if baseline is None else None)
+        if baseline_run is None or baseline_run['run_id'] == candidate_run['run_id']:
+            return None
+
+        metrics = []
+        for name, base_stats in baseline_run['metrics'].items():
+            cand_stats = candidate_run['metrics'].get(name)
+            if cand_stats is None:
+                continue
+            change = cand_stats['median'] / base_stats['median'] - 1 if base_stats['median'] > 0 else 0.0
+            test = welch_test(base_stats['samples'], cand_stats['samples'])
+            if test['significant'] is None:
+                status = 'insufficient'
+            elif test['significant'] and change > threshold:
+                status = 'regression'
+            elif test['significant'] and change < -threshold:
+                status = 'improvement'
+            else:
+                status = 'unchanged'
+            metrics.append({
+                'metric': name,
+                'baseline_median': base_stats['median'],
+                'candidate_median': cand_stats['median'],
+                'change': change,
+                't': test['t'],
+                'status': status
+            })
+        metrics.sort(key=lambda m: m['change'], reverse=True)
+
+        # 运行环境差异（主机、库版本、git 版本）有助于解释性能变化
+        environment_changes = {}
+        for section, keys in (('host', ['fingerprint']), ('versions', None), ('git', ['sha', 'dirty'])):
+            base_env = baseline_run.get(section, {})
+            cand_env = candidate_run.get(section, {})
+            for key in keys or sorted(set(base_env) | set(cand_env)):
+                if base_env.get(key) != cand_env.get(key):
+                    environment_changes[f"{section}.{key}"] = (base_env.get(key), cand_env.get(key))
+
+        return {
+            'suite': suite,
+            'baseline': baseline_run['run_id'],
+            'candidate': candidate_run['run_id'],
+            'environment_changes': environment_changes,
+            'metrics': metrics,
+            'regressions': [m for m in metrics if m['status'] == 'regression']
+        }
+
+    @staticmethod
+    def print_comparison(report: Dict[str, Any]) -> None:
+        """
+        打印对比报告
+
+        Args:
+            report: compare 返回的对比报告
+        """
+        print(f"\n{'=' * 80}")
+        print(f"{report['suite']}: {report['baseline']} -> {report['candidate']}")
+        print(f"{'=' * 80}")
+
+        for key, (before, after) in report['environment_changes'].items():
+            print(f"⚠️ 环境变化 {key}: {before} -> {after}")
+
+        labels = {'regression': '❌ 回退', 'improvement': '✅ 提升',
+                  'unchanged': '   持平', 'insufficient': '   样本不足'}
+        name_width = max([len(m['metric']) for m in report['metrics']] + [10])
+        print(f"{'指标':<{name_width}} {'基线(秒)':<12} {'对比(秒)':<12} {'变化':<10} 结论")
+        for m in report['metrics']:
+            print(f"{m['metric']:<{name_width}} {m['baseline_median']:<12.4f} "
+                  f"{m['candidate_median']:<12.4f} {m['change']:<+10.1%} {labels[m['status']]}")
+
+        print(f"\n共 {len(report['metrics'])} 个指标，{len(report['regressions'])} 个显著回退")
@@ -0,0 +1,358 @@
+"""
+行组统计索引模块
+
+从 Parquet 文件元数据中提取每个行组各列的 min/max/null_count，保存为旁路索引文件，
+查询时先用索引排除不可能匹配的行组，再通过 read_row_groups 只读取剩余行组。
+"""
+
+import os
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from typing import Dict, Any, List, Optional, Tuple
+
+from .filter_compiler import Filters, normalize_filters, normalize_operator, compile_filters
+
+# 索引表中每个行组的基本信息列
+_ROW_GROUP_COLUMNS = ['row_group', 'num_rows', 'compressed_bytes']
+
+# 旁路索引文件记录源文件状态的元数据键，用于判断索引是否过期
+_SOURCE_SIZE_KEY = b'source_size'
+_SOURCE_MTIME_KEY = b'source_mtime_ns'
+
+
+def statistics_mask(col_min: pa.ChunkedArray, col_max: pa.ChunkedArray, null_count: pa.ChunkedArray,
+                    num_rows: pa.ChunkedArray, op: str, value: Any) -> pa.ChunkedArray:
+    """
+    根据 min/max/null_count 统计信息判断每个数据块（行组或数据页）是否可能包含匹配行
+
+    统计信息缺失或值无法比较时保守地返回 True。
+
+    Args:
+        col_min: 每个数据块的最小值
+        col_max: 每个数据块的最大值
+        null_count: 每个数据块的 null 数量
+        num_rows: 每个数据块的行数
+        op: 过滤操作符
+        value: 过滤值
+
+    Returns:
+        布尔数组
+    """
+    num_blocks = len(col_min)
+    op = normalize_operator(op)
+    # 全部为 null 的数据块中任何比较都不成立
+    all_null = pc.equal(null_count, num_rows).fill_null(False)
+    if op == 'is null':
+        return pc.greater(null_count, 0).fill_null(True)
+    if op == 'is not null':
+        return pc.invert(all_null)
+
+    def scalar(v):
+        return pa.scalar(v, type=col_min.type)
+
+    try:
+        if op == '==':
+            mask = pc.and_(pc.less_equal(col_min, scalar(value)), pc.greater_equal(col_max, scalar(value)))
+        elif op == '!=':
+            # 数据块内所有值都等于 value 时不可能匹配
+            mask = pc.invert(pc.and_(pc.equal(col_min, scalar(value)), pc.equal(col_max, scalar(value))))
+        elif op == '<':
+            mask = pc.less(col_min, scalar(value))
+        elif op == '<=':
+            mask = pc.less_equal(col_min, scalar(value))
+        elif op == '>':
+            mask = pc.greater(col_max, scalar(value))
+        elif op == '>=':
+            mask = pc.greater_equal(col_max, scalar(value))
+        elif op == 'in':
+            mask = pa.chunked_array([pa.array([False] * num_blocks)])
+            for v in value:
+                mask = pc.or_(mask, pc.and_(pc.less_equal(col_min, scalar(v)),
+                                            pc.greater_equal(col_max, scalar(v))))
+        elif op == 'not in':
+            # 与 pyarrow 一致，'not in' 是 'in' 取反，null 行匹配，含 null 的数据块（包括全为 null 的）都要保留
+            single_value = pc.equal(col_min, col_max)
+            in_values = pc.is_in(col_min, value_set=pa.array(list(value), type=col_min.type))
+            mask = pc.invert(pc.and_(single_value, in_values)).fill_null(True)
+            return pc.or_(mask, pc.not_equal(null_count, 0).fill_null(True))
+        else:
+            low, high = value
+            mask = pc.and_(pc.less_equal(col_min, scalar(high)), pc.greater_equal(col_max, scalar(low)))
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError):
+        return pa.chunked_array([pa.array([True] * num_blocks)])
+
+    return pc.and_(mask.fill_null(True), pc.invert(all_null))
+
+
+class RowGroupIndex:
+    """Parquet 文件的行组统计索引"""
+
+    def __init__(self, filename: str, table: pa.Table):
+        """
+        初始化行组索引
+
+        Args:
+            filename: 被索引的 Parquet 文件
+            table: 索引表，每个行组一行，包含 row_group、num_rows、compressed_bytes
+                   以及每列的 "<列>.min"、"<列>.max"、"<列>.null_count"、"<列>.compressed_bytes"
+        """
+        self.filename = filename
+        self.table = table
+        # 宽表的索引有上千列，table.column_names 每次访问都会重新构建列表
+        column_names = table.column_names
+        self._column_names = set(column_names)
+        self.columns = [name[:-len('.min')] for name in column_names if name.endswith('.min')]
+
+    @staticmethod
+    def sidecar_path(filename: str) -> str:
+        """
+        旁路索引文件路径
+
+        文件名以下划线开头，pyarrow.dataset 发现文件时会忽略它，
+        因此索引可以与数据文件放在同一目录。
+        """
+        directory, basename = os.path.split(filename)
+        return os.path.join(directory, f"_{basename}.rgindex")
+
+    @classmethod
+    def build(cls, filename: str, metadata: Optional[pq.FileMetaData] = None) -> 'RowGroupIndex':
+        """
+        从 Parquet 文件元数据构建索引（只读取文件尾部元数据，不读取数据页）
+
+        只索引顶层的基本类型列；没有统计信息的列对应值为 null，查询时不会据此排除行组。
+
+        Args:
+            filename: Parquet 文件
+            metadata: 已读取的文件元数据，默认从文件读取
+
+        Returns:
+            行组索引
+        """
+        metadata = metadata or pq.read_metadata(filename)
+        schema = metadata.schema.to_arrow_schema()
+
+        # 列名 -> 元数据中的列序号，只保留顶层基本类型列
+        column_positions = {}
+        if metadata.num_row_groups > 0:
+            row_group = metadata.row_group(0)
+            for j in range(row_group.num_columns):
+                path = row_group.column(j).path_in_schema
+                if path in schema.names and not pa.types.is_nested(schema.field(path).type):
+                    column_positions[path] = j
+
+        data = {name: [] for name in _ROW_GROUP_COLUMNS}
+        for name in column_positions:
+            for suffix in ('min', 'max', 'null_count', 'compressed_bytes'):
+                data[f"{name}.{suffix}"] = []
+
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            data['row_group'].append(i)
+            data['num_rows'].append(row_group.num_rows)
+            data['compressed_bytes'].append(
+                sum(row_group.column(j).total_compressed_size for j in range(row_group.num_columns))
+            )
+            for name, j in column_positions.items():
+                column = row_group.column(j)
+                stats = column.statistics
+                has_min_max = stats is not None and stats.has_min_max
+                data[f"{name}.min"].append(stats.min if has_min_max else None)
+                data[f"{name}.max"].append(stats.max if has_min_max else None)
+                data[f"{name}.null_count"].append(
+                    stats.null_count if stats is not None and stats.has_null_count else None
+                )
+                data[f"{name}.compressed_bytes"].append(column.total_compressed_size)
+
+        arrays = {}
+        for key, values in data.items():
+            name, _, suffix = key.rpartition('.')
+            value_type = schema.field(name).type if suffix in ('min', 'max') else pa.int64()
+            arrays[key] = pa.array(values, type=value_type)
+
+        stat = os.stat(filename)
+        table = pa.table(arrays).replace_schema_metadata({
+            _SOURCE_SIZE_KEY: str(stat.st_size).encode(),
+            _SOURCE_MTIME_KEY: str(stat.st_mtime_ns).encode()
+        })
+        return cls(filename, table)
+
+    def save(self, path: Optional[str] = None) -> str:
+        """
+        保存旁路索引文件（Parquet 格式）
+
+        Args:
+            path: 保存路径，默认为 sidecar_path(filename)
+
+        Returns:
+            保存路径
+        """
+        path = path or self.sidecar_path(self.filename)
+        pq.write_table(self.table, path)
+        return path
+
+    @classmethod
+    def load(cls, filename: str, path: Optional[str] = None) -> Optional['RowGroupIndex']:
+        """
+        加载旁路索引文件
+
+        Args:
+            filename: 被索引的 Parquet 文件
+            path: 索引文件路径，默认为 sidecar_path(filename)
+
+        Returns:
+            行组索引；索引文件不存在或源文件已变化（大小或修改时间不同）时返回 None
+        """
+        path = path or cls.sidecar_path(filename)
+        if not os.path.exists(path):
+            return None
+
+        table = pq.read_table(path)
+        metadata = table.schema.metadata or {}
+        stat = os.stat(filename)
+        if metadata.get(_SOURCE_SIZE_KEY) != str(stat.st_size).encode() or \
+                metadata.get(_SOURCE_MTIME_KEY) != str(stat.st_mtime_ns).encode():
+            return None
+        return cls(filename, table)
+
+    @classmethod
+    def load_or_build(cls, filename: str, save: bool = True) -> 'RowGroupIndex':
+        """
+        加载旁路索引，不存在或过期时重新构建
+
+        Args:
+            filename: Parquet 文件
+            save: 重新构建后是否保存旁路索引文件
+
+        Returns:
+            行组索引
+        """
+        index = cls.load(filename)
+        if index is None:
+            index = cls.build(filename)
+            if save:
+                index.save()
+        return index
+
+    @property
+    def num_row_groups(self) -> int:
+        """行组数量"""
+        return self.table.num_rows
+
+    def _predicate_mask(self, column: str, op: str, value: Any) -> pa.ChunkedArray:
+        """
+        计算单个条件下每个行组是否可能包含匹配行
+
+        统计信息缺失或值无法比较时保守地返回 True。
+        """
+        if column not in self.columns:
+            return pa.chunked_array([pa.array([True] * self.num_row_groups)])
+        return statistics_mask(self.table[f"{column}.min"], self.table[f"{column}.max"],
+                               self.table[f"{column}.null_count"], self.table['num_rows'], op, value)
+
+    def select_row_groups(self, filters: Optional[Filters]) -> List[int]:
+        """
+        根据过滤条件选出可能包含匹配行的行组
+
+        Args:
+            filters: pyarrow 风格的过滤条件（AND 列表或 OR 连接的 AND 条件组）
+
+        Returns:
+            行组序号列表
+        """
+        groups = normalize_filters(filters)
+        if not groups:
+            return list(range(self.num_row_groups))
+
+        selected = None
+        for group in groups:
+            group_mask = None
+            for column, op, value in group:
+                mask = self._predicate_mask(column, op, value)
+                group_mask = mask if group_mask is None else pc.and_(group_mask, mask)
+            selected = group_mask if selected is None else pc.or_(selected, group_mask)
+        return pc.indices_nonzero(selected).to_pylist()
+
+    def plan(self, filters: Optional[Filters], columns: Optional[List[str]] = None,
+             row_groups: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        生成读取计划并统计跳过的行组、行数和字节数
+
+        Args:
+            filters: 过滤条件
+            columns: 要读取的列，默认读取所有列；过滤条件涉及的列总会被读取
+            row_groups: 已选出的行组（例如又经过 Bloom 过滤器排除），默认按统计信息选择
+
+        Returns:
+            读取计划字典，字节数为所需列的压缩后大小
+        """
+        if row_groups is None:
+            row_groups = self.select_row_groups(filters)
+        needed_columns = self._needed_columns(filters, columns)
+
+        if needed_columns is None:
+            bytes_per_group = self.table['compressed_bytes'].to_pylist()
+        else:
+            bytes_per_group = [0] * self.num_row_groups
+            for name in needed_columns:
+                if f"{name}.compressed_bytes" in self._column_names:
+                    for i, size in enumerate(self.table[f"{name}.compressed_bytes"].to_pylist()):
+                        bytes_per_group[i] += size
+        rows_per_group = self.table['num_rows'].to_pylist()
+
+        selected = set(row_groups)
+        read_bytes = sum(bytes_per_group[i] for i in selected)
+        read_rows = sum(rows_per_group[i] for i in selected)
+        return {
+            'row_groups': row_groups,
+            'columns': needed_columns,
+            'total_row_groups': self.num_row_groups,
+            'read_row_groups': len(row_groups),
+            'skipped_row_groups': self.num_row_groups - len(row_groups),
+            'read_rows': read_rows,
+            'skipped_rows': sum(rows_per_group) - read_rows,
+            'read_bytes': read_bytes,
+            'skipped_bytes': sum(bytes_per_group) - read_bytes
+        }
+
+    @staticmethod
+    def _needed_columns(filters: Optional[Filters], columns: Optional[List[str]]) -> Optional[List[str]]:
+        """读取时需要的列：投影列加上过滤条件涉及的列"""
+        if columns is None:
+            return None
+        needed = list(columns)
+        for group in normalize_filters(filters):
+            for column, _, _ in group:
+                if column not in needed:
+                    needed.append(column)
+        return needed
+
+    def read(self, filters: Optional[Filters] = None, columns: Optional[List[str]] = None,
+             row_groups: Optional[List[int]] = None,
+             metadata: Optional[pq.FileMetaData] = None) -> Tuple[pa.Table, Dict[str, Any]]:
+        """
+        先用索引排除行组，再读取剩余行组并精确过滤
+
+        Args:
+            filters: 过滤条件
+            columns: 要返回的列，默认返回所有列
+            row_groups: 已选出的行组，默认按统计信息选择
+            metadata: 已解析的文件元数据，传入时打开文件不再解析文件尾部
+
+        Returns:
+            (过滤后的表, 读取计划)
+        """
+        plan = self.plan(filters, columns, row_groups)
+        parquet_file = pq.ParquetFile(self.filename, metadata=metadata)
+        if plan['row_groups']:
+            table = parquet_file.read_row_groups(plan['row_groups'], columns=plan['columns'])
+        else:
+            table = parquet_file.schema_arrow.empty_table()
+            if plan['columns'] is not None:
+                table = table.select(plan['columns'])
+
+        if filters:
+            table = table.filter(compile_filters(filters))
+        if columns is not None:
+            table = table.select(columns)
+        return table, plan
@@ -6,31 +6,184 @@
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import time
 import os
+import gc
+import threading
+import tracemalloc
+import psutil
 import matplotlib.pyplot as plt
 import seaborn as sns
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Union, Tuple
+
+from .pandas_conversion import table_to_pandas
+
+# 流式生成时每个批次的默认行数
+DEFAULT_BATCH_SIZE = 100000
+
+# 并行生成时每个分片的默认行数
+DEFAULT_ROWS_PER_SHARD = 1000000
+
+# 批次随机流在 SeedSequence spawn_key 中的命名空间，避免与 spawn() 派生的子流重叠
+_CHUNK_STREAM_KEY = 0xC4A7
+
+# 嵌套数据的取值范围
+CONTACT_TYPES = ['Mobile', 'Email', 'WeChat']
+PROVINCES = ['Beijing', 'Shanghai', 'Guangdong', 'Zhejiang', 'Jiangsu']
+TAGS = ['VIP', 'Regular', 'New']
+
+# 练习数据可以是 DataFrame 或 Arrow 表
+DataFrameOrTable = Union[pd.DataFrame, pa.Table]
+
+# 用户数据的 Arrow Schema
+USER_SCHEMA = pa.schema([
+    ('UserID', pa.int64()),
+    ('Username', pa.string()),
+    ('Age', pa.int64()),
+    ('City', pa.string()),
+    ('RegisterTime', pa.timestamp('us')),
+    ('Income', pa.float64())
+])
+
+
+# 嵌套数据的 Arrow Schema
+NESTED_SCHEMA = pa.schema([
+    ('UserID', pa.int64()),
+    ('Username', pa.string()),
+    ('Age', pa.int64()),
+    ('Contacts', pa.list_(pa.struct([('type', pa.string()), ('value', pa.string())]))),
+    ('Address', pa.struct([
+        ('province', pa.string()),
+        ('city', pa.string()),
+        ('district', pa.string()),
+        ('street', pa.string())
+    ])),
+    ('Tags', pa.list_(pa.string()))
+])
+
+
+def _format_usernames(user_ids: np.ndarray) -> pa.Array:
+    """
+    向量化生成用户名（等价于 f'User_{i:06d}'）
+    
+    Args:
+        user_ids: 用户 ID 数组
+        
+    Returns:
+        Arrow 字符串数组
+    """
+    padded = pc.utf8_lpad(pc.cast(pa.array(user_ids), pa.string()), 6, '0')
+    return pc.binary_join_element_wise('User_', padded, '')
+
+
+def _integers(rng: Union[np.random.Generator, np.random.RandomState],
+              low: int, high: int, size: int) -> np.ndarray:
+    """
+    在 [low, high) 范围内抽取整数，兼容新旧两种随机数生成器
+    
+    Args:
+        rng: numpy.random.Generator 或兼容模式下的 RandomState
+        low: 下界（包含）
+        high: 上界（不包含）
+        size: 抽取个数
+        
+    Returns:
+        int64 数组
+    """
+    if isinstance(rng, np.random.RandomState):
+        return rng.randint(low, high, size)
+    return rng.integers(low, high, size)
+
+
+def _counts_to_offsets(counts: np.ndarray) -> pa.Array:
+    """
+    将每行元素个数转换为 ListArray 的偏移量数组
+    
+    Args:
+        counts: 每行的元素个数
+        
+    Returns:
+        长度为 len(counts) + 1 的 int32 偏移量数组
+    """
+    offsets = np.zeros(len(counts) + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    return pa.array(offsets)
 
 
 class DataGenerator:
     """数据生成器类"""
     
-    def __init__(self, seed: int = 42):
+    def __init__(self, seed: Union[int, np.random.SeedSequence] = 42,
+                 reference_time: Optional[datetime] = None,
+                 legacy_random: bool = False):
         """
         初始化数据生成器
         
+        生成器持有独立的 numpy.random.Generator (PCG64)，不修改全局随机状态，
+        多个线程可通过 spawn() 得到互不相关的子生成器并发生成数据。
+        
         Args:
-            seed: 随机种子，确保结果可重现
+            seed: 随机种子，确保结果可重现；也可以传入 SeedSequence（如 spawn() 派生的子序列）
+            reference_time: RegisterTime 的基准时间，默认为生成时的当前时间；
+                固定该值可使整份数据（包括时间列）完全可重现
+            legacy_random: 兼容模式，使用与 np.random.seed(seed) 相同的旧版随机流
+                （但不修改全局状态），以重现迁移前 generate_user_data 的输出
         """
-        self.seed = seed
-        np.random.seed(seed)
+        if legacy_random and isinstance(seed, np.random.SeedSequence):
+            raise ValueError("兼容模式只支持整数种子")
+        if isinstance(seed, np.random.SeedSequence):
+            self._seed_sequence = seed
+            self.seed = seed.entropy
+        else:
+            self._seed_sequence = np.random.SeedSequence(seed)
+            self.seed = seed
+        self.reference_time = reference_time
+        self.legacy_random = legacy_random
+        if legacy_random:
+            self.rng = np.random.RandomState(seed)
+        else:
+            self.rng = np.random.Generator(np.random.PCG64(self._seed_sequence))
         self.cities = ['Beijing', 'Shanghai', 'Guangzhou', 'Shenzhen', 'Hangzhou', 'Nanjing', 'Chengdu', 'Wuhan', 'Xian', 'Chongqing']
+    
+    def spawn(self, n_children: int) -> List['DataGenerator']:
+        """
+        派生相互独立的子生成器
+        
+        子生成器的随机流由 SeedSequence 派生，互不重叠且可重现，
+        适合每个线程持有一个子生成器进行并发生成。
+        
+        Args:
+            n_children: 子生成器数量
+            
+        Returns:
+            子生成器列表
+        """
+        children = []
+        for child_sequence in self._seed_sequence.spawn(n_children):
+            child = DataGenerator(child_sequence, reference_time=self.reference_time)
+            child.cities = self.cities
+            children.append(child)
+        return children
+    
+    def spawn_rng(self) -> np.random.Generator:
+        """
+        派生一个独立的 numpy.random.Generator
+        
+        Returns:
+            与本生成器及其他子流互不相关的随机数生成器
+        """
+        return np.random.default_rng(self._seed_sequence.spawn(1)[0])
         
     def generate_user_data(self, num_records: int = 100000) -> pd.DataFrame:
         """
-        生成用户数据
+        生成用户数据（DataFrame 形式）
+        
+        与 generate_user_table 生成相同的数据，再转换为 DataFrame；
+        练习和基准测试内部使用 Arrow 表，只有需要 pandas 时才调用本方法。
         
         Args:
             num_records: 记录数量
@@ -38,23 +191,214 @@ class DataGenerator:
         Returns:
             包含用户数据的 DataFrame
         """
+        return self.generate_user_table(num_records).to_pandas()
+    
+    def generate_user_table(self, num_records: int = 100000) -> pa.Table:
+        """
+        生成用户数据（Arrow 表形式，schema 为 USER_SCHEMA）
+        
+        所有列均以向量化方式生成：Username 由 Arrow 字符串内核拼接，
+        RegisterTime 使用 NumPy datetime64 运算，避免逐行 Python 循环。
+        兼容模式下随机数的抽取顺序与逐行实现一致，相同种子得到相同的数据。
+        
+        Args:
+            num_records: 记录数量
+            
+        Returns:
+            包含用户数据的 Arrow 表
+        """
         print(f"正在生成 {num_records} 条用户记录...")
         
-        data = {
-            'UserID': range(1, num_records + 1),
-            'Username': [f'User_{i:06d}' for i in range(1, num_records + 1)],
-            'Age': np.random.randint(18, 80, num_records),
-            'City': np.random.choice(self.cities, num_records),
-            'RegisterTime': [
-                datetime.now() - timedelta(days=np.random.randint(0, 365))
-                for _ in range(num_records)
-            ],
-            'Income': np.random.normal(50000, 20000, num_records).round(2)
-        }
+        ages = _integers(self.rng, 18, 80, num_records)
+        city_codes = _integers(self.rng, 0, len(self.cities), num_records)
+        register_days = _integers(self.rng, 0, 365, num_records)
+        incomes = self.rng.normal(50000, 20000, num_records).round(2)
         
-        df = pd.DataFrame(data)
+        batch = self._build_user_batch(
+            1, ages, city_codes, register_days, incomes, self._reference_time()
+        )
         print("数据生成完成！")
-        return df
+        return pa.Table.from_batches([batch])
+    
+    def iter_user_batches(self, total_records: int,
+                          batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pa.RecordBatch]:
+        """
+        以 RecordBatch 流的形式生成用户数据，内存占用与总量无关
+        
+        每个批次使用由 (种子序列, 批次序号) 派生的独立随机流，
+        因此同一批次的内容只取决于种子和批次划分，与消费方式无关。
+        
+        Args:
+            total_records: 总记录数
+            batch_size: 每个批次的记录数
+            
+        Yields:
+            符合 USER_SCHEMA 的 RecordBatch
+        """
+        return self._iter_user_chunks(0, total_records, batch_size, self._reference_time())
+    
+    def generate_user_chunk(self, chunk_index: int, start: int, num_rows: int,
+                            reference_time: Optional[np.datetime64] = None) -> pa.RecordBatch:
+        """
+        生成单个用户数据批次
+        
+        Args:
+            chunk_index: 批次序号，用于派生该批次的随机流
+            start: 批次第一行在整个数据集中的偏移量（UserID 从 start + 1 开始）
+            num_rows: 批次行数
+            reference_time: RegisterTime 的基准时间，默认取 self.reference_time 或当前时间
+            
+        Returns:
+            符合 USER_SCHEMA 的 RecordBatch
+        """
+        rng = np.random.default_rng(np.random.SeedSequence(
+            self._seed_sequence.entropy,
+            spawn_key=self._seed_sequence.spawn_key + (_CHUNK_STREAM_KEY, chunk_index)
+        ))
+        
+        ages = rng.integers(18, 80, num_rows)
+        city_codes = rng.integers(0, len(self.cities), num_rows)
+        register_days = rng.integers(0, 365, num_rows)
+        incomes = rng.normal(50000, 20000, num_rows).round(2)
+        
+        if reference_time is None:
+            reference_time = self._reference_time()
+        return self._build_user_batch(
+            start + 1, ages, city_codes, register_days, incomes, reference_time
+        )
+    
+    def write_user_parquet(self, filename: str, total_records: int,
+                           batch_size: int = DEFAULT_BATCH_SIZE, **write_options) -> int:
+        """
+        将用户数据流式写入 Parquet 文件，不在内存中物化完整数据集
+        
+        Args:
+            filename: 输出文件名
+            total_records: 总记录数
+            batch_size: 每个批次的记录数
+            **write_options: 传递给 pq.ParquetWriter 的写入参数（如 compression）
+            
+        Returns:
+            写入的批次数
+        """
+        return self.write_user_shard(filename, 0, total_records, batch_size,
+                                     self._reference_time(), **write_options)
+    
+    def write_user_shard(self, filename: str, start: int, num_rows: int,
+                         batch_size: int = DEFAULT_BATCH_SIZE,
+                         reference_time: Optional[np.datetime64] = None,
+                         **write_options) -> int:
+        """
+        将整个数据集中 [start, start + num_rows) 范围的用户数据写入一个 Parquet 分片
+        
+        分片内的批次与 iter_user_batches 使用相同的批次划分和随机流，
+        因此各分片拼接后与单进程生成的数据完全一致。
+        
+        Args:
+            filename: 分片文件名
+            start: 分片第一行的偏移量，必须是 batch_size 的整数倍
+            num_rows: 分片行数
+            batch_size: 每个批次的记录数
+            reference_time: RegisterTime 的基准时间，多个分片应使用同一个值
+            **write_options: 传递给 pq.ParquetWriter 的写入参数
+            
+        Returns:
+            写入的批次数
+        """
+        if start % batch_size != 0:
+            raise ValueError(f"分片起始偏移 {start} 必须是批次大小 {batch_size} 的整数倍")
+        if reference_time is None:
+            reference_time = self._reference_time()
+        
+        batches_written = 0
+        with pq.ParquetWriter(filename, USER_SCHEMA, **write_options) as writer:
+            for batch in self._iter_user_chunks(start, start + num_rows, batch_size, reference_time):
+                writer.write_batch(batch)
+                batches_written += 1
+        return batches_written
+    
+    def write_user_parquet_parallel(self, output_dir: str, total_records: int,
+                                    num_workers: Optional[int] = None,
+                                    rows_per_shard: int = DEFAULT_ROWS_PER_SHARD,
+                                    batch_size: int = DEFAULT_BATCH_SIZE,
+                                    **write_options) -> List[str]:
+        """
+        使用进程池并行生成用户数据，每个分片由工作进程直接写入 Parquet 文件
+        
+        分片按固定的 rows_per_shard 划分，分片内容只取决于种子和分片位置，
+        因此无论使用多少个工作进程，输出文件都逐字节相同。
+        工作进程只向父进程返回文件路径，不回传数据。
+        
+        Args:
+            output_dir: 分片输出目录
+            total_records: 总记录数
+            num_workers: 工作进程数，默认为 CPU 核数
+            rows_per_shard: 每个分片的行数，必须是 batch_size 的整数倍
+            batch_size: 每个批次的记录数
+            **write_options: 传递给 pq.ParquetWriter 的写入参数
+            
+        Returns:
+            按行顺序排列的分片文件路径列表
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+        
+        if rows_per_shard % batch_size != 0:
+            raise ValueError(f"分片行数 {rows_per_shard} 必须是批次大小 {batch_size} 的整数倍")
+        
+        os.makedirs(output_dir, exist_ok=True)
+        reference_time = self._reference_time()
+        
+        tasks = []
+        for shard_index, start in enumerate(range(0, total_records, rows_per_shard)):
+            tasks.append({
+                'seed_sequence': self._seed_sequence,
+                'cities': self.cities,
+                'filename': os.path.join(output_dir, f'part-{shard_index:05d}.parquet'),
+                'start': start,
+                'num_rows': min(rows_per_shard, total_records - start),
+                'batch_size': batch_size,
+                'reference_time': reference_time,
+                'write_options': write_options
+            })
+        
+        print(f"正在并行生成 {total_records:,} 条用户记录 "
+              f"({len(tasks)} 个分片, {num_workers or os.cpu_count()} 个进程)...")
+        
+        # 使用 spawn 启动工作进程，避免 fork 继承 Arrow 线程池状态
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=context) as executor:
+            files = list(executor.map(_write_user_shard, tasks))
+        
+        print("并行数据生成完成！")
+        return files
+    
+    def _iter_user_chunks(self, start: int, stop: int, batch_size: int,
+                          reference_time: np.datetime64) -> Iterator[pa.RecordBatch]:
+        """按固定批次划分生成 [start, stop) 范围的用户数据"""
+        for chunk_start in range(start, stop, batch_size):
+            num_rows = min(batch_size, stop - chunk_start)
+            yield self.generate_user_chunk(
+                chunk_start // batch_size, chunk_start, num_rows, reference_time
+            )
+    
+    def _reference_time(self) -> np.datetime64:
+        """获取 RegisterTime 的基准时间"""
+        return np.datetime64(self.reference_time or datetime.now(), 'us')
+    
+    def _build_user_batch(self, first_id: int, ages: np.ndarray, city_codes: np.ndarray,
+                          register_days: np.ndarray, incomes: np.ndarray,
+                          reference_time: np.datetime64) -> pa.RecordBatch:
+        """根据随机抽样结果组装用户数据批次"""
+        user_ids = np.arange(first_id, first_id + len(ages), dtype=np.int64)
+        return pa.RecordBatch.from_arrays([
+            pa.array(user_ids),
+            _format_usernames(user_ids),
+            pa.array(ages, type=pa.int64()),
+            pa.array(self.cities).take(city_codes),
+            pa.array(reference_time - register_days.astype('timedelta64[D]')),
+            pa.array(incomes)
+        ], schema=USER_SCHEMA)
     
     def generate_nested_data(self, num_records: int = 10000) -> pd.DataFrame:
         """
@@ -66,51 +410,211 @@ class DataGenerator:
         Returns:
             包含嵌套数据的 DataFrame
         """
-        print(f"正在生成 {num_records} 条嵌套数据记录...")
+        df = self.generate_nested_table(num_records).to_pandas()
+        return df
+    
+    def generate_nested_table(self, num_records: int = 10000) -> pa.Table:
+        """
+        以列式方式生成包含嵌套结构的 Arrow 表
         
-        data = []
-        for i in range(1, num_records + 1):
-            # Generate contact list
-            num_contacts = np.random.randint(1, 4)  # 1-3 contacts
-            contacts = []
-            for _ in range(num_contacts):
-                contacts.append({
-                    'type': np.random.choice(['Mobile', 'Email', 'WeChat']),
-                    'value': f'contact_{np.random.randint(10000, 99999)}'
-                })
-            
-            # Generate address information
-            address = {
-                'province': np.random.choice(['Beijing', 'Shanghai', 'Guangdong', 'Zhejiang', 'Jiangsu']),
-                'city': np.random.choice(self.cities[:5]),  # Use first 5 cities
-                'district': f'District_{np.random.randint(1, 10)}',
-                'street': f'Street_{np.random.randint(1, 100)}'
-            }
+        Contacts (list<struct>)、Address (struct) 和 Tags (list<string>)
+        直接由偏移量数组和子数组构建，不经过逐行的 Python 字典。
+        
+        Args:
+            num_records: 记录数量
             
-            data.append({
-                'UserID': i,
-                'Username': f'User_{i:06d}',
-                'Age': np.random.randint(18, 80),
-                'Contacts': contacts,
-                'Address': address,
-                'Tags': np.random.choice(['VIP', 'Regular', 'New'], size=np.random.randint(1, 3)).tolist()
-            })
+        Returns:
+            符合 NESTED_SCHEMA 的 Arrow 表
+        """
+        print(f"正在生成 {num_records} 条嵌套数据记录...")
+        
+        user_ids = np.arange(1, num_records + 1, dtype=np.int64)
+        ages = _integers(self.rng, 18, 80, num_records)
+        
+        # Generate contact list: 1-3 contacts per user
+        contact_counts = _integers(self.rng, 1, 4, num_records)
+        contact_offsets = _counts_to_offsets(contact_counts)
+        total_contacts = int(contact_offsets[-1])
+        contact_types = pa.array(CONTACT_TYPES).take(
+            _integers(self.rng, 0, len(CONTACT_TYPES), total_contacts)
+        )
+        contact_values = pc.binary_join_element_wise(
+            'contact_', pc.cast(pa.array(_integers(self.rng, 10000, 99999, total_contacts)), pa.string()), ''
+        )
+        contacts = pa.ListArray.from_arrays(
+            contact_offsets,
+            pa.StructArray.from_arrays([contact_types, contact_values], names=['type', 'value'])
+        )
         
-        df = pd.DataFrame(data)
+        # Generate address information
+        districts = pa.array([f'District_{i}' for i in range(1, 10)])
+        streets = pa.array([f'Street_{i}' for i in range(1, 100)])
+        address = pa.StructArray.from_arrays([
+            pa.array(PROVINCES).take(_integers(self.rng, 0, len(PROVINCES), num_records)),
+            pa.array(self.cities[:5]).take(_integers(self.rng, 0, 5, num_records)),  # Use first 5 cities
+            districts.take(_integers(self.rng, 0, len(districts), num_records)),
+            streets.take(_integers(self.rng, 0, len(streets), num_records))
+        ], names=['province', 'city', 'district', 'street'])
+        
+        # Generate tags: 1-2 tags per user
+        tag_counts = _integers(self.rng, 1, 3, num_records)
+        tag_offsets = _counts_to_offsets(tag_counts)
+        tags = pa.ListArray.from_arrays(
+            tag_offsets,
+            pa.array(TAGS).take(_integers(self.rng, 0, len(TAGS), int(tag_offsets[-1])))
+        )
+        
+        table = pa.Table.from_arrays([
+            pa.array(user_ids),
+            _format_usernames(user_ids),
+            pa.array(ages, type=pa.int64()),
+            contacts,
+            address,
+            tags
+        ], schema=NESTED_SCHEMA)
         print("嵌套数据生成完成！")
-        return df
+        return table
+
+
+def _write_user_shard(task: Dict[str, Any]) -> str:
+    """
+    工作进程入口：在子进程中重建生成器并写入一个分片
+    
+    Args:
+        task: 分片任务描述
+        
+    Returns:
+        分片文件路径
+    """
+    generator = DataGenerator(task['seed_sequence'])
+    generator.cities = task['cities']
+    generator.write_user_shard(
+        task['filename'], task['start'], task['num_rows'], task['batch_size'],
+        task['reference_time'], **task['write_options']
+    )
+    return task['filename']
+
+
+# 双侧 95% 置信区间的 t 分布临界值（自由度 1-30），更大自由度使用正态近似
+_T_CRITICAL_95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042
+]
+
+
+def t_critical_95(degrees_of_freedom: int) -> float:
+    """获取双侧 95% 置信区间的 t 临界值"""
+    if degrees_of_freedom <= len(_T_CRITICAL_95):
+        return _T_CRITICAL_95[degrees_of_freedom - 1]
+    return 1.96
+
+
+_BYTES_PER_MB = 1024 * 1024
+
+# 读取基准的缓存模式：warm 只测页缓存命中，cold 每次读取前清除页缓存，both 两者都测
+CACHE_MODES = ('warm', 'cold', 'both')
+
+# compare_performance 中展示的内存字段及列名
+_MEMORY_COLUMNS = [('rss_peak_delta_mb', 'rss_peak'), ('arrow_peak_delta_mb', 'arrow_peak'),
+                   ('python_peak_mb', 'py_peak')]
+
+
+def evict_file_cache(paths: Union[str, List[str]]) -> bool:
+    """
+    将文件从操作系统页缓存中清除（posix_fadvise DONTNEED）
+    
+    DONTNEED 只会丢弃干净页，因此先 fsync 刷盘，刚写入的文件也能被清除。
+    目录会递归处理其中的所有文件。
+    
+    Args:
+        paths: 文件或目录路径，或路径列表
+        
+    Returns:
+        当前平台是否支持清除页缓存（不支持时不做任何操作）
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names)
+        else:
+            files.append(path)
+    
+    for filename in files:
+        fd = os.open(filename, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+
+class _MemorySampler:
+    """后台线程定期采样进程 RSS 和 Arrow 已分配内存，记录峰值"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.rss_peak = 0
+        self.arrow_peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self) -> None:
+        self.rss_peak = max(self.rss_peak, self.process.memory_info().rss)
+        self.arrow_peak = max(self.arrow_peak, pa.total_allocated_bytes())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> '_MemorySampler':
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
 
 
 class PerformanceAnalyzer:
     """性能分析器类"""
     
-    def __init__(self):
-        """初始化性能分析器"""
+    def __init__(self, warmup: int = 1, repeat: int = 5, disable_gc: bool = True,
+                 track_memory: bool = False, record_history: bool = True):
+        """
+        初始化性能分析器
+        
+        Args:
+            warmup: measure_stats 正式计时前的预热次数（不计入统计）
+            repeat: measure_stats 的计时次数
+            disable_gc: 计时期间是否关闭垃圾回收，避免 GC 停顿混入样本
+            track_memory: measure_stats 是否额外执行一次内存测量，结果放在统计信息的 memory 键下
+            record_history: save_results 是否同时把计时统计追加到结果目录下的历史记录文件
+        """
+        if repeat < 1:
+            raise ValueError("repeat 至少为 1")
         self.results = {}
+        self.warmup = warmup
+        self.repeat = repeat
+        self.disable_gc = disable_gc
+        self.track_memory = track_memory
+        self.record_history = record_history
         
     def measure_time(self, func, *args, **kwargs) -> tuple:
         """
-        测量函数执行时间
+        测量函数执行时间（单次执行）
         
         Args:
             func: 要测量的函数
@@ -120,11 +624,252 @@ class PerformanceAnalyzer:
         Returns:
             (结果, 执行时间)
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        execution_time = time.time() - start_time
+        execution_time = (time.perf_counter_ns() - start_ns) / 1e9
         return result, execution_time
     
+    def measure_stats(self, func, *args, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+        """
+        重复测量函数执行时间并返回统计信息
+        
+        先执行 warmup 次预热，再计时 repeat 次；每次计时使用 perf_counter_ns，
+        计时期间按配置关闭垃圾回收。
+        
+        Args:
+            func: 要测量的函数
+            *args: 函数参数
+            **kwargs: 函数关键字参数
+            
+        Returns:
+            (最后一次执行的结果, 统计信息字典，见 compute_stats；
+             开启 track_memory 时包含 memory 键，见 measure_memory)
+        """
+        result, stats = self._run_samples(lambda: func(*args, **kwargs))
+        if self.track_memory:
+            # 内存测量会拖慢执行（tracemalloc、采样线程），单独执行一次，不混入计时样本
+            del result
+            result, stats['memory'] = self.measure_memory(func, *args, **kwargs)
+        return result, stats
+    
+    def measure_each(self, func, inputs: Iterable[Any],
+                     warmup: Optional[int] = None) -> Tuple[List[Any], Dict[str, Any]]:
+        """
+        对每个输入各执行并计时一次，返回每次的结果和统计信息
+        
+        适合一组不同的查询各计时一次的场景。先用前 warmup 个输入预热（不计入统计），
+        每次计时使用 perf_counter_ns，计时期间按配置关闭垃圾回收。不做内存测量。
+        
+        Args:
+            func: 要测量的函数，以单个输入为参数
+            inputs: 输入序列
+            warmup: 预热次数，None 表示使用 self.warmup；测量缓存从空开始的效果时传 0
+        
+        Returns:
+            (与 inputs 一一对应的结果列表, 统计信息字典，见 compute_stats)
+        """
+        inputs = list(inputs)
+        if not inputs:
+            raise ValueError("inputs 不能为空")
+        warmup = self.warmup if warmup is None else warmup
+        
+        results = []
+        samples = []
+        gc_was_enabled = gc.isenabled()
+        try:
+            for i, value in enumerate(inputs[:warmup] + inputs):
+                if self.disable_gc:
+                    gc.collect()
+                    gc.disable()
+                start_ns = time.perf_counter_ns()
+                result = func(value)
+                elapsed_ns = time.perf_counter_ns() - start_ns
+                if gc_was_enabled:
+                    gc.enable()
+                if i >= min(warmup, len(inputs)):
+                    results.append(result)
+                    samples.append(elapsed_ns / 1e9)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return results, self.compute_stats(samples)
+    
+    def measure_cache_stats(self, paths: Union[str, List[str]], func, *args,
+                            cache_mode: str = 'both', **kwargs) -> Tuple[Any, Dict[str, Dict[str, Any]]]:
+        """
+        分别测量冷缓存和热缓存下的读取性能
+        
+        冷缓存模式在每次执行（含预热）前调用 evict_file_cache 清除 paths 的页缓存，
+        反映真实的存储读取吞吐；热缓存模式即 measure_stats，数据来自页缓存。
+        
+        Args:
+            paths: 被读取的文件或目录
+            func: 要测量的函数
+            *args: 函数参数
+            cache_mode: 'warm'、'cold' 或 'both'
+            **kwargs: 函数关键字参数
+            
+        Returns:
+            (结果, {'cold': 统计信息, 'warm': 统计信息})，只包含所测的模式；
+            冷缓存统计信息中的 page_cache_evicted 表示页缓存是否确实被清除
+        """
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"cache_mode 必须是 {CACHE_MODES} 之一: {cache_mode}")
+        
+        result = None
+        stats = {}
+        if cache_mode in ('cold', 'both'):
+            evicted = evict_file_cache(paths)
+            if not evicted:
+                print("⚠️ 当前平台不支持 posix_fadvise，冷缓存结果仍可能命中页缓存")
+            result, stats['cold'] = self._run_samples(
+                lambda: func(*args, **kwargs), before_each=lambda: evict_file_cache(paths)
+            )
+            stats['cold']['page_cache_evicted'] = evicted
+        if cache_mode in ('warm', 'both'):
+            result = None
+            result, stats['warm'] = self.measure_stats(func, *args, **kwargs)
+        return result, stats
+    
+    def measure_memory(self, func, *args, **kwargs) -> Tuple[Any, Dict[str, float]]:
+        """
+        测量单次执行的内存使用
+        
+        同时记录三类内存：进程 RSS（psutil 后台采样峰值）、Arrow 内存池分配
+        （pa.total_allocated_bytes 采样峰值及内存池历史最大值）以及 Python 对象分配
+        （tracemalloc 峰值）。采样间隔为 5 毫秒，极短的分配尖峰可能漏采。
+        
+        Args:
+            func: 要测量的函数
+            *args: 函数参数
+            **kwargs: 函数关键字参数
+            
+        Returns:
+            (结果, 内存信息字典，单位 MB)
+        """
+        gc.collect()
+        pool = pa.default_memory_pool()
+        arrow_before = pa.total_allocated_bytes()
+        was_tracing = tracemalloc.is_tracing()
+        if was_tracing:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+        python_before = tracemalloc.get_traced_memory()[0]
+        
+        try:
+            with _MemorySampler() as sampler:
+                rss_before = sampler.rss_peak
+                result = func(*args, **kwargs)
+            python_peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        
+        rss_after = sampler.process.memory_info().rss
+        memory = {
+            'rss_before_mb': rss_before / _BYTES_PER_MB,
+            'rss_after_mb': rss_after / _BYTES_PER_MB,
+            'rss_peak_mb': sampler.rss_peak / _BYTES_PER_MB,
+            'rss_peak_delta_mb': (sampler.rss_peak - rss_before) / _BYTES_PER_MB,
+            'arrow_allocated_mb': (pa.total_allocated_bytes() - arrow_before) / _BYTES_PER_MB,
+            'arrow_peak_delta_mb': (sampler.arrow_peak - arrow_before) / _BYTES_PER_MB,
+            'arrow_pool_max_mb': pool.max_memory() / _BYTES_PER_MB,
+            'arrow_backend': pool.backend_name,
+            'python_peak_mb': max(python_peak - python_before, 0) / _BYTES_PER_MB
+        }
+        return result, memory
+    
+    def _run_samples(self, call, before_each=None) -> Tuple[Any, Dict[str, Any]]:
+        """
+        执行预热和计时循环
+        
+        Args:
+            call: 无参可调用对象
+            before_each: 每次执行（含预热）前调用的准备函数，不计入耗时
+            
+        Returns:
+            (最后一次执行的结果, 统计信息字典)
+        """
+        result = None
+        samples = []
+        gc_was_enabled = gc.isenabled()
+        try:
+            for i in range(self.warmup + self.repeat):
+                if before_each is not None:
+                    before_each()
+                if self.disable_gc:
+                    gc.collect()
+                    gc.disable()
+                start_ns = time.perf_counter_ns()
+                result = call()
+                elapsed_ns = time.perf_counter_ns() - start_ns
+                if gc_was_enabled:
+                    gc.enable()
+                if i >= self.warmup:
+                    samples.append(elapsed_ns / 1e9)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return result, self.compute_stats(samples)
+    
+    @staticmethod
+    def compute_stats(samples: List[float]) -> Dict[str, Any]:
+        """
+        计算计时样本的统计信息
+        
+        Args:
+            samples: 计时样本（秒）
+            
+        Returns:
+            包含 min/median/mean/p95/stddev、均值 95% 置信区间和原始样本的字典
+        """
+        values = np.asarray(samples, dtype=np.float64)
+        n = len(values)
+        mean = float(values.mean())
+        stddev = float(values.std(ddof=1)) if n > 1 else 0.0
+        half_width = t_critical_95(n - 1) * stddev / np.sqrt(n) if n > 1 else 0.0
+        return {
+            'min': float(values.min()),
+            'median': float(np.median(values)),
+            'mean': mean,
+            'p95': float(np.percentile(values, 95)),
+            'stddev': stddev,
+            'ci_low': mean - half_width,
+            'ci_high': mean + half_width,
+            'repeat': n,
+            'samples': values.tolist()
+        }
+    
+    @staticmethod
+    def speedup(baseline_time: float, optimized_time: float) -> float:
+        """
+        计算加速比，耗时为 0 时返回 0 而不是除零
+        
+        Args:
+            baseline_time: 基准耗时
+            optimized_time: 优化后耗时
+            
+        Returns:
+            加速比
+        """
+        return baseline_time / optimized_time if optimized_time > 0 else 0.0
+    
+    @staticmethod
+    def format_stats(stats: Dict[str, Any]) -> str:
+        """
+        格式化统计信息，用于打印
+        
+        Args:
+            stats: measure_stats 返回的统计信息
+            
+        Returns:
+            形如 "0.0123 秒 (min 0.0120, p95 0.0130, ±0.0004, n=5)" 的字符串
+        """
+        half_width = (stats['ci_high'] - stats['ci_low']) / 2
+        return (f"{stats['median']:.4f} 秒 (min {stats['min']:.4f}, p95 {stats['p95']:.4f}, "
+                f"±{half_width:.4f}, n={stats['repeat']})")
+    
     def get_file_size(self, filename: str) -> float:
         """
         获取文件大小（MB）
@@ -156,30 +901,48 @@ class PerformanceAnalyzer:
         max_name_len = max(len(name) for name in results.keys())
         name_width = max(max_name_len, 10)
         
+        # 统计信息等嵌套字典不在表格中展示；内存信息（measure_memory 结果）展开为峰值列
+        first_metrics = next(iter(results.values()))
+        columns = []
+        for key, value in first_metrics.items():
+            if not isinstance(value, dict):
+                columns.append((self._column_label(key), lambda m, k=key: m.get(k)))
+            elif 'rss_peak_delta_mb' in value:
+                prefix = key[:-len('memory')] if key.endswith('memory') else key + '_'
+                for field, short_name in _MEMORY_COLUMNS:
+                    columns.append((f"{prefix}{short_name}(MB)",
+                                    lambda m, k=key, f=field: m.get(k, {}).get(f)))
+        
         # 打印表头
         header = f"{'方法':<{name_width}}"
-        for key in next(iter(results.values())).keys():
-            if 'time' in key.lower():
-                header += f" {key + '(秒)':<12}"
-            elif 'size' in key.lower():
-                header += f" {key + '(MB)':<12}"
-            else:
-                header += f" {key:<12}"
+        for label, _ in columns:
+            header += f" {label:<{max(len(label), 12)}}"
         print(header)
         print("-" * len(header))
         
         # 打印数据
         for name, metrics in results.items():
             row = f"{name:<{name_width}}"
-            for value in metrics.values():
+            for label, getter in columns:
+                width = max(len(label), 12)
+                value = getter(metrics)
                 if isinstance(value, float):
-                    row += f" {value:<12.4f}"
+                    row += f" {value:<{width}.4f}"
                 elif isinstance(value, list):
-                    row += f" {len(value):<12}"
+                    row += f" {len(value):<{width}}"
                 else:
-                    row += f" {str(value):<12}"
+                    row += f" {str(value):<{width}}"
             print(row)
     
+    @staticmethod
+    def _column_label(key: str) -> str:
+        """根据指标名生成带单位的列名"""
+        if 'time' in key.lower():
+            return key + '(秒)'
+        if 'size' in key.lower():
+            return key + '(MB)'
+        return key
+    
     def plot_performance_comparison(self, results: Dict[str, Dict[str, float]], 
                                   metric: str, title: str = "Performance Comparison") -> None:
         """
@@ -212,6 +975,10 @@ class PerformanceAnalyzer:
         """
         保存结果到文件
         
+        filename 每次运行都会被覆盖；开启 record_history 时，结果中的计时统计还会
+        追加到同目录的 benchmark_history.jsonl（测试集名称为 filename 去掉扩展名），
+        用于跨运行比较性能。
+        
         Args:
             results: 结果字典
             filename: 保存文件名
@@ -238,15 +1005,78 @@ class PerformanceAnalyzer:
             json.dump(converted_results, f, ensure_ascii=False, indent=2)
         
         print(f"结果已保存到：{filename}")
+        
+        if self.record_history:
+            from .results_store import BenchmarkResultStore, HISTORY_FILENAME
+            
+            history_file = os.path.join(os.path.dirname(filename), HISTORY_FILENAME)
+            suite = os.path.splitext(os.path.basename(filename))[0]
+            record = BenchmarkResultStore(history_file).append(converted_results, suite)
+            if record is not None:
+                print(f"运行记录 {record['run_id']} 已追加到：{history_file}")
+
+
+def as_arrow_table(data: DataFrameOrTable) -> pa.Table:
+    """
+    把练习数据转换为 Arrow 表，已经是 Arrow 表时原样返回（不复制）
+    
+    Args:
+        data: DataFrame 或 Arrow 表
+        
+    Returns:
+        Arrow 表
+    """
+    if isinstance(data, pa.Table):
+        return data
+    return pa.Table.from_pandas(data)
+
+
+def _column_names(data: DataFrameOrTable) -> List[str]:
+    return data.column_names if isinstance(data, pa.Table) else list(data.columns)
+
+
+class ArrowTableData:
+    """
+    练习类共用的数据持有方式
+    
+    数据以 Arrow 表（self.table）为规范形式保存，读写和查询都直接使用它；
+    df 属性在第一次访问时才按 pandas_profile（见 pandas_conversion.PANDAS_PROFILES）
+    转换为 DataFrame 并缓存。给 df 赋值等同于调用 set_data。
+    """
+    
+    table: Optional[pa.Table] = None
+    _df: Optional[pd.DataFrame] = None
+    pandas_profile: str = 'default'
+    
+    def set_data(self, data: Optional[DataFrameOrTable]) -> None:
+        """
+        设置练习数据
+        
+        Args:
+            data: DataFrame 或 Arrow 表；传入 DataFrame 时同时保留它，之后访问 df 不再转换
+        """
+        self.table = None if data is None else as_arrow_table(data)
+        self._df = data if isinstance(data, pd.DataFrame) else None
+    
+    @property
+    def df(self) -> Optional[pd.DataFrame]:
+        """按需转换的 DataFrame 视图"""
+        if self._df is None and self.table is not None:
+            self._df = table_to_pandas(self.table, self.pandas_profile)
+        return self._df
+    
+    @df.setter
+    def df(self, data: Optional[DataFrameOrTable]) -> None:
+        self.set_data(data)
 
 
-def verify_data_integrity(original_df: pd.DataFrame, read_df: pd.DataFrame) -> bool:
+def verify_data_integrity(original_df: DataFrameOrTable, read_df: DataFrameOrTable) -> bool:
     """
     验证数据完整性
     
     Args:
-        original_df: 原始数据
-        read_df: 读取的数据
+        original_df: 原始数据（DataFrame 或 Arrow 表）
+        read_df: 读取的数据（DataFrame 或 Arrow 表）
         
     Returns:
         是否完整
@@ -259,13 +1089,15 @@ def verify_data_integrity(original_df: pd.DataFrame, read_df: pd.DataFrame) -> b
         return False
     
     # Check column count
-    if len(original_df.columns) != len(read_df.columns):
-        print(f"❌ 列数不匹配：原始 {len(original_df.columns)} 列，读取 {len(read_df.columns)} 列")
+    original_columns = _column_names(original_df)
+    read_columns = _column_names(read_df)
+    if len(original_columns) != len(read_columns):
+        print(f"❌ 列数不匹配：原始 {len(original_columns)} 列，读取 {len(read_columns)} 列")
         return False
     
     # Check column names
-    for col in original_df.columns:
-        if col not in read_df.columns:
+    for col in original_columns:
+        if col not in read_columns:
             print(f"❌ 缺少列 '{col}'")
             return False
     
@@ -0,0 +1,25 @@
+"""
+测试共享的 fixture
+"""
+
+import pytest
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator
+
+from . import TEST_SEED
+
+
+@pytest.fixture(scope='session')
+def users_file(tmp_path_factory):
+    """5000 行用户数据，每 500 行一个行组（只读，各测试共用）"""
+    table = DataGenerator(seed=TEST_SEED).generate_user_table(5000)
+    filename = str(tmp_path_factory.mktemp('users') / 'users.parquet')
+    pq.write_table(table, filename, row_group_size=500)
+    return filename
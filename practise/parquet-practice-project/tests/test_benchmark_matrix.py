@@ -0,0 +1,90 @@
+"""
+基准矩阵测试
+"""
+
+import json
+import pytest
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(project_root / "examples"))
+
+from benchmark import (ParquetBenchmark, expand_matrix, matrix_cell_id, load_matrix_results,
+                       _truncate_partial_line, DEFAULT_MATRIX_AXES, DEFAULT_MATRIX_SETTINGS)
+
+SMALL_AXES = {'rows': [2000], 'codec': ['snappy', 'zstd'], 'compression_level': [None, 3],
+              'read_path': ['read_table', 'projection']}
+
+
+def test_expand_matrix():
+    """测试矩阵展开：不支持压缩级别的编解码器去重，相同写入配置的单元相邻"""
+    cells = expand_matrix(SMALL_AXES)
+    assert all(set(cell) == set(DEFAULT_MATRIX_AXES) for cell in cells)
+    assert [(cell['codec'], cell['compression_level']) for cell in cells[::2]] == \
+        [('snappy', None), ('zstd', None), ('zstd', 3)]
+    assert [cell['read_path'] for cell in cells[:2]] == ['read_table', 'projection']
+    assert len({matrix_cell_id(cell) for cell in cells}) == len(cells) == 6
+
+    with pytest.raises(ValueError):
+        expand_matrix({'threads': [1]})
+    with pytest.raises(ValueError):
+        expand_matrix({'read_path': ['mmap']})
+
+
+def test_cell_id_includes_settings():
+    cell = expand_matrix(SMALL_AXES)[0]
+    settings = dict(DEFAULT_MATRIX_SETTINGS)
+    assert matrix_cell_id(cell, settings=settings) != matrix_cell_id(cell, settings={**settings, 'repeat': 5})
+    assert matrix_cell_id(cell, settings=settings).startswith(matrix_cell_id(cell))
+
+
+def test_truncate_partial_line(tmp_path):
+    results_file = str(tmp_path / 'results.jsonl')
+    _truncate_partial_line(results_file)
+
+    with open(results_file, 'w', encoding='utf-8') as f:
+        f.write('{"a": 1}\n{"a": 2}\n{"a": ')
+    _truncate_partial_line(results_file)
+    assert Path(results_file).read_text(encoding='utf-8') == '{"a": 1}\n{"a": 2}\n'
+    _truncate_partial_line(results_file)
+    assert Path(results_file).read_text(encoding='utf-8') == '{"a": 1}\n{"a": 2}\n'
+
+
+def test_run_matrix_resume(tmp_path):
+    """测试断点续跑：完成的单元被跳过且不追加历史记录，运行设置变化后重新测量，结果表只含本次单元"""
+    output_dir = str(tmp_path / 'out')
+    benchmark = ParquetBenchmark(output_dir)
+    results_file = Path(output_dir) / 'matrix_results.jsonl'
+    history_file = Path(output_dir) / 'benchmark_history.jsonl'
+    spec = {'axes': {'rows': [2000], 'codec': ['none'], 'read_path': ['read_table', 'projection']},
+            'warmup': 0, 'repeat': 1}
+
+    table = benchmark.run_matrix(spec)
+    assert len(table) == 2
+    assert len(results_file.read_text(encoding='utf-8').splitlines()) == 2
+    assert len(history_file.read_text(encoding='utf-8').splitlines()) == 1
+
+    # 全部已完成：不重新测量，也不追加历史记录
+    table = benchmark.run_matrix(spec)
+    assert len(table) == 2
+    assert len(results_file.read_text(encoding='utf-8').splitlines()) == 2
+    assert len(history_file.read_text(encoding='utf-8').splitlines()) == 1
+
+    # repeat 变化：之前的单元不算完成，结果表只包含新设置下的单元
+    table = benchmark.run_matrix({**spec, 'repeat': 2})
+    assert len(results_file.read_text(encoding='utf-8').splitlines()) == 4
+    assert len(table) == 2
+    assert table['repeat'].tolist() == [2, 2]
+    assert (table['read_repeat'] == 2).all()
+    assert len(load_matrix_results(str(results_file))) == 4
+
+    # 中断写入的不完整末行被截掉，已完成的单元仍被跳过
+    with open(results_file, 'a', encoding='utf-8') as f:
+        f.write('{"cell_id": ')
+    benchmark.run_matrix({**spec, 'axes': {**spec['axes'], 'read_path': ['read_table', 'filter']}})
+    records = [json.loads(line) for line in results_file.read_text(encoding='utf-8').splitlines()]
+    assert len(records) == 5
+    assert records[-1]['read_path'] == 'filter'
@@ -0,0 +1,151 @@
+"""
+Bloom 过滤器索引测试
+"""
+
+import os
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator, BloomFilterIndex, RowGroupIndex
+from parquet_practice.bloom_filter import write_with_bloom_filters, optimal_num_bytes, _xxh64
+from parquet_practice.clustering import cluster_table
+
+from . import TEST_SEED
+
+
+@pytest.fixture(scope='module')
+def scattered_table():
+    """按 Age 聚集的用户数据，UserID 和 Username 在各行组中无序分布"""
+    df = DataGenerator(seed=TEST_SEED).generate_user_data(10000)
+    return cluster_table(pa.Table.from_pandas(df), ['Age'], 'sort')
+
+
+def test_xxh64_reference_values():
+    """测试 XXH64 与参考实现一致"""
+    assert _xxh64(b'') == 0xEF46DB3751D8E999
+    assert _xxh64(b'a') == 0xD24EC4F1A98C6E5B
+
+
+def test_optimal_num_bytes():
+    assert optimal_num_bytes(1) == 32
+    assert optimal_num_bytes(1000, 0.01) == 2048
+    assert optimal_num_bytes(1000, 0.0001) == 4096
+    with pytest.raises(ValueError):
+        optimal_num_bytes(1000, 1.5)
+
+
+@pytest.mark.parametrize('mode', ['parquet', 'sidecar'])
+class TestBloomFilterIndex:
+    """Bloom 过滤器剪枝测试（文件内过滤器和旁路文件）"""
+
+    def write(self, tmp_path, table, mode):
+        filename = str(tmp_path / 'users.parquet')
+        write_with_bloom_filters(table, filename, ['UserID', 'Username'], mode=mode, row_group_size=1000)
+        return filename
+
+    def test_no_false_negatives(self, tmp_path, scattered_table, mode):
+        """测试包含查询值的行组总会被保留，且大多数其他行组被排除"""
+        filename = self.write(tmp_path, scattered_table, mode)
+        index = BloomFilterIndex.open(filename)
+        assert index.source == mode
+        assert index.columns == ['UserID', 'Username']
+
+        user_ids = scattered_table['UserID'].to_pylist()
+        usernames = scattered_table['Username'].to_pylist()
+        selected_counts = []
+        for row in range(0, scattered_table.num_rows, 37):
+            by_id = index.select_row_groups([('UserID', '==', user_ids[row])])
+            by_name = index.select_row_groups([('Username', '==', usernames[row])])
+            assert row // 1000 in by_id
+            assert row // 1000 in by_name
+            selected_counts.append(len(by_id) + len(by_name))
+        assert sum(selected_counts) / len(selected_counts) < 2.5
+
+    @pytest.mark.parametrize('filters', [
+        [('Username', '==', 'User_004211')],
+        [('Username', '==', 'User_004211#')],
+        [('UserID', 'in', [17, 4211, 9999])],
+        [('UserID', '==', 4211), ('Age', '>', 30)],
+        [[('UserID', '==', 5)], [('Username', '==', 'User_000077')]],
+        [('UserID', '>', 9000)],
+        [('Username', '==', 42)],
+    ])
+    def test_read_matches_pyarrow_filter(self, tmp_path, scattered_table, mode, filters):
+        """测试统计索引 + Bloom 过滤器剪枝后的结果与 pyarrow 过滤一致"""
+        filename = self.write(tmp_path, scattered_table, mode)
+        index = BloomFilterIndex.open(filename)
+        stats_index = RowGroupIndex.build(filename)
+
+        try:
+            expected = pq.read_table(filename, filters=filters)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # pyarrow 无法比较的值：过滤器不能排除任何行组
+            assert index.select_row_groups(filters) == list(range(10))
+            return
+        table, plan = index.read(filters, stats_index=stats_index)
+        assert table.equals(expected)
+        assert plan['stats_row_groups'] - plan['bloom_skipped_row_groups'] == plan['read_row_groups']
+
+    def test_point_lookup_prunes_row_groups(self, tmp_path, scattered_table, mode):
+        """测试无序列上的点查询：统计信息不能排除行组，Bloom 过滤器可以"""
+        filename = self.write(tmp_path, scattered_table, mode)
+        filters = [('Username', '==', 'User_004211')]
+
+        _, plan = BloomFilterIndex.open(filename).read(filters)
+        assert plan['stats_row_groups'] == 10
+        assert plan['read_row_groups'] == 1
+
+        _, miss_plan = BloomFilterIndex.open(filename).read([('Username', '==', 'User_004211#')])
+        assert miss_plan['read_row_groups'] <= 1
+
+
+def test_file_without_filters(tmp_path):
+    """测试没有 Bloom 过滤器的文件不排除任何行组"""
+    filename = str(tmp_path / 'plain.parquet')
+    pq.write_table(pa.table({'x': list(range(100))}), filename, row_group_size=10)
+
+    index = BloomFilterIndex.open(filename)
+    assert index.columns == []
+    assert index.select_row_groups([('x', '==', 12345)]) == list(range(10))
+
+
+def test_sidecar_staleness(tmp_path, scattered_table):
+    """测试旁路过滤器在源文件变化后失效"""
+    filename = str(tmp_path / 'users.parquet')
+    write_with_bloom_filters(scattered_table, filename, ['Username'], mode='sidecar', row_group_size=1000)
+    assert os.path.exists(BloomFilterIndex.sidecar_path(filename))
+    assert BloomFilterIndex.load(filename) is not None
+
+    pq.write_table(pa.table({'Username': ['a', 'b']}), filename)
+    assert BloomFilterIndex.load(filename) is None
+    assert BloomFilterIndex.open(filename).source == 'parquet'
+
+
+def test_sidecar_rejects_unsupported_columns(tmp_path, scattered_table):
+    filename = str(tmp_path / 'users.parquet')
+    with pytest.raises(ValueError):
+        write_with_bloom_filters(scattered_table, filename, ['Income'], mode='sidecar')
+
+
+def test_sidecar_dictionary_column(tmp_path, scattered_table):
+    """测试字典编码列的旁路过滤器按值构建，查询结果与 pyarrow 过滤一致"""
+    table = scattered_table.set_column(
+        scattered_table.schema.get_field_index('Username'), 'Username',
+        scattered_table['Username'].dictionary_encode()
+    )
+    filename = str(tmp_path / 'users.parquet')
+    write_with_bloom_filters(table, filename, ['Username'], mode='sidecar', row_group_size=1000)
+    index = BloomFilterIndex.open(filename)
+    assert index.source == 'sidecar'
+
+    filters = [('Username', '==', 'User_004211')]
+    result, plan = index.read(filters)
+    assert result.equals(pq.read_table(filename, filters=filters))
+    assert plan['read_row_groups'] == 1
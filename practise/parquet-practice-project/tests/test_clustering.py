@@ -0,0 +1,82 @@
+"""
+数据聚集测试
+"""
+
+import pytest
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator, RowGroupIndex
+from parquet_practice.clustering import cluster_table, curve_index, write_clustered
+
+from . import TEST_SEED
+
+
+def grid_table(size: int) -> pa.Table:
+    """size x size 网格上的所有点"""
+    xs, ys = np.meshgrid(np.arange(size), np.arange(size))
+    return pa.table({'x': xs.ravel(), 'y': ys.ravel()})
+
+
+class TestSpaceFillingCurves:
+    """空间填充曲线测试"""
+
+    def test_zorder_interleaves_bits(self):
+        """测试 Z-order 在 2x2 网格上的顺序"""
+        order = np.argsort(curve_index(grid_table(2), ['x', 'y'], 'zorder'))
+        table = grid_table(2).take(pa.array(order))
+        assert list(zip(table['x'].to_pylist(), table['y'].to_pylist())) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+
+    @pytest.mark.parametrize('size', [4, 16])
+    def test_hilbert_visits_neighbours(self, size):
+        """测试 Hilbert 曲线上相邻的点在网格上也相邻"""
+        table = cluster_table(grid_table(size), ['x', 'y'], 'hilbert')
+        steps = np.abs(np.diff(table['x'].to_numpy())) + np.abs(np.diff(table['y'].to_numpy()))
+        assert table.num_rows == size * size
+        assert steps.max() == 1
+
+    def test_unknown_method(self):
+        with pytest.raises(ValueError):
+            cluster_table(grid_table(2), ['x'], 'random')
+
+
+class TestClusterTable:
+    """聚集写入测试"""
+
+    @pytest.mark.parametrize('method', ['sort', 'zorder', 'hilbert'])
+    def test_rows_preserved(self, method):
+        """测试聚集只改变行顺序"""
+        df = DataGenerator(seed=TEST_SEED).generate_user_data(2000)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        clustered = cluster_table(table, ['Age', 'City'], method)
+        assert clustered.sort_by('UserID').equals(table.sort_by('UserID'))
+
+    def test_sort_orders_first_key(self):
+        df = DataGenerator(seed=TEST_SEED).generate_user_data(2000)
+        clustered = cluster_table(pa.Table.from_pandas(df), ['Age', 'City'], 'sort')
+        ages = clustered['Age'].to_numpy()
+        assert (np.diff(ages) >= 0).all()
+
+    @pytest.mark.parametrize('method', ['sort', 'zorder', 'hilbert'])
+    def test_clustering_enables_pruning(self, tmp_path, method):
+        """测试聚集后 Age 过滤能够排除行组，而原始顺序不能"""
+        df = DataGenerator(seed=TEST_SEED).generate_user_data(20000)
+        table = pa.Table.from_pandas(df)
+        filters = [('Age', '>', 50)]
+
+        unclustered = str(tmp_path / 'none.parquet')
+        pq.write_table(table, unclustered, row_group_size=1000)
+        clustered = str(tmp_path / f'{method}.parquet')
+        write_clustered(table, clustered, ['Age', 'City'], method, row_group_size=1000)
+
+        assert RowGroupIndex.build(unclustered).plan(filters)['skipped_row_groups'] == 0
+        assert RowGroupIndex.build(clustered).plan(filters)['skipped_row_groups'] >= 5
+        assert pq.read_table(clustered, filters=filters).num_rows == \
+            pq.read_table(unclustered, filters=filters).num_rows
@@ -0,0 +1,133 @@
+"""
+列块缓存测试
+"""
+
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import ColumnChunkCache
+
+
+def write_chunks(filename, num_row_groups=4, rows=100):
+    """写出一个整数列文件，返回单个列块解码后的字节数"""
+    table = pa.table({'x': list(range(num_row_groups * rows)), 'y': list(range(num_row_groups * rows))})
+    pq.write_table(table, filename, row_group_size=rows)
+    return pq.ParquetFile(filename).read_row_group(0, columns=['x'])['x'].nbytes
+
+
+@pytest.mark.parametrize('policy', ['lru', 'arc'])
+@pytest.mark.parametrize('columns, filters', [
+    (None, None),
+    (['City', 'Income'], None),
+    (['Age', 'Income'], [('Age', '>=', 25), ('Age', '<=', 45)]),
+    (['UserID', 'City'], [('City', 'in', ['Beijing', 'Shanghai'])]),
+    (None, [[('UserID', '<', 100)], [('Income', '>', 90000)]]),
+    (['UserID'], [('UserID', '>', 10 ** 9)]),
+])
+def test_read_matches_pyarrow(users_file, policy, columns, filters):
+    """测试缓存读取与 pq.read_table 结果一致"""
+    cache = ColumnChunkCache(policy=policy)
+    expected = pq.read_table(users_file, columns=columns, filters=filters)
+    for _ in range(2):
+        assert cache.read_table(users_file, columns=columns, filters=filters).equals(expected)
+
+
+def test_hits_and_misses(users_file):
+    cache = ColumnChunkCache()
+    cache.read_table(users_file, columns=['City', 'Age'])
+    stats = cache.stats()
+    assert stats['misses'] == 20 and stats['hits'] == 0
+    assert stats['entries'] == 20
+
+    # 第二次查询中 Age 的列块已缓存，只需读取 Income
+    cache.read_table(users_file, columns=['Age', 'Income'])
+    stats = cache.stats()
+    assert stats['hits'] == 10 and stats['misses'] == 30
+    assert stats['hit_rate'] == pytest.approx(0.25)
+
+    # 过滤列也按列块缓存，被统计信息排除的行组不读取
+    cache.read_table(users_file, columns=['Income'], filters=[('UserID', '<=', 500)])
+    stats = cache.stats()
+    assert stats['hits'] == 11 and stats['misses'] == 31
+
+
+def test_invalidation_on_file_change(tmp_path):
+    """测试文件变化后丢弃该文件的缓存列块"""
+    filename = str(tmp_path / 'data.parquet')
+    pq.write_table(pa.table({'x': [1, 2, 3]}), filename)
+    cache = ColumnChunkCache()
+    assert cache.read_table(filename)['x'].to_pylist() == [1, 2, 3]
+
+    pq.write_table(pa.table({'x': list(range(10))}), filename)
+    assert cache.read_table(filename, filters=[('x', '>', 5)])['x'].to_pylist() == [6, 7, 8, 9]
+    stats = cache.stats()
+    assert stats['invalidations'] == 1
+    assert stats['entries'] == 1
+
+
+def test_lru_eviction(tmp_path):
+    """测试超出内存预算时淘汰最久未使用的列块"""
+    filename = str(tmp_path / 'data.parquet')
+    chunk_bytes = write_chunks(filename)
+    cache = ColumnChunkCache(max_bytes=chunk_bytes * 2, policy='lru')
+
+    cache.read_row_group(filename, 0, ['x'])
+    cache.read_row_group(filename, 1, ['x'])
+    cache.read_row_group(filename, 0, ['x'])
+    cache.read_row_group(filename, 2, ['x'])
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['evictions'] == 1
+    assert stats['bytes'] <= stats['max_bytes']
+
+    # 行组 1 最久未使用，已被淘汰
+    cache.read_row_group(filename, 0, ['x'])
+    cache.read_row_group(filename, 1, ['x'])
+    assert cache.stats()['misses'] == 4
+
+    # 单个超过预算的列块不缓存
+    tiny = ColumnChunkCache(max_bytes=1)
+    assert tiny.read_row_group(filename, 3, ['x', 'y']).num_rows == 100
+    assert tiny.stats()['entries'] == 0
+
+
+def test_arc_resists_scans(tmp_path):
+    """测试一次性扫描不会把 ARC 中反复访问的列块挤出（LRU 会）"""
+    filename = str(tmp_path / 'data.parquet')
+    chunk_bytes = write_chunks(filename, num_row_groups=8)
+    hits = {}
+    for policy in ('lru', 'arc'):
+        cache = ColumnChunkCache(max_bytes=chunk_bytes * 4, policy=policy)
+        for _ in range(2):
+            cache.read_row_group(filename, 0, ['x'])
+            cache.read_row_group(filename, 1, ['x'])
+        for row_group in range(8):
+            cache.read_row_group(filename, row_group, ['y'])
+        before = cache.stats()['hits']
+        cache.read_row_group(filename, 0, ['x'])
+        cache.read_row_group(filename, 1, ['x'])
+        hits[policy] = cache.stats()['hits'] - before
+    assert hits == {'lru': 0, 'arc': 2}
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        ColumnChunkCache(policy='fifo')
+    with pytest.raises(ValueError):
+        ColumnChunkCache(max_bytes=0)
+
+
+def test_clear(users_file):
+    cache = ColumnChunkCache(policy='arc')
+    cache.read_table(users_file, columns=['Age'])
+    cache.clear()
+    stats = cache.stats()
+    assert stats['entries'] == 0 and stats['bytes'] == 0
+    cache.read_table(users_file, columns=['Age'])
+    assert cache.stats()['misses'] == 20
@@ -0,0 +1,101 @@
+"""
+过滤条件编译测试
+"""
+
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator, RowGroupIndex, MetadataCache, ColumnChunkCache
+from parquet_practice.filter_compiler import compile_filters, filter_table, normalize_operator
+
+from . import TEST_SEED
+
+
+@pytest.fixture(scope='module')
+def users_table():
+    df = DataGenerator(seed=TEST_SEED).generate_user_data(5000)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+@pytest.fixture(scope='module')
+def users_file(tmp_path_factory, users_table):
+    """Income 中每 7 行有一个 null，按 UserID 有序写成 10 个行组"""
+    income = [None if i % 7 == 0 else value for i, value in enumerate(users_table['Income'].to_pylist())]
+    table = users_table.set_column(users_table.schema.get_field_index('Income'), 'Income',
+                                   pa.array(income, type=pa.float64()))
+    filename = str(tmp_path_factory.mktemp('filter_compiler') / 'users.parquet')
+    pq.write_table(table, filename, row_group_size=500)
+    return filename
+
+
+@pytest.mark.parametrize('filters', [
+    [('Age', '>', 50)],
+    [('Age', '>', 30), ('City', 'in', ['Beijing', 'Shanghai', 'Guangzhou'])],
+    [('Age', '>=', 25), ('Age', '<=', 45)],
+    [('City', 'not in', ['Beijing', 'Wuhan']), ('Income', '!=', 0)],
+    [[('UserID', '<', 100)], [('Income', '>', 90000)]],
+    [('City', '==', 'Xian')],
+])
+def test_matches_pyarrow(users_table, filters):
+    """测试 pyarrow 支持的过滤条件与 pq.filters_to_expression 结果一致"""
+    expected = users_table.filter(pq.filters_to_expression(filters))
+    assert filter_table(users_table, filters).equals(expected)
+
+
+def test_extended_operators():
+    table = pa.table({'x': [1, 2, None, 4, 5], 's': ['a', 'b', 'c', None, 'e']})
+    assert filter_table(table, [('x', 'between', (2, 4))])['x'].to_pylist() == [2, 4]
+    assert filter_table(table, [('x', 'is null', None)])['s'].to_pylist() == ['c']
+    assert filter_table(table, [('s', 'is not null', None)])['x'].to_pylist() == [1, 2, None, 5]
+    # 与 pyarrow 一致：'not in' 是 'in' 取反，保留 null 行
+    assert filter_table(table, [('s', 'not in', ['a', 'b'])])['s'].to_pylist() == ['c', None, 'e']
+    assert filter_table(table, [[('x', '<', 2)], [('s', 'is null', None)]])['x'].to_pylist() == [1, 4]
+    assert filter_table(table, [('x', '=', 5)])['s'].to_pylist() == ['e']
+    assert filter_table(table, None) is table
+    assert compile_filters([]) is None
+
+
+def test_invalid_filters():
+    assert normalize_operator(' NOT  IN ') == 'not in'
+    assert normalize_operator('is_null') == 'is null'
+    with pytest.raises(ValueError):
+        normalize_operator('like')
+    with pytest.raises(ValueError):
+        compile_filters([('City', 'in', 'Beijing')])
+    with pytest.raises(ValueError):
+        compile_filters([('Age', 'between', (1, 2, 3))])
+
+
+@pytest.mark.parametrize('filters', [
+    [('UserID', 'between', (1200, 1300))],
+    [('Income', 'is null', None)],
+    [('Income', 'is not null', None), ('Age', 'between', [30, 40])],
+    [[('UserID', 'between', (10, 20))], [('City', 'not in', ['Beijing']), ('Income', 'is null', None)]],
+])
+def test_pushdown_matches_memory(users_file, filters):
+    """测试下推路径（pq.read_table、行组索引、缓存）与内存过滤结果一致"""
+    expected = filter_table(pq.read_table(users_file), filters)
+    assert pq.read_table(users_file, filters=compile_filters(filters)).equals(expected)
+    assert RowGroupIndex.build(users_file).read(filters)[0].equals(expected)
+    assert MetadataCache().read_table(users_file, filters=filters).equals(expected)
+    assert ColumnChunkCache().read_table(users_file, filters=filters).equals(expected)
+
+
+def test_statistics_pruning(tmp_path, users_file):
+    """测试 between 和 null 检查也能按行组统计信息排除行组"""
+    index = RowGroupIndex.build(users_file)
+    assert index.select_row_groups([('UserID', 'between', (1200, 1300))]) == [2]
+    assert index.select_row_groups([('UserID', 'between', (10 ** 6, 10 ** 7))]) == []
+
+    filename = str(tmp_path / 'nulls.parquet')
+    pq.write_table(pa.table({'x': [1, 2, None, None, 5, 6]}), filename, row_group_size=2)
+    index = RowGroupIndex.build(filename)
+    assert index.select_row_groups([('x', 'is null', None)]) == [1]
+    assert index.select_row_groups([('x', 'is not null', None)]) == [0, 2]
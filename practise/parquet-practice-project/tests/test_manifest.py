@@ -0,0 +1,110 @@
+"""
+数据集清单测试
+"""
+
+import os
+import pytest
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator, DatasetManifest
+from parquet_practice.manifest import MANIFEST_FILENAME
+from parquet_practice.partitioning_exercise import hive_partitioning
+
+from . import TEST_SEED
+
+PARTITION_COLS = ['City', 'Shard']
+
+
+@pytest.fixture(scope='module')
+def dataset_dir(tmp_path_factory):
+    """按 City 和 Shard 两级分区的数据集（约 80 个文件）"""
+    df = DataGenerator(seed=TEST_SEED).generate_user_data(4000)
+    df['Shard'] = (df['UserID'] % 8).astype(str)
+    path = str(tmp_path_factory.mktemp('manifest') / 'dataset')
+    ds.write_dataset(pa.Table.from_pandas(df), path, format='parquet',
+                     partitioning=hive_partitioning(PARTITION_COLS))
+    DatasetManifest.build(path, PARTITION_COLS).save()
+    return path
+
+
+def listing_dataset(path):
+    return ds.dataset(path, format='parquet', partitioning=hive_partitioning(PARTITION_COLS))
+
+
+def test_manifest_matches_listing(dataset_dir):
+    """测试清单记录的文件、行数和 schema 与列举目录一致"""
+    manifest = DatasetManifest.load(dataset_dir)
+    reference = listing_dataset(dataset_dir)
+
+    assert manifest.partition_cols == PARTITION_COLS
+    assert manifest.num_files == len(reference.files)
+    assert manifest.summary()['num_rows'] == reference.count_rows()
+    assert manifest.to_dataset().schema.equals(reference.schema)
+    assert MANIFEST_FILENAME not in manifest.table['path'].to_pylist()
+
+    row = manifest.table.slice(0, 1).to_pylist()[0]
+    assert row['footer_offset'] + row['footer_length'] + 8 == row['file_size']
+    assert f"City={row['City']}" in row['path']
+
+
+@pytest.mark.parametrize('expression, filters', [
+    ((ds.field('City') == 'Beijing') & (ds.field('Shard') == '3'), None),
+    (ds.field('City').isin(['Wuhan', 'Xian']), [('City', 'in', ['Wuhan', 'Xian'])]),
+    (ds.field('UserID') < 200, [('UserID', '<', 200)]),
+    (ds.field('Age') > 60, [('Age', '>', 60)]),
+])
+def test_to_dataset_matches_listing(dataset_dir, expression, filters):
+    """测试从清单构建的数据集（包括按统计信息排除文件后）查询结果与列举目录一致"""
+    manifest = DatasetManifest.load(dataset_dir)
+    expected = listing_dataset(dataset_dir).to_table(filter=expression).sort_by('UserID')
+
+    assert manifest.to_dataset().to_table(filter=expression).sort_by('UserID').equals(expected)
+    pruned = manifest.to_dataset(filters)
+    assert pruned.to_table(filter=expression).sort_by('UserID').equals(expected)
+    assert len(pruned.files) == len(manifest.select_files(filters))
+
+
+def test_select_files(dataset_dir):
+    manifest = DatasetManifest.load(dataset_dir)
+    assert len(manifest.select_files([('City', '==', 'Beijing'), ('Shard', '==', '3')])) == 1
+    assert manifest.select_files([('City', '==', 'Atlantis')]) == []
+    # 超出所有文件 UserID 最大值的条件按文件级统计信息排除全部文件
+    assert manifest.select_files([('UserID', '>', 10 ** 9)]) == []
+
+
+def test_load_or_build(tmp_path):
+    path = str(tmp_path / 'dataset')
+    table = pa.table({'x': list(range(100)), 'p': [str(i % 4) for i in range(100)]})
+    ds.write_dataset(table, path, format='parquet', partitioning=hive_partitioning(['p']))
+
+    assert DatasetManifest.load(path) is None
+    manifest = DatasetManifest.load_or_build(path, ['p'])
+    assert os.path.exists(DatasetManifest.manifest_path(path))
+    assert manifest.num_files == 4
+    assert pc.sum(manifest.to_dataset().to_table(filter=ds.field('p') == '1')['x']).as_py() == \
+        sum(range(1, 100, 4))
+
+
+def test_dictionary_column(tmp_path):
+    """测试字典编码（categorical）列的文件级统计信息按值类型保存并用于排除文件"""
+    path = str(tmp_path / 'dataset')
+    table = pa.table({'x': list(range(100)),
+                      'tag': pa.array([f"t{i // 10:02d}" for i in range(100)]).dictionary_encode(),
+                      'p': [str(i // 25) for i in range(100)]})
+    ds.write_dataset(table, path, format='parquet', partitioning=hive_partitioning(['p']))
+
+    manifest = DatasetManifest.build(path, ['p'])
+    assert manifest.table['tag.min'].type == pa.string()
+    assert manifest.table['tag.max'].to_pylist() == ['t02', 't04', 't07', 't09']
+    assert len(manifest.select_files([('tag', '==', 't05')])) == 1
+    expected = ds.dataset(path, format='parquet', partitioning=hive_partitioning(['p'])).to_table(
+        filter=ds.field('tag') == 't05')
+    assert manifest.to_dataset([('tag', '==', 't05')]).to_table(filter=ds.field('tag') == 't05').equals(expected)
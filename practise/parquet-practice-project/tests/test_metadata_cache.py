@@ -0,0 +1,104 @@
+"""
+文件元数据缓存测试
+"""
+
+import os
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import MetadataCache
+
+
+@pytest.mark.parametrize('columns, filters', [
+    (None, None),
+    (['UserID', 'Income'], None),
+    (['UserID', 'Username', 'Age', 'Income'], [('Age', '>=', 25), ('Age', '<=', 45)]),
+    (['UserID', 'City'], [('City', 'in', ['Beijing', 'Shanghai'])]),
+    (None, [[('UserID', '<', 100)], [('Income', '>', 90000)]]),
+    (['UserID'], [('UserID', '>', 10 ** 9)]),
+])
+def test_read_matches_pyarrow(users_file, columns, filters):
+    """测试缓存读取与 pq.read_table 结果一致"""
+    cache = MetadataCache()
+    expected = pq.read_table(users_file, columns=columns, filters=filters)
+    for _ in range(2):
+        assert cache.read_table(users_file, columns=columns, filters=filters).equals(expected)
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_metadata_and_schema(users_file):
+    cache = MetadataCache()
+    assert cache.metadata(users_file).equals(pq.read_metadata(users_file))
+    assert cache.schema(users_file).equals(pq.read_schema(users_file))
+    assert cache.parquet_file(users_file).metadata.num_row_groups == 10
+    stats = cache.stats()
+    assert stats['hits'] == 2 and stats['misses'] == 1
+    assert stats['hit_rate'] == pytest.approx(2 / 3)
+
+
+def test_invalidation_on_file_change(tmp_path):
+    """测试文件大小或修改时间变化后重新读取元数据"""
+    filename = str(tmp_path / 'data.parquet')
+    pq.write_table(pa.table({'x': [1, 2, 3]}), filename)
+    cache = MetadataCache()
+    assert cache.metadata(filename).num_rows == 3
+
+    pq.write_table(pa.table({'x': list(range(10))}), filename)
+    assert cache.metadata(filename).num_rows == 10
+    assert cache.read_table(filename, filters=[('x', '>', 5)]).num_rows == 4
+    stats = cache.stats()
+    assert stats['invalidations'] == 1
+    assert stats['entries'] == 1
+
+
+def test_byte_budget_eviction(tmp_path):
+    """测试超出字节预算时淘汰最久未使用的文件"""
+    filenames = []
+    for i in range(4):
+        filename = str(tmp_path / f'part-{i}.parquet')
+        pq.write_table(pa.table({'x': list(range(100))}), filename)
+        filenames.append(filename)
+    footer_bytes = pq.read_metadata(filenames[0]).serialized_size
+
+    cache = MetadataCache(max_bytes=footer_bytes * 2)
+    cache.metadata(filenames[0])
+    cache.metadata(filenames[1])
+    cache.metadata(filenames[0])
+    cache.metadata(filenames[2])
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['evictions'] == 1
+    assert stats['bytes'] <= stats['max_bytes']
+
+    # filenames[1] 最久未使用，已被淘汰
+    cache.metadata(filenames[0])
+    cache.metadata(filenames[1])
+    assert cache.stats()['misses'] == 4
+
+    # 单个超过预算的文件不缓存
+    tiny = MetadataCache(max_bytes=1)
+    assert tiny.metadata(filenames[3]).num_rows == 100
+    assert tiny.stats()['entries'] == 0
+
+    with pytest.raises(ValueError):
+        MetadataCache(max_bytes=0)
+
+
+def test_invalidate_and_clear(users_file):
+    cache = MetadataCache()
+    cache.metadata(users_file)
+    cache.invalidate(users_file)
+    assert cache.stats()['entries'] == 0
+    cache.metadata(os.path.relpath(users_file))
+    cache.metadata(users_file)
+    assert cache.stats()['hits'] == 1
+    cache.clear()
+    assert cache.stats()['bytes'] == 0
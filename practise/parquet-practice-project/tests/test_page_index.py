@@ -0,0 +1,119 @@
+"""
+页索引剪枝测试
+"""
+
+import struct
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator, PageIndex, RowGroupIndex
+from parquet_practice.page_index import _union_ranges, _intersect_ranges, page_index_write_options, PAGE_ROW_LIMITS
+from parquet_practice.parquet_format import read_file_metadata, write_struct, top_level_leaves
+
+from . import TEST_SEED
+
+WRITER_CONFIGS = {
+    'small_pages': dict(row_group_size=5000, **page_index_write_options(300)),
+    'one_row_group_zstd': dict(row_group_size=20000, compression='zstd', **page_index_write_options(500),
+                               use_dictionary=['City']),
+    'default_pages': dict(row_group_size=3000, **page_index_write_options())
+}
+
+
+@pytest.fixture(scope='module')
+def users_table():
+    df = DataGenerator(seed=TEST_SEED).generate_user_data(20000)
+    return pa.Table.from_pandas(df)
+
+
+@pytest.fixture(scope='module', params=list(WRITER_CONFIGS))
+def page_indexed_file(request, users_table, tmp_path_factory):
+    filename = str(tmp_path_factory.mktemp('page_index') / f'{request.param}.parquet')
+    pq.write_table(users_table, filename, **WRITER_CONFIGS[request.param])
+    return filename
+
+
+def test_ranges():
+    assert _union_ranges([(5, 8), (0, 3), (3, 4), (7, 10)]) == [(0, 4), (5, 10)]
+    assert _union_ranges([]) == []
+    assert _intersect_ranges([(0, 4), (6, 10)], [(2, 7), (9, 12)]) == [(2, 4), (6, 7), (9, 10)]
+    assert _intersect_ranges([(0, 4)], [(4, 8)]) == []
+
+
+def test_footer_round_trip(page_indexed_file):
+    """测试 FileMetaData 解析后重新编码与原始字节一致"""
+    with open(page_indexed_file, 'rb') as f:
+        data = f.read()
+    footer_length = struct.unpack('<I', data[-8:-4])[0]
+    footer = data[-8 - footer_length:-8]
+    assert bytes(write_struct(read_file_metadata(page_indexed_file))) == footer
+
+
+def test_top_level_leaves(page_indexed_file):
+    metadata = read_file_metadata(page_indexed_file)
+    leaves = top_level_leaves(metadata[2])
+    schema = pq.read_schema(page_indexed_file)
+    assert list(leaves) == [name for name in schema.names if name in leaves]
+    assert [leaf for _, leaf in leaves.values()] == list(range(len(leaves)))
+
+
+@pytest.mark.parametrize('filters', [
+    [('UserID', '==', 12345)],
+    [('UserID', '<', 700)],
+    [('UserID', '>=', 19000), ('Age', '>', 40)],
+    [('Username', '==', 'User_000077')],
+    [('City', 'in', ['北京', '上海'])],
+    [('Income', '>', 90000), ('Age', '<', 30)],
+    [[('UserID', '<', 100)], [('UserID', '>', 19900)]],
+    [('UserID', '==', -1)],
+    [('Age', '>', 0)],
+])
+@pytest.mark.parametrize('columns', [None, ['UserID', 'Income']])
+def test_read_matches_pyarrow_filter(page_indexed_file, filters, columns):
+    """测试页级剪枝后的结果与 pyarrow 过滤一致"""
+    expected = pq.read_table(page_indexed_file, filters=filters, columns=columns)
+    table, plan = PageIndex(page_indexed_file).read(filters, columns)
+    assert table.equals(expected)
+    assert plan['read_bytes'] <= plan['row_group_bytes']
+    assert plan['read_pages'] <= plan['total_pages']
+
+
+@pytest.mark.skipif(not PAGE_ROW_LIMITS, reason="当前 pyarrow 不支持 max_rows_per_page")
+def test_selective_filter_reads_fewer_bytes(users_table, tmp_path):
+    """测试大行组上的选择性查询只读取少量数据页"""
+    filename = str(tmp_path / 'users.parquet')
+    pq.write_table(users_table, filename, row_group_size=users_table.num_rows, use_dictionary=['City'],
+                   **page_index_write_options(500))
+    index = PageIndex(filename)
+    stats_index = RowGroupIndex.build(filename)
+
+    table, plan = index.read([('UserID', '==', 12345)], stats_index=stats_index)
+    assert table.num_rows == 1
+    assert plan['read_row_groups'] == 1
+    assert plan['read_rows'] == 500
+    assert plan['read_bytes'] * 10 < plan['row_group_bytes']
+
+    _, full_plan = index.read([('Age', '>', 0)], stats_index=stats_index)
+    assert full_plan['read_pages'] == full_plan['total_pages']
+    assert full_plan['read_bytes'] == full_plan['row_group_bytes']
+
+
+def test_file_without_page_index(users_table, tmp_path):
+    """测试没有页索引的文件退化为行组级读取"""
+    filename = str(tmp_path / 'plain.parquet')
+    pq.write_table(users_table, filename, row_group_size=5000, write_page_index=False)
+    filters = [('UserID', '<', 700)]
+
+    index = PageIndex(filename)
+    assert index.num_pages == 0
+    table, plan = index.read(filters)
+    assert table.equals(pq.read_table(filename, filters=filters))
+    assert plan['read_row_groups'] == 1
+    assert plan['read_bytes'] == plan['row_group_bytes']
@@ -0,0 +1,91 @@
+"""
+pandas 转换配置测试
+"""
+
+import pytest
+import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator, ParquetQueryOptimizationExercise, QueryResultCache
+from parquet_practice.pandas_conversion import (PANDAS_PROFILES, read_pandas, table_to_pandas, resolve_profile,
+                                                dictionary_columns)
+
+from . import TEST_SEED
+
+
+@pytest.fixture(scope='module')
+def users_table():
+    return DataGenerator(seed=TEST_SEED).generate_user_table(2000)
+
+
+@pytest.fixture(scope='module')
+def users_file(tmp_path_factory, users_table):
+    filename = str(tmp_path_factory.mktemp('pandas_conversion') / 'users.parquet')
+    pq.write_table(users_table, filename, row_group_size=500)
+    return filename
+
+
+@pytest.mark.parametrize('profile', list(PANDAS_PROFILES))
+def test_profiles_preserve_values(users_file, users_table, profile):
+    """测试所有转换配置得到的值与默认转换一致"""
+    filters = [('Age', '>', 40)]
+    expected = users_table.filter(pc.field('Age') > 40).to_pandas()
+    df = read_pandas(users_file, columns=None, filters=filters, profile=profile)
+
+    assert list(df.columns) == list(expected.columns)
+    for column in expected.columns:
+        assert df[column].astype(object).tolist() == expected[column].astype(object).tolist()
+
+
+def test_profile_dtypes(users_file):
+    df = read_pandas(users_file, ['Username', 'City'], profile='dictionary')
+    assert isinstance(df['City'].dtype, pd.CategoricalDtype)
+    # 近乎唯一的列不以字典编码读取
+    assert not isinstance(df['Username'].dtype, pd.CategoricalDtype)
+    assert dictionary_columns(users_file) == ['City']
+    assert dictionary_columns(users_file, ['UserID', 'Age']) == []
+    assert isinstance(read_pandas(users_file, ['City'], profile='strings_to_categorical')['City'].dtype,
+                      pd.CategoricalDtype)
+    df = read_pandas(users_file, ['UserID', 'City'], profile='arrow_dtype')
+    assert all(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes)
+    # 自定义参数字典
+    df = read_pandas(users_file, ['Age'], profile={'split_blocks': True, 'use_threads': False})
+    assert df['Age'].dtype == 'int64'
+
+
+def test_shared_table_survives_self_destruct(users_table):
+    """测试未声明独占的表不会被 self_destruct 释放"""
+    df = table_to_pandas(users_table, 'low_memory')
+    assert len(df) == 2000
+    assert users_table.num_rows == 2000
+    assert users_table.column('UserID').to_pylist()[:3] == [1, 2, 3]
+
+
+def test_query_pandas_with_result_cache(tmp_path, users_table):
+    """测试缓存的查询结果在按 self_destruct 配置转换后仍可命中和使用"""
+    exercise = ParquetQueryOptimizationExercise(users_table, str(tmp_path), result_cache=QueryResultCache(),
+                                                pandas_profile='self_destruct')
+    first = exercise.query_pandas(['UserID', 'Age'], [('Age', '>', 60)])
+    second = exercise.query_pandas(['UserID', 'Age'], [('Age', '>', 60)])
+    pd.testing.assert_frame_equal(first, second)
+    assert exercise.result_cache.stats()['hits'] == 1
+
+    exercise = ParquetQueryOptimizationExercise(users_table, str(tmp_path / 'plain'), pandas_profile='dictionary')
+    df = exercise.query_pandas(['City'], [('Age', '>', 60)])
+    assert isinstance(df['City'].dtype, pd.CategoricalDtype)
+    assert len(df) == len(first)
+
+
+def test_invalid_profiles():
+    assert resolve_profile(None) == {}
+    with pytest.raises(ValueError):
+        resolve_profile('zero_copy')
+    with pytest.raises(ValueError):
+        resolve_profile({'categories': ['City']})
@@ -0,0 +1,58 @@
+"""
+分区裁剪测试
+"""
+
+import pytest
+import pyarrow.dataset as ds
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator
+from parquet_practice.partitioning_exercise import ParquetPartitioningExercise
+
+from . import TEST_SEED
+
+
+@pytest.fixture(scope='module')
+def exercise(tmp_path_factory):
+    df = DataGenerator(seed=TEST_SEED).generate_user_data(5000)
+    exercise = ParquetPartitioningExercise(df, str(tmp_path_factory.mktemp('partitioning')))
+    exercise.performance_analyzer.record_history = False
+    exercise.create_non_partitioned_table()
+    exercise.create_partitioned_table()
+    return exercise
+
+
+def test_partition_pruning_opens_one_fragment(exercise):
+    """测试单城市查询只打开一个分区文件，结果与非分区表一致"""
+    result = exercise.test_partition_pruning('Beijing')
+    assert result['data_consistent']
+    assert result['result_rows'] == (exercise.df['City'] == 'Beijing').sum()
+    assert result['fragments_opened'] == 1
+    assert result['total_fragments'] == exercise.df['City'].nunique()
+
+
+def test_multi_partition_query(exercise):
+    cities = ['Beijing', 'Shanghai', 'Chengdu']
+    result = exercise.test_multi_partition_query(cities, columns=['UserID', 'City'])
+    assert result['rows'] == exercise.df['City'].isin(cities).sum()
+    assert result['fragments_opened'] == 3
+
+
+def test_query_with_projection(exercise):
+    """测试列投影不包含分区列时仍按分区裁剪"""
+    table = exercise._query_partitioned(ds.field('City') == 'Wuhan', columns=['UserID'])
+    assert table.column_names == ['UserID']
+    assert len(table) == (exercise.df['City'] == 'Wuhan').sum()
+
+
+def test_nested_partitioning(exercise):
+    result = exercise.test_nested_partitioning(city='Shanghai', age_group='Young')
+    expected = ((exercise.df['City'] == 'Shanghai') & (exercise.df['Age'] <= 30)).sum()
+    assert result['result_rows'] == expected
+    assert result['fragments_opened'] == 1
+    assert result['total_fragments'] == result['nested_info']['leaf_partitions']
@@ -0,0 +1,111 @@
+"""
+读取模式测试
+"""
+
+import os
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator, ParquetBasicExercise, ParquetQueryOptimizationExercise, ParquetAdvancedExercise
+from parquet_practice.read_modes import READ_MODES, read_table, ensure_hot_tier, hot_tier_path, read_hot_tier
+from parquet_practice.pandas_conversion import read_pandas
+from parquet_practice.filter_compiler import compile_filters
+
+from . import TEST_SEED
+
+
+@pytest.fixture
+def users_file(tmp_path):
+    table = DataGenerator(seed=TEST_SEED).generate_user_table(3000)
+    filename = str(tmp_path / 'users.parquet')
+    pq.write_table(table, filename, row_group_size=1000)
+    return filename
+
+
+@pytest.mark.parametrize('mode', READ_MODES)
+@pytest.mark.parametrize('columns, filters', [
+    (None, None),
+    (['UserID', 'City'], None),
+    (['UserID', 'Username'], [('Age', '>', 30), ('City', 'in', ['Beijing', 'Shanghai'])]),
+    (None, [[('Age', '<', 20)], [('Income', 'between', (50000, 60000))]]),
+])
+def test_modes_match_read_table(users_file, mode, columns, filters):
+    """测试所有读取模式的结果与 pq.read_table 一致"""
+    expected = pq.read_table(users_file, columns=columns, filters=compile_filters(filters))
+    assert read_table(users_file, columns, filters, mode=mode).equals(expected)
+
+
+def test_hot_tier_is_zero_copy(users_file):
+    """测试热数据层是未压缩的 IPC 文件，读取时不分配 Arrow 内存"""
+    path = ensure_hot_tier(users_file)
+    assert path == hot_tier_path(users_file)
+    assert os.path.basename(path).startswith('_')
+
+    with pa.memory_map(path, 'r') as source:
+        assert pa.ipc.open_file(source).schema == pq.read_schema(users_file)
+
+    read_hot_tier(path)
+    allocated = pa.total_allocated_bytes()
+    table = read_hot_tier(path, columns=['UserID', 'Income'])
+    assert pa.total_allocated_bytes() == allocated
+    assert table.num_rows == 3000
+
+
+def test_hot_tier_refreshed_after_rewrite(users_file):
+    path = ensure_hot_tier(users_file)
+    mtime = os.stat(path).st_mtime_ns
+    assert ensure_hot_tier(users_file) == path
+    assert os.stat(path).st_mtime_ns == mtime
+
+    pq.write_table(pa.table({'x': [1, 2, 3]}), users_file)
+    assert read_table(users_file, mode='ipc').column_names == ['x']
+
+
+def test_exercises_use_read_mode(tmp_path, users_file):
+    """测试练习类按 read_mode 读取，清理时删除热数据层"""
+    table = pq.read_table(users_file)
+    exercise = ParquetQueryOptimizationExercise(table, str(tmp_path / 'query'), read_mode='ipc')
+    result = exercise._read_table(columns=['UserID', 'Age'], filters=[('Age', '>', 50)])
+    assert result.equals(pq.read_table(exercise.filename, columns=['UserID', 'Age'], filters=[('Age', '>', 50)]))
+    assert os.path.exists(hot_tier_path(exercise.filename))
+    df = exercise.query_pandas(['City'], [('Age', '>', 50)])
+    assert len(df) == result.num_rows
+    exercise.cleanup()
+    assert not os.path.exists(hot_tier_path(exercise.filename))
+
+    advanced = ParquetAdvancedExercise(str(tmp_path / 'advanced'), read_mode='mmap')
+    assert advanced._read_table(users_file, columns=['Age']).equals(pq.read_table(users_file, columns=['Age']))
+    assert read_pandas(users_file, ['City'], profile='dictionary', mode='ipc')['City'].dtype != 'category'
+
+
+def test_invalid_mode(tmp_path, users_file):
+    with pytest.raises(ValueError):
+        read_table(users_file, mode='direct')
+    with pytest.raises(ValueError):
+        ParquetAdvancedExercise(str(tmp_path), read_mode='direct')
+
+
+@pytest.mark.parametrize('mode', READ_MODES)
+def test_cold_read_evicts_file_actually_read(tmp_path, monkeypatch, mode):
+    """测试冷缓存测量清除实际被读取的文件（ipc 模式下为热数据层）的页缓存"""
+    import parquet_practice.utils as utils
+    evicted = []
+    monkeypatch.setattr(utils, 'evict_file_cache', lambda paths: evicted.append(paths) or True)
+
+    exercise = ParquetBasicExercise(num_records=1000, output_dir=str(tmp_path), track_memory=False,
+                                    cache_mode='cold', read_mode=mode)
+    exercise.performance_analyzer.record_history = False
+    exercise.generate_sample_data()
+    exercise.save_to_parquet()
+    filename = str(tmp_path / 'sample_data.parquet')
+    exercise.read_from_parquet(filename)
+
+    expected = hot_tier_path(filename) if mode == 'ipc' else filename
+    assert evicted and set(evicted) == {expected}
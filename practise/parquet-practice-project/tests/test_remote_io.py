@@ -0,0 +1,129 @@
+"""
+模拟远程存储与读取设置测试
+"""
+
+import time
+import pytest
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import (DataGenerator, PerformanceAnalyzer, ParquetQueryOptimizationExercise,
+                              ParquetPartitioningExercise)
+from parquet_practice.remote_io import (latency_filesystem, read_table, parquet_format, compare_io_settings,
+                                        IO_SETTINGS)
+from parquet_practice.filter_compiler import compile_filters
+
+from . import TEST_SEED
+
+
+@pytest.fixture(scope='module')
+def users_table():
+    return DataGenerator(seed=TEST_SEED).generate_user_table(20000)
+
+
+@pytest.fixture(scope='module')
+def users_file(tmp_path_factory, users_table):
+    filename = str(tmp_path_factory.mktemp('remote_io') / 'users.parquet')
+    pq.write_table(users_table, filename, row_group_size=2000)
+    return filename
+
+
+@pytest.mark.parametrize('name', list(IO_SETTINGS))
+def test_settings_match_read_table(users_file, name):
+    """测试各读取设置在模拟远程存储上的结果与本地 pq.read_table 一致"""
+    columns = ['UserID', 'Age', 'City']
+    filters = [('Age', '>', 40), ('City', 'in', ['Beijing', 'Wuhan'])]
+    expected = pq.read_table(users_file, columns=columns, filters=compile_filters(filters))
+    filesystem = latency_filesystem(latency=0, bandwidth=None)
+    assert read_table(users_file, columns, filters, filesystem=filesystem, **IO_SETTINGS[name]).equals(expected)
+    assert filesystem.handler.stats()['read_requests'] > 0
+
+
+def test_request_accounting(users_file):
+    """测试请求计数、读取字节数和注入的延迟"""
+    filesystem = latency_filesystem(latency=0.002, bandwidth=None)
+    start_time = time.perf_counter()
+    read_table(users_file, ['UserID'], filesystem=filesystem, pre_buffer=False)
+    elapsed = time.perf_counter() - start_time
+    stats = filesystem.handler.stats()
+
+    assert stats['requests'] == (stats['read_requests'] + stats['open_requests'] +
+                                 stats['info_requests'] + stats['list_requests'])
+    assert stats['simulated_seconds'] == pytest.approx(0.002 * stats['requests'])
+    assert elapsed >= stats['simulated_seconds']
+    assert 0 < stats['bytes_read'] <= Path(users_file).stat().st_size
+
+    filesystem.handler.reset_stats()
+    assert filesystem.handler.stats()['requests'] == 0
+
+
+def test_coalescing_reduces_requests(users_file):
+    """测试 pre_buffer 和放宽范围合并减少读取请求"""
+    counts = {}
+    for name, io_options in IO_SETTINGS.items():
+        filesystem = latency_filesystem(latency=0, bandwidth=None)
+        read_table(users_file, ['UserID', 'Username', 'City'], filesystem=filesystem, **io_options)
+        counts[name] = filesystem.handler.stats()['read_requests']
+    assert counts['pre_buffer'] < counts['no_pre_buffer']
+    assert counts['wide_coalescing'] <= counts['pre_buffer']
+
+
+def test_buffered_stream_splits_reads(tmp_path, users_table):
+    """测试缓冲流在数据页大于缓冲区时分多次请求"""
+    filename = str(tmp_path / 'pages.parquet')
+    pq.write_table(users_table, filename, data_page_size=8192)
+    counts = {}
+    for buffer_size in (None, 8192):
+        filesystem = latency_filesystem(latency=0, bandwidth=None)
+        table = read_table(filename, ['UserID', 'Username'], filesystem=filesystem, pre_buffer=False,
+                           buffer_size=buffer_size)
+        assert table.equals(pq.read_table(filename, columns=['UserID', 'Username']))
+        counts[buffer_size] = filesystem.handler.stats()['read_requests']
+    assert counts[8192] > counts[None]
+
+
+def test_bandwidth_delay(users_file):
+    filesystem = latency_filesystem(latency=0, bandwidth=1024 * 1024)
+    read_table(users_file, filesystem=filesystem)
+    stats = filesystem.handler.stats()
+    assert stats['simulated_seconds'] == pytest.approx(stats['bytes_read'] / (1024 * 1024))
+
+
+def test_compare_io_settings(users_file):
+    analyzer = PerformanceAnalyzer(warmup=0, repeat=1, record_history=False)
+    settings = {'pre_buffer': IO_SETTINGS['pre_buffer'], 'no_pre_buffer': IO_SETTINGS['no_pre_buffer']}
+    results = compare_io_settings(
+        lambda filesystem, io_options: read_table(users_file, ['Age', 'City'], filesystem=filesystem, **io_options),
+        analyzer, settings, latency=0.001, bandwidth=None
+    )
+    assert set(results) == set(settings)
+    assert results['pre_buffer']['rows'] == 20000
+    assert results['pre_buffer']['requests'] < results['no_pre_buffer']['requests']
+
+
+def test_exercises_read_through_filesystem(tmp_path, users_table):
+    """测试练习类的查询经过指定的文件系统和读取设置"""
+    filesystem = latency_filesystem(latency=0, bandwidth=None)
+    exercise = ParquetQueryOptimizationExercise(users_table, str(tmp_path / 'query'), filesystem=filesystem,
+                                                io_options={'pre_buffer': False})
+    result = exercise._read_table(columns=['UserID'], filters=[('Age', '<', 30)])
+    assert result.num_rows == pq.read_table(exercise.filename, filters=[('Age', '<', 30)]).num_rows
+    assert filesystem.handler.stats()['read_requests'] > 0
+
+    filesystem.handler.reset_stats()
+    partitioning = ParquetPartitioningExercise(users_table, str(tmp_path / 'partitioning'), filesystem=filesystem)
+    partitioning.create_partitioned_table()
+    table = partitioning._query_partitioned(ds.field('City') == 'Beijing', columns=['UserID'])
+    assert table.num_rows == users_table.filter(ds.field('City') == 'Beijing').num_rows
+    stats = filesystem.handler.stats()
+    assert stats['list_requests'] >= 1 and stats['open_requests'] >= 1
+
+    with pytest.raises(ValueError):
+        ParquetPartitioningExercise(users_table, str(tmp_path), io_options={'prefetch': 2})
+    assert isinstance(parquet_format(buffer_size=4096, hole_size_limit=1024), ds.ParquetFileFormat)
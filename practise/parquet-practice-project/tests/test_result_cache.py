@@ -0,0 +1,150 @@
+"""
+查询结果缓存测试
+"""
+
+import time
+import pytest
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import QueryResultCache
+from parquet_practice.result_cache import canonicalize_filters
+
+
+@pytest.mark.parametrize('first, second', [
+    ([('Age', '>', 30), ('City', 'in', ['Beijing', 'Shanghai'])],
+     [('City', 'in', ['Shanghai', 'Beijing', 'Beijing']), ('Age', '>', 30)]),
+    ([('City', '=', 'Wuhan')], [[('City', '==', 'Wuhan')]]),
+    ([[('Age', '<', 20)], [('Age', '>', 70)]], [[('Age', '>', 70)], [('Age', '<', 20), ('Age', '<', 20)]]),
+    ([('Age', '>', 30)], [('Age', '>', np.int64(30))]),
+    ([('Income', 'is null', None)], [('Income', 'IS NULL', 0)]),
+    ([('Age', 'between', (20, 30))], [('Age', 'between', [20, 30])]),
+    ([('City', 'in', ['Beijing', 'Wuhan'])], [('City', 'in', np.array(['Wuhan', 'Beijing']))]),
+    ([('Age', 'not in', [20, 30])], [('Age', 'not in', np.array([30, 20, 30]))]),
+    ([('Age', 'in', [20])], [('Age', 'in', pa.array([20]))]),
+])
+def test_equivalent_filters(first, second):
+    """测试等价的过滤条件得到相同的规范形式"""
+    assert canonicalize_filters(first) == canonicalize_filters(second)
+    hash(canonicalize_filters(first))
+
+
+def test_distinct_filters():
+    assert canonicalize_filters(None) == canonicalize_filters([]) == ()
+    assert canonicalize_filters([('Age', '>', 30)]) != canonicalize_filters([('Age', '>=', 30)])
+    # between 的上下界有顺序，不能像 IN 列表一样排序
+    assert canonicalize_filters([('Age', 'between', (30, 20))]) != canonicalize_filters([('Age', 'between', (20, 30))])
+    assert canonicalize_filters([[('Age', '>', 30), ('Age', '<', 50)]]) != \
+        canonicalize_filters([[('Age', '>', 30)], [('Age', '<', 50)]])
+
+
+@pytest.mark.parametrize('columns, filters', [
+    (None, None),
+    (['UserID', 'Username', 'Age', 'City'], [('Age', '>', 30), ('City', 'in', ['Beijing', 'Shanghai'])]),
+    (['UserID'], [('UserID', '>', 10 ** 9)]),
+    (['UserID', 'City'], [('City', 'in', np.array(['Beijing', 'Wuhan']))]),
+])
+def test_read_matches_pyarrow(users_file, columns, filters):
+    """测试缓存结果与 pq.read_table 一致，重复查询命中缓存"""
+    cache = QueryResultCache()
+    expected = pq.read_table(users_file, columns=columns, filters=filters)
+    first = cache.read_table(users_file, columns=columns, filters=filters)
+    second = cache.read_table(users_file, columns=columns, filters=filters)
+    assert first.equals(expected)
+    assert second is first
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    assert stats['saved_seconds'] > 0
+
+
+def test_columns_are_part_of_key(users_file):
+    cache = QueryResultCache()
+    filters = [('Age', '>', 60)]
+    assert cache.read_table(users_file, ['UserID', 'Age'], filters).column_names == ['UserID', 'Age']
+    assert cache.read_table(users_file, ['Age', 'UserID'], filters).column_names == ['Age', 'UserID']
+    assert cache.stats()['misses'] == 2
+
+
+def test_custom_reader(users_file):
+    calls = []
+
+    def reader(path, columns=None, filters=None):
+        calls.append(path)
+        return pq.read_table(path, columns=columns, filters=filters)
+
+    cache = QueryResultCache()
+    for _ in range(3):
+        cache.read_table(users_file, ['Age'], [('Age', '>', 60)], reader=reader)
+    assert calls == [users_file]
+
+
+def test_invalidation_on_file_change(tmp_path):
+    """测试文件改写后版本变化，旧结果不再命中"""
+    filename = str(tmp_path / 'data.parquet')
+    pq.write_table(pa.table({'x': [1, 2, 3]}), filename)
+    cache = QueryResultCache()
+    assert cache.read_table(filename, filters=[('x', '>', 1)]).num_rows == 2
+
+    pq.write_table(pa.table({'x': list(range(10))}), filename)
+    assert cache.read_table(filename, filters=[('x', '>', 1)]).num_rows == 8
+    stats = cache.stats()
+    assert stats['misses'] == 2
+    # 旧版本的结果在缓存新结果时移除
+    assert stats['entries'] == 1 and stats['invalidations'] == 1
+
+    cache.read_table(filename, columns=['x'])
+    cache.invalidate(filename)
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['invalidations'] == 3
+
+
+def test_ttl_expiration(tmp_path):
+    filename = str(tmp_path / 'data.parquet')
+    pq.write_table(pa.table({'x': [1, 2, 3]}), filename)
+    cache = QueryResultCache(ttl=0.05)
+    cache.read_table(filename)
+    cache.read_table(filename)
+    time.sleep(0.1)
+    cache.read_table(filename)
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 2
+    assert stats['expirations'] == 1
+    assert stats['entries'] == 1
+
+
+def test_byte_budget_eviction(tmp_path):
+    """测试超出内存预算时淘汰最久未使用的结果"""
+    filename = str(tmp_path / 'data.parquet')
+    pq.write_table(pa.table({'x': list(range(1000))}), filename)
+    result_bytes = pq.read_table(filename, filters=[('x', '<', 100)]).nbytes
+
+    cache = QueryResultCache(max_bytes=int(result_bytes * 2.5))
+    for bound in (100, 101, 100, 102):
+        cache.read_table(filename, filters=[('x', '<', bound)])
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['evictions'] == 1
+    assert stats['bytes'] <= stats['max_bytes']
+
+    # x < 101 最久未使用，已被淘汰
+    cache.read_table(filename, filters=[('x', '<', 100)])
+    cache.read_table(filename, filters=[('x', '<', 101)])
+    assert cache.stats()['misses'] == 4
+
+    # 单个超过预算的结果不缓存
+    tiny = QueryResultCache(max_bytes=1)
+    assert tiny.read_table(filename).num_rows == 1000
+    assert tiny.stats()['entries'] == 0
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        QueryResultCache(max_bytes=0)
+    with pytest.raises(ValueError):
+        QueryResultCache(ttl=0)
@@ -0,0 +1,112 @@
+"""
+基准结果存储测试
+"""
+
+import json
+import pytest
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import BenchmarkResultStore, PerformanceAnalyzer
+from parquet_practice.results_store import extract_metrics, welch_test, HISTORY_FILENAME
+
+ENVIRONMENT = {
+    'git': {'sha': 'abc123', 'dirty': False},
+    'host': {'fingerprint': 'host-a'},
+    'versions': {'pyarrow': '26.0.0'}
+}
+
+
+def make_stats(samples):
+    """构造与 measure_stats 相同结构的统计信息"""
+    return PerformanceAnalyzer.compute_stats(samples)
+
+
+class TestMetricExtraction:
+    """统计信息提取测试"""
+
+    def test_nested_and_list_paths(self):
+        results = {
+            'Parquet': {'read_time': 0.1, 'read_time_stats': make_stats([0.1, 0.2])},
+            'read_stats': [make_stats([0.3]), make_stats([0.4])],
+            'file_size': 1.5
+        }
+        metrics = extract_metrics(results)
+        assert set(metrics) == {'Parquet.read_time_stats', 'read_stats[0]', 'read_stats[1]'}
+        assert metrics['read_stats[1]']['samples'] == [0.4]
+        assert 'p95' not in metrics['Parquet.read_time_stats']
+
+
+class TestWelchTest:
+    """Welch t 检验测试"""
+
+    def test_significant_difference(self):
+        assert welch_test([1.0, 1.01, 0.99, 1.0], [2.0, 2.02, 1.98, 2.0])['significant']
+
+    def test_overlapping_samples(self):
+        assert not welch_test([1.0, 1.5, 0.5, 1.2], [1.1, 1.4, 0.6, 1.0])['significant']
+
+    def test_too_few_samples(self):
+        assert welch_test([1.0], [2.0, 2.1])['significant'] is None
+
+
+class TestBenchmarkResultStore:
+    """结果存储与回退检测测试"""
+
+    def test_append_and_load(self, tmp_path):
+        store = BenchmarkResultStore(str(tmp_path / 'history.jsonl'))
+        assert store.append({'size': 1}, 'suite', ENVIRONMENT) is None
+
+        record = store.append({'t': make_stats([0.1, 0.2])}, 'suite', ENVIRONMENT)
+        store.append({'t': make_stats([0.1, 0.2])}, 'other', ENVIRONMENT)
+        # 中断写入留下的不完整行被跳过
+        with open(store.path, 'a') as f:
+            f.write('{"run_id": ')
+
+        assert [r['run_id'] for r in store.load('suite')] == [record['run_id']]
+        assert store.suites() == ['suite', 'other']
+        assert store.find_run('abc1', 'suite')['run_id'] == record['run_id']
+
+    def test_compare_flags_regression(self, tmp_path):
+        store = BenchmarkResultStore(str(tmp_path / 'history.jsonl'))
+        store.append({'fast': make_stats([1.0, 1.01, 0.99, 1.0]),
+                      'noisy': make_stats([1.0, 1.5, 0.5, 1.2])}, 'suite', ENVIRONMENT)
+        upgraded = dict(ENVIRONMENT, versions={'pyarrow': '27.0.0'})
+        store.append({'fast': make_stats([1.5, 1.51, 1.49, 1.5]),
+                      'noisy': make_stats([1.1, 1.4, 0.6, 1.3])}, 'suite', upgraded)
+
+        report = store.compare('suite')
+        statuses = {m['metric']: m['status'] for m in report['metrics']}
+        assert statuses == {'fast': 'regression', 'noisy': 'unchanged'}
+        assert report['regressions'][0]['change'] == pytest.approx(0.5)
+        assert report['environment_changes'] == {'versions.pyarrow': ('26.0.0', '27.0.0')}
+
+        # 指定基线为较新的运行时，对比结果反向为提升
+        reverse = store.compare('suite', baseline=report['candidate'], candidate=report['baseline'])
+        assert {m['metric']: m['status'] for m in reverse['metrics']}['fast'] == 'improvement'
+
+    def test_compare_needs_two_runs(self, tmp_path):
+        store = BenchmarkResultStore(str(tmp_path / 'history.jsonl'))
+        store.append({'t': make_stats([0.1, 0.2])}, 'suite', ENVIRONMENT)
+        assert store.compare('suite') is None
+
+    def test_save_results_appends_history(self, tmp_path):
+        analyzer = PerformanceAnalyzer(warmup=0, repeat=2)
+        _, stats = analyzer.measure_stats(sum, range(100))
+        results_file = tmp_path / 'basic_exercise_results.json'
+        analyzer.save_results({'Parquet': {'read_time_stats': stats}}, str(results_file))
+        analyzer.save_results({'Parquet': {'read_time_stats': stats}}, str(results_file))
+
+        records = BenchmarkResultStore(str(tmp_path / HISTORY_FILENAME)).load()
+        assert len(records) == 2
+        assert records[0]['suite'] == 'basic_exercise_results'
+        assert set(records[0]['versions']) >= {'pyarrow', 'pandas', 'numpy'}
+        assert records[0]['host']['fingerprint']
+        assert json.loads(results_file.read_text())['Parquet']['read_time_stats']['repeat'] == 2
+
+        PerformanceAnalyzer(record_history=False).save_results({'t': stats}, str(results_file))
+        assert len(BenchmarkResultStore(str(tmp_path / HISTORY_FILENAME)).load()) == 2
@@ -0,0 +1,121 @@
+"""
+行组统计索引测试
+"""
+
+import os
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator, RowGroupIndex, PageIndex, ColumnChunkCache, DatasetManifest
+from parquet_practice.filter_compiler import compile_filters
+
+from . import TEST_SEED
+
+
+@pytest.fixture
+def user_file(tmp_path):
+    """按 UserID 递增写入的用户数据文件，每 1000 行一个行组"""
+    df = DataGenerator(seed=TEST_SEED).generate_user_data(10000)
+    filename = str(tmp_path / 'users.parquet')
+    pq.write_table(pa.Table.from_pandas(df), filename, row_group_size=1000)
+    return filename
+
+
+class TestRowGroupIndex:
+    """行组索引测试"""
+
+    @pytest.mark.parametrize('filters', [
+        [('UserID', '<=', 2500)],
+        [('UserID', '>', 9500), ('Age', '>=', 30)],
+        [('UserID', 'in', [5, 7777])],
+        [[('UserID', '<', 100)], [('UserID', '==', 9999)]],
+        [('Age', '>', 50)],
+        [('City', 'in', ['Beijing', 'Shanghai'])],
+        [('RegisterTime', '>', datetime(2100, 1, 1))],
+        [('UserID', 'not in', [1, 2])],
+        [('UserID', '!=', 3)],
+    ])
+    def test_read_matches_pyarrow_filter(self, user_file, filters):
+        """测试剪枝后的结果与 pyarrow 过滤完全一致"""
+        index = RowGroupIndex.build(user_file)
+        table, plan = index.read(filters, columns=['UserID', 'Income'])
+        expected = pq.read_table(user_file, columns=['UserID', 'Income'], filters=filters)
+
+        assert table.column_names == ['UserID', 'Income']
+        assert table.equals(expected)
+        assert plan['read_row_groups'] + plan['skipped_row_groups'] == 10
+
+    def test_pruning_counts(self, user_file):
+        """测试跳过的行组、行数和字节数"""
+        index = RowGroupIndex.build(user_file)
+
+        plan = index.plan([('UserID', '<=', 2500)], columns=['Age'])
+        assert plan['row_groups'] == [0, 1, 2]
+        assert plan['skipped_rows'] == 7000
+        assert plan['columns'] == ['Age', 'UserID']
+        metadata = pq.ParquetFile(user_file).metadata
+        age_and_id = [j for j in range(metadata.num_columns)
+                      if metadata.row_group(0).column(j).path_in_schema in ('Age', 'UserID')]
+        expected_read = sum(metadata.row_group(i).column(j).total_compressed_size
+                            for i in range(3) for j in age_and_id)
+        assert plan['read_bytes'] == expected_read
+
+        assert index.plan([('RegisterTime', '>', datetime(2100, 1, 1))])['read_row_groups'] == 0
+        assert index.plan([('Age', '>', 50)])['skipped_row_groups'] == 0
+
+    def test_null_and_missing_statistics(self, tmp_path):
+        """测试全 null 行组被排除、缺少统计信息的列不排除行组"""
+        filename = str(tmp_path / 'nulls.parquet')
+        table = pa.table({'x': pa.array([None, None, 1, 2], type=pa.int64()),
+                          'y': [1, 2, 3, 4]})
+        pq.write_table(table, filename, row_group_size=2, write_statistics=['x'])
+
+        index = RowGroupIndex.build(filename)
+        assert index.select_row_groups([('x', '>=', 0)]) == [1]
+        assert index.select_row_groups([('y', '>', 100)]) == [0, 1]
+
+    @pytest.mark.parametrize('filters', [
+        [('c', 'not in', ['a'])],
+        [('c', 'not in', ['a', 'b'])],
+        [('c', '!=', 'a')],
+        [('c', 'in', ['b'])],
+        [('c', 'is null', None)],
+    ])
+    def test_pruning_on_nullable_column(self, tmp_path, filters):
+        """测试含 null 和全 null 的数据块上，各剪枝路径的结果与 pq.read_table 一致（'not in' 保留 null 行）"""
+        table = pa.table({'c': ['a', 'a', None, None, 'b', 'b', 'a', None],
+                          'x': [1, 2, 3, 4, 5, 6, 7, 8]})
+        dataset_dir = tmp_path / 'dataset'
+        dataset_dir.mkdir()
+        filename = str(dataset_dir / 'part-0.parquet')
+        pq.write_table(table, filename, row_group_size=2, write_page_index=True)
+        expected = pq.read_table(filename, filters=compile_filters(filters))
+
+        assert RowGroupIndex.build(filename).read(filters)[0].equals(expected)
+        assert PageIndex(filename).read(filters)[0].equals(expected)
+        assert ColumnChunkCache().read_table(filename, filters=filters).equals(expected)
+        manifest = DatasetManifest.build(str(dataset_dir), [])
+        assert manifest.to_dataset(filters).to_table(filter=compile_filters(filters)).equals(expected)
+
+    def test_sidecar_round_trip_and_staleness(self, user_file):
+        """测试旁路索引的保存、加载和过期检测"""
+        index = RowGroupIndex.build(user_file)
+        path = index.save()
+        assert os.path.basename(path).startswith('_')
+
+        loaded = RowGroupIndex.load(user_file)
+        assert loaded.table.equals(index.table)
+
+        pq.write_table(pa.table({'UserID': [1, 2, 3]}), user_file)
+        assert RowGroupIndex.load(user_file) is None
+        rebuilt = RowGroupIndex.load_or_build(user_file)
+        assert rebuilt.num_row_groups == 1
+        assert RowGroupIndex.load(user_file) is not None
@@ -0,0 +1,78 @@
+"""
+数据集扫描设置测试
+"""
+
+import pytest
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator, ParquetPartitioningExercise
+from parquet_practice.scanner import scan_table, thread_pools, check_scan_options, SCAN_SETTINGS
+
+from . import TEST_SEED
+
+
+@pytest.fixture(scope='module')
+def exercise(tmp_path_factory):
+    table = DataGenerator(seed=TEST_SEED).generate_user_table(5000)
+    exercise = ParquetPartitioningExercise(table, str(tmp_path_factory.mktemp('scanner')),
+                                           scan_options={'fragment_readahead': 2})
+    exercise.performance_analyzer.repeat = 1
+    exercise.performance_analyzer.warmup = 0
+    exercise.performance_analyzer.record_history = False
+    exercise.create_partitioned_table()
+    return exercise
+
+
+@pytest.mark.parametrize('name', list(SCAN_SETTINGS))
+def test_settings_match_to_table(exercise, name):
+    """测试各扫描设置的结果与 dataset.to_table 一致"""
+    dataset = exercise._open_dataset()
+    expression = ds.field('Age') > 40
+    expected = dataset.to_table(columns=['UserID', 'City'], filter=expression)
+    result = scan_table(dataset, ['UserID', 'City'], expression, **SCAN_SETTINGS[name], batch_size=100,
+                        io_thread_count=2, cpu_count=1)
+    assert result.equals(expected)
+
+
+def test_thread_pools_restored():
+    io_threads, cpu_count = pa.io_thread_count(), pa.cpu_count()
+    with thread_pools(io_thread_count=3, cpu_count=2):
+        assert (pa.io_thread_count(), pa.cpu_count()) == (3, 2)
+    assert (pa.io_thread_count(), pa.cpu_count()) == (io_threads, cpu_count)
+
+    with pytest.raises(RuntimeError):
+        with thread_pools(cpu_count=5):
+            raise RuntimeError
+    assert pa.cpu_count() == cpu_count
+
+
+def test_check_scan_options():
+    assert check_scan_options(None) == {}
+    with pytest.raises(ValueError):
+        check_scan_options({'readahead': 4})
+    with pytest.raises(ValueError):
+        check_scan_options({'cpu_count': 0})
+    with pytest.raises(ValueError):
+        ParquetPartitioningExercise(pa.table({'City': ['Beijing']}), scan_options={'threads': 2})
+
+
+def test_full_scan_and_scaling(exercise):
+    """测试全表扫描经过扫描设置，扩展性测试覆盖每个设置和线程数"""
+    assert exercise.test_full_scan()['rows'] == 5000
+    assert exercise._query_partitioned(None, ['UserID']).num_rows == 5000
+
+    result = exercise.test_scan_scaling(cpu_counts=[1, 2], settings={
+        'default': {}, 'no_readahead': {'fragment_readahead': 1, 'batch_readahead': 1}
+    })
+    assert result['rows'] == 5000
+    assert result['cpu_counts'] == [1, 2]
+    for setting in result['settings'].values():
+        assert len(setting['times']) == 2
+        assert setting['speedups'][0] == 1.0
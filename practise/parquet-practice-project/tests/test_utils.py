@@ -0,0 +1,471 @@
+"""
+工具模块测试
+"""
+
+import os
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+import sys
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from parquet_practice import DataGenerator
+
+from . import TEST_DATA_SIZE, TEST_SEED
+
+REFERENCE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+
+class TestUserDataGeneration:
+    """用户数据生成测试"""
+
+    def test_schema(self):
+        """测试列名和数据类型"""
+        df = DataGenerator(seed=TEST_SEED).generate_user_data(TEST_DATA_SIZE)
+
+        assert list(df.columns) == ['UserID', 'Username', 'Age', 'City', 'RegisterTime', 'Income']
+        assert df['UserID'].dtype == np.int64
+        assert df['Age'].dtype == np.int64
+        assert df['Income'].dtype == np.float64
+        assert pd.api.types.is_datetime64_any_dtype(df['RegisterTime'])
+        assert pd.api.types.is_string_dtype(df['Username'])
+        assert pd.api.types.is_string_dtype(df['City'])
+
+    def test_values(self):
+        """测试生成值的取值范围"""
+        generator = DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME)
+        df = generator.generate_user_data(TEST_DATA_SIZE)
+
+        assert df['UserID'].tolist() == list(range(1, TEST_DATA_SIZE + 1))
+        assert df['Username'].tolist() == [f'User_{i:06d}' for i in range(1, TEST_DATA_SIZE + 1)]
+        assert df['Age'].between(18, 79).all()
+        assert df['City'].isin(generator.cities).all()
+        age_days = (pd.Timestamp(REFERENCE_TIME) - df['RegisterTime']).dt.days
+        assert age_days.between(0, 364).all()
+
+    def test_username_beyond_padding_width(self):
+        """测试超过 6 位的用户 ID 不被截断"""
+        from parquet_practice.utils import _format_usernames
+
+        names = _format_usernames(np.array([7, 1234567], dtype=np.int64)).to_pylist()
+        assert names == ['User_000007', 'User_1234567']
+
+    def test_user_table_matches_dataframe(self):
+        """测试 Arrow 表与 DataFrame 两种生成结果一致"""
+        table = DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME).generate_user_table(TEST_DATA_SIZE)
+        df = DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME).generate_user_data(TEST_DATA_SIZE)
+
+        assert isinstance(table, pa.Table)
+        assert table.num_rows == TEST_DATA_SIZE
+        pd.testing.assert_frame_equal(table.to_pandas(), df)
+
+    def test_reproducibility_with_reference_time(self):
+        """测试固定种子和基准时间后的可重现性"""
+        df1 = DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME).generate_user_data(TEST_DATA_SIZE)
+        df2 = DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME).generate_user_data(TEST_DATA_SIZE)
+
+        pd.testing.assert_frame_equal(df1, df2)
+
+
+class TestUserBatchStreaming:
+    """用户数据流式生成测试"""
+
+    def test_batch_sizes_and_ids(self):
+        """测试批次划分与 UserID 连续性"""
+        generator = DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME)
+        batches = list(generator.iter_user_batches(25, batch_size=10))
+
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+        user_ids = [uid for batch in batches for uid in batch.column('UserID').to_pylist()]
+        assert user_ids == list(range(1, 26))
+
+    def test_schema(self):
+        """测试批次 Schema"""
+        from parquet_practice.utils import USER_SCHEMA
+
+        generator = DataGenerator(seed=TEST_SEED)
+        batch = next(generator.iter_user_batches(TEST_DATA_SIZE, batch_size=TEST_DATA_SIZE))
+        assert batch.schema.equals(USER_SCHEMA)
+
+    def test_chunk_seeding_is_deterministic(self):
+        """测试每个批次只取决于种子和批次序号"""
+        generator = DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME)
+        batches = list(generator.iter_user_batches(30, batch_size=10))
+        chunk = generator.generate_user_chunk(2, 20, 10)
+
+        assert chunk.equals(batches[2])
+        assert not batches[0].column('Age').equals(batches[1].column('Age'))
+
+    def test_write_user_parquet(self, tmp_path):
+        """测试流式写入 Parquet 文件"""
+        import pyarrow.parquet as pq
+
+        filename = str(tmp_path / 'users.parquet')
+        generator = DataGenerator(seed=TEST_SEED)
+        batches_written = generator.write_user_parquet(filename, 250, batch_size=100)
+
+        assert batches_written == 3
+        assert pq.read_metadata(filename).num_rows == 250
+
+    def test_parallel_shards_independent_of_worker_count(self, tmp_path):
+        """测试并行分片输出与进程数无关，且与单进程数据一致"""
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        generator = DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME)
+        shard_bytes = []
+        for num_workers in (1, 2):
+            files = generator.write_user_parquet_parallel(
+                str(tmp_path / f'workers_{num_workers}'), 250,
+                num_workers=num_workers, rows_per_shard=100, batch_size=50
+            )
+            assert len(files) == 3
+            shard_bytes.append([Path(file).read_bytes() for file in files])
+
+        assert shard_bytes[0] == shard_bytes[1]
+
+        single_file = str(tmp_path / 'single.parquet')
+        generator.write_user_parquet(single_file, 250, batch_size=50)
+        parallel_table = ds.dataset(str(tmp_path / 'workers_2')).to_table()
+        assert parallel_table.equals(pq.read_table(single_file))
+
+    def test_parallel_rejects_misaligned_shards(self, tmp_path):
+        """测试分片行数必须与批次划分对齐"""
+        generator = DataGenerator(seed=TEST_SEED)
+        with pytest.raises(ValueError):
+            generator.write_user_parquet_parallel(str(tmp_path), 100, rows_per_shard=30, batch_size=20)
+
+
+class TestNestedDataGeneration:
+    """嵌套数据生成测试"""
+
+    def test_nested_table_schema(self):
+        """测试嵌套表 Schema"""
+        from parquet_practice.utils import NESTED_SCHEMA
+
+        table = DataGenerator(seed=TEST_SEED).generate_nested_table(TEST_DATA_SIZE)
+        assert table.schema.equals(NESTED_SCHEMA)
+        assert table.num_rows == TEST_DATA_SIZE
+
+    def test_nested_value_ranges(self):
+        """测试嵌套列的元素个数和取值"""
+        import pyarrow.compute as pc
+        from parquet_practice.utils import CONTACT_TYPES, PROVINCES, TAGS
+
+        generator = DataGenerator(seed=TEST_SEED)
+        table = generator.generate_nested_table(TEST_DATA_SIZE)
+
+        contact_counts = pc.list_value_length(table['Contacts']).to_numpy()
+        tag_counts = pc.list_value_length(table['Tags']).to_numpy()
+        assert ((contact_counts >= 1) & (contact_counts <= 3)).all()
+        assert ((tag_counts >= 1) & (tag_counts <= 2)).all()
+
+        contacts = pc.list_flatten(table['Contacts'])
+        assert set(pc.struct_field(contacts, 'type').to_pylist()) <= set(CONTACT_TYPES)
+        assert set(pc.list_flatten(table['Tags']).to_pylist()) <= set(TAGS)
+        assert set(pc.struct_field(table['Address'], 'province').to_pylist()) <= set(PROVINCES)
+        assert set(pc.struct_field(table['Address'], 'city').to_pylist()) <= set(generator.cities[:5])
+
+    def test_nested_dataframe(self):
+        """测试 DataFrame 接口保持不变"""
+        df = DataGenerator(seed=TEST_SEED).generate_nested_data(TEST_DATA_SIZE)
+
+        assert list(df.columns) == ['UserID', 'Username', 'Age', 'Contacts', 'Address', 'Tags']
+        assert isinstance(df['Address'].iloc[0], dict)
+
+
+class TestArrowTableData:
+    """练习数据以 Arrow 表为规范形式的测试"""
+
+    def test_dataframe_converted_lazily(self):
+        """测试只有访问 df 时才转换为 DataFrame"""
+        from parquet_practice.utils import ArrowTableData
+
+        table = DataGenerator(seed=TEST_SEED).generate_user_table(100)
+        holder = ArrowTableData()
+        holder.set_data(table)
+        assert holder.table is table
+        assert holder._df is None
+
+        df = holder.df
+        assert isinstance(df, pd.DataFrame) and len(df) == 100
+        assert holder.df is df
+
+    def test_dataframe_assignment(self):
+        """测试给 df 赋值 DataFrame 时转换为 Arrow 表并保留原 DataFrame"""
+        from parquet_practice.utils import ArrowTableData
+
+        df = DataGenerator(seed=TEST_SEED).generate_user_data(100)
+        holder = ArrowTableData()
+        holder.df = df
+        assert isinstance(holder.table, pa.Table) and holder.table.num_rows == 100
+        assert holder.df is df
+
+        holder.df = None
+        assert holder.table is None and holder.df is None
+
+    def test_exercise_keeps_arrow_table(self, tmp_path):
+        """测试练习类直接使用传入的 Arrow 表，查询结果也是 Arrow 表"""
+        from parquet_practice import ParquetQueryOptimizationExercise
+
+        table = DataGenerator(seed=TEST_SEED).generate_user_table(1000)
+        exercise = ParquetQueryOptimizationExercise(table, str(tmp_path))
+        result = exercise._read_table(columns=['UserID', 'Age'], filters=[('Age', '>', 50)])
+
+        assert exercise.table is table
+        assert isinstance(result, pa.Table)
+        assert result.num_rows == pc.sum(pc.greater(table['Age'], 50)).as_py()
+        assert exercise._df is None
+
+
+class TestRandomGenerators:
+    """独立随机数生成器测试"""
+
+    def test_global_random_state_untouched(self):
+        """测试生成数据不修改全局随机状态"""
+        np.random.seed(0)
+        expected = np.random.random(5)
+
+        np.random.seed(0)
+        DataGenerator(seed=TEST_SEED).generate_user_data(TEST_DATA_SIZE)
+        DataGenerator(seed=TEST_SEED, legacy_random=True).generate_user_data(TEST_DATA_SIZE)
+        np.testing.assert_array_equal(np.random.random(5), expected)
+
+    def test_legacy_random_reproduces_global_seed_stream(self):
+        """测试兼容模式与 np.random.seed 的旧版随机流一致"""
+        np.random.seed(TEST_SEED)
+        expected_ages = np.random.randint(18, 80, TEST_DATA_SIZE)
+        np.random.randint(0, 10, TEST_DATA_SIZE)
+        np.random.randint(0, 365, TEST_DATA_SIZE)
+        expected_incomes = np.random.normal(50000, 20000, TEST_DATA_SIZE).round(2)
+
+        df = DataGenerator(seed=TEST_SEED, legacy_random=True).generate_user_data(TEST_DATA_SIZE)
+        np.testing.assert_array_equal(df['Age'].to_numpy(), expected_ages)
+        np.testing.assert_array_equal(df['Income'].to_numpy(), expected_incomes)
+
+    def test_spawned_children_are_reproducible_and_independent(self):
+        """测试派生子生成器可重现且互不相同"""
+        children_a = DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME).spawn(2)
+        children_b = DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME).spawn(2)
+
+        df_a0 = children_a[0].generate_user_data(TEST_DATA_SIZE)
+        df_a1 = children_a[1].generate_user_data(TEST_DATA_SIZE)
+        pd.testing.assert_frame_equal(df_a0, children_b[0].generate_user_data(TEST_DATA_SIZE))
+        assert not df_a0['Income'].equals(df_a1['Income'])
+
+    def test_concurrent_generation_with_threads(self):
+        """测试多线程各自使用子生成器时结果与串行一致"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def generate(generator):
+            return generator.generate_user_data(TEST_DATA_SIZE)
+
+        serial = [generate(g) for g in DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME).spawn(4)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            concurrent = list(executor.map(
+                generate, DataGenerator(seed=TEST_SEED, reference_time=REFERENCE_TIME).spawn(4)
+            ))
+
+        for expected, actual in zip(serial, concurrent):
+            pd.testing.assert_frame_equal(expected, actual)
+
+    def test_legacy_random_requires_integer_seed(self):
+        """测试兼容模式拒绝 SeedSequence 种子"""
+        with pytest.raises(ValueError):
+            DataGenerator(seed=np.random.SeedSequence(TEST_SEED), legacy_random=True)
+
+
+class TestTimingHarness:
+    """重复计时统计测试"""
+
+    def test_measure_stats_repeat_and_warmup(self):
+        """测试预热和计时次数"""
+        from parquet_practice import PerformanceAnalyzer
+
+        calls = []
+        analyzer = PerformanceAnalyzer(warmup=2, repeat=4)
+        result, stats = analyzer.measure_stats(lambda x: calls.append(x) or x * 2, 21)
+
+        assert result == 42
+        assert len(calls) == 6
+        assert stats['repeat'] == 4
+        assert len(stats['samples']) == 4
+        assert stats['min'] <= stats['median'] <= stats['p95']
+        assert stats['ci_low'] <= stats['mean'] <= stats['ci_high']
+
+    def test_measure_each(self):
+        """测试每个输入计时一次，预热使用前几个输入且不计入结果"""
+        import gc
+        from parquet_practice import PerformanceAnalyzer
+
+        calls = []
+        analyzer = PerformanceAnalyzer(warmup=2, repeat=4)
+        results, stats = analyzer.measure_each(lambda x: calls.append(x) or x * 2, range(5))
+        assert results == [0, 2, 4, 6, 8]
+        assert calls == [0, 1, 0, 1, 2, 3, 4]
+        assert stats['repeat'] == len(stats['samples']) == 5
+
+        calls.clear()
+        results, _ = analyzer.measure_each(lambda x: calls.append(x) or x, [7], warmup=0)
+        assert results == calls == [7]
+        assert gc.isenabled()
+
+        with pytest.raises(ValueError):
+            analyzer.measure_each(abs, [])
+
+    def test_gc_restored_after_measurement(self):
+        """测试计时结束后恢复垃圾回收状态"""
+        import gc
+        from parquet_practice import PerformanceAnalyzer
+
+        def failing():
+            raise RuntimeError("boom")
+
+        analyzer = PerformanceAnalyzer(warmup=0, repeat=2, disable_gc=True)
+        analyzer.measure_stats(sum, range(100))
+        assert gc.isenabled()
+        with pytest.raises(RuntimeError):
+            analyzer.measure_stats(failing)
+        assert gc.isenabled()
+
+    def test_compute_stats(self):
+        """测试统计量计算"""
+        from parquet_practice import PerformanceAnalyzer
+
+        stats = PerformanceAnalyzer.compute_stats([1.0, 2.0, 3.0, 4.0, 5.0])
+        assert stats['median'] == 3.0
+        assert stats['min'] == 1.0
+        assert stats['p95'] == pytest.approx(4.8)
+        assert stats['stddev'] == pytest.approx(np.std([1, 2, 3, 4, 5], ddof=1))
+        # t(0.975, 4) = 2.776
+        assert stats['ci_high'] - stats['mean'] == pytest.approx(2.776 * stats['stddev'] / np.sqrt(5))
+
+        single = PerformanceAnalyzer.compute_stats([0.5])
+        assert single['stddev'] == 0.0 and single['ci_low'] == single['ci_high'] == 0.5
+
+    def test_speedup_handles_zero(self):
+        """测试加速比在耗时为 0 时不除零"""
+        from parquet_practice import PerformanceAnalyzer
+
+        assert PerformanceAnalyzer.speedup(1.0, 0.0) == 0.0
+        assert PerformanceAnalyzer.speedup(2.0, 0.5) == 4.0
+
+
+class TestMemoryProfiling:
+    """内存测量测试"""
+
+    def test_measure_memory_tracks_arrow_and_python(self):
+        """测试 Arrow 内存池和 Python 分配被记录"""
+        from parquet_practice import PerformanceAnalyzer
+
+        analyzer = PerformanceAnalyzer()
+        # pa.array 直接引用 numpy 缓冲区，乘法结果才由 Arrow 内存池分配
+        table, memory = analyzer.measure_memory(
+            lambda: pc.multiply(pa.array(np.arange(2_000_000, dtype=np.int64)), 2))
+        assert len(table) == 2_000_000
+        # 16 MB 的 int64 数组保存在 Arrow 内存池中
+        assert memory['arrow_allocated_mb'] >= 15
+        assert memory['arrow_peak_delta_mb'] >= memory['arrow_allocated_mb'] - 0.01
+        # 中间的 numpy 数组由 tracemalloc 记录
+        assert memory['python_peak_mb'] >= 15
+        assert memory['rss_peak_mb'] >= memory['rss_before_mb']
+
+        import tracemalloc
+        assert not tracemalloc.is_tracing()
+
+    def test_track_memory_in_stats(self):
+        """测试 track_memory 将内存信息附加到统计结果并可保存为 JSON"""
+        import json
+        from parquet_practice import PerformanceAnalyzer
+
+        analyzer = PerformanceAnalyzer(warmup=0, repeat=2, track_memory=True)
+        result, stats = analyzer.measure_stats(sum, range(1000))
+        assert result == sum(range(1000))
+        assert stats['repeat'] == 2
+        assert set(stats['memory']) >= {'rss_peak_delta_mb', 'arrow_peak_delta_mb', 'python_peak_mb'}
+
+        analyzer.compare_performance({'sum': {'time': stats['median'], 'memory': stats['memory']}})
+        json.dumps(stats)
+
+        _, stats = PerformanceAnalyzer(warmup=0, repeat=1).measure_stats(sum, range(10))
+        assert 'memory' not in stats
+
+    @pytest.mark.parametrize('track_memory', [False, True])
+    def test_track_memory_in_exercises(self, tmp_path, track_memory):
+        """测试 track_memory 传递到其他练习的 PerformanceAnalyzer，默认不测量内存"""
+        from parquet_practice import (ParquetCompressionExercise, ParquetQueryOptimizationExercise,
+                                      ParquetPartitioningExercise, ParquetAdvancedExercise)
+
+        table = DataGenerator(seed=TEST_SEED).generate_user_table(500)
+        exercises = [
+            ParquetCompressionExercise(table, str(tmp_path), track_memory=track_memory),
+            ParquetQueryOptimizationExercise(table, str(tmp_path), track_memory=track_memory),
+            ParquetPartitioningExercise(table, str(tmp_path), track_memory=track_memory),
+            ParquetAdvancedExercise(str(tmp_path), track_memory=track_memory),
+        ]
+        assert all(exercise.performance_analyzer.track_memory == track_memory for exercise in exercises)
+
+        compression = exercises[0]
+        compression.performance_analyzer.repeat = 1
+        compression.performance_analyzer.record_history = False
+        result = compression.test_single_compression('snappy')
+        assert ('memory' in result['read_time_stats']) == track_memory
+
+
+class TestPageCacheEviction:
+    """冷缓存读取测试"""
+
+    def test_measure_cache_stats_modes(self, tmp_path):
+        """测试冷/热缓存模式分别返回统计信息"""
+        import pyarrow.parquet as pq
+        from parquet_practice import PerformanceAnalyzer
+
+        filename = str(tmp_path / 'data.parquet')
+        pq.write_table(pa.table({'x': np.arange(1000)}), filename)
+
+        analyzer = PerformanceAnalyzer(warmup=0, repeat=2)
+        table, stats = analyzer.measure_cache_stats(filename, pq.read_table, filename)
+        assert table.num_rows == 1000
+        assert set(stats) == {'cold', 'warm'}
+        assert stats['cold']['repeat'] == 2
+        assert 'page_cache_evicted' in stats['cold']
+
+        _, stats = analyzer.measure_cache_stats(filename, pq.read_table, filename, cache_mode='warm')
+        assert set(stats) == {'warm'}
+
+        with pytest.raises(ValueError):
+            analyzer.measure_cache_stats(filename, pq.read_table, filename, cache_mode='hot')
+
+    @pytest.mark.parametrize('cache_mode', ['warm', 'cold', 'both'])
+    def test_basic_exercise_read_keys(self, tmp_path, cache_mode):
+        """测试基础练习结果中 read_time 只记录热缓存读取，冷缓存读取只记录在 cold_read_time"""
+        from parquet_practice import ParquetBasicExercise
+
+        exercise = ParquetBasicExercise(num_records=500, output_dir=str(tmp_path), track_memory=False,
+                                        cache_mode=cache_mode)
+        exercise.performance_analyzer.repeat = 1
+        exercise.performance_analyzer.record_history = False
+        results = exercise.run_basic_exercise()
+        for name in ('Parquet', 'CSV'):
+            assert ('read_time' in results[name]) == (cache_mode != 'cold')
+            assert ('cold_read_time' in results[name]) == (cache_mode != 'warm')
+        if cache_mode == 'both':
+            assert results['Parquet']['read_time_stats'] is not results['Parquet']['cold_read_time_stats']
+
+    @pytest.mark.skipif(not hasattr(os, 'posix_fadvise'), reason="需要 posix_fadvise")
+    def test_evict_file_cache_directory(self, tmp_path):
+        """测试目录中的文件被逐个清除"""
+        from parquet_practice.utils import evict_file_cache
+
+        (tmp_path / 'part').mkdir()
+        (tmp_path / 'part' / 'a.bin').write_bytes(b'x' * 4096)
+        (tmp_path / 'b.bin').write_bytes(b'y' * 4096)
+        assert evict_file_cache(str(tmp_path)) is True
+        assert evict_file_cache([str(tmp_path / 'b.bin')]) is True